@@ -0,0 +1,140 @@
+"""Bounded async cache with stale-while-revalidate for DB-derived lookups.
+
+Each namespace (tenant stats, segments, invoice payers, trajectories) is an
+AsyncCache with its own TTL. A fresh entry is returned as is. An entry past
+its TTL but within its stale window is still returned, and one background
+refresh per key reloads it, so an expiry never stalls the request that hits
+it. Only a cold or fully expired key waits, and concurrent waiters share
+one load. Entries are evicted least recently used beyond the size bound.
+
+Settings per namespace: ML_CACHE_<NAME>_TTL_SECONDS, _STALE_SECONDS and
+_MAX_ENTRIES override the defaults given where the namespace is created.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_namespaces: dict[str, "AsyncCache"] = {}
+
+
+class AsyncCache(Generic[T]):
+    """One cache namespace."""
+
+    def __init__(self, name: str, *, ttl_seconds: float, stale_seconds: float, max_entries: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[Hashable, tuple[T, float]] = OrderedDict()
+        self._flights = SingleFlight()
+        self._refreshes: set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+        _namespaces[name] = self
+
+    @classmethod
+    def from_env(cls, name: str, *, ttl_seconds: float, stale_seconds: float, max_entries: int) -> "AsyncCache":
+        prefix = f"ML_CACHE_{name.upper()}"
+        return cls(
+            name,
+            ttl_seconds=float(os.environ.get(f"{prefix}_TTL_SECONDS", ttl_seconds)),
+            stale_seconds=float(os.environ.get(f"{prefix}_STALE_SECONDS", stale_seconds)),
+            max_entries=int(os.environ.get(f"{prefix}_MAX_ENTRIES", max_entries)),
+        )
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[T]], *, cache_none: bool = True) -> T:
+        """Cached value for key; `load` produces it on a miss or refresh.
+
+        With cache_none=False a None result is returned but not stored (and a
+        refresh that yields None drops the key), so lookups for rows that do
+        not exist yet are retried instead of pinned for the TTL.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, loaded_at = entry
+            age = time.monotonic() - loaded_at
+            if age < self.ttl_seconds:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            if age < self.ttl_seconds + self.stale_seconds:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._refresh_in_background(key, load, cache_none)
+                return value
+        self.misses += 1
+        return await self._flights.do(key, lambda: self._load(key, load, cache_none))
+
+    async def _load(self, key: Hashable, load: Callable[[], Awaitable[T]], cache_none: bool) -> T:
+        value = await load()
+        if value is None and not cache_none:
+            self.invalidate(key)
+        else:
+            self.put(key, value)
+        return value
+
+    def _refresh_in_background(self, key: Hashable, load: Callable[[], Awaitable[T]], cache_none: bool) -> None:
+        if self._flights.in_flight(key):
+            return
+        task = asyncio.ensure_future(self._flights.do(key, lambda: self._load(key, load, cache_none)))
+        self._refreshes.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self._refreshes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # The stale value stays in place; the next stale hit retries.
+            self.refresh_errors += 1
+            logger.warning("Cache %s refresh failed: %s", self.name, task.exception())
+
+    def put(self, key: Hashable, value: T) -> None:
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        """Drop one key, or every entry when key is None."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refresh_errors": self.refresh_errors,
+            "evictions": self.evictions,
+        }
+
+
+def cache_status() -> dict[str, dict[str, Any]]:
+    """status() of every namespace, for /health."""
+    return {name: cache.status() for name, cache in sorted(_namespaces.items())}
+
+
+def clear_caches() -> None:
+    for cache in _namespaces.values():
+        cache.invalidate()
@@ -1,10 +1,24 @@
-"""Post-hoc calibration: temperature scaling + isotonic regression."""
+"""Post-hoc calibration: temperature scaling + isotonic regression.
+
+Fitted calibrators are plain dicts. Besides the fitted object under "model",
+they carry the arrays needed to apply them to a whole vector at once: the
+temperature for temperature scaling, and the x/y breakpoints of the step
+function for isotonic regression (applied with np.interp).
+
+Fitting is vectorized end to end and works on at most
+ML_CALIBRATION_MAX_SAMPLES pairs; larger histories are reservoir-sampled.
+"""
 
 import math
+import os
+
 import numpy as np
-from scipy.optimize import minimize_scalar
+from scipy.optimize import minimize
+from scipy.special import expit
 from sklearn.isotonic import IsotonicRegression
 
+MAX_CALIBRATION_SAMPLES = int(os.environ.get("ML_CALIBRATION_MAX_SAMPLES", "5000"))
+
 
 def _clamp(p: float, lo: float = 0.001, hi: float = 0.999) -> float:
     return max(lo, min(hi, p))
@@ -22,50 +36,54 @@ def _sigmoid(x: float) -> float:
     return ex / (1.0 + ex)
 
 
+def _logits(predictions) -> np.ndarray:
+    p = np.clip(np.asarray(predictions, dtype=np.float64), 0.001, 0.999)
+    return np.log(p / (1.0 - p))
+
+
 def compute_ece(predictions: list[float], outcomes: list[float], n_bins: int = 10) -> float:
     """Expected Calibration Error. 10-bin histogram.
     ECE = sum(|bin_accuracy - bin_confidence| * bin_count / total)
+        = sum(|sum(outcomes in bin) - sum(predictions in bin)|) / total
     """
     if len(predictions) == 0:
         return 0.0
 
-    preds = np.array(predictions, dtype=np.float64)
-    outs = np.array(outcomes, dtype=np.float64)
+    preds = np.asarray(predictions, dtype=np.float64)
+    outs = np.asarray(outcomes, dtype=np.float64)
     total = len(preds)
 
-    ece = 0.0
-    for i in range(n_bins):
-        lo = i / n_bins
-        hi = (i + 1) / n_bins
-        if i == n_bins - 1:
-            mask = (preds >= lo) & (preds <= hi)
-        else:
-            mask = (preds >= lo) & (preds < hi)
+    # Bins are [i/n, (i+1)/n); the last bin also includes 1.0.
+    in_range = (preds >= 0.0) & (preds <= 1.0)
+    preds, outs = preds[in_range], outs[in_range]
+    bins = np.digitize(preds, np.arange(1, n_bins) / n_bins)
+    pred_sums = np.bincount(bins, weights=preds, minlength=n_bins)
+    outcome_sums = np.bincount(bins, weights=outs, minlength=n_bins)
 
-        count = mask.sum()
-        if count == 0:
-            continue
-        bin_acc = outs[mask].mean()
-        bin_conf = preds[mask].mean()
-        ece += abs(bin_acc - bin_conf) * count / total
-
-    return float(ece)
+    return float(np.abs(outcome_sums - pred_sums).sum() / total)
 
 
 def fit_temperature_scaling(predictions: list[float], outcomes: list[float]) -> float:
     """Learn scalar T that minimizes NLL. Returns T.
     calibrated = sigmoid(logit(raw) / T)
+
+    With z = logit / T the NLL is sum(softplus(z) - y*z), and its gradient
+    with respect to T is sum((sigmoid(z) - y) * -logit / T^2).
     """
-    logits = np.array([_logit(p) for p in predictions])
-    y = np.array(outcomes, dtype=np.float64)
+    logits = _logits(predictions)
+    y = np.asarray(outcomes, dtype=np.float64)
 
-    def nll(T: float) -> float:
-        calibrated = np.array([_sigmoid(l / T) for l in logits])
-        calibrated = np.clip(calibrated, 1e-7, 1.0 - 1e-7)
-        return -np.sum(y * np.log(calibrated) + (1.0 - y) * np.log(1.0 - calibrated))
+    def nll_and_grad(params: np.ndarray) -> tuple[float, np.ndarray]:
+        T = params[0]
+        z = logits / T
+        nll = float(np.sum(np.logaddexp(0.0, z) - y * z))
+        grad = float(np.sum((expit(z) - y) * -logits)) / (T * T)
+        return nll, np.array([grad])
 
-    result = minimize_scalar(nll, bounds=(0.1, 10.0), method="bounded")
-    return float(result.x)
+    result = minimize(
+        nll_and_grad, x0=np.array([1.0]), jac=True, method="L-BFGS-B", bounds=[(0.1, 10.0)],
+    )
+    return float(result.x[0])
 
 
 def apply_temperature(prediction: float, temperature: float) -> float:
@@ -73,6 +91,11 @@ def apply_temperature(prediction: float, temperature: float) -> float:
     return _sigmoid(_logit(prediction) / temperature)
 
 
+def apply_temperature_array(predictions: np.ndarray, temperature: float) -> np.ndarray:
+    """Vectorized apply_temperature over an array of predictions."""
+    return expit(_logits(predictions) / temperature)
+
+
 def fit_isotonic(predictions: list[float], outcomes: list[float]) -> IsotonicRegression:
     """Fit sklearn IsotonicRegression. Returns the fitted model."""
     model = IsotonicRegression(y_min=0, y_max=1, out_of_bounds="clip")
@@ -86,38 +109,85 @@ def apply_isotonic(prediction: float, model: IsotonicRegression) -> float:
     return float(result[0])
 
 
-def fit_best_calibrator(predictions: list[float], outcomes: list[float]) -> dict:
+def isotonic_thresholds(model: IsotonicRegression) -> tuple[np.ndarray, np.ndarray]:
+    """Breakpoints of a fitted isotonic model as contiguous float64 arrays."""
+    return (
+        np.ascontiguousarray(model.X_thresholds_, dtype=np.float64),
+        np.ascontiguousarray(model.y_thresholds_, dtype=np.float64),
+    )
+
+
+def apply_isotonic_array(predictions: np.ndarray, x_thresholds: np.ndarray, y_thresholds: np.ndarray) -> np.ndarray:
+    """Vectorized isotonic calibration. np.interp clamps outside the fitted
+    range, matching out_of_bounds="clip"."""
+    return np.interp(np.asarray(predictions, dtype=np.float64), x_thresholds, y_thresholds)
+
+
+def reservoir_sample(
+    predictions,
+    outcomes,
+    max_samples: int,
+    seed: int = 0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Uniform sample of at most max_samples (prediction, outcome) pairs.
+
+    Equivalent to running reservoir sampling (Algorithm R) over the pairs, but
+    draws the reservoir indices in one call. Input order is preserved.
+    """
+    preds = np.asarray(predictions, dtype=np.float64)
+    outs = np.asarray(outcomes, dtype=np.float64)
+    if max_samples <= 0 or len(preds) <= max_samples:
+        return preds, outs
+    rng = np.random.default_rng(seed)
+    keep = np.sort(rng.choice(len(preds), size=max_samples, replace=False))
+    return preds[keep], outs[keep]
+
+
+def fit_best_calibrator(
+    predictions: list[float],
+    outcomes: list[float],
+    max_samples: int = MAX_CALIBRATION_SAMPLES,
+) -> dict:
     """
     Fit both temperature scaling and isotonic regression.
     Return the one with lower ECE.
 
+    At most max_samples pairs are used for fitting and scoring.
+
     Returns: {
         "method": "temperature" | "isotonic",
         "ece_before": float,
         "ece_after": float,
-        "n_samples": int,
+        "n_samples": int,  # pairs available
+        "n_fit": int,  # pairs used after sampling
         "temperature": float | None,  # only if method is temperature
+        "x_thresholds": np.ndarray,  # only if method is isotonic
+        "y_thresholds": np.ndarray,  # only if method is isotonic
         "model": object  # the fitted calibrator
     }
     """
-    ece_before = compute_ece(predictions, outcomes)
+    n_samples = len(predictions)
+    preds, outs = reservoir_sample(predictions, outcomes, max_samples)
+    ece_before = compute_ece(preds, outs)
 
     # Temperature scaling
-    T = fit_temperature_scaling(predictions, outcomes)
-    temp_calibrated = [apply_temperature(p, T) for p in predictions]
-    ece_temp = compute_ece(temp_calibrated, outcomes)
+    T = fit_temperature_scaling(preds, outs)
+    temp_calibrated = apply_temperature_array(preds, T)
+    ece_temp = compute_ece(temp_calibrated, outs)
 
     # Isotonic regression
-    iso_model = fit_isotonic(predictions, outcomes)
-    iso_calibrated = [apply_isotonic(p, iso_model) for p in predictions]
-    ece_iso = compute_ece(iso_calibrated, outcomes)
+    iso_model = fit_isotonic(preds, outs)
+    x_thresholds, y_thresholds = isotonic_thresholds(iso_model)
+    iso_calibrated = apply_isotonic_array(preds, x_thresholds, y_thresholds)
+    ece_iso = compute_ece(iso_calibrated, outs)
 
     if ece_temp <= ece_iso:
         return {
             "method": "temperature",
             "ece_before": ece_before,
             "ece_after": ece_temp,
-            "n_samples": len(predictions),
+            "n_samples": n_samples,
+            "n_fit": len(preds),
             "temperature": T,
             "model": T,
         }
@@ -126,15 +196,24 @@ def fit_best_calibrator(predictions: list[float], outcomes: list[float]) -> dict
             "method": "isotonic",
             "ece_before": ece_before,
             "ece_after": ece_iso,
-            "n_samples": len(predictions),
+            "n_samples": n_samples,
+            "n_fit": len(preds),
             "temperature": None,
+            "x_thresholds": x_thresholds,
+            "y_thresholds": y_thresholds,
             "model": iso_model,
         }
 
 
+def apply_calibrator(predictions: np.ndarray, calibrator: dict) -> np.ndarray:
+    """Apply the best calibrator to a vector of raw predictions in one call."""
+    if calibrator["method"] == "temperature":
+        return apply_temperature_array(predictions, calibrator["model"])
+    if "x_thresholds" not in calibrator:
+        calibrator["x_thresholds"], calibrator["y_thresholds"] = isotonic_thresholds(calibrator["model"])
+    return apply_isotonic_array(predictions, calibrator["x_thresholds"], calibrator["y_thresholds"])
+
+
 def calibrate(prediction: float, calibrator: dict) -> float:
     """Apply the best calibrator to a raw prediction."""
-    if calibrator["method"] == "temperature":
-        return apply_temperature(prediction, calibrator["model"])
-    else:
-        return apply_isotonic(prediction, calibrator["model"])
+    return float(apply_calibrator(np.asarray([prediction], dtype=np.float64), calibrator)[0])
@@ -17,6 +17,7 @@ Falls back to logistic regression if < 50 samples (CatBoost needs more data).
 from __future__ import annotations
 
 import logging
+import os
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Any
@@ -47,6 +48,9 @@ MONOTONE_INCREASING = {
 
 MIN_CATBOOST_SAMPLES = 50
 
+# CPU threads per CatBoost fit (-1 = all cores); see training_executor.
+CATBOOST_THREAD_COUNT = int(os.environ.get("ML_TRAINING_THREADS_PER_JOB", "-1"))
+
 
 @dataclass
 class TrainedCatBoostModel:
@@ -94,11 +98,14 @@ def fit_catboost_payment_model(
     prediction_type: str,
     tenant_id: str | None,
     scope: str,
+    with_shap: bool = True,
 ) -> TrainedCatBoostModel | None:
     """Fit a CatBoost classifier for payment prediction.
 
     Requires at least MIN_CATBOOST_SAMPLES rows. For smaller datasets,
-    the caller should fall back to logistic regression.
+    the caller should fall back to logistic regression. Pass
+    with_shap=False when the model crosses a process boundary and attach
+    the explainer with build_shap_explainer on the receiving side.
     """
     if len(rows) < MIN_CATBOOST_SAMPLES:
         return None
@@ -155,19 +162,18 @@ def fit_catboost_payment_model(
         random_seed=42,
         verbose=0,
         posterior_sampling=True,  # virtual ensemble for uncertainty
+        thread_count=CATBOOST_THREAD_COUNT,
+        allow_writing_files=False,  # no catboost_info/ scratch output
     )
     model.fit(X, y)
 
     probabilities = model.predict_proba(X)[:, 1]
 
     # Calibration
-    from .calibration import fit_best_calibrator, calibrate
+    from .calibration import fit_best_calibrator, apply_calibrator
     calibrator = fit_best_calibrator(probabilities.tolist(), y.astype(float).tolist()) if len(rows) >= 30 else None
 
-    calibrated = np.asarray(
-        [calibrate(float(p), calibrator) if calibrator else float(p) for p in probabilities],
-        dtype=np.float64,
-    )
+    calibrated = apply_calibrator(probabilities, calibrator) if calibrator else probabilities
 
     # Metrics
     from sklearn.metrics import brier_score_loss, roc_auc_score
@@ -180,14 +186,6 @@ def fit_catboost_payment_model(
     scope_label = "tenant" if scope == "tenant" else "global"
     model_id = f"ml_catboost_{prediction_type}_{scope_label}_v1"
 
-    # SHAP explainer (precompute for fast per-prediction SHAP)
-    shap_explainer = None
-    try:
-        import shap
-        shap_explainer = shap.TreeExplainer(model)
-    except Exception:
-        logger.warning("Failed to create SHAP explainer")
-
     return TrainedCatBoostModel(
         model_id=model_id,
         release_id=None,
@@ -210,10 +208,20 @@ def fit_catboost_payment_model(
             "monotone_features_constrained": sum(1 for c in monotone_constraints if c != 0),
             "iterations": 300,
         },
-        shap_explainer=shap_explainer,
+        shap_explainer=build_shap_explainer(model) if with_shap else None,
     )
 
 
+def build_shap_explainer(classifier: Any) -> Any | None:
+    """SHAP explainer for a fitted CatBoost classifier (precompute for fast per-prediction SHAP)."""
+    try:
+        import shap
+        return shap.TreeExplainer(classifier)
+    except Exception:
+        logger.warning("Failed to create SHAP explainer")
+        return None
+
+
 def predict_catboost(
     model: TrainedCatBoostModel,
     features: dict[str, float],
@@ -221,58 +229,83 @@ def predict_catboost(
     top_k_shap: int = 5,
 ) -> dict[str, Any]:
     """Predict with CatBoost model, returning value, interval, and SHAP reasons."""
-    from .calibration import calibrate
+    return predict_catboost_batch(model, [features], top_k_shap=top_k_shap)[0]
 
-    vector = np.asarray(
-        [[float(features.get(name, 0.0)) for name in model.feature_names]],
+
+def predict_catboost_batch(
+    model: TrainedCatBoostModel,
+    feature_rows: list[dict[str, float]],
+    *,
+    top_k_shap: int = 5,
+) -> list[dict[str, Any]]:
+    """Score many feature maps with one predict_proba, one virtual-ensemble
+    pass and one SHAP call. Returns one predict_catboost-shaped dict per row."""
+    from .calibration import apply_calibrator
+
+    if not feature_rows:
+        return []
+
+    matrix = np.asarray(
+        [[float(features.get(name, 0.0)) for name in model.feature_names] for features in feature_rows],
         dtype=np.float64,
     )
 
-    raw_prob = float(model.model.predict_proba(vector)[0][1])
-    calibrated = calibrate(raw_prob, model.calibrator) if model.calibrator else raw_prob
-    value = float(np.clip(calibrated, 0.0, 1.0))
+    raw_probs = model.model.predict_proba(matrix)[:, 1]
+    if model.calibrator:
+        calibrated = apply_calibrator(raw_probs, model.calibrator)
+    else:
+        calibrated = raw_probs
+    values = np.clip(calibrated, 0.0, 1.0)
 
     # Virtual ensemble uncertainty — predict with posterior sampling
     try:
         virtual_preds = model.model.virtual_ensembles_predict(
-            vector, prediction_type="TotalUncertainty",
+            matrix, prediction_type="TotalUncertainty",
         )
-        # virtual_preds shape: (1, 2) -> [mean, variance]
-        variance = float(virtual_preds[0][1]) if virtual_preds.shape[1] > 1 else 0.02
-        std = float(np.sqrt(max(variance, 0)))
-        lower = float(np.clip(value - 1.645 * std, 0.0, 1.0))
-        upper = float(np.clip(value + 1.645 * std, 0.0, 1.0))
+        # virtual_preds shape: (n, 2) -> [mean, variance]
+        if virtual_preds.shape[1] > 1:
+            variances = np.asarray(virtual_preds[:, 1], dtype=np.float64)
+        else:
+            variances = np.full(len(values), 0.02)
+        stds = np.sqrt(np.maximum(variances, 0))
+        lowers = np.clip(values - 1.645 * stds, 0.0, 1.0)
+        uppers = np.clip(values + 1.645 * stds, 0.0, 1.0)
     except Exception:
         # Fallback interval
-        lower = float(np.clip(value - 0.15, 0.0, 1.0))
-        upper = float(np.clip(value + 0.15, 0.0, 1.0))
-
-    interval = {"lower": lower, "upper": upper, "coverage": 0.90}
+        lowers = np.clip(values - 0.15, 0.0, 1.0)
+        uppers = np.clip(values + 0.15, 0.0, 1.0)
 
     # SHAP reason codes
-    shap_reasons: list[dict[str, Any]] = []
+    shap_reasons: list[list[dict[str, Any]]] = [[] for _ in feature_rows]
     if model.shap_explainer is not None:
         try:
-            shap_values = model.shap_explainer.shap_values(vector)
+            shap_values = model.shap_explainer.shap_values(matrix)
             # For binary classification, shap_values may be a list [class0, class1]
             if isinstance(shap_values, list):
-                sv = shap_values[1][0]  # class 1 (positive) SHAP values
+                shap_matrix = np.asarray(shap_values[1])  # class 1 (positive) SHAP values
             else:
-                sv = shap_values[0]
+                shap_matrix = np.asarray(shap_values)
 
             # Top-k by absolute contribution
-            indexed = [(model.feature_names[i], float(features.get(model.feature_names[i], 0)), float(sv[i])) for i in range(len(sv))]
-            indexed.sort(key=lambda x: abs(x[2]), reverse=True)
-            shap_reasons = [
-                {"feature": name, "value": round(val, 4), "contribution": round(contrib, 4)}
-                for name, val, contrib in indexed[:top_k_shap]
-            ]
+            top_indices = np.argsort(-np.abs(shap_matrix), axis=1, kind="stable")[:, :top_k_shap]
+            for row_idx, features in enumerate(feature_rows):
+                shap_reasons[row_idx] = [
+                    {
+                        "feature": model.feature_names[i],
+                        "value": round(float(features.get(model.feature_names[i], 0)), 4),
+                        "contribution": round(float(shap_matrix[row_idx, i]), 4),
+                    }
+                    for i in top_indices[row_idx]
+                ]
         except Exception:
             pass
 
-    return {
-        "value": value,
-        "raw_value": raw_prob,
-        "interval": interval,
-        "shap_reasons": shap_reasons,
-    }
+    return [
+        {
+            "value": float(values[i]),
+            "raw_value": float(raw_probs[i]),
+            "interval": {"lower": float(lowers[i]), "upper": float(uppers[i]), "coverage": 0.90},
+            "shap_reasons": shap_reasons[i],
+        }
+        for i in range(len(feature_rows))
+    ]
@@ -2,33 +2,128 @@
 Conformal prediction intervals for the ML sidecar.
 
 Two approaches:
-1. compute_intervals — MAPIE-based, fits a model on residuals
+1. compute_intervals — MAPIE-based, fits a model on residuals. Fitted
+   conformalizers are cached per key and outcome watermark, and
+   compute_intervals_batch scores many predictions with one predict_interval.
 2. compute_intervals_from_residuals — pure empirical conformal (no model fitting)
+
+compute_intervals_batch_from_residuals is the vectorized form of (2) for
+scoring many predictions against the same residual set.
+
+Trained models keep their residuals fixed, so build_conformal_table
+precomputes (2) at fit time for ML_CONFORMAL_COVERAGE_LEVELS and serving is a
+table lookup. With ML_CONFORMAL_MONDRIAN_BINS > 1 the table also holds
+Mondrian (per predicted-value bin) quantiles, so interval width adapts to
+where the prediction falls.
 """
 
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable
+
 import numpy as np
 
+COVERAGE_LEVELS = tuple(
+    float(level) for level in os.environ.get("ML_CONFORMAL_COVERAGE_LEVELS", "0.80,0.90,0.95").split(",") if level.strip()
+)
+MONDRIAN_BINS = int(os.environ.get("ML_CONFORMAL_MONDRIAN_BINS", "0"))
+MONDRIAN_MIN_BIN_SIZE = int(os.environ.get("ML_CONFORMAL_MONDRIAN_MIN_BIN_SIZE", "50"))
+CONFORMALIZER_CACHE_SIZE = int(os.environ.get("ML_CONFORMALIZER_CACHE_SIZE", "200"))
 
-def compute_intervals(
+
+class ConformalizerCache:
+    """LRU of fitted MAPIE conformalizers, one per key.
+
+    Each entry remembers the watermark of the (prediction, outcome) pairs it
+    was fitted on; a lookup with a different watermark is a miss, so a key is
+    refit only when new outcomes land.
+    """
+
+    def __init__(self, maxsize: int = CONFORMALIZER_CACHE_SIZE):
+        self._maxsize = maxsize
+        self._entries: OrderedDict[Hashable, tuple[Hashable, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, watermark: Hashable):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != watermark:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, watermark: Hashable, conformalizer) -> None:
+        self._entries[key] = (watermark, conformalizer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Module-level singleton
+conformalizer_cache = ConformalizerCache()
+
+
+def outcome_pairs_watermark(preds: np.ndarray, outs: np.ndarray) -> str:
+    """Content fingerprint of a pair set, used when the caller has no watermark."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(preds, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(outs, dtype=np.float64).tobytes())
+    return f"{len(preds)}:{digest.hexdigest()}"
+
+
+def fit_conformalizer(preds: np.ndarray, outs: np.ndarray, coverage: float = 0.90):
+    """Fit a 5-fold CV+ MAPIE regressor mapping raw prediction to outcome."""
+    from mapie.regression import CrossConformalRegressor
+    from sklearn.linear_model import LinearRegression
+
+    # Feature: the raw prediction. Target: the actual outcome.
+    # MAPIE learns the prediction-to-outcome mapping and produces
+    # conformal intervals around the corrected prediction.
+    mapie = CrossConformalRegressor(
+        estimator=LinearRegression(),
+        confidence_level=coverage,
+        method="plus",
+        cv=5,
+    )
+    mapie.fit_conformalize(preds.reshape(-1, 1), outs)
+    return mapie
+
+
+def compute_intervals_batch(
     predictions: list[float],
     outcomes: list[float],
-    new_prediction: float,
+    new_predictions,
     coverage: float = 0.90,
-) -> dict:
+    *,
+    cache_key: Hashable | None = None,
+    watermark: Hashable | None = None,
+) -> list[dict]:
     """
-    Given historical (predicted, outcome) pairs and a new prediction,
-    return a prediction interval with guaranteed coverage.
+    MAPIE conformal intervals for many new predictions from one fitted model.
 
-    Uses MAPIE MapieRegressor with a linear base estimator to learn the
-    error distribution from residuals, then produces a conformal interval
-    for the new prediction.
+    The fitted conformalizer is cached under (cache_key, coverage) — callers
+    pass e.g. (tenant_id, prediction_type) — and reused while `watermark`
+    is unchanged. Without a watermark the pairs' content fingerprint is used;
+    without a cache_key the fingerprint is also the key.
 
     Falls back to +/- 2*MAE when fewer than 20 data points are available.
 
-    Returns: {"lower": float, "upper": float, "coverage": float}
+    Returns a list of {"lower": float, "upper": float, "coverage": float},
+    one per new prediction, in input order.
     """
     preds = np.asarray(predictions, dtype=np.float64)
     outs = np.asarray(outcomes, dtype=np.float64)
+    new_preds = np.asarray(new_predictions, dtype=np.float64).reshape(-1)
 
     if len(preds) != len(outs):
         raise ValueError("predictions and outcomes must have the same length")
@@ -37,41 +132,57 @@ def compute_intervals(
     if len(preds) < 20:
         mae = np.mean(np.abs(preds - outs)) if len(preds) > 0 else 0.5
         margin = 2.0 * mae
-        lower = float(np.clip(new_prediction - margin, 0.0, 1.0))
-        upper = float(np.clip(new_prediction + margin, 0.0, 1.0))
-        return {"lower": lower, "upper": upper, "coverage": coverage}
+        lowers = np.clip(new_preds - margin, 0.0, 1.0)
+        uppers = np.clip(new_preds + margin, 0.0, 1.0)
+    else:
+        # --- MAPIE-based conformal interval ---
+        if watermark is None:
+            watermark = outcome_pairs_watermark(preds, outs)
+        key = (cache_key if cache_key is not None else watermark, round(float(coverage), 4))
+        mapie = conformalizer_cache.get(key, watermark)
+        if mapie is None:
+            mapie = fit_conformalizer(preds, outs, coverage)
+            conformalizer_cache.put(key, watermark, mapie)
 
-    # --- MAPIE-based conformal interval ---
-    from mapie.regression import CrossConformalRegressor
-    from sklearn.linear_model import LinearRegression
+        _, y_intervals = mapie.predict_interval(new_preds.reshape(-1, 1))
+        # y_intervals shape: (n_samples, 2, n_confidence_levels) — [lower, upper]
+        bounds = np.asarray(y_intervals, dtype=np.float64).reshape(len(new_preds), 2, -1)[:, :, 0]
+        # Clamp probability predictions to [0, 1]
+        lowers = np.clip(bounds[:, 0], 0.0, 1.0)
+        uppers = np.clip(bounds[:, 1], 0.0, 1.0)
 
-    # Feature: the raw prediction. Target: the actual outcome.
-    # MAPIE learns the prediction-to-outcome mapping and produces
-    # conformal intervals around the corrected prediction.
-    X = preds.reshape(-1, 1)
-    y = outs
+    return [
+        {"lower": float(lower), "upper": float(upper), "coverage": coverage}
+        for lower, upper in zip(lowers, uppers)
+    ]
 
-    base_estimator = LinearRegression()
-    mapie = CrossConformalRegressor(
-        estimator=base_estimator,
-        confidence_level=coverage,
-        method="plus",
-        cv=5,
-    )
-    mapie.fit_conformalize(X, y)
 
-    X_new = np.array([[new_prediction]])
-    y_pred, y_intervals = mapie.predict_interval(X_new)
+def compute_intervals(
+    predictions: list[float],
+    outcomes: list[float],
+    new_prediction: float,
+    coverage: float = 0.90,
+    *,
+    cache_key: Hashable | None = None,
+    watermark: Hashable | None = None,
+) -> dict:
+    """
+    Given historical (predicted, outcome) pairs and a new prediction,
+    return a prediction interval with guaranteed coverage.
 
-    # y_intervals shape: (n_samples, 2, n_confidence_levels) — [lower, upper]
-    lower = float(np.asarray(y_intervals[0, 0]).flat[0])
-    upper = float(np.asarray(y_intervals[0, 1]).flat[0])
+    Uses MAPIE CrossConformalRegressor with a linear base estimator to learn
+    the error distribution from residuals, then produces a conformal interval
+    for the new prediction. The fitted regressor is cached; see
+    compute_intervals_batch.
 
-    # Clamp probability predictions to [0, 1]
-    lower = float(np.clip(lower, 0.0, 1.0))
-    upper = float(np.clip(upper, 0.0, 1.0))
+    Falls back to +/- 2*MAE when fewer than 20 data points are available.
 
-    return {"lower": lower, "upper": upper, "coverage": coverage}
+    Returns: {"lower": float, "upper": float, "coverage": float}
+    """
+    return compute_intervals_batch(
+        predictions, outcomes, [new_prediction], coverage,
+        cache_key=cache_key, watermark=watermark,
+    )[0]
 
 
 def compute_intervals_from_residuals(
@@ -111,3 +222,180 @@ def compute_intervals_from_residuals(
     upper = float(np.clip(new_prediction + q, 0.0, 1.0))
 
     return {"lower": lower, "upper": upper, "coverage": coverage}
+
+
+def _conformal_quantile(residuals: list[float], coverage: float) -> float | None:
+    """Finite-sample conformal quantile of |residuals|, or None if empty."""
+    resids = np.asarray(residuals, dtype=np.float64)
+    if len(resids) == 0:
+        return None
+    n = len(resids)
+    quantile_level = min(np.ceil((n + 1) * coverage) / n, 1.0)
+    return float(np.quantile(np.abs(resids), quantile_level))
+
+
+def compute_intervals_batch_from_residuals(
+    residuals: list[float],
+    new_predictions,
+    coverage: float = 0.90,
+) -> list[dict]:
+    """
+    Vectorized compute_intervals_from_residuals.
+
+    The conformal quantile depends only on the residuals, so it is computed
+    once and applied to every prediction in a single clip.
+
+    Returns a list of {"lower": float, "upper": float, "coverage": float},
+    one per prediction, in input order.
+    """
+    preds = np.asarray(new_predictions, dtype=np.float64).reshape(-1)
+    q = _conformal_quantile(residuals, coverage)
+    if q is None:
+        q = 0.5
+
+    lowers = np.clip(preds - q, 0.0, 1.0)
+    uppers = np.clip(preds + q, 0.0, 1.0)
+    return [
+        {"lower": float(lower), "upper": float(upper), "coverage": coverage}
+        for lower, upper in zip(lowers, uppers)
+    ]
+
+
+def _coverage_key(coverage: float) -> float:
+    return round(float(coverage), 4)
+
+
+def _sorted_conformal_quantile(sorted_abs: np.ndarray, coverage: float) -> float:
+    """Conformal quantile from pre-sorted |residuals|; same value as
+    _conformal_quantile (np.quantile, linear) without re-sorting."""
+    n = len(sorted_abs)
+    quantile_level = min(np.ceil((n + 1) * coverage) / n, 1.0)
+    position = (n - 1) * quantile_level
+    lower = int(np.floor(position))
+    upper = min(lower + 1, n - 1)
+    return float(sorted_abs[lower] + (position - lower) * (sorted_abs[upper] - sorted_abs[lower]))
+
+
+@dataclass
+class ConformalTable:
+    """Conformal quantiles of a fixed residual set, precomputed per coverage.
+
+    Coverage levels outside the table are answered from the sorted residuals
+    without re-sorting. Mondrian bins (optional) hold their own residuals;
+    bins with too few samples share the global ones.
+    """
+    sorted_abs_residuals: np.ndarray
+    quantiles: dict[float, float]
+    bin_edges: np.ndarray | None = None  # inner edges over predicted values
+    bin_sorted_abs_residuals: list[np.ndarray] | None = None
+    bin_quantiles: dict[float, np.ndarray] | None = None
+
+    def quantile(self, coverage: float = 0.90) -> float:
+        q = self.quantiles.get(_coverage_key(coverage))
+        if q is not None:
+            return q
+        if len(self.sorted_abs_residuals) == 0:
+            return 0.5
+        return _sorted_conformal_quantile(self.sorted_abs_residuals, coverage)
+
+    def quantiles_for(self, predictions, coverage: float = 0.90) -> np.ndarray:
+        """Per-prediction quantiles: Mondrian bins when present, else global."""
+        preds = np.asarray(predictions, dtype=np.float64).reshape(-1)
+        if self.bin_edges is None or self.bin_sorted_abs_residuals is None:
+            return np.full(len(preds), self.quantile(coverage))
+        per_bin = (self.bin_quantiles or {}).get(_coverage_key(coverage))
+        if per_bin is None:
+            per_bin = np.asarray(
+                [_sorted_conformal_quantile(resids, coverage) for resids in self.bin_sorted_abs_residuals],
+                dtype=np.float64,
+            )
+        return per_bin[np.digitize(preds, self.bin_edges)]
+
+    def intervals(
+        self,
+        predictions,
+        coverage: float = 0.90,
+        lower_bound: float = 0.0,
+        upper_bound: float = 1.0,
+    ) -> list[dict]:
+        """Same output as compute_intervals_batch_from_residuals."""
+        preds = np.asarray(predictions, dtype=np.float64).reshape(-1)
+        q = self.quantiles_for(preds, coverage)
+        lowers = np.clip(preds - q, lower_bound, upper_bound)
+        uppers = np.clip(preds + q, lower_bound, upper_bound)
+        return [
+            {"lower": float(lower), "upper": float(upper), "coverage": coverage}
+            for lower, upper in zip(lowers, uppers)
+        ]
+
+
+def build_conformal_table(
+    residuals,
+    predictions=None,
+    coverage_levels: tuple[float, ...] = COVERAGE_LEVELS,
+    mondrian_bins: int = MONDRIAN_BINS,
+    min_bin_size: int = MONDRIAN_MIN_BIN_SIZE,
+) -> ConformalTable:
+    """Precompute conformal quantiles for a trained model's residuals.
+
+    `predictions` are the fitted values the residuals belong to; they are only
+    needed for Mondrian bins, whose edges are quantiles of the predictions.
+    """
+    abs_resids = np.abs(np.asarray(residuals, dtype=np.float64))
+    sorted_abs = np.sort(abs_resids)
+    if len(sorted_abs) == 0 or mondrian_bins <= 1 or predictions is None:
+        return table_from_sorted_residuals(sorted_abs, coverage_levels=coverage_levels)
+
+    preds = np.asarray(predictions, dtype=np.float64).reshape(-1)
+    if len(preds) != len(abs_resids):
+        raise ValueError("predictions and residuals must have the same length")
+    edges = np.unique(np.quantile(preds, np.arange(1, mondrian_bins) / mondrian_bins))
+    bin_index = np.digitize(preds, edges)
+    bin_resids = []
+    for b in range(len(edges) + 1):
+        in_bin = np.sort(abs_resids[bin_index == b])
+        bin_resids.append(in_bin if len(in_bin) >= min_bin_size else sorted_abs)
+    return table_from_sorted_residuals(
+        sorted_abs,
+        bin_edges=edges,
+        bin_sorted_abs_residuals=bin_resids,
+        coverage_levels=coverage_levels,
+    )
+
+
+def table_from_sorted_residuals(
+    sorted_abs_residuals: np.ndarray,
+    *,
+    bin_edges: np.ndarray | None = None,
+    bin_sorted_abs_residuals: list[np.ndarray] | None = None,
+    coverage_levels: tuple[float, ...] = COVERAGE_LEVELS,
+) -> ConformalTable:
+    """Build a ConformalTable from already-sorted absolute residuals.
+
+    Used by build_conformal_table and when loading a stored model artifact,
+    which keeps the residuals (and Mondrian bins) but not the quantiles.
+    """
+    sorted_abs = np.asarray(sorted_abs_residuals, dtype=np.float64)
+    if len(sorted_abs) == 0:
+        return ConformalTable(sorted_abs_residuals=sorted_abs, quantiles={})
+
+    table = ConformalTable(
+        sorted_abs_residuals=sorted_abs,
+        quantiles={
+            _coverage_key(level): _sorted_conformal_quantile(sorted_abs, level)
+            for level in coverage_levels
+        },
+    )
+    if bin_edges is None or bin_sorted_abs_residuals is None:
+        return table
+
+    table.bin_edges = np.asarray(bin_edges, dtype=np.float64)
+    table.bin_sorted_abs_residuals = bin_sorted_abs_residuals
+    table.bin_quantiles = {
+        _coverage_key(level): np.asarray(
+            [_sorted_conformal_quantile(resids, level) for resids in bin_sorted_abs_residuals],
+            dtype=np.float64,
+        )
+        for level in coverage_levels
+    }
+    return table
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 import json
+from datetime import datetime, timezone
 from typing import Optional
 
 import asyncpg
@@ -23,6 +24,19 @@ async def get_pool() -> Optional[asyncpg.Pool]:
     return _pool
 
 
+async def open_listen_connection() -> Optional[asyncpg.Connection]:
+    """Open a dedicated connection for LISTEN/NOTIFY.
+
+    Listeners hold their connection for the life of the process, so they get
+    their own rather than pinning one of the pool's. Returns None if
+    DATABASE_URL is not set.
+    """
+    database_url = os.environ.get("DATABASE_URL")
+    if not database_url:
+        return None
+    return await asyncpg.connect(database_url)
+
+
 async def close_pool() -> None:
     """Close the connection pool if it exists."""
     global _pool
@@ -277,6 +291,57 @@ async def get_object_state_at(
     }
 
 
+async def get_object_states_at(
+    pool: asyncpg.Pool,
+    tenant_id: str,
+    object_ids: list[str],
+    as_of: datetime,
+) -> dict[str, dict]:
+    """Set-based get_object_state_at for many objects in one round trip.
+
+    Returns {object_id: {state, estimated, version, valid_from}}; objects with
+    neither a valid version nor a current row are omitted.
+    """
+    if not object_ids:
+        return {}
+    rows = await pool.fetch(
+        """
+        SELECT
+          req.object_id,
+          COALESCE(v.state, obj.state) AS state,
+          COALESCE(v.estimated, obj.estimated) AS estimated,
+          COALESCE(v.version, obj.version) AS version,
+          v.valid_from
+        FROM unnest($2::text[]) AS req(object_id)
+        LEFT JOIN LATERAL (
+          SELECT state, estimated, version, valid_from
+          FROM world_object_versions
+          WHERE object_id = req.object_id
+            AND valid_from <= $3
+            AND (valid_to IS NULL OR valid_to > $3)
+          ORDER BY version DESC
+          LIMIT 1
+        ) v ON TRUE
+        LEFT JOIN world_objects obj
+          ON obj.id = req.object_id
+         AND obj.tenant_id = $1
+        WHERE v.version IS NOT NULL OR obj.id IS NOT NULL
+        """,
+        tenant_id,
+        list(object_ids),
+        as_of,
+    )
+    return {
+        str(r["object_id"]): {
+            "state": _parse_json_value(r["state"], {}),
+            "estimated": _parse_json_value(r["estimated"], {}),
+            "version": r["version"],
+            "valid_from": r["valid_from"],
+        }
+        for r in rows
+    }
+
+
 async def get_epoch_training_rows(
     pool: asyncpg.Pool,
     tenant_id: str | None = None,
@@ -355,6 +420,9 @@ async def get_unresolved_epochs(
     return [dict(r) for r in rows]
 
 
+_EVENT_COUNT_KEYS = ("reminder_count", "partial_payment_count", "escalation_count", "dispute_count")
+
+
 async def get_event_counts_for_object(
     pool: asyncpg.Pool,
     tenant_id: str,
@@ -362,68 +430,161 @@ async def get_event_counts_for_object(
     as_of: str | None = None,
 ) -> dict[str, int]:
     """Count actions/events for an object up to a point in time."""
-    time_filter = "AND we.timestamp <= $3" if as_of else ""
-    params = [tenant_id, object_id]
+    as_of_dt = None
     if as_of:
-        params.append(as_of)
+        as_of_dt = datetime.fromisoformat(as_of.replace("Z", "+00:00"))
+        if as_of_dt.tzinfo is None:
+            as_of_dt = as_of_dt.replace(tzinfo=timezone.utc)
+    counts = await get_event_counts_for_objects(pool, tenant_id, [object_id], as_of_dt)
+    return counts[object_id]
+
+
+def _accumulate_event_count(counts: dict[str, int], event_type: str, cnt: int) -> None:
+    """Fold one (event type, count) row into the feature count buckets.
+
+    Mirrored by the rollup_world_event_counts trigger (migration 097).
+    """
+    if "remind" in event_type or "communicate.email" in event_type:
+        counts["reminder_count"] = counts.get("reminder_count", 0) + cnt
+    if "partial" in event_type or "payment.received" in event_type:
+        counts["partial_payment_count"] = counts.get("partial_payment_count", 0) + cnt
+    if "escalat" in event_type or "task.create" in event_type:
+        counts["escalation_count"] = counts.get("escalation_count", 0) + cnt
+    if "dispute" in event_type:
+        counts["dispute_count"] = counts.get("dispute_count", 0) + cnt
 
+
+def _rollup_counts(row) -> dict[str, int]:
+    return {key: int(row[key]) for key in _EVENT_COUNT_KEYS if row[key]}
+
+
+def _days_since_last_contact(last_contact, ref: datetime) -> int:
+    if isinstance(last_contact, datetime):
+        delta = (ref - last_contact).total_seconds() / 86400.0
+        return max(0, int(delta))
+    return -1
+
+
+async def get_event_counts_for_objects(
+    pool: asyncpg.Pool,
+    tenant_id: str,
+    object_ids: list[str],
+    as_of: datetime | None = None,
+) -> dict[str, dict[str, int]]:
+    """Event-count features for many objects from the world_object_event_counts rollup.
+
+    The running totals are exact for every object whose latest event is not
+    after as_of (always, without as_of), so the usual case is one indexed
+    lookup. Objects with later events are counted as of as_of from the
+    per-day buckets (see _event_counts_as_of).
+    """
+    if not object_ids:
+        return {}
     rows = await pool.fetch(
-        f"""
-        SELECT
-          we.type,
-          COUNT(*)::int AS cnt
-        FROM world_events we
-        WHERE we.tenant_id = $1
-          AND (
-            we.payload->>'objectId' = $2
-            OR we.payload->>'targetObjectId' = $2
-          )
-          {time_filter}
-        GROUP BY we.type
+        """
+        SELECT object_id, reminder_count, partial_payment_count, escalation_count,
+               dispute_count, last_action_at, last_event_at
+        FROM world_object_event_counts
+        WHERE tenant_id = $1
+          AND object_id = ANY($2::text[])
         """,
-        *params,
+        tenant_id,
+        list(object_ids),
     )
+    totals = {str(r["object_id"]): r for r in rows}
 
-    counts: dict[str, int] = {}
-    for r in rows:
-        event_type = str(r["type"] or "")
-        cnt = int(r["cnt"])
-        if "remind" in event_type or "communicate.email" in event_type:
-            counts["reminder_count"] = counts.get("reminder_count", 0) + cnt
-        if "partial" in event_type or "payment.received" in event_type:
-            counts["partial_payment_count"] = counts.get("partial_payment_count", 0) + cnt
-        if "escalat" in event_type or "task.create" in event_type:
-            counts["escalation_count"] = counts.get("escalation_count", 0) + cnt
-        if "dispute" in event_type:
-            counts["dispute_count"] = counts.get("dispute_count", 0) + cnt
-
-    # Days since last contact
-    last_contact = await pool.fetchval(
-        f"""
-        SELECT MAX(we.timestamp)
+    point_in_time: dict[str, tuple[dict[str, int], datetime | None]] = {}
+    if as_of is not None:
+        later = [
+            object_id for object_id, row in totals.items()
+            if row["last_event_at"] is not None and row["last_event_at"] > as_of
+        ]
+        if later:
+            point_in_time = await _event_counts_as_of(pool, tenant_id, later, as_of)
+
+    ref_time = as_of or datetime.now(timezone.utc)
+    result: dict[str, dict[str, int]] = {}
+    for object_id in object_ids:
+        if object_id in point_in_time:
+            counts, last_contact = point_in_time[object_id]
+        elif object_id in totals:
+            counts, last_contact = _rollup_counts(totals[object_id]), totals[object_id]["last_action_at"]
+        else:
+            counts, last_contact = {}, None
+        counts["days_since_last_contact"] = _days_since_last_contact(last_contact, ref_time)
+        result[object_id] = counts
+    return result
+
+
+async def _event_counts_as_of(
+    pool: asyncpg.Pool,
+    tenant_id: str,
+    object_ids: list[str],
+    as_of: datetime,
+) -> dict[str, tuple[dict[str, int], datetime | None]]:
+    """Counts and last contact at as_of: day buckets before its UTC day, raw events within it.
+
+    Only the as-of day's events are scanned, through the (tenant_id,
+    timestamp) index.
+    """
+    day_start = as_of.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    bucket_rows = await pool.fetch(
+        """
+        SELECT
+          object_id,
+          SUM(reminder_count)::int AS reminder_count,
+          SUM(partial_payment_count)::int AS partial_payment_count,
+          SUM(escalation_count)::int AS escalation_count,
+          SUM(dispute_count)::int AS dispute_count,
+          MAX(last_action_at) AS last_action_at
+        FROM world_object_event_count_days
+        WHERE tenant_id = $1
+          AND object_id = ANY($2::text[])
+          AND day < $3
+        GROUP BY object_id
+        """,
+        tenant_id,
+        list(object_ids),
+        day_start.date(),
+    )
+    day_rows = await pool.fetch(
+        """
+        SELECT
+          ref.object_id,
+          we.type,
+          COUNT(*)::int AS cnt,
+          MAX(we.timestamp) FILTER (WHERE we.type LIKE 'action.%%') AS last_action_at
         FROM world_events we
+        CROSS JOIN LATERAL (
+          SELECT DISTINCT ref_id AS object_id
+          FROM unnest(ARRAY[we.payload->>'objectId', we.payload->>'targetObjectId']) AS ref_id
+        ) ref
         WHERE we.tenant_id = $1
-          AND (
-            we.payload->>'objectId' = $2
-            OR we.payload->>'targetObjectId' = $2
-          )
-          AND we.type LIKE 'action.%%'
-          {time_filter}
+          AND we.timestamp >= $3
+          AND we.timestamp <= $4
+          AND ref.object_id = ANY($2::text[])
+        GROUP BY ref.object_id, we.type
         """,
-        *params,
+        tenant_id,
+        list(object_ids),
+        day_start,
+        as_of,
     )
-    if last_contact is not None:
-        from datetime import datetime, timezone
-        ref = datetime.fromisoformat(as_of.replace("Z", "+00:00")) if as_of else datetime.now(timezone.utc)
-        if isinstance(last_contact, datetime):
-            delta = (ref - last_contact).total_seconds() / 86400.0
-            counts["days_since_last_contact"] = max(0, int(delta))
-        else:
-            counts["days_since_last_contact"] = -1
-    else:
-        counts["days_since_last_contact"] = -1
 
-    return counts
+    counted: dict[str, tuple[dict[str, int], datetime | None]] = {
+        object_id: ({}, None) for object_id in object_ids
+    }
+    for r in bucket_rows:
+        counted[str(r["object_id"])] = (_rollup_counts(r), r["last_action_at"])
+    for r in day_rows:
+        object_id = str(r["object_id"])
+        counts, last_contact = counted[object_id]
+        _accumulate_event_count(counts, str(r["type"] or ""), int(r["cnt"]))
+        last_action_at = r["last_action_at"]
+        if last_action_at is not None and (last_contact is None or last_action_at > last_contact):
+            last_contact = last_action_at
+        counted[object_id] = (counts, last_contact)
+    return counted
 
 
 async def upsert_decision_epoch(
@@ -493,77 +654,28 @@ async def resolve_epoch_outcome(
     )
 
 
-async def get_tenant_invoice_stats(
+async def get_tenant_invoice_sketches(
     pool: asyncpg.Pool,
     tenant_id: str,
-) -> dict:
-    """Compute tenant-level invoice statistics for relative features.
+) -> dict[str, list[dict]]:
+    """Bucket rows of the tenant's invoice quantile sketches, by metric.
 
-    Returns percentiles, medians, and averages across the tenant's invoices.
+    The sketches are maintained by a world_objects trigger (migration 098);
+    see quantile_sketch.QuantileSketch.from_rows.
     """
-    row = await pool.fetchrow(
-        """
-        SELECT
-          COUNT(*)::int AS invoice_count,
-          COALESCE(PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY (state->>'amountCents')::numeric), 0) AS amount_p25,
-          COALESCE(PERCENTILE_CONT(0.50) WITHIN GROUP (ORDER BY (state->>'amountCents')::numeric), 0) AS amount_p50,
-          COALESCE(PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY (state->>'amountCents')::numeric), 0) AS amount_p75,
-          COALESCE(PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY (state->>'amountCents')::numeric), 0) AS amount_p95,
-          COALESCE(AVG((state->>'amountCents')::numeric), 0) AS avg_amount_cents
-        FROM world_objects
-        WHERE tenant_id = $1
-          AND type = 'invoice'
-          AND NOT tombstone
-          AND valid_to IS NULL
-          AND state->>'amountCents' IS NOT NULL
-        """,
-        tenant_id,
-    )
-    if row is None:
-        return {
-            "invoice_count": 0,
-            "amount_p25": 1000,
-            "amount_p50": 5000,
-            "amount_p75": 20000,
-            "amount_p95": 100000,
-            "avg_amount_cents": 5000,
-            "median_amount_cents": 5000,
-            "avg_days_to_pay": 30.0,
-        }
-
-    # Compute average days-to-pay from paid invoices
-    dtp_row = await pool.fetchrow(
+    rows = await pool.fetch(
         """
-        SELECT
-          AVG(
-            EXTRACT(EPOCH FROM (
-              COALESCE(
-                (state->>'paidAt')::timestamptz,
-                updated_at
-              ) - (state->>'issuedAt')::timestamptz
-            )) / 86400.0
-          ) AS avg_days_to_pay,
-          COUNT(*)::int AS paid_count
-        FROM world_objects
+        SELECT metric, bucket, count, total
+        FROM world_tenant_invoice_sketches
         WHERE tenant_id = $1
-          AND type = 'invoice'
-          AND NOT tombstone
-          AND state->>'status' = 'paid'
-          AND state->>'issuedAt' IS NOT NULL
+          AND count > 0
         """,
         tenant_id,
     )
-
-    return {
-        "invoice_count": int(row["invoice_count"]),
-        "amount_p25": float(row["amount_p25"]),
-        "amount_p50": float(row["amount_p50"]),
-        "amount_p75": float(row["amount_p75"]),
-        "amount_p95": float(row["amount_p95"]),
-        "avg_amount_cents": float(row["avg_amount_cents"]),
-        "median_amount_cents": float(row["amount_p50"]),
-        "avg_days_to_pay": float(dtp_row["avg_days_to_pay"] or 30.0) if dtp_row else 30.0,
-    }
+    sketches: dict[str, list[dict]] = {}
+    for r in rows:
+        sketches.setdefault(r["metric"], []).append(dict(r))
+    return sketches
 
 
 async def get_customer_payment_history(
@@ -616,41 +728,83 @@ async def get_customer_payment_history(
     return [dict(r) for r in rows]
 
 
-async def get_customer_reliability_percentile(
+async def get_customer_payment_histories(
     pool: asyncpg.Pool,
     tenant_id: str,
-    party_id: str,
-) -> float:
-    """Compute where this customer ranks among the tenant's customers.
+    party_ids: list[str],
+    before: datetime | None = None,
+    limit: int = 50,
+) -> dict[str, list[dict]]:
+    """Set-based get_customer_payment_history: the latest `limit` invoices per party."""
+    if not party_ids:
+        return {}
+    time_filter = "AND inv.created_at <= $4" if before else ""
+    params: list = [tenant_id, list(party_ids), limit]
+    if before:
+        params.append(before)
 
-    Returns 0.0-1.0 percentile based on payment reliability from estimated state.
+    rows = await pool.fetch(
+        f"""
+        SELECT *
+        FROM (
+          SELECT
+            rel.from_id AS party_id,
+            inv.id AS invoice_id,
+            inv.state->>'status' AS status,
+            (inv.state->>'amountCents')::numeric AS amount_cents,
+            (inv.state->>'amountPaidCents')::numeric AS amount_paid_cents,
+            inv.state->>'issuedAt' AS issued_at,
+            inv.state->>'dueAt' AS due_at,
+            inv.state->>'paidAt' AS paid_at,
+            inv.updated_at,
+            ROW_NUMBER() OVER (PARTITION BY rel.from_id ORDER BY inv.created_at DESC) AS rn
+          FROM world_relationships rel
+          JOIN world_objects inv
+            ON inv.id = rel.to_id
+            AND inv.tenant_id = rel.tenant_id
+          WHERE rel.tenant_id = $1
+            AND rel.from_id = ANY($2::text[])
+            AND rel.type = 'pays'
+            AND rel.valid_to IS NULL
+            AND inv.type = 'invoice'
+            AND NOT inv.tombstone
+            AND inv.valid_to IS NULL
+            {time_filter}
+        ) ranked
+        WHERE rn <= $3
+        ORDER BY party_id, rn
+        """,
+        *params,
+    )
+    histories: dict[str, list[dict]] = {}
+    for r in rows:
+        record = dict(r)
+        party_id = str(record.pop("party_id"))
+        record.pop("rn", None)
+        histories.setdefault(party_id, []).append(record)
+    return histories
+
+
+async def get_party_reliabilities(
+    pool: asyncpg.Pool,
+    tenant_id: str,
+) -> dict[str, float]:
+    """paymentReliability of every live party of the tenant (0.5 when unset).
+
+    Feeds reliability_index, which ranks customers in memory.
     """
-    row = await pool.fetchrow(
+    rows = await pool.fetch(
         """
-        WITH customer_scores AS (
-          SELECT
-            p.id,
-            COALESCE((p.estimated->>'paymentReliability')::float8, 0.5) AS reliability
-          FROM world_objects p
-          WHERE p.tenant_id = $1
-            AND p.type = 'party'
-            AND NOT p.tombstone
-            AND p.valid_to IS NULL
-        )
-        SELECT
-          COALESCE(
-            PERCENT_RANK() OVER (ORDER BY reliability) ,
-            0.5
-          ) AS percentile
-        FROM customer_scores
-        WHERE id = $2
+        SELECT p.id, COALESCE(ml_sketch_try_float(p.estimated->>'paymentReliability'), 0.5) AS reliability
+        FROM world_objects p
+        WHERE p.tenant_id = $1
+          AND p.type = 'party'
+          AND NOT p.tombstone
+          AND p.valid_to IS NULL
         """,
         tenant_id,
-        party_id,
     )
-    if row is None:
-        return 0.5
-    return float(row["percentile"]) if row["percentile"] is not None else 0.5
+    return {str(r["id"]): float(r["reliability"]) for r in rows}
 
 
 async def get_party_id_for_invoice(
@@ -675,6 +829,155 @@ async def get_party_id_for_invoice(
     return str(row["from_id"]) if row else None
 
 
+async def get_party_ids_for_invoices(
+    pool: asyncpg.Pool,
+    tenant_id: str,
+    invoice_ids: list[str],
+) -> dict[str, str]:
+    """Set-based get_party_id_for_invoice. Invoices without a payer are omitted."""
+    if not invoice_ids:
+        return {}
+    rows = await pool.fetch(
+        """
+        SELECT DISTINCT ON (to_id) to_id, from_id
+        FROM world_relationships
+        WHERE tenant_id = $1
+          AND to_id = ANY($2::text[])
+          AND type = 'pays'
+          AND valid_to IS NULL
+        ORDER BY to_id, valid_from DESC
+        """,
+        tenant_id,
+        list(invoice_ids),
+    )
+    return {str(r["to_id"]): str(r["from_id"]) for r in rows}
+
+
+async def get_invoice_feature_inputs(
+    pool: asyncpg.Pool,
+    tenant_id: str,
+    object_id: str,
+    as_of: datetime,
+    history_limit: int = 50,
+) -> dict | None:
+    """Everything one invoice's feature vector reads from the database, in one query.
+
+    Combines get_object_state_at, get_party_id_for_invoice, the event-count
+    rollup and get_customer_payment_history for the invoice's payer into a
+    single CTE. Returns {state, estimated, version, valid_from, party_id,
+    event_counts, payment_history}, or None if the object does not exist.
+    Only an invoice with events after as_of costs a second round trip (see
+    get_event_counts_for_objects).
+    """
+    row = await pool.fetchrow(
+        """
+        WITH obj AS (
+          SELECT
+            COALESCE(v.state, cur.state) AS state,
+            COALESCE(v.estimated, cur.estimated) AS estimated,
+            COALESCE(v.version, cur.version) AS version,
+            v.valid_from
+          FROM (SELECT $2::text AS object_id) req
+          LEFT JOIN LATERAL (
+            SELECT state, estimated, version, valid_from
+            FROM world_object_versions
+            WHERE object_id = req.object_id
+              AND valid_from <= $3
+              AND (valid_to IS NULL OR valid_to > $3)
+            ORDER BY version DESC
+            LIMIT 1
+          ) v ON TRUE
+          LEFT JOIN world_objects cur
+            ON cur.id = req.object_id
+           AND cur.tenant_id = $1
+          WHERE v.version IS NOT NULL OR cur.id IS NOT NULL
+        ),
+        payer AS (
+          SELECT from_id AS party_id
+          FROM world_relationships
+          WHERE tenant_id = $1
+            AND to_id = $2
+            AND type = 'pays'
+            AND valid_to IS NULL
+          ORDER BY valid_from DESC
+          LIMIT 1
+        ),
+        history AS (
+          SELECT
+            inv.id AS invoice_id,
+            inv.state->>'status' AS status,
+            (inv.state->>'amountCents')::numeric AS amount_cents,
+            (inv.state->>'amountPaidCents')::numeric AS amount_paid_cents,
+            inv.state->>'issuedAt' AS issued_at,
+            inv.state->>'dueAt' AS due_at,
+            inv.state->>'paidAt' AS paid_at,
+            inv.updated_at,
+            inv.created_at
+          FROM payer
+          JOIN world_relationships rel
+            ON rel.tenant_id = $1
+           AND rel.from_id = payer.party_id
+           AND rel.type = 'pays'
+           AND rel.valid_to IS NULL
+          JOIN world_objects inv
+            ON inv.id = rel.to_id
+           AND inv.tenant_id = rel.tenant_id
+          WHERE inv.type = 'invoice'
+            AND NOT inv.tombstone
+            AND inv.valid_to IS NULL
+          ORDER BY inv.created_at DESC
+          LIMIT $4
+        )
+        SELECT
+          obj.state,
+          obj.estimated,
+          obj.version,
+          obj.valid_from,
+          payer.party_id,
+          ev.reminder_count,
+          ev.partial_payment_count,
+          ev.escalation_count,
+          ev.dispute_count,
+          ev.last_action_at,
+          ev.last_event_at,
+          (
+            SELECT COALESCE(json_agg(h ORDER BY h.created_at DESC), '[]'::json)
+            FROM history h
+          ) AS payment_history
+        FROM obj
+        LEFT JOIN payer ON TRUE
+        LEFT JOIN world_object_event_counts ev
+          ON ev.tenant_id = $1
+         AND ev.object_id = $2
+        """,
+        tenant_id,
+        object_id,
+        as_of,
+        history_limit,
+    )
+    if row is None:
+        return None
+
+    last_event_at = row["last_event_at"]
+    if last_event_at is not None and last_event_at > as_of:
+        counts, last_contact = (await _event_counts_as_of(pool, tenant_id, [object_id], as_of))[object_id]
+    elif row["reminder_count"] is not None:  # the object has a rollup row
+        counts, last_contact = _rollup_counts(row), row["last_action_at"]
+    else:
+        counts, last_contact = {}, None
+    counts["days_since_last_contact"] = _days_since_last_contact(last_contact, as_of)
+
+    return {
+        "state": _parse_json_value(row["state"], {}),
+        "estimated": _parse_json_value(row["estimated"], {}),
+        "version": row["version"],
+        "valid_from": row["valid_from"],
+        "party_id": str(row["party_id"]) if row["party_id"] is not None else None,
+        "event_counts": counts,
+        "payment_history": _parse_json_value(row["payment_history"], []),
+    }
+
+
 def _parse_json_value(raw, default):
     if raw is None:
         return default
@@ -813,3 +1116,588 @@ async def get_latest_model_release(
     record["replay_report"] = _parse_json_value(record.get("replay_report"), {})
     record["metadata"] = _parse_json_value(record.get("metadata"), {})
     return record
+
+
+async def get_monitor_states(
+    pool: asyncpg.Pool,
+    kind: str,
+    *,
+    state_key: str | None = None,
+    tenant_id: str | None = None,
+) -> dict[str, bytes]:
+    """Return {state_key: state} for one key or for every key of a tenant."""
+    rows = await pool.fetch(
+        """
+        SELECT state_key, state
+        FROM world_model_monitor_state
+        WHERE kind = $1
+          AND ($2::text IS NULL OR state_key = $2)
+          AND ($3::text IS NULL OR tenant_id = $3)
+        """,
+        kind,
+        state_key,
+        tenant_id,
+    )
+    return {r["state_key"]: bytes(r["state"]) for r in rows}
+
+
+async def upsert_monitor_states(
+    pool: asyncpg.Pool,
+    kind: str,
+    states: list[tuple[str, str, bytes]],
+) -> None:
+    """Write (state_key, tenant_id, state) checkpoints in one statement."""
+    if not states:
+        return
+    await pool.execute(
+        """
+        INSERT INTO world_model_monitor_state (kind, state_key, tenant_id, state, updated_at)
+        SELECT $1, s.state_key, s.tenant_id, s.state, now()
+        FROM unnest($2::text[], $3::text[], $4::bytea[]) AS s(state_key, tenant_id, state)
+        ON CONFLICT (kind, state_key) DO UPDATE SET
+          state = EXCLUDED.state,
+          tenant_id = EXCLUDED.tenant_id,
+          updated_at = now()
+        """,
+        kind,
+        [state_key for state_key, _, _ in states],
+        [tenant_id for _, tenant_id, _ in states],
+        [state for _, _, state in states],
+    )
+
+
+async def upsert_drift_checkpoint(
+    pool: asyncpg.Pool,
+    states: list[tuple[str, str, bytes]],
+    watermarks: dict[str, tuple[datetime, str, int]],
+) -> None:
+    """Write drift detector checkpoints and ingest watermarks in one transaction.
+
+    watermarks maps tenant_id to (last_outcome_at, last_prediction_id,
+    outcomes consumed since the last write). A watermark must never be
+    stored without the detector state that has consumed up to it.
+    """
+    if not states and not watermarks:
+        return
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await upsert_monitor_states(conn, "drift", states)
+            if watermarks:
+                tenant_ids = list(watermarks)
+                await conn.execute(
+                    """
+                    INSERT INTO world_drift_watermarks (
+                      tenant_id, last_outcome_at, last_prediction_id, outcomes_consumed, updated_at
+                    )
+                    SELECT w.tenant_id, w.last_outcome_at, w.last_prediction_id, w.consumed, now()
+                    FROM unnest($1::text[], $2::timestamptz[], $3::text[], $4::bigint[])
+                      AS w(tenant_id, last_outcome_at, last_prediction_id, consumed)
+                    ON CONFLICT (tenant_id) DO UPDATE SET
+                      last_outcome_at = EXCLUDED.last_outcome_at,
+                      last_prediction_id = EXCLUDED.last_prediction_id,
+                      outcomes_consumed = world_drift_watermarks.outcomes_consumed + EXCLUDED.outcomes_consumed,
+                      updated_at = now()
+                    """,
+                    tenant_ids,
+                    [watermarks[tenant_id][0] for tenant_id in tenant_ids],
+                    [watermarks[tenant_id][1] for tenant_id in tenant_ids],
+                    [watermarks[tenant_id][2] for tenant_id in tenant_ids],
+                )
+
+
+async def get_drift_watermark(
+    pool: asyncpg.Pool,
+    tenant_id: str,
+) -> tuple[datetime, str] | None:
+    """(last_outcome_at, last_prediction_id) of the last outcome fed to a tenant's drift detectors."""
+    row = await pool.fetchrow(
+        """
+        SELECT last_outcome_at, last_prediction_id
+        FROM world_drift_watermarks
+        WHERE tenant_id = $1
+        """,
+        tenant_id,
+    )
+    if row is None:
+        return None
+    return (row["last_outcome_at"], row["last_prediction_id"])
+
+
+async def get_outcome_pairs_after(
+    pool: asyncpg.Pool,
+    tenant_id: str,
+    watermark: tuple[datetime, str] | None,
+    limit: int,
+) -> list[dict]:
+    """Outcomes past the watermark in (outcome_at, prediction_id) order."""
+    rows = await pool.fetch(
+        """
+        SELECT o.prediction_id, o.outcome_at, p.model_id, p.prediction_type, p.predicted_value, o.outcome_value
+        FROM world_prediction_outcomes o
+        JOIN world_predictions p ON p.id = o.prediction_id AND p.tenant_id = o.tenant_id
+        WHERE o.tenant_id = $1
+          AND ($2::timestamptz IS NULL OR (o.outcome_at, o.prediction_id) > ($2::timestamptz, $3::text))
+        ORDER BY o.outcome_at ASC, o.prediction_id ASC
+        LIMIT $4
+        """,
+        tenant_id,
+        watermark[0] if watermark else None,
+        watermark[1] if watermark else None,
+        limit,
+    )
+    return [dict(r) for r in rows]
+
+
+async def insert_model_artifact(pool: asyncpg.Pool, artifact: dict) -> None:
+    """Store a serialized model; the first write for a (release, kind) wins."""
+    await pool.execute(
+        """
+        INSERT INTO world_model_artifacts (
+          release_id, model_kind, cache_key, tenant_id, model_id, format, payload, checksum, byte_size, created_at
+        ) VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,now())
+        ON CONFLICT (release_id, model_kind) DO NOTHING
+        """,
+        artifact["release_id"],
+        artifact["model_kind"],
+        artifact["cache_key"],
+        artifact.get("tenant_id"),
+        artifact["model_id"],
+        artifact["format"],
+        artifact["payload"],
+        artifact["checksum"],
+        len(artifact["payload"]),
+    )
+
+
+async def get_model_artifact(
+    pool: asyncpg.Pool,
+    model_kind: str,
+    *,
+    release_id: str | None = None,
+    cache_key: str | None = None,
+) -> dict | None:
+    """Return the artifact of a release, or the newest one stored under a cache key."""
+    row = await pool.fetchrow(
+        """
+        SELECT release_id, model_kind, cache_key, model_id, format, payload, checksum
+        FROM world_model_artifacts
+        WHERE model_kind = $1
+          AND ($2::text IS NULL OR release_id = $2)
+          AND ($3::text IS NULL OR cache_key = $3)
+        ORDER BY created_at DESC
+        LIMIT 1
+        """,
+        model_kind,
+        release_id,
+        cache_key,
+    )
+    if row is None:
+        return None
+    artifact = dict(row)
+    artifact["payload"] = bytes(artifact["payload"])
+    return artifact
+
+
+async def get_most_active_tenants(
+    pool: asyncpg.Pool,
+    since: datetime,
+    limit: int,
+) -> list[str]:
+    """Tenants ranked by prediction count since `since`, busiest first."""
+    rows = await pool.fetch(
+        """
+        SELECT tenant_id, count(*) AS prediction_count
+        FROM world_predictions
+        WHERE predicted_at >= $1
+        GROUP BY tenant_id
+        ORDER BY prediction_count DESC, tenant_id
+        LIMIT $2
+        """,
+        since,
+        limit,
+    )
+    return [r["tenant_id"] for r in rows]
+
+
+_TRAINING_JOB_COLUMNS = """
+    job_id, tenant_id, prediction_type, status, stage, attempts, claimed_by,
+    result, error, created_at, started_at, heartbeat_at, finished_at
+"""
+
+
+def _training_job_row(row) -> dict:
+    job = dict(row)
+    job["result"] = _parse_json_value(job.get("result"), None)
+    return job
+
+
+async def insert_training_job(
+    pool: asyncpg.Pool,
+    job_id: str,
+    tenant_id: str | None,
+    prediction_type: str,
+) -> dict:
+    row = await pool.fetchrow(
+        f"""
+        INSERT INTO world_model_training_jobs (job_id, tenant_id, prediction_type)
+        VALUES ($1, $2, $3)
+        RETURNING {_TRAINING_JOB_COLUMNS}
+        """,
+        job_id,
+        tenant_id,
+        prediction_type,
+    )
+    return _training_job_row(row)
+
+
+async def get_training_job(pool: asyncpg.Pool, job_id: str) -> dict | None:
+    row = await pool.fetchrow(
+        f"SELECT {_TRAINING_JOB_COLUMNS} FROM world_model_training_jobs WHERE job_id = $1",
+        job_id,
+    )
+    return _training_job_row(row) if row is not None else None
+
+
+async def claim_training_job(
+    pool: asyncpg.Pool,
+    worker_id: str,
+    lease_seconds: float,
+    max_attempts: int,
+) -> dict | None:
+    """Claim the oldest queued job, or a running one whose heartbeat is stale.
+
+    Stale jobs that already used max_attempts are marked failed instead.
+    """
+    await pool.execute(
+        """
+        UPDATE world_model_training_jobs
+        SET status = 'failed', error = 'worker lost; attempts exhausted', finished_at = now()
+        WHERE status = 'running'
+          AND heartbeat_at < now() - make_interval(secs => $1)
+          AND attempts >= $2
+        """,
+        lease_seconds,
+        max_attempts,
+    )
+    row = await pool.fetchrow(
+        f"""
+        UPDATE world_model_training_jobs
+        SET status = 'running',
+            stage = 'queued',
+            attempts = attempts + 1,
+            claimed_by = $1,
+            started_at = now(),
+            heartbeat_at = now()
+        WHERE job_id = (
+          SELECT job_id
+          FROM world_model_training_jobs
+          WHERE status = 'queued'
+             OR (status = 'running' AND heartbeat_at < now() - make_interval(secs => $2))
+          ORDER BY created_at
+          FOR UPDATE SKIP LOCKED
+          LIMIT 1
+        )
+        RETURNING {_TRAINING_JOB_COLUMNS}
+        """,
+        worker_id,
+        lease_seconds,
+    )
+    return _training_job_row(row) if row is not None else None
+
+
+async def update_training_job_stage(pool: asyncpg.Pool, job_id: str, worker_id: str, stage: str) -> bool:
+    """Record a stage and heartbeat; False when worker_id no longer holds the job.
+
+    A job whose lease expired may have been reclaimed by another worker (or
+    failed as exhausted), so the update only applies to this worker's claim.
+    """
+    updated = await pool.fetchval(
+        """
+        UPDATE world_model_training_jobs
+        SET stage = $3, heartbeat_at = now()
+        WHERE job_id = $1
+          AND claimed_by = $2
+          AND status = 'running'
+        RETURNING job_id
+        """,
+        job_id,
+        worker_id,
+        stage,
+    )
+    return updated is not None
+
+
+async def finish_training_job(
+    pool: asyncpg.Pool,
+    job_id: str,
+    worker_id: str,
+    status: str,
+    *,
+    result: dict | None = None,
+    error: str | None = None,
+) -> bool:
+    """Store a job's outcome; False when worker_id no longer holds the job."""
+    updated = await pool.fetchval(
+        """
+        UPDATE world_model_training_jobs
+        SET status = $3,
+            stage = 'done',
+            result = $4::jsonb,
+            error = $5,
+            heartbeat_at = now(),
+            finished_at = now()
+        WHERE job_id = $1
+          AND claimed_by = $2
+          AND status = 'running'
+        RETURNING job_id
+        """,
+        job_id,
+        worker_id,
+        status,
+        json.dumps(result, default=str) if result is not None else None,
+        error,
+    )
+    return updated is not None
+
+
+async def get_invoice_feature_sources(
+    pool: asyncpg.Pool,
+    tenant_id: str,
+    *,
+    object_ids: list[str] | None = None,
+    limit: int = 200,
+) -> list[dict]:
+    """Open invoices with their change watermarks and stored feature rows.
+
+    One row per open invoice (most recently updated first, optionally
+    restricted to object_ids): the invoice version and state, its payer, the
+    last change to its event-count rollup, the latest update to the payer's invoices,
+    and the world_model_invoice_features columns (NULL when never stored).
+    """
+    rows = await pool.fetch(
+        """
+        SELECT
+          inv.id AS object_id,
+          inv.version,
+          inv.state,
+          payer.party_id,
+          ev.updated_at AS events_updated_at,
+          (
+            SELECT MAX(hist.updated_at)
+            FROM world_relationships hrel
+            JOIN world_objects hist
+              ON hist.id = hrel.to_id
+              AND hist.tenant_id = hrel.tenant_id
+            WHERE hrel.tenant_id = $1
+              AND hrel.from_id = payer.party_id
+              AND hrel.type = 'pays'
+              AND hrel.valid_to IS NULL
+              AND hist.type = 'invoice'
+          ) AS history_updated_at,
+          fs.source_fingerprint,
+          fs.features,
+          fs.feature_hash,
+          fs.tenant_stats_available,
+          fs.trajectory_available,
+          fs.snapshot_fingerprint,
+          fs.snapshot_trigger,
+          fs.refreshed_at
+        FROM world_objects inv
+        LEFT JOIN LATERAL (
+          SELECT from_id AS party_id
+          FROM world_relationships
+          WHERE tenant_id = $1
+            AND to_id = inv.id
+            AND type = 'pays'
+            AND valid_to IS NULL
+          ORDER BY valid_from DESC
+          LIMIT 1
+        ) payer ON TRUE
+        LEFT JOIN world_object_event_counts ev
+          ON ev.tenant_id = inv.tenant_id
+          AND ev.object_id = inv.id
+        LEFT JOIN world_model_invoice_features fs
+          ON fs.tenant_id = inv.tenant_id
+          AND fs.object_id = inv.id
+        WHERE inv.tenant_id = $1
+          AND inv.type = 'invoice'
+          AND NOT inv.tombstone
+          AND inv.valid_to IS NULL
+          AND ($2::text[] IS NULL OR inv.id = ANY($2::text[]))
+          AND (
+            inv.state->>'status' IN ('sent', 'overdue', 'partial', 'disputed')
+            OR (
+              inv.state->>'status' NOT IN ('paid', 'voided', 'written_off')
+              AND (inv.state->>'amountRemainingCents')::numeric > 0
+            )
+          )
+        ORDER BY inv.updated_at DESC
+        LIMIT $3
+        """,
+        tenant_id,
+        list(object_ids) if object_ids is not None else None,
+        limit,
+    )
+    sources = []
+    for r in rows:
+        source = dict(r)
+        source["state"] = _parse_json_value(source["state"], {})
+        source["features"] = _parse_json_value(source["features"], None)
+        sources.append(source)
+    return sources
+
+
+async def upsert_invoice_features(pool: asyncpg.Pool, tenant_id: str, rows: list[dict]) -> None:
+    """Write refreshed feature rows in one statement; snapshot markers are kept."""
+    if not rows:
+        return
+    await pool.execute(
+        """
+        INSERT INTO world_model_invoice_features (
+          tenant_id, object_id, object_version, party_id, source_fingerprint, state,
+          features, feature_hash, tenant_stats_available, trajectory_available, refreshed_at
+        )
+        SELECT $1, r.object_id, r.object_version, r.party_id, r.source_fingerprint, r.state::jsonb,
+               r.features::jsonb, r.feature_hash, r.tenant_stats_available, r.trajectory_available, now()
+        FROM unnest(
+          $2::text[], $3::int[], $4::text[], $5::text[], $6::text[],
+          $7::text[], $8::text[], $9::bool[], $10::bool[]
+        ) AS r(
+          object_id, object_version, party_id, source_fingerprint, state,
+          features, feature_hash, tenant_stats_available, trajectory_available
+        )
+        ON CONFLICT (tenant_id, object_id) DO UPDATE SET
+          object_version = EXCLUDED.object_version,
+          party_id = EXCLUDED.party_id,
+          source_fingerprint = EXCLUDED.source_fingerprint,
+          state = EXCLUDED.state,
+          features = EXCLUDED.features,
+          feature_hash = EXCLUDED.feature_hash,
+          tenant_stats_available = EXCLUDED.tenant_stats_available,
+          trajectory_available = EXCLUDED.trajectory_available,
+          refreshed_at = now()
+        """,
+        tenant_id,
+        [row["object_id"] for row in rows],
+        [row["object_version"] for row in rows],
+        [row.get("party_id") for row in rows],
+        [row["source_fingerprint"] for row in rows],
+        [json.dumps(row["state"], default=str) for row in rows],
+        [json.dumps(row["features"]) for row in rows],
+        [row["feature_hash"] for row in rows],
+        [bool(row["tenant_stats_available"]) for row in rows],
+        [bool(row["trajectory_available"]) for row in rows],
+    )
+
+
+async def get_invoice_features(
+    pool: asyncpg.Pool,
+    tenant_id: str,
+    object_id: str,
+    max_age_seconds: float,
+) -> dict | None:
+    """The stored feature row of an invoice, if built from its current version recently enough.
+
+    The row comes with the invoice's current change watermarks (as in
+    get_invoice_feature_sources) so the caller can check its stored
+    source_fingerprint against them.
+    """
+    row = await pool.fetchrow(
+        """
+        SELECT
+          fs.features,
+          fs.feature_hash,
+          fs.tenant_stats_available,
+          fs.trajectory_available,
+          fs.refreshed_at,
+          fs.source_fingerprint,
+          inv.version,
+          payer.party_id,
+          ev.updated_at AS events_updated_at,
+          (
+            SELECT MAX(hist.updated_at)
+            FROM world_relationships hrel
+            JOIN world_objects hist
+              ON hist.id = hrel.to_id
+              AND hist.tenant_id = hrel.tenant_id
+            WHERE hrel.tenant_id = $1
+              AND hrel.from_id = payer.party_id
+              AND hrel.type = 'pays'
+              AND hrel.valid_to IS NULL
+              AND hist.type = 'invoice'
+          ) AS history_updated_at
+        FROM world_model_invoice_features fs
+        JOIN world_objects inv
+          ON inv.id = fs.object_id
+          AND inv.tenant_id = fs.tenant_id
+          AND inv.version = fs.object_version
+          AND inv.valid_to IS NULL
+          AND NOT inv.tombstone
+        LEFT JOIN LATERAL (
+          SELECT from_id AS party_id
+          FROM world_relationships
+          WHERE tenant_id = $1
+            AND to_id = inv.id
+            AND type = 'pays'
+            AND valid_to IS NULL
+          ORDER BY valid_from DESC
+          LIMIT 1
+        ) payer ON TRUE
+        LEFT JOIN world_object_event_counts ev
+          ON ev.tenant_id = inv.tenant_id
+          AND ev.object_id = inv.id
+        WHERE fs.tenant_id = $1
+          AND fs.object_id = $2
+          AND fs.refreshed_at > now() - make_interval(secs => $3)
+        """,
+        tenant_id,
+        object_id,
+        max_age_seconds,
+    )
+    if row is None:
+        return None
+    stored = dict(row)
+    stored["features"] = _parse_json_value(stored["features"], {})
+    return stored
+
+
+async def mark_invoice_features_snapshot(
+    pool: asyncpg.Pool,
+    tenant_id: str,
+    object_id: str,
+    source_fingerprint: str,
+    epoch_trigger: str,
+) -> None:
+    """Record the source fingerprint and trigger of the epoch just taken for an invoice."""
+    await pool.execute(
+        """
+        UPDATE world_model_invoice_features
+        SET snapshot_fingerprint = $3, snapshot_trigger = $4
+        WHERE tenant_id = $1 AND object_id = $2
+        """,
+        tenant_id,
+        object_id,
+        source_fingerprint,
+        epoch_trigger,
+    )
+
+
+async def prune_invoice_features(pool: asyncpg.Pool, tenant_id: str) -> int:
+    """Drop rows whose invoice closed, was deleted or moved past the stored version."""
+    result = await pool.execute(
+        """
+        DELETE FROM world_model_invoice_features fs
+        WHERE fs.tenant_id = $1
+          AND NOT EXISTS (
+            SELECT 1
+            FROM world_objects inv
+            WHERE inv.id = fs.object_id
+              AND inv.tenant_id = fs.tenant_id
+              AND inv.version = fs.object_version
+              AND inv.valid_to IS NULL
+              AND NOT inv.tombstone
+          )
+        """,
+        tenant_id,
+    )
+    return int(str(result).rsplit(" ", 1)[-1]) if result else 0
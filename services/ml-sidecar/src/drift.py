@@ -1,17 +1,235 @@
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+
+import numpy as np
 from river.drift import ADWIN
 from datetime import datetime, timezone
 
+from .db import get_drift_watermark, get_outcome_pairs_after
+
+logger = logging.getLogger(__name__)
+
+DRIFT_INGEST_BATCH_SIZE = int(os.environ.get("ML_DRIFT_INGEST_BATCH_SIZE", "5000"))
+
+# "adwin" (river, one object per key) or "page_hinkley" (numpy ring buffer)
+DRIFT_BACKEND = os.environ.get("ML_DRIFT_BACKEND", "adwin")
+DRIFT_RING_CAPACITY = int(os.environ.get("ML_DRIFT_RING_CAPACITY", "1000"))
+DRIFT_PH_DELTA = float(os.environ.get("ML_DRIFT_PH_DELTA", "0.005"))
+DRIFT_PH_THRESHOLD = float(os.environ.get("ML_DRIFT_PH_THRESHOLD", "10.0"))
+DRIFT_PH_MIN_INSTANCES = int(os.environ.get("ML_DRIFT_PH_MIN_INSTANCES", "30"))
+# Most recent ADWIN window residuals kept for checkpoint replay
+DRIFT_ADWIN_REPLAY_MAX = int(os.environ.get("ML_DRIFT_ADWIN_REPLAY_MAX", "1000"))
+
+# (outcome_at, prediction_id) of the last outcome fed to a tenant's detectors
+Watermark = tuple[datetime, str]
+
+# Version of the JSON written by DriftMonitor.export_state
+DRIFT_STATE_FORMAT = 2
+
+
+class PageHinkleyRingDetector:
+    """Two-sided Page-Hinkley test over a fixed-size numpy ring buffer.
+
+    Exposes the same surface DriftMonitor uses on river's ADWIN (update,
+    drift_detected, estimation) plus update_many, which runs the test over a
+    whole batch with cumulative sums. Memory per detector is one float64
+    array of `capacity` values and a handful of scalars; `estimation` is the
+    mean residual over the buffer (samples since the last drift, at most
+    `capacity` of them).
+    """
+
+    def __init__(
+        self,
+        capacity: int = DRIFT_RING_CAPACITY,
+        delta: float = DRIFT_PH_DELTA,
+        threshold: float = DRIFT_PH_THRESHOLD,
+        min_instances: int = DRIFT_PH_MIN_INSTANCES,
+    ):
+        self.capacity = capacity
+        self.delta = delta
+        self.threshold = threshold
+        self.min_instances = min_instances
+        self._buffer = np.zeros(capacity, dtype=np.float64)
+        self._head = 0  # next write position
+        self._size = 0
+        self.drift_detected = False
+        self.n_detections = 0
+        self._reset_test()
+
+    def _reset_test(self) -> None:
+        self._n = 0
+        self._sum = 0.0
+        self._m_up = 0.0
+        self._min_up = 0.0
+        self._m_down = 0.0
+        self._max_down = 0.0
+
+    def _push(self, values: np.ndarray) -> None:
+        if len(values) >= self.capacity:
+            self._buffer[:] = values[-self.capacity:]
+            self._head, self._size = 0, self.capacity
+            return
+        end = self._head + len(values)
+        if end <= self.capacity:
+            self._buffer[self._head:end] = values
+        else:
+            split = self.capacity - self._head
+            self._buffer[self._head:] = values[:split]
+            self._buffer[: end - self.capacity] = values[split:]
+        self._head = end % self.capacity
+        self._size = min(self.capacity, self._size + len(values))
+
+    def _first_drift(self, values: np.ndarray) -> int | None:
+        """Advance the test over `values`; return the index of the first drift
+        (state then reflects the samples up to it) or None."""
+        n = self._n + np.arange(1, len(values) + 1)
+        means = (self._sum + np.cumsum(values)) / n
+        m_up = self._m_up + np.cumsum(values - means - self.delta)
+        min_up = np.minimum(self._min_up, np.minimum.accumulate(m_up))
+        m_down = self._m_down + np.cumsum(values - means + self.delta)
+        max_down = np.maximum(self._max_down, np.maximum.accumulate(m_down))
+        hits = (n >= self.min_instances) & (
+            (m_up - min_up > self.threshold) | (max_down - m_down > self.threshold)
+        )
+        last = int(np.argmax(hits)) if hits.any() else len(values) - 1
+        self._n = int(n[last])
+        self._sum = float(means[last] * n[last])
+        self._m_up, self._min_up = float(m_up[last]), float(min_up[last])
+        self._m_down, self._max_down = float(m_down[last]), float(max_down[last])
+        return last if hits[last] else None
+
+    def update_many(self, values) -> bool:
+        """Feed residuals in order. Returns True if drift was detected anywhere
+        in the batch; drift_detected reflects the last sample, as with update."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        detected_any = False
+        self.drift_detected = False
+        while len(values):
+            index = self._first_drift(values)
+            if index is None:
+                self._push(values)
+                break
+            detected_any = True
+            self.n_detections += 1
+            # Drop the pre-change window; keep the sample that tripped the test.
+            self._size = self._head = 0
+            self._push(values[index:index + 1])
+            self._reset_test()
+            self.drift_detected = index == len(values) - 1
+            values = values[index + 1:]
+        return detected_any
+
+    def update(self, value: float) -> None:
+        self.update_many([value])
+
+    @property
+    def estimation(self) -> float:
+        if self._size == 0:
+            return 0.0
+        return float(self._buffer[: self._size].mean())
+
+    def to_state(self) -> dict:
+        # While the ring is not full its samples sit in buffer[:size].
+        buffer = self._buffer if self._size == self.capacity else self._buffer[: self._size]
+        return {
+            "capacity": self.capacity,
+            "delta": self.delta,
+            "threshold": self.threshold,
+            "min_instances": self.min_instances,
+            "buffer": buffer.tolist(),
+            "head": self._head,
+            "size": self._size,
+            "drift_detected": self.drift_detected,
+            "n_detections": self.n_detections,
+            "n": self._n,
+            "sum": self._sum,
+            "m_up": self._m_up,
+            "min_up": self._min_up,
+            "m_down": self._m_down,
+            "max_down": self._max_down,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "PageHinkleyRingDetector":
+        detector = cls(
+            capacity=int(state["capacity"]),
+            delta=float(state["delta"]),
+            threshold=float(state["threshold"]),
+            min_instances=int(state["min_instances"]),
+        )
+        buffer = np.asarray(state["buffer"], dtype=np.float64)
+        detector._buffer[: len(buffer)] = buffer
+        detector._head = int(state["head"])
+        detector._size = int(state["size"])
+        detector.drift_detected = bool(state["drift_detected"])
+        detector.n_detections = int(state["n_detections"])
+        detector._n = int(state["n"])
+        detector._sum = float(state["sum"])
+        detector._m_up = float(state["m_up"])
+        detector._min_up = float(state["min_up"])
+        detector._m_down = float(state["m_down"])
+        detector._max_down = float(state["max_down"])
+        return detector
+
+
+def _adwin_params(detector: ADWIN) -> dict:
+    return {
+        "delta": detector.delta,
+        "clock": detector.clock,
+        "max_buckets": detector.max_buckets,
+        "min_window_length": detector.min_window_length,
+        "grace_period": detector.grace_period,
+    }
+
+
+def _adwin_replay(params: dict, window) -> ADWIN:
+    """A fresh ADWIN with `params` that has seen the residuals in `window`."""
+    detector = ADWIN(**params)
+    for residual in window:
+        detector.update(float(residual))
+    return detector
+
+
+def make_detector(backend: str = DRIFT_BACKEND):
+    if backend == "page_hinkley":
+        return PageHinkleyRingDetector()
+    if backend != "adwin":
+        raise ValueError(f"Unknown drift backend: {backend}")
+    return ADWIN()
+
 
 class DriftMonitor:
-    """Monitors prediction residuals for distribution drift using ADWIN.
+    """Monitors prediction residuals for distribution drift.
+
+    Maintains one detector per (model_id, prediction_type, tenant_id) — river's
+    ADWIN by default, or PageHinkleyRingDetector with
+    ML_DRIFT_BACKEND=page_hinkley — plus a per-tenant watermark of the
+    outcomes already fed to them.
 
-    Maintains one ADWIN instance per (model_id, prediction_type, tenant_id).
+    ADWIN's state is river-internal, so checkpoints never include it: the
+    monitor keeps the residuals still in each ADWIN window (the latest
+    DRIFT_ADWIN_REPLAY_MAX of them) and a restore replays them into a fresh
+    detector.
     """
 
-    def __init__(self):
-        self._monitors: dict[str, ADWIN] = {}
+    def __init__(self, backend: str = DRIFT_BACKEND):
+        self.backend = backend
+        make_detector(backend)  # fail fast on a bad backend name
+        self._monitors: dict[str, ADWIN | PageHinkleyRingDetector] = {}
         self._drift_flags: dict[str, bool] = {}
         self._last_checked: dict[str, str] = {}
+        # ADWIN keys -> residuals in the detector's current window
+        self._windows: dict[str, deque] = {}
+        # tenant_id -> watermark; None means loaded but nothing consumed yet
+        self._watermarks: dict[str, Watermark | None] = {}
+        # tenant_id -> outcomes consumed since the watermark was last persisted
+        self._dirty_watermarks: dict[str, int] = {}
+        self._ingest_locks: dict[str, asyncio.Lock] = {}
+        # keys changed since the last checkpoint (see monitor_state)
+        self._dirty: set[str] = set()
 
     def _key(self, model_id: str, prediction_type: str, tenant_id: str) -> str:
         return f"{tenant_id}:{model_id}:{prediction_type}"
@@ -27,15 +245,57 @@ class DriftMonitor:
         """Feed a new prediction-outcome pair. Returns True if drift detected."""
         key = self._key(model_id, prediction_type, tenant_id)
         if key not in self._monitors:
-            self._monitors[key] = ADWIN()
+            self._monitors[key] = make_detector(self.backend)
             self._drift_flags[key] = False
 
         residual = predicted - actual
         self._monitors[key].update(residual)
+        self._track_window(key, [residual])
         self._drift_flags[key] = self._monitors[key].drift_detected
         self._last_checked[key] = datetime.now(timezone.utc).isoformat()
+        self._dirty.add(key)
         return self._drift_flags[key]
 
+    def update_many(
+        self,
+        model_id: str,
+        prediction_type: str,
+        tenant_id: str,
+        residuals,
+    ) -> bool:
+        """Feed residuals (predicted - actual) in order. Returns True if drift
+        was detected at any point; the stored flag reflects the last residual."""
+        key = self._key(model_id, prediction_type, tenant_id)
+        if key not in self._monitors:
+            self._monitors[key] = make_detector(self.backend)
+            self._drift_flags[key] = False
+
+        detector = self._monitors[key]
+        if isinstance(detector, PageHinkleyRingDetector):
+            detected_any = detector.update_many(residuals)
+        else:
+            detected_any = False
+            for residual in residuals:
+                detector.update(float(residual))
+                detected_any = detected_any or detector.drift_detected
+            self._track_window(key, residuals)
+        self._drift_flags[key] = detector.drift_detected
+        self._last_checked[key] = datetime.now(timezone.utc).isoformat()
+        self._dirty.add(key)
+        return detected_any
+
+    def _track_window(self, key: str, residuals) -> None:
+        """Follow an ADWIN detector's window: it always holds the latest `width` samples."""
+        detector = self._monitors[key]
+        if isinstance(detector, PageHinkleyRingDetector):
+            return
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = deque(maxlen=DRIFT_ADWIN_REPLAY_MAX)
+        window.extend(float(residual) for residual in residuals)
+        while len(window) > detector.width:
+            window.popleft()
+
     def get_status(self, model_id: str, prediction_type: str, tenant_id: str) -> dict:
         """Returns {"drift_detected": bool, "adwin_value": float, "last_checked": str}"""
         key = self._key(model_id, prediction_type, tenant_id)
@@ -78,16 +338,102 @@ class DriftMonitor:
         tenant_id: str,
         pairs: list[tuple[float, float]],
     ) -> None:
-        """Rebuild ADWIN state from historical prediction-outcome pairs.
+        """Rebuild detector state from historical prediction-outcome pairs.
         Called on service restart."""
         key = self._key(model_id, prediction_type, tenant_id)
-        self._monitors[key] = ADWIN()
+        self._monitors[key] = make_detector(self.backend)
         self._drift_flags[key] = False
-        for predicted, actual in pairs:
-            residual = predicted - actual
-            self._monitors[key].update(residual)
-            self._drift_flags[key] = self._monitors[key].drift_detected
-        self._last_checked[key] = datetime.now(timezone.utc).isoformat()
+        self._windows.pop(key, None)
+        residuals = np.asarray([predicted - actual for predicted, actual in pairs], dtype=np.float64)
+        self.update_many(model_id, prediction_type, tenant_id, residuals)
+
+
+    def export_state(self, key: str) -> bytes | None:
+        """Serialize one detector with its flag and timestamp as versioned JSON."""
+        if key not in self._monitors:
+            return None
+        detector = self._monitors[key]
+        if isinstance(detector, PageHinkleyRingDetector):
+            detector_state = detector.to_state()
+        else:
+            detector_state = {"params": _adwin_params(detector), "window": list(self._windows.get(key, ()))}
+        return json.dumps({
+            "format": DRIFT_STATE_FORMAT,
+            "backend": self.backend,
+            "detector": detector_state,
+            "drift_detected": self._drift_flags.get(key, False),
+            "last_checked": self._last_checked.get(key),
+        }).encode("utf-8")
+
+    def import_state(self, key: str, payload: bytes) -> bool:
+        """Install a detector from export_state unless the key is already live.
+
+        State that cannot be read (not this format or backend, or malformed)
+        is dropped with a warning; the key then starts a fresh detector.
+        """
+        if key in self._monitors:
+            return False
+        try:
+            state = json.loads(bytes(payload).decode("utf-8"))
+            if state.get("format") != DRIFT_STATE_FORMAT or state.get("backend") != self.backend:
+                raise ValueError(f"format {state.get('format')!r}, backend {state.get('backend')!r}")
+            if self.backend == "page_hinkley":
+                detector = PageHinkleyRingDetector.from_state(state["detector"])
+            else:
+                window = [float(residual) for residual in state["detector"]["window"]]
+                detector = _adwin_replay(state["detector"]["params"], window)
+            drift_detected = bool(state["drift_detected"])
+        except (ValueError, KeyError, TypeError, AttributeError) as exc:
+            logger.warning("Dropping unreadable drift state %s: %s", key, exc)
+            return False
+        self._monitors[key] = detector
+        if not isinstance(detector, PageHinkleyRingDetector):
+            self._windows[key] = deque(maxlen=DRIFT_ADWIN_REPLAY_MAX)
+            self._track_window(key, window)
+        self._drift_flags[key] = drift_detected
+        if state.get("last_checked"):
+            self._last_checked[key] = state["last_checked"]
+        return True
+
+    def pop_dirty(self) -> set[str]:
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def has_watermark(self, tenant_id: str) -> bool:
+        return tenant_id in self._watermarks
+
+    def get_watermark(self, tenant_id: str) -> Watermark | None:
+        return self._watermarks.get(tenant_id)
+
+    def set_watermark(self, tenant_id: str, watermark: Watermark | None, consumed: int = 0) -> None:
+        """Record how far a tenant's outcomes have been fed to its detectors.
+
+        Watermarks that moved are persisted with the next checkpoint, in the
+        same transaction as the detector state (see monitor_state).
+        """
+        self._watermarks[tenant_id] = watermark
+        if consumed and watermark is not None:
+            self._dirty_watermarks[tenant_id] = self._dirty_watermarks.get(tenant_id, 0) + consumed
+
+    def pop_dirty_watermarks(self) -> dict[str, tuple[datetime, str, int]]:
+        """{tenant_id: (outcome_at, prediction_id, consumed)} moved since the last call."""
+        dirty, self._dirty_watermarks = self._dirty_watermarks, {}
+        return {
+            tenant_id: (*self._watermarks[tenant_id], consumed)
+            for tenant_id, consumed in dirty.items()
+        }
+
+    def requeue(self, keys: set[str], watermarks: dict[str, tuple[datetime, str, int]]) -> None:
+        """Mark keys and watermarks dirty again after a failed checkpoint."""
+        self._dirty |= keys
+        for tenant_id, (_, _, consumed) in watermarks.items():
+            self._dirty_watermarks[tenant_id] = self._dirty_watermarks.get(tenant_id, 0) + consumed
+
+    def ingest_lock(self, tenant_id: str) -> asyncio.Lock:
+        lock = self._ingest_locks.get(tenant_id)
+        if lock is None:
+            lock = self._ingest_locks[tenant_id] = asyncio.Lock()
+        return lock
 
 
 # Module-level singleton
@@ -95,7 +441,13 @@ drift_monitor = DriftMonitor()
 
 
 async def check_all_models(pool, tenant_id: str) -> list[dict]:
-    """Query recent outcomes from DB and return drift status per model.
+    """Feed outcomes recorded since the last call and return drift status per model.
+
+    Only outcomes past the tenant's watermark are fetched, so each outcome
+    reaches the detectors exactly once and the cost is proportional to new
+    outcomes. The watermark is persisted in world_drift_watermarks by the
+    next monitor_state checkpoint, together with the detectors that consumed
+    up to it; callers restore the tenant's detectors before calling this.
 
     Returns list of:
     {
@@ -106,24 +458,30 @@ async def check_all_models(pool, tenant_id: str) -> list[dict]:
         "last_checked": str (ISO datetime)
     }
     """
-    rows = await pool.fetch(
-        """
-        SELECT p.model_id, p.prediction_type, p.predicted_value, o.outcome_value
-        FROM world_prediction_outcomes o
-        JOIN world_predictions p ON p.id = o.prediction_id AND p.tenant_id = o.tenant_id
-        WHERE o.tenant_id = $1
-        ORDER BY o.outcome_at ASC
-        """,
-        tenant_id,
-    )
-
-    for row in rows:
-        drift_monitor.update(
-            model_id=row["model_id"],
-            prediction_type=row["prediction_type"],
-            tenant_id=tenant_id,
-            predicted=float(row["predicted_value"]),
-            actual=float(row["outcome_value"]),
-        )
+    async with drift_monitor.ingest_lock(tenant_id):
+        if drift_monitor.has_watermark(tenant_id):
+            watermark = drift_monitor.get_watermark(tenant_id)
+        else:
+            watermark = await get_drift_watermark(pool, tenant_id)
+        consumed = 0
+
+        while True:
+            rows = await get_outcome_pairs_after(pool, tenant_id, watermark, DRIFT_INGEST_BATCH_SIZE)
+            # Detectors are independent per model, so each gets its residuals
+            # as one in-order batch.
+            residuals: dict[tuple[str, str], list[float]] = {}
+            for row in rows:
+                residuals.setdefault((row["model_id"], row["prediction_type"]), []).append(
+                    float(row["predicted_value"]) - float(row["outcome_value"])
+                )
+            for (model_id, prediction_type), values in residuals.items():
+                drift_monitor.update_many(model_id, prediction_type, tenant_id, values)
+            if rows:
+                watermark = (rows[-1]["outcome_at"], rows[-1]["prediction_id"])
+                consumed += len(rows)
+            if len(rows) < DRIFT_INGEST_BATCH_SIZE:
+                break
+
+        drift_monitor.set_watermark(tenant_id, watermark, consumed)
 
     return drift_monitor.get_all_status(tenant_id)
@@ -21,6 +21,7 @@ from .db import (
     resolve_epoch_outcome,
     upsert_decision_epoch,
 )
+from .feature_store import feature_store
 from .features import build_full_feature_vector, compute_feature_hash
 from .tenant_stats import load_tenant_stats_with_customer
 from .trajectory import load_customer_trajectory
@@ -146,7 +147,8 @@ async def create_epoch_for_invoice(
     # Get event counts for this invoice up to reference_time
     event_counts = await get_event_counts_for_object(pool, tenant_id, object_id, as_of_str)
 
-    # Resolve party (customer) for this invoice
+    # Resolve party (customer) for this invoice. Uncached: an epoch is
+    # recorded once, so it must not be built from a stale payer link.
     party_id = await get_party_id_for_invoice(pool, tenant_id, object_id)
 
     # Load tenant stats with customer percentile if not provided
@@ -210,8 +212,15 @@ async def sweep_invoices_for_epochs(
 ) -> int:
     """Sweep all open/overdue invoices for a tenant and create epochs where warranted.
 
+    With the feature store enabled the sweep refreshes the tenant's stored
+    features first and skips invoices whose sources and trigger are the same
+    as at their last epoch (the epoch for that trigger is frozen anyway).
+
     Returns the number of epochs created.
     """
+    if feature_store.enabled:
+        return await _sweep_changed_invoices(pool, tenant_id, tenant_stats=tenant_stats, limit=limit)
+
     rows = await pool.fetch(
         """
         SELECT id, tenant_id
@@ -249,6 +258,44 @@ async def sweep_invoices_for_epochs(
     return created
 
 
+async def _sweep_changed_invoices(
+    pool,
+    tenant_id: str,
+    *,
+    tenant_stats: dict[str, float] | None,
+    limit: int,
+) -> int:
+    stored = await feature_store.refresh(pool, tenant_id, limit=limit)
+    now = datetime.now(timezone.utc)
+
+    created = 0
+    skipped = 0
+    for row in stored:
+        trigger = determine_epoch_trigger(row["state"], now)
+        if trigger is None:
+            continue
+        if row.get("snapshot_trigger") == trigger and row.get("snapshot_fingerprint") == row["source_fingerprint"]:
+            skipped += 1
+            continue
+        result = await create_epoch_for_invoice(
+            pool,
+            tenant_id,
+            row["object_id"],
+            tenant_stats=tenant_stats,
+        )
+        if result is not None:
+            created += 1
+            await feature_store.mark_snapshot(
+                pool, tenant_id, row["object_id"], row["source_fingerprint"], result["epoch_trigger"],
+            )
+
+    logger.info(
+        "Epoch sweep for tenant %s: %d/%d invoices got epochs, %d unchanged",
+        tenant_id, created, len(stored), skipped,
+    )
+    return created
+
+
 async def resolve_pending_outcomes(
     pool,
     tenant_id: str | None = None,
@@ -0,0 +1,148 @@
+"""Feature assembly for serving.
+
+Gathering each feature family with its own queries costs about six round
+trips per invoice. assemble_feature_vector (predict_v2) reads one invoice's
+state, payer, event counts and payer history with a single CTE while the
+tenant stats and reliability index load concurrently from their caches.
+assemble_feature_vectors (bulk scoring) gathers each family for every
+requested invoice with one set-based query. Both build rows with
+build_full_feature_vector so bulk and single-object features stay identical.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any
+
+from .async_cache import AsyncCache
+from .db import (
+    get_event_counts_for_objects,
+    get_invoice_feature_inputs,
+    get_object_states_at,
+    get_party_id_for_invoice,
+    get_party_ids_for_invoices,
+)
+from .features import build_full_feature_vector
+from .reliability_index import reliability_index
+from .tenant_stats import load_tenant_stats, load_tenant_stats_with_customers
+from .trajectory import load_customer_trajectories, trajectory_from_history
+
+logger = logging.getLogger(__name__)
+
+# Invoice -> payer links almost never change once an invoice exists.
+_party_link_cache = AsyncCache.from_env("party_link", ttl_seconds=3600, stale_seconds=86400, max_entries=100000)
+
+
+async def load_party_id(pool, tenant_id: str, invoice_id: str) -> str | None:
+    """The invoice's payer (cached get_party_id_for_invoice).
+
+    A missing link is not cached: the pays relationship is often written
+    just after the invoice, and the payer must show up once it is.
+    """
+    return await _party_link_cache.get(
+        (tenant_id, invoice_id),
+        lambda: get_party_id_for_invoice(pool, tenant_id, invoice_id),
+        cache_none=False,
+    )
+
+
+async def assemble_feature_vector(
+    pool,
+    tenant_id: str,
+    object_id: str,
+    *,
+    reference_time: datetime | None = None,
+) -> dict[str, Any] | None:
+    """Build one invoice's full feature vector in a single database round trip.
+
+    Returns {"features", "tenant_stats", "trajectory", "party_id"}, or None if
+    the object does not exist.
+    """
+    now = reference_time or datetime.now(timezone.utc)
+    inputs, base_stats, reliabilities = await asyncio.gather(
+        get_invoice_feature_inputs(pool, tenant_id, object_id, now),
+        load_tenant_stats(pool, tenant_id),
+        reliability_index.tenant(pool, tenant_id),
+    )
+    if inputs is None:
+        return None
+
+    party_id = inputs["party_id"]
+    tenant_stats = base_stats
+    trajectory = None
+    if party_id:
+        tenant_stats = {**base_stats, "customer_reliability_percentile": reliabilities.percentile(party_id)}
+        trajectory = trajectory_from_history(inputs["payment_history"], now)
+
+    features = build_full_feature_vector(
+        inputs["state"],
+        inputs["estimated"],
+        reference_time=now,
+        tenant_stats=tenant_stats,
+        event_counts=inputs["event_counts"],
+        trajectory=trajectory,
+    )
+    return {
+        "features": features,
+        "tenant_stats": tenant_stats,
+        "trajectory": trajectory,
+        "party_id": party_id,
+    }
+
+
+async def assemble_feature_vectors(
+    pool,
+    tenant_id: str,
+    object_ids: list[str],
+    *,
+    reference_time: datetime | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Build full feature vectors for many invoices of one tenant.
+
+    Returns {object_id: {"features", "tenant_stats", "trajectory", "party_id"}}
+    in request order. Objects that do not exist are omitted.
+    """
+    now = reference_time or datetime.now(timezone.utc)
+    unique_ids = list(dict.fromkeys(object_ids))
+
+    objects = await get_object_states_at(pool, tenant_id, unique_ids, now)
+    found_ids = [object_id for object_id in unique_ids if object_id in objects]
+    if not found_ids:
+        return {}
+
+    party_by_object = await get_party_ids_for_invoices(pool, tenant_id, found_ids)
+    party_ids = sorted(set(party_by_object.values()))
+
+    base_stats = await load_tenant_stats(pool, tenant_id)
+    stats_by_party = await load_tenant_stats_with_customers(pool, tenant_id, party_ids)
+    event_counts = await get_event_counts_for_objects(pool, tenant_id, found_ids, as_of=now)
+    trajectories = await load_customer_trajectories(pool, tenant_id, party_ids, reference_time=now)
+
+    assembled: dict[str, dict[str, Any]] = {}
+    for object_id in found_ids:
+        obj = objects[object_id]
+        party_id = party_by_object.get(object_id)
+        tenant_stats = stats_by_party.get(party_id, base_stats) if party_id else base_stats
+        trajectory = trajectories.get(party_id) if party_id else None
+        features = build_full_feature_vector(
+            obj["state"],
+            obj["estimated"],
+            reference_time=now,
+            tenant_stats=tenant_stats,
+            event_counts=event_counts.get(object_id),
+            trajectory=trajectory,
+        )
+        assembled[object_id] = {
+            "features": features,
+            "tenant_stats": tenant_stats,
+            "trajectory": trajectory,
+            "party_id": party_id,
+        }
+
+    logger.info(
+        "Assembled %d/%d feature vectors for tenant %s",
+        len(assembled), len(unique_ids), tenant_id,
+    )
+    return assembled
@@ -0,0 +1,187 @@
+"""Materialized invoice feature store (world_model_invoice_features).
+
+Building an invoice's feature vector from raw state costs about six queries,
+and /predict/v2 and the epoch sweep used to pay that on every call. The
+store keeps the latest 34-feature vector and feature hash of each open
+invoice. refresh() fingerprints every feature family's sources — invoice
+version, last change to the invoice's event counts, latest change to the
+customer's invoices, tenant stats — and rebuilds (with the set-based feature
+assembly) only rows whose fingerprint changed or that are older than
+ML_FEATURE_STORE_MAX_AGE_SECONDS, since time features such as daysOverdue
+move with the clock.
+
+/predict/v2 serves a stored row only while its fingerprint matches the
+invoice's current watermarks, read in the same query as the row, and it is
+within the max age; a new event or a change to the customer's invoices
+makes it a miss until the next refresh. The epoch sweep only snapshots invoices whose
+fingerprint or epoch trigger changed since their last epoch.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any
+
+from .db import (
+    get_invoice_feature_sources,
+    get_invoice_features,
+    mark_invoice_features_snapshot,
+    prune_invoice_features,
+    upsert_invoice_features,
+)
+from .feature_assembly import assemble_feature_vectors
+from .features import compute_feature_hash
+from .tenant_stats import load_tenant_stats
+
+logger = logging.getLogger(__name__)
+
+FEATURE_STORE_ENABLED = os.environ.get("ML_FEATURE_STORE_ENABLED", "1").lower() in ("1", "true", "yes")
+FEATURE_STORE_MAX_AGE_SECONDS = float(os.environ.get("ML_FEATURE_STORE_MAX_AGE_SECONDS", "900"))
+
+
+def _iso(value: Any) -> str | None:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def source_fingerprint(source: dict[str, Any], tenant_stats: dict[str, float]) -> str:
+    """sha256 over the change watermarks every feature family is built from."""
+    canonical = json.dumps(
+        {
+            "version": source["version"],
+            "party_id": source.get("party_id"),
+            "events_updated_at": _iso(source.get("events_updated_at")),
+            "history_updated_at": _iso(source.get("history_updated_at")),
+            "tenant_stats": tenant_stats,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class InvoiceFeatureStore:
+    """Reads and incrementally refreshes materialized invoice features."""
+
+    def __init__(
+        self,
+        enabled: bool = FEATURE_STORE_ENABLED,
+        max_age_seconds: float = FEATURE_STORE_MAX_AGE_SECONDS,
+    ):
+        self.enabled = enabled
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.refreshed = 0
+        self.unchanged = 0
+
+    async def get(self, pool, tenant_id: str, object_id: str) -> dict | None:
+        """The stored row for an invoice, or None when absent or stale."""
+        if not self.enabled:
+            return None
+        row, tenant_stats = await asyncio.gather(
+            get_invoice_features(pool, tenant_id, object_id, self.max_age_seconds),
+            load_tenant_stats(pool, tenant_id),
+        )
+        if row is not None and row["source_fingerprint"] != source_fingerprint(row, tenant_stats):
+            row = None
+        if row is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return row
+
+    def _is_current(self, source: dict[str, Any], fingerprint: str, now: datetime) -> bool:
+        refreshed_at = source.get("refreshed_at")
+        return (
+            source.get("features") is not None
+            and source.get("source_fingerprint") == fingerprint
+            and refreshed_at is not None
+            and (now - refreshed_at).total_seconds() < self.max_age_seconds
+        )
+
+    async def refresh(
+        self,
+        pool,
+        tenant_id: str,
+        *,
+        object_ids: list[str] | None = None,
+        limit: int = 200,
+    ) -> list[dict[str, Any]]:
+        """Bring the rows of a tenant's open invoices up to date.
+
+        Returns one dict per open invoice (object_id, state, features,
+        feature_hash, source_fingerprint, snapshot_fingerprint,
+        snapshot_trigger, and whether this call rebuilt it). Without
+        object_ids, rows of invoices that closed or changed version outside
+        the scan are pruned as well.
+        """
+        sources = await get_invoice_feature_sources(pool, tenant_id, object_ids=object_ids, limit=limit)
+        tenant_stats = await load_tenant_stats(pool, tenant_id) if sources else {}
+        now = datetime.now(timezone.utc)
+
+        stale: list[dict[str, Any]] = []
+        for source in sources:
+            fingerprint = source_fingerprint(source, tenant_stats)
+            source["rebuilt"] = not self._is_current(source, fingerprint, now)
+            if source["rebuilt"]:
+                stale.append(source)
+            source["source_fingerprint"] = fingerprint
+
+        if stale:
+            assembled = await assemble_feature_vectors(
+                pool, tenant_id, [source["object_id"] for source in stale], reference_time=now,
+            )
+            rows = []
+            for source in stale:
+                entry = assembled.get(source["object_id"])
+                if entry is None:
+                    source["rebuilt"] = False
+                    continue
+                features = entry["features"]
+                source["features"] = features
+                source["feature_hash"] = compute_feature_hash(features)
+                rows.append({
+                    "object_id": source["object_id"],
+                    "object_version": source["version"],
+                    "party_id": source.get("party_id"),
+                    "source_fingerprint": source["source_fingerprint"],
+                    "state": source["state"],
+                    "features": features,
+                    "feature_hash": source["feature_hash"],
+                    "tenant_stats_available": bool(entry["tenant_stats"] and entry["tenant_stats"].get("invoice_count", 0) > 0),
+                    "trajectory_available": bool(entry["trajectory"] and entry["trajectory"].get("invoices_paid_count", 0) > 0),
+                })
+            await upsert_invoice_features(pool, tenant_id, rows)
+            self.refreshed += len(rows)
+        self.unchanged += len(sources) - len(stale)
+
+        if object_ids is None:
+            await prune_invoice_features(pool, tenant_id)
+
+        logger.info(
+            "Feature store refresh for tenant %s: %d/%d rows rebuilt",
+            tenant_id, len(stale), len(sources),
+        )
+        return [source for source in sources if source.get("features") is not None]
+
+    async def mark_snapshot(self, pool, tenant_id: str, object_id: str, fingerprint: str, trigger: str) -> None:
+        await mark_invoice_features_snapshot(pool, tenant_id, object_id, fingerprint, trigger)
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshed": self.refreshed,
+            "unchanged": self.unchanged,
+        }
+
+
+# Module-level singleton
+feature_store = InvoiceFeatureStore()
@@ -0,0 +1,111 @@
+"""Server-side micro-batching of single-row predictions.
+
+Callers send one /predict per invoice from many concurrent workflows. When
+enabled, the batcher holds each row for up to ML_PREDICT_MICROBATCH_WINDOW_MS
+(or until ML_PREDICT_MICROBATCH_MAX_ROWS rows share a key), then scores all
+rows of a key with one call, so model selection runs once and the model's
+kernel scores them as one matrix. Each waiting handler gets its own row's
+result back. Rows are keyed like /predict/batch groups: (tenant_id,
+prediction_type, coverage), which resolves to one selected model.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Hashable
+
+MICROBATCH_ENABLED = os.environ.get("ML_PREDICT_MICROBATCH", "0").lower() in ("1", "true", "yes")
+MICROBATCH_WINDOW_MS = float(os.environ.get("ML_PREDICT_MICROBATCH_WINDOW_MS", "2"))
+MICROBATCH_MAX_ROWS = int(os.environ.get("ML_PREDICT_MICROBATCH_MAX_ROWS", "256"))
+
+# (key, rows) -> one result per row, in order
+ScoreBatch = Callable[[Hashable, list[Any]], Awaitable[list[Any]]]
+
+
+class _PendingBatch:
+    __slots__ = ("rows", "futures", "timer")
+
+    def __init__(self):
+        self.rows: list[Any] = []
+        self.futures: list[asyncio.Future] = []
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class MicroBatcher:
+    """Collects rows per key for a short window and scores them together."""
+
+    def __init__(
+        self,
+        score: ScoreBatch,
+        *,
+        enabled: bool = MICROBATCH_ENABLED,
+        window_ms: float = MICROBATCH_WINDOW_MS,
+        max_rows: int = MICROBATCH_MAX_ROWS,
+    ):
+        self.score = score
+        self.enabled = enabled
+        self.window_seconds = window_ms / 1000.0
+        self.max_rows = max(1, max_rows)
+        self._pending: dict[Hashable, _PendingBatch] = {}
+        self._flushes: set[asyncio.Task] = set()
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+
+    async def submit(self, key: Hashable, row: Any) -> Any:
+        """Queue one row and wait for its result."""
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = _PendingBatch()
+            self._pending[key] = batch
+            batch.timer = loop.call_later(self.window_seconds, self._flush, key, batch)
+        future = loop.create_future()
+        batch.rows.append(row)
+        batch.futures.append(future)
+        if len(batch.rows) >= self.max_rows:
+            self._flush(key, batch)
+        return await future
+
+    def _flush(self, key: Hashable, batch: _PendingBatch) -> None:
+        if self._pending.get(key) is not batch:
+            return  # already flushed (size limit beat the timer)
+        del self._pending[key]
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.ensure_future(self._run(key, batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _run(self, key: Hashable, batch: _PendingBatch) -> None:
+        self.batches += 1
+        self.rows += len(batch.rows)
+        self.largest_batch = max(self.largest_batch, len(batch.rows))
+        try:
+            results = await self.score(key, batch.rows)
+            if len(results) != len(batch.rows):
+                raise RuntimeError(f"score returned {len(results)} results for {len(batch.rows)} rows")
+        except asyncio.CancelledError:
+            self._fail(batch, RuntimeError("micro-batch scoring was cancelled"))
+            raise
+        except Exception as exc:
+            self._fail(batch, exc)
+            return
+        for future, result in zip(batch.futures, results):
+            if not future.done():  # the waiting handler may have been cancelled
+                future.set_result(result)
+
+    @staticmethod
+    def _fail(batch: _PendingBatch, exc: BaseException) -> None:
+        for future in batch.futures:
+            if not future.done():
+                future.set_exception(exc)
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "batches": self.batches,
+            "rows": self.rows,
+            "largest_batch": self.largest_batch,
+        }
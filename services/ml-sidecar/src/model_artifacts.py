@@ -0,0 +1,545 @@
+"""Durable storage for fitted models.
+
+The model caches in server.py are process-local, so an eviction or a restart
+used to mean retraining from scratch. Every fitted model is now also written
+to world_model_artifacts (migration 094) when it is trained, and a cache miss
+reloads it from there instead.
+
+Payloads are compressed npz archives without pickle: the serving arrays
+(compiled linear / Cox kernels, calibrator thresholds, conformal residuals)
+plus a JSON header with the scalar fields. CatBoost models are embedded in
+their native cbm format. sklearn/lifelines estimators are not stored; loaded
+models serve through their compiled kernels. Each payload's checksum covers
+the release it belongs to, so a row copied to another release fails to load.
+Serialization runs in a worker thread: rebuilding a CatBoost model and its
+SHAP explainer would otherwise stall every request on the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy as np
+
+from .catboost_model import TrainedCatBoostModel, build_shap_explainer
+from .conformal import ConformalTable, table_from_sorted_residuals
+from .db import get_model_artifact, insert_model_artifact
+from .survival import CoxKernel, TrainedSurvivalModel
+from .training import LinearKernel, TrainedInterventionModel, TrainedProbabilityModel
+from .uplift import TrainedUpliftModel
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = "npz.v1"
+MISS_TTL_SECONDS = float(os.environ.get("ML_ARTIFACT_MISS_TTL_SECONDS", "60"))
+MAX_REMEMBERED_MISSES = 4096
+
+
+class ArtifactError(ValueError):
+    """A stored artifact that cannot be loaded (bad checksum, format or kind)."""
+
+
+def artifact_checksum(release_id: str, payload: bytes) -> str:
+    digest = hashlib.sha256()
+    digest.update(release_id.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(payload)
+    return digest.hexdigest()
+
+
+def _encode(kind: str, header: dict[str, Any], arrays: dict[str, np.ndarray]) -> bytes:
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        __header__=np.asarray(json.dumps({"kind": kind, **header}, default=str)),
+        **arrays,
+    )
+    return buffer.getvalue()
+
+
+def _decode(kind: str, payload: bytes) -> tuple[dict[str, Any], dict[str, np.ndarray]]:
+    with np.load(io.BytesIO(payload), allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    header = json.loads(str(arrays.pop("__header__")))
+    if header.get("kind") != kind:
+        raise ArtifactError(f"expected a {kind} artifact, got {header.get('kind')!r}")
+    return header, arrays
+
+
+# ---------------------------------------------------------------------------
+# Shared parts
+# ---------------------------------------------------------------------------
+
+
+def _kernel_arrays(prefix: str, kernel: LinearKernel | None) -> dict[str, np.ndarray]:
+    if kernel is None:
+        raise ArtifactError("model has no compiled kernel to store")
+    return {f"{prefix}_coef": kernel.coef, f"{prefix}_intercept": np.asarray(kernel.intercept)}
+
+
+def _kernel_from(prefix: str, arrays: dict[str, np.ndarray]) -> LinearKernel:
+    return LinearKernel(
+        coef=np.ascontiguousarray(arrays[f"{prefix}_coef"], dtype=np.float64),
+        intercept=float(arrays[f"{prefix}_intercept"]),
+    )
+
+
+def _calibrator_parts(calibrator: dict[str, Any] | None) -> tuple[dict | None, dict[str, np.ndarray]]:
+    """Split a calibrator into JSON scalars and threshold arrays (no fitted objects)."""
+    if not calibrator:
+        return None, {}
+    scalars = {
+        key: value
+        for key, value in calibrator.items()
+        if key not in ("model", "x_thresholds", "y_thresholds")
+    }
+    if calibrator["method"] != "isotonic":
+        return scalars, {}
+    if "x_thresholds" not in calibrator:
+        # apply_calibrator derives the thresholds on first use
+        from .calibration import isotonic_thresholds
+
+        calibrator["x_thresholds"], calibrator["y_thresholds"] = isotonic_thresholds(calibrator["model"])
+    return scalars, {
+        "calibrator_x": np.asarray(calibrator["x_thresholds"], dtype=np.float64),
+        "calibrator_y": np.asarray(calibrator["y_thresholds"], dtype=np.float64),
+    }
+
+
+def _calibrator_from(scalars: dict | None, arrays: dict[str, np.ndarray]) -> dict[str, Any] | None:
+    if scalars is None:
+        return None
+    calibrator = dict(scalars)
+    if calibrator["method"] == "isotonic":
+        calibrator["x_thresholds"] = arrays["calibrator_x"]
+        calibrator["y_thresholds"] = arrays["calibrator_y"]
+        calibrator["model"] = None
+    else:
+        calibrator["model"] = calibrator["temperature"]
+    return calibrator
+
+
+def _conformal_arrays(table: ConformalTable | None) -> dict[str, np.ndarray]:
+    if table is None:
+        return {}
+    arrays = {"conformal_sorted": table.sorted_abs_residuals}
+    if table.bin_edges is not None and table.bin_sorted_abs_residuals is not None:
+        arrays["conformal_bin_edges"] = table.bin_edges
+        arrays["conformal_bin_sizes"] = np.asarray(
+            [len(resids) for resids in table.bin_sorted_abs_residuals], dtype=np.int64,
+        )
+        arrays["conformal_bin_sorted"] = np.concatenate(table.bin_sorted_abs_residuals)
+    return arrays
+
+
+def _conformal_from(arrays: dict[str, np.ndarray]) -> ConformalTable | None:
+    if "conformal_sorted" not in arrays:
+        return None
+    bin_sorted = None
+    if "conformal_bin_edges" in arrays:
+        offsets = np.cumsum(arrays["conformal_bin_sizes"])[:-1]
+        bin_sorted = np.split(arrays["conformal_bin_sorted"], offsets)
+    return table_from_sorted_residuals(
+        arrays["conformal_sorted"],
+        bin_edges=arrays.get("conformal_bin_edges"),
+        bin_sorted_abs_residuals=bin_sorted,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Per-kind serializers
+# ---------------------------------------------------------------------------
+
+
+def dump_probability_model(model: TrainedProbabilityModel) -> bytes:
+    calibrator, calibrator_arrays = _calibrator_parts(model.calibrator)
+    return _encode(
+        "probability",
+        {
+            "model_id": model.model_id,
+            "scope": model.scope,
+            "tenant_id": model.tenant_id,
+            "prediction_type": model.prediction_type,
+            "feature_names": model.feature_names,
+            "calibrator": calibrator,
+            "trained_at": model.trained_at,
+            "sample_count": model.sample_count,
+            "positive_rate": model.positive_rate,
+            "brier_score": model.brier_score,
+            "roc_auc": model.roc_auc,
+            "metadata": model.metadata,
+        },
+        {
+            **_kernel_arrays("kernel", model.kernel),
+            **calibrator_arrays,
+            **_conformal_arrays(model.conformal),
+            "residuals": np.asarray(model.residuals, dtype=np.float64),
+        },
+    )
+
+
+def load_probability_model(payload: bytes) -> TrainedProbabilityModel:
+    header, arrays = _decode("probability", payload)
+    return TrainedProbabilityModel(
+        model_id=header["model_id"],
+        release_id=None,
+        release_status="candidate",
+        scope=header["scope"],
+        tenant_id=header["tenant_id"],
+        prediction_type=header["prediction_type"],
+        feature_names=header["feature_names"],
+        estimator=None,
+        calibrator=_calibrator_from(header["calibrator"], arrays),
+        trained_at=header["trained_at"],
+        sample_count=header["sample_count"],
+        positive_rate=header["positive_rate"],
+        brier_score=header["brier_score"],
+        roc_auc=header["roc_auc"],
+        residuals=arrays["residuals"].tolist(),
+        metadata=header["metadata"],
+        kernel=_kernel_from("kernel", arrays),
+        conformal=_conformal_from(arrays),
+    )
+
+
+def dump_catboost_model(model: TrainedCatBoostModel) -> bytes:
+    import tempfile
+
+    # CatBoost only writes its native format to a file.
+    with tempfile.NamedTemporaryFile(suffix=".cbm") as handle:
+        model.model.save_model(handle.name, format="cbm")
+        cbm = handle.read()
+    calibrator, calibrator_arrays = _calibrator_parts(model.calibrator)
+    return _encode(
+        "catboost",
+        {
+            "model_id": model.model_id,
+            "scope": model.scope,
+            "tenant_id": model.tenant_id,
+            "prediction_type": model.prediction_type,
+            "feature_names": model.feature_names,
+            "calibrator": calibrator,
+            "trained_at": model.trained_at,
+            "sample_count": model.sample_count,
+            "positive_rate": model.positive_rate,
+            "brier_score": model.brier_score,
+            "roc_auc": model.roc_auc,
+            "metadata": model.metadata,
+        },
+        {"cbm": np.frombuffer(cbm, dtype=np.uint8), **calibrator_arrays},
+    )
+
+
+def load_catboost_model(payload: bytes) -> TrainedCatBoostModel:
+    from catboost import CatBoostClassifier
+
+    header, arrays = _decode("catboost", payload)
+    classifier = CatBoostClassifier()
+    classifier.load_model(blob=arrays["cbm"].tobytes())
+
+    return TrainedCatBoostModel(
+        model_id=header["model_id"],
+        release_id=None,
+        release_status="candidate",
+        scope=header["scope"],
+        tenant_id=header["tenant_id"],
+        prediction_type=header["prediction_type"],
+        feature_names=header["feature_names"],
+        model=classifier,
+        calibrator=_calibrator_from(header["calibrator"], arrays),
+        trained_at=header["trained_at"],
+        sample_count=header["sample_count"],
+        positive_rate=header["positive_rate"],
+        brier_score=header["brier_score"],
+        roc_auc=header["roc_auc"],
+        metadata=header["metadata"],
+        shap_explainer=build_shap_explainer(classifier),
+    )
+
+
+def dump_survival_model(model: TrainedSurvivalModel) -> bytes:
+    if model.kernel is None:
+        raise ArtifactError("survival model has no compiled Cox kernel to store")
+    return _encode(
+        "survival",
+        {
+            "model_id": model.model_id,
+            "tenant_id": model.tenant_id,
+            "scope": model.scope,
+            "feature_names": model.feature_names,
+            "trained_at": model.trained_at,
+            "sample_count": model.sample_count,
+            "event_count": model.event_count,
+            "censored_count": model.censored_count,
+            "concordance": model.concordance,
+            "median_survival_days": model.median_survival_days,
+            "metadata": model.metadata,
+            "offset": model.kernel.offset,
+        },
+        {
+            "coef": model.kernel.coef,
+            "timeline": model.kernel.timeline,
+            "baseline_cumulative_hazard": model.kernel.baseline_cumulative_hazard,
+        },
+    )
+
+
+def load_survival_model(payload: bytes) -> TrainedSurvivalModel:
+    header, arrays = _decode("survival", payload)
+    return TrainedSurvivalModel(
+        model_id=header["model_id"],
+        tenant_id=header["tenant_id"],
+        scope=header["scope"],
+        feature_names=header["feature_names"],
+        model=None,
+        trained_at=header["trained_at"],
+        sample_count=header["sample_count"],
+        event_count=header["event_count"],
+        censored_count=header["censored_count"],
+        concordance=header["concordance"],
+        median_survival_days=header["median_survival_days"],
+        metadata=header["metadata"],
+        kernel=CoxKernel(
+            coef=np.ascontiguousarray(arrays["coef"], dtype=np.float64),
+            offset=float(header["offset"]),
+            timeline=arrays["timeline"],
+            baseline_cumulative_hazard=arrays["baseline_cumulative_hazard"],
+        ),
+    )
+
+
+def dump_uplift_model(model: TrainedUpliftModel) -> bytes:
+    return _encode(
+        "uplift",
+        {
+            "model_id": model.model_id,
+            "tenant_id": model.tenant_id,
+            "action_class": model.action_class,
+            "scope": model.scope,
+            "feature_names": model.feature_names,
+            "trained_at": model.trained_at,
+            "treatment_sample_count": model.treatment_sample_count,
+            "control_sample_count": model.control_sample_count,
+            "treatment_positive_rate": model.treatment_positive_rate,
+            "control_positive_rate": model.control_positive_rate,
+            "observed_lift": model.observed_lift,
+            "metadata": model.metadata,
+        },
+        {
+            **_kernel_arrays("treatment", model.treatment_kernel),
+            **_kernel_arrays("control", model.control_kernel),
+            **_conformal_arrays(model.conformal),
+            "residuals": np.asarray(model.residuals, dtype=np.float64),
+        },
+    )
+
+
+def load_uplift_model(payload: bytes) -> TrainedUpliftModel:
+    header, arrays = _decode("uplift", payload)
+    return TrainedUpliftModel(
+        model_id=header["model_id"],
+        tenant_id=header["tenant_id"],
+        action_class=header["action_class"],
+        scope=header["scope"],
+        feature_names=header["feature_names"],
+        treatment_estimator=None,
+        control_estimator=None,
+        trained_at=header["trained_at"],
+        treatment_sample_count=header["treatment_sample_count"],
+        control_sample_count=header["control_sample_count"],
+        treatment_positive_rate=header["treatment_positive_rate"],
+        control_positive_rate=header["control_positive_rate"],
+        observed_lift=header["observed_lift"],
+        residuals=arrays["residuals"].tolist(),
+        metadata=header["metadata"],
+        treatment_kernel=_kernel_from("treatment", arrays),
+        control_kernel=_kernel_from("control", arrays),
+        conformal=_conformal_from(arrays),
+    )
+
+
+def dump_intervention_model(model: TrainedInterventionModel) -> bytes:
+    return _encode(
+        "intervention",
+        {
+            "model_id": model.model_id,
+            "tenant_id": model.tenant_id,
+            "action_class": model.action_class,
+            "object_type": model.object_type,
+            "field": model.field,
+            "feature_names": model.feature_names,
+            "trained_at": model.trained_at,
+            "sample_count": model.sample_count,
+            "mean_absolute_error": model.mean_absolute_error,
+            "r2_score": model.r2_score,
+            "delta_mean": model.delta_mean,
+            "metadata": model.metadata,
+        },
+        _kernel_arrays("kernel", model.kernel),
+    )
+
+
+def load_intervention_model(payload: bytes) -> TrainedInterventionModel:
+    header, arrays = _decode("intervention", payload)
+    return TrainedInterventionModel(
+        model_id=header["model_id"],
+        tenant_id=header["tenant_id"],
+        action_class=header["action_class"],
+        object_type=header["object_type"],
+        field=header["field"],
+        feature_names=header["feature_names"],
+        estimator=None,
+        trained_at=header["trained_at"],
+        sample_count=header["sample_count"],
+        mean_absolute_error=header["mean_absolute_error"],
+        r2_score=header["r2_score"],
+        delta_mean=header["delta_mean"],
+        metadata=header["metadata"],
+        kernel=_kernel_from("kernel", arrays),
+    )
+
+
+SERIALIZERS: dict[str, tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "probability": (dump_probability_model, load_probability_model),
+    "catboost": (dump_catboost_model, load_catboost_model),
+    "survival": (dump_survival_model, load_survival_model),
+    "uplift": (dump_uplift_model, load_uplift_model),
+    "intervention": (dump_intervention_model, load_intervention_model),
+}
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+
+class ModelArtifactStore:
+    """Saves fitted models at training time and loads them on cache misses.
+
+    Lookups that found nothing are remembered for MISS_TTL_SECONDS so
+    scopes without a model (most tenants have no CatBoost model) do not
+    query Postgres on every request.
+    """
+
+    def __init__(self, miss_ttl_seconds: float = MISS_TTL_SECONDS):
+        self.miss_ttl_seconds = miss_ttl_seconds
+        self._misses: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self.saved = 0
+        self.loaded = 0
+        self.failures = 0
+
+    def clear(self) -> None:
+        self._misses.clear()
+
+    def _recent_miss(self, lookup: tuple[str, str]) -> bool:
+        missed_at = self._misses.get(lookup)
+        if missed_at is None:
+            return False
+        if time.monotonic() - missed_at < self.miss_ttl_seconds:
+            return True
+        del self._misses[lookup]
+        return False
+
+    def _remember_miss(self, lookup: tuple[str, str]) -> None:
+        self._misses[lookup] = time.monotonic()
+        self._misses.move_to_end(lookup)
+        while len(self._misses) > MAX_REMEMBERED_MISSES:
+            self._misses.popitem(last=False)
+
+    async def save(
+        self,
+        pool,
+        kind: str,
+        model,
+        *,
+        release_id: str,
+        cache_key: str,
+        tenant_id: str | None,
+    ) -> bool:
+        """Serialize and store a model. Failures are logged, never raised."""
+        if pool is None:
+            return False
+        dump, _ = SERIALIZERS[kind]
+        try:
+            payload = await asyncio.to_thread(dump, model)
+            await insert_model_artifact(
+                pool,
+                {
+                    "release_id": release_id,
+                    "model_kind": kind,
+                    "cache_key": cache_key,
+                    "tenant_id": tenant_id,
+                    "model_id": model.model_id,
+                    "format": ARTIFACT_FORMAT,
+                    "payload": payload,
+                    "checksum": artifact_checksum(release_id, payload),
+                },
+            )
+        except Exception as exc:
+            self.failures += 1
+            logger.warning("Could not store %s artifact for %s: %s", kind, cache_key, exc)
+            return False
+        self._misses.pop((kind, f"release:{release_id}"), None)
+        self._misses.pop((kind, f"key:{cache_key}"), None)
+        self.saved += 1
+        return True
+
+    async def load(
+        self,
+        pool,
+        kind: str,
+        *,
+        release_id: str | None = None,
+        cache_key: str | None = None,
+    ):
+        """Load the artifact of a release, or the newest one stored under a cache key.
+
+        Returns the model with release_id set, or None if nothing usable is stored.
+        """
+        if pool is None:
+            return None
+        lookup = (kind, f"release:{release_id}" if release_id is not None else f"key:{cache_key}")
+        if self._recent_miss(lookup):
+            return None
+        try:
+            row = await get_model_artifact(pool, kind, release_id=release_id, cache_key=cache_key)
+        except Exception as exc:
+            logger.warning("Could not look up %s artifact %s: %s", kind, lookup[1], exc)
+            return None
+        if row is None:
+            self._remember_miss(lookup)
+            return None
+
+        try:
+            model = await asyncio.to_thread(_decode_artifact, kind, row)
+        except Exception as exc:
+            self.failures += 1
+            self._remember_miss(lookup)
+            logger.warning("Discarding unreadable %s artifact %s: %s", kind, row["release_id"], exc)
+            return None
+        if hasattr(model, "release_id"):
+            model.release_id = row["release_id"]
+        self.loaded += 1
+        return model
+
+
+def _decode_artifact(kind: str, row: dict):
+    """Verify and deserialize a stored artifact row (runs off the event loop)."""
+    if row["format"] != ARTIFACT_FORMAT:
+        raise ArtifactError(f"unsupported format {row['format']!r}")
+    if artifact_checksum(row["release_id"], row["payload"]) != row["checksum"]:
+        raise ArtifactError("checksum mismatch")
+    _, load = SERIALIZERS[kind]
+    return load(row["payload"])
+
+
+# Module-level singleton
+artifact_store = ModelArtifactStore()
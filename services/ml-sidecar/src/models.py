@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class PredictRequest(BaseModel):
@@ -11,6 +11,7 @@ class PredictRequest(BaseModel):
     object_id: str
     prediction_type: str
     features: dict
+    coverage: Optional[float] = Field(default=None, gt=0.0, lt=1.0)
 
 
 class ConfidenceInterval(BaseModel):
@@ -59,6 +60,14 @@ class PredictResponse(BaseModel):
     selection: ModelSelectionInfo
 
 
+class PredictBatchRequest(BaseModel):
+    items: list[PredictRequest]
+
+
+class PredictBatchResponse(BaseModel):
+    results: list[PredictResponse]
+
+
 class CalibrateRequest(BaseModel):
     model_id: str
     prediction_type: str
@@ -0,0 +1,158 @@
+"""Checkpoint and lazy restore of drift and OOD monitor state.
+
+drift_monitor and distribution_monitor live in process memory. This module
+periodically writes the keys that changed since the last checkpoint to
+world_model_monitor_state (migration 093), drift keys in one transaction with
+the tenants' ingest watermarks, and, after a restart, restores each key from
+there the first time it is needed, so a deploy does not reset every tenant to
+"no drift" / "in distribution".
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+
+from .db import get_monitor_states, upsert_drift_checkpoint, upsert_monitor_states
+from .drift import DriftMonitor, drift_monitor
+from .ood import DistributionMonitor, distribution_monitor
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_INTERVAL_SECONDS = float(os.environ.get("ML_MONITOR_CHECKPOINT_SECONDS", "60"))
+
+
+def _drift_tenant(key: str) -> str:
+    # key format: tenant_id:model_id:prediction_type
+    return key.split(":", 1)[0]
+
+
+def _ood_tenant(key: str) -> str:
+    # key format: tenant_id:prediction_type
+    return key.rsplit(":", 1)[0]
+
+
+class MonitorStateStore:
+    """Persists one DriftMonitor and one DistributionMonitor."""
+
+    def __init__(
+        self,
+        drift: DriftMonitor,
+        ood: DistributionMonitor,
+        interval_seconds: float = CHECKPOINT_INTERVAL_SECONDS,
+    ):
+        self.drift = drift
+        self.ood = ood
+        self.interval_seconds = interval_seconds
+        # (kind, key or "tenant:<id>") already looked up since start
+        self._attempted: set[tuple[str, str]] = set()
+        self._task: asyncio.Task | None = None
+        self.restored = 0
+        self.checkpointed = 0
+
+    def reset(self) -> None:
+        self._attempted.clear()
+
+    async def _restore(self, pool, kind: str, attempt_key: str, monitor, **lookup) -> None:
+        if pool is None or (kind, attempt_key) in self._attempted:
+            return
+        self._attempted.add((kind, attempt_key))
+        try:
+            states = await get_monitor_states(pool, kind, **lookup)
+        except Exception as exc:
+            logger.warning("Could not load %s monitor state for %s: %s", kind, attempt_key, exc)
+            return
+        for state_key, payload in states.items():
+            try:
+                if monitor.import_state(state_key, payload):
+                    self.restored += 1
+            except Exception as exc:
+                logger.warning("Discarding unreadable %s monitor state %s: %s", kind, state_key, exc)
+
+    async def restore_drift(self, pool, model_id: str, prediction_type: str, tenant_id: str) -> None:
+        """Restore one drift detector if it is not in memory yet."""
+        key = self.drift._key(model_id, prediction_type, tenant_id)
+        if key in self.drift._monitors or ("drift", f"tenant:{tenant_id}") in self._attempted:
+            return
+        await self._restore(pool, "drift", key, self.drift, state_key=key)
+
+    async def restore_drift_tenant(self, pool, tenant_id: str) -> None:
+        """Restore every persisted drift detector of a tenant."""
+        await self._restore(pool, "drift", f"tenant:{tenant_id}", self.drift, tenant_id=tenant_id)
+
+    async def restore_ood(self, pool, tenant_id: str, prediction_type: str) -> None:
+        """Restore one OOD reference table if it is not in memory yet."""
+        key = self.ood._key(tenant_id, prediction_type)
+        if key in self.ood._distributions:
+            return
+        await self._restore(pool, "ood", key, self.ood, state_key=key)
+
+    async def checkpoint(self, pool) -> int:
+        """Write every monitor changed since the last checkpoint. Returns the count.
+
+        Drift detectors are written in one transaction with the ingest
+        watermarks they have consumed up to, so a restart never resumes past
+        outcomes that the restored detectors have not seen.
+        """
+        if pool is None:
+            return 0
+        written = await self._checkpoint_drift(pool) + await self._checkpoint_ood(pool)
+        self.checkpointed += written
+        return written
+
+    async def _checkpoint_drift(self, pool) -> int:
+        dirty = self.drift.pop_dirty()
+        watermarks = self.drift.pop_dirty_watermarks()
+        states = self._export(self.drift, dirty, _drift_tenant)
+        try:
+            await upsert_drift_checkpoint(pool, states, watermarks)
+        except Exception as exc:
+            logger.warning("Monitor checkpoint failed for %d drift keys: %s", len(states), exc)
+            self.drift.requeue(dirty, watermarks)
+            return 0
+        return len(states)
+
+    async def _checkpoint_ood(self, pool) -> int:
+        dirty = self.ood.pop_dirty()
+        states = self._export(self.ood, dirty, _ood_tenant)
+        try:
+            await upsert_monitor_states(pool, "ood", states)
+        except Exception as exc:
+            logger.warning("Monitor checkpoint failed for %d ood keys: %s", len(states), exc)
+            self.ood._dirty |= dirty
+            return 0
+        return len(states)
+
+    @staticmethod
+    def _export(monitor, keys: set[str], tenant_of) -> list[tuple[str, str, bytes]]:
+        states = []
+        for key in keys:
+            payload = monitor.export_state(key)
+            if payload is not None:
+                states.append((key, tenant_of(key), payload))
+        return states
+
+    async def _run(self, pool) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.checkpoint(pool)
+
+    def start(self, pool) -> None:
+        if self._task is None and pool is not None:
+            self._task = asyncio.create_task(self._run(pool))
+
+    async def stop(self, pool) -> None:
+        """Cancel the checkpoint loop and write a final checkpoint."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.checkpoint(pool)
+
+
+# Module-level singleton
+monitor_state = MonitorStateStore(drift_monitor, distribution_monitor)
@@ -1,6 +1,46 @@
+import io
+from dataclasses import dataclass
+
 import numpy as np
 
 
+@dataclass
+class ReferenceTable:
+    """Reference histograms for one (tenant, prediction_type), stacked for scoring.
+
+    Everything check() needs is fixed at fit time: row i of each array belongs
+    to feature_names[i], and bin_scores/out_of_range_scores are the
+    per-bin divergence scores (surprise minus reference entropy, floored at 0).
+    """
+    feature_names: list[str]
+    feature_index: dict[str, int]
+    edges: np.ndarray  # (n_features, n_bins + 1)
+    probs: np.ndarray  # (n_features, n_bins)
+    bin_scores: np.ndarray  # (n_features, n_bins)
+    out_of_range_scores: np.ndarray  # (n_features,)
+
+
+def _build_reference_table(feature_names: list[str], edges: np.ndarray, probs: np.ndarray) -> ReferenceTable:
+    # Smooth the reference to avoid log(0)
+    eps = 1e-10
+    q = probs + eps
+    q = q / q.sum(axis=1, keepdims=True)
+    log_q = np.log(q)
+
+    # Entropy of the reference distribution (baseline surprise)
+    h_ref = -np.sum(q * log_q, axis=1)
+
+    # Out-of-range values get maximum surprise: the min-probability bin.
+    return ReferenceTable(
+        feature_names=feature_names,
+        feature_index={name: i for i, name in enumerate(feature_names)},
+        edges=edges,
+        probs=probs,
+        bin_scores=np.maximum(0.0, -log_q - h_ref[:, None]),
+        out_of_range_scores=np.maximum(0.0, -log_q.min(axis=1) - h_ref),
+    )
+
+
 class DistributionMonitor:
     """Monitors feature distributions for OOD detection using KL divergence.
 
@@ -11,7 +51,9 @@ class DistributionMonitor:
     def __init__(self, n_bins: int = 50, threshold: float = 0.5):
         self.n_bins = n_bins
         self.threshold = threshold
-        self._distributions: dict[str, dict] = {}  # key -> {feature_name -> {edges, counts}}
+        self._distributions: dict[str, ReferenceTable] = {}
+        # keys refit since the last checkpoint (see monitor_state)
+        self._dirty: set[str] = set()
 
     def _key(self, tenant_id: str, prediction_type: str) -> str:
         return f"{tenant_id}:{prediction_type}"
@@ -27,20 +69,52 @@ class DistributionMonitor:
         feature_matrix: {"amount_cents": [100, 200, ...], "days_overdue": [1, 5, ...], ...}
         """
         key = self._key(tenant_id, prediction_type)
-        distributions: dict[str, dict] = {}
+        feature_names = list(feature_matrix.keys())
+        edges = np.empty((len(feature_names), self.n_bins + 1), dtype=np.float64)
+        probs = np.empty((len(feature_names), self.n_bins), dtype=np.float64)
 
-        for feature_name, values in feature_matrix.items():
-            arr = np.asarray(values, dtype=np.float64)
-            counts, edges = np.histogram(arr, bins=self.n_bins)
+        for i, feature_name in enumerate(feature_names):
+            arr = np.asarray(feature_matrix[feature_name], dtype=np.float64)
+            counts, edges[i] = np.histogram(arr, bins=self.n_bins)
             # Normalize to a probability distribution
             total = counts.sum()
             if total > 0:
-                probs = counts.astype(np.float64) / total
+                probs[i] = counts.astype(np.float64) / total
             else:
-                probs = np.ones_like(counts, dtype=np.float64) / len(counts)
-            distributions[feature_name] = {"edges": edges, "probs": probs}
+                probs[i] = 1.0 / len(counts)
 
-        self._distributions[key] = distributions
+        self._distributions[key] = _build_reference_table(feature_names, edges, probs)
+        self._dirty.add(key)
+
+    def export_state(self, key: str) -> bytes | None:
+        """Serialize a scope's histograms (names, edges, probs) as a compressed npz."""
+        ref = self._distributions.get(key)
+        if ref is None:
+            return None
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            feature_names=np.asarray(ref.feature_names, dtype=np.str_),
+            edges=ref.edges,
+            probs=ref.probs,
+        )
+        return buffer.getvalue()
+
+    def import_state(self, key: str, payload: bytes) -> bool:
+        """Install histograms from export_state unless the key is already fitted."""
+        if key in self._distributions:
+            return False
+        with np.load(io.BytesIO(payload), allow_pickle=False) as data:
+            self._distributions[key] = _build_reference_table(
+                [str(name) for name in data["feature_names"]],
+                data["edges"],
+                data["probs"],
+            )
+        return True
+
+    def pop_dirty(self) -> set[str]:
+        dirty, self._dirty = self._dirty, set()
+        return dirty
 
     def check(
         self,
@@ -62,65 +136,61 @@ class DistributionMonitor:
 
         Returns: {"in_distribution": bool, "kl_divergence": float, "per_feature": {name: kl}}
         """
-        key = self._key(tenant_id, prediction_type)
-        ref = self._distributions.get(key)
-
-        if ref is None:
-            return {
-                "in_distribution": True,
-                "kl_divergence": 0.0,
-                "per_feature": {},
-            }
+        return self.check_batch(tenant_id, prediction_type, [features])[0]
 
-        per_feature: dict[str, float] = {}
-        matched_features = 0
+    def check_batch(
+        self,
+        tenant_id: str,
+        prediction_type: str,
+        feature_rows: list[dict[str, float]],
+    ) -> list[dict]:
+        """check() for many feature vectors at once; results in input order.
 
-        for feature_name, value in features.items():
-            if feature_name not in ref:
+        Rows are laid out as an (n_rows, n_features) matrix over the reference
+        features (missing ones masked), binned with one broadcast comparison
+        against the edges matrix, and scored with a single gather.
+        """
+        ref = self._distributions.get(self._key(tenant_id, prediction_type))
+        if ref is None:
+            return [
+                {"in_distribution": True, "kl_divergence": 0.0, "per_feature": {}}
+                for _ in feature_rows
+            ]
+
+        n_features, n_bins = ref.bin_scores.shape
+        values = np.zeros((len(feature_rows), n_features), dtype=np.float64)
+        present = np.zeros((len(feature_rows), n_features), dtype=bool)
+        for row, features in enumerate(feature_rows):
+            for feature_name, value in features.items():
+                col = ref.feature_index.get(feature_name)
+                if col is not None:
+                    values[row, col] = value
+                    present[row, col] = True
+
+        # Equivalent to searchsorted(edges[1:], value, side="right") per feature,
+        # clipped to the last bin; NaN sorts past every edge.
+        bins = (ref.edges[None, :, 1:] <= values[:, :, None]).sum(axis=2)
+        bins = np.where(np.isnan(values), n_bins - 1, np.minimum(bins, n_bins - 1))
+        scores = np.take_along_axis(ref.bin_scores[None, :, :], bins[:, :, None], axis=2)[:, :, 0]
+        out_of_range = (values < ref.edges[:, 0]) | (values > ref.edges[:, -1])
+        scores = np.where(out_of_range, ref.out_of_range_scores, scores)
+
+        matched = present.sum(axis=1)
+        averages = np.where(present, scores, 0.0).sum(axis=1) / np.maximum(matched, 1)
+
+        results: list[dict] = []
+        for row in range(len(feature_rows)):
+            if matched[row] == 0:
+                results.append({"in_distribution": True, "kl_divergence": 0.0, "per_feature": {}})
                 continue
-
-            edges = ref[feature_name]["edges"]
-            ref_probs = ref[feature_name]["probs"]
-            n_bins = len(ref_probs)
-
-            # Smooth the reference to avoid log(0)
-            eps = 1e-10
-            q = ref_probs + eps
-            q = q / q.sum()
-
-            # Entropy of the reference distribution (baseline surprise)
-            h_ref = -float(np.sum(q * np.log(q)))
-
-            # Check if the value falls outside the histogram range entirely
-            if value < edges[0] or value > edges[-1]:
-                # Far out of range — assign maximum surprise.
-                # Use the min-probability bin as a proxy.
-                surprise = -np.log(q.min())
-            else:
-                # Find the bin for this value
-                bin_idx = np.searchsorted(edges[1:], value, side="right")
-                bin_idx = int(np.clip(bin_idx, 0, n_bins - 1))
-                surprise = -np.log(q[bin_idx])
-
-            # Score: how much more surprising than average (entropy)
-            score = max(0.0, surprise - h_ref)
-            per_feature[feature_name] = score
-            matched_features += 1
-
-        if matched_features == 0:
-            return {
-                "in_distribution": True,
-                "kl_divergence": 0.0,
-                "per_feature": per_feature,
-            }
-
-        avg_kl = sum(per_feature.values()) / matched_features
-
-        return {
-            "in_distribution": bool(avg_kl < self.threshold),
-            "kl_divergence": float(avg_kl),
-            "per_feature": per_feature,
-        }
+            cols = np.flatnonzero(present[row])
+            avg_kl = float(averages[row])
+            results.append({
+                "in_distribution": bool(avg_kl < self.threshold),
+                "kl_divergence": avg_kl,
+                "per_feature": {ref.feature_names[col]: float(scores[row, col]) for col in cols},
+            })
+        return results
 
     def _kl_divergence(self, p: np.ndarray, q: np.ndarray) -> float:
         """Compute KL(p || q) with smoothing to avoid log(0)."""
@@ -0,0 +1,117 @@
+"""Mergeable log-bucket quantile sketch (DDSketch-style).
+
+Values are counted in buckets whose bounds grow geometrically by GAMMA, so
+every quantile comes back within RELATIVE_ACCURACY of the exact one. Counts
+can be decremented as well as incremented, which lets the world_objects
+trigger of migration 098 keep per-tenant sketches of invoice amounts and
+days-to-pay exact under updates and deletes. Each bucket also carries the
+sum of its values, so means stay exact. Values at or below zero share
+ZERO_BUCKET and read back as 0.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+from typing import Iterable
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+ZERO_BUCKET = -(2**31)
+_LOG_GAMMA = math.log(GAMMA)
+_MIN_VALUE = 1e-9
+
+
+def bucket_index(value: float) -> int:
+    """Bucket of a value; must match ml_sketch_bucket in migration 098."""
+    if value <= _MIN_VALUE:
+        return ZERO_BUCKET
+    return math.ceil(math.log(value) / _LOG_GAMMA)
+
+
+def bucket_value(index: int) -> float:
+    """Representative value of a bucket (within RELATIVE_ACCURACY of its members)."""
+    if index == ZERO_BUCKET:
+        return 0.0
+    return 2.0 * GAMMA**index / (GAMMA + 1.0)
+
+
+class QuantileSketch:
+    """Bucket counts and sums of one metric."""
+
+    __slots__ = ("counts", "totals")
+
+    def __init__(self):
+        self.counts: dict[int, int] = {}
+        self.totals: dict[int, float] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> "QuantileSketch":
+        """Build from (bucket, count, total) rows, e.g. world_tenant_invoice_sketches."""
+        sketch = cls()
+        for row in rows:
+            bucket, count, total = row["bucket"], int(row["count"]), float(row["total"])
+            if count > 0:
+                sketch.counts[bucket] = sketch.counts.get(bucket, 0) + count
+                sketch.totals[bucket] = sketch.totals.get(bucket, 0.0) + total
+        return sketch
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Add (or, with a negative count, remove) a value."""
+        bucket = bucket_index(value)
+        remaining = self.counts.get(bucket, 0) + count
+        if remaining > 0:
+            self.counts[bucket] = remaining
+            self.totals[bucket] = self.totals.get(bucket, 0.0) + count * value
+        else:
+            self.counts.pop(bucket, None)
+            self.totals.pop(bucket, None)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+            self.totals[bucket] = self.totals.get(bucket, 0.0) + other.totals.get(bucket, 0.0)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def total(self) -> float:
+        return sum(self.totals.values())
+
+    def mean(self, default: float = 0.0) -> float:
+        count = self.count
+        return self.total / count if count else default
+
+    def quantiles(self, qs: Iterable[float], default: float = 0.0) -> list[float]:
+        """Quantiles with PERCENTILE_CONT's linear interpolation between ranks."""
+        qs = list(qs)
+        count = self.count
+        if count == 0:
+            return [default for _ in qs]
+        buckets = sorted(self.counts)
+        # Cumulative count through each bucket; rank r lies in the first bucket past r.
+        cumulative: list[int] = []
+        running = 0
+        for bucket in buckets:
+            running += self.counts[bucket]
+            cumulative.append(running)
+
+        def value_at(rank: int) -> float:
+            return bucket_value(buckets[bisect.bisect_right(cumulative, rank)])
+
+        results = []
+        for q in qs:
+            rank = min(max(q, 0.0), 1.0) * (count - 1)
+            lower = math.floor(rank)
+            lower_value = value_at(lower)
+            fraction = rank - lower
+            if fraction == 0.0:
+                results.append(lower_value)
+            else:
+                results.append(lower_value + fraction * (value_at(lower + 1) - lower_value))
+        return results
+
+    def quantile(self, q: float, default: float = 0.0) -> float:
+        return self.quantiles([q], default)[0]
@@ -0,0 +1,150 @@
+"""Process-local registry of model releases.
+
+Model selection needs the latest and the latest-approved release for a
+(prediction_type, scope, tenant_id) several times per request. This registry
+holds both per key so the hot path never queries world_model_releases.
+
+Freshness comes from Postgres LISTEN/NOTIFY: a trigger on world_model_releases
+(migration 091) notifies 'world_model_release_changed' on every insert or
+update, and the registry drops the matching entry. While no listener is
+connected, entries expire after a short TTL instead.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+RELEASE_NOTIFY_CHANNEL = "world_model_release_changed"
+UNLISTENED_TTL_SECONDS = float(os.environ.get("ML_RELEASE_REGISTRY_TTL_SECONDS", "30"))
+
+ReleaseLoader = Callable[..., Awaitable[dict | None]]
+RegistryKey = tuple[str, str, str | None]
+
+
+class ModelReleaseRegistry:
+    """Caches latest and latest-approved releases per (prediction_type, scope, tenant_id)."""
+
+    def __init__(self, ttl_seconds: float = UNLISTENED_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        # key -> {"latest": release | None, "approved": release | None, "loaded_at": float}
+        self._entries: dict[RegistryKey, dict[str, Any]] = {}
+        # Bumped by invalidate()/clear() so a load that overlaps one is not stored.
+        self._generations: dict[RegistryKey, int] = {}
+        self._clears = 0
+        self._listen_conn = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def listening(self) -> bool:
+        return self._listen_conn is not None and not self._listen_conn.is_closed()
+
+    def _key(self, prediction_type: str, scope: str, tenant_id: str | None) -> RegistryKey:
+        return (prediction_type, scope, tenant_id)
+
+    def _generation(self, key: RegistryKey) -> tuple[int, int]:
+        return (self._clears, self._generations.get(key, 0))
+
+    async def get(
+        self,
+        pool,
+        prediction_type: str,
+        scope: str,
+        tenant_id: str | None = None,
+        *,
+        status: str | None = None,
+        loader: ReleaseLoader,
+    ) -> dict | None:
+        """Return the latest release (status=None) or latest approved release.
+
+        `loader` has the signature of db.get_latest_model_release and is only
+        called on a miss. Other status filters are not cached.
+        """
+        if status not in (None, "approved"):
+            return await loader(pool, prediction_type, scope, tenant_id, status)
+
+        key = self._key(prediction_type, scope, tenant_id)
+        entry = self._entries.get(key)
+        if entry is not None and (self.listening or time.monotonic() - entry["loaded_at"] < self.ttl_seconds):
+            self.hits += 1
+        else:
+            self.misses += 1
+            generation = self._generation(key)
+            latest = await loader(pool, prediction_type, scope, tenant_id, None)
+            if latest is None or latest.get("status") == "approved":
+                approved = latest
+            else:
+                approved = await loader(pool, prediction_type, scope, tenant_id, "approved")
+            entry = {"latest": latest, "approved": approved, "loaded_at": time.monotonic()}
+            # A change notified during the load may postdate what was read.
+            if self._generation(key) == generation:
+                self._entries[key] = entry
+
+        return entry["approved"] if status == "approved" else entry["latest"]
+
+    def invalidate(self, prediction_type: str, scope: str, tenant_id: str | None = None) -> None:
+        key = self._key(prediction_type, scope, tenant_id)
+        self._generations[key] = self._generations.get(key, 0) + 1
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._clears += 1
+        self._entries.clear()
+
+    def handle_notification(self, payload: str) -> None:
+        """Drop the entry named by a NOTIFY payload; clear everything if unparseable."""
+        try:
+            message = json.loads(payload)
+            self.invalidate(
+                str(message["prediction_type"]),
+                str(message["scope"]),
+                message.get("tenant_id"),
+            )
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Unparseable release notification, clearing registry: %r", payload)
+            self.clear()
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self.handle_notification(payload)
+
+    def _on_terminate(self, connection) -> None:
+        # Notifications may have been missed; fall back to TTL freshness.
+        logger.warning("Release registry listener connection lost")
+        self._listen_conn = None
+        self.clear()
+
+    async def start(self, connect: Callable[[], Awaitable[Any]]) -> bool:
+        """LISTEN for release changes on a connection from `connect`.
+
+        Returns False (and keeps TTL freshness) if no connection is available.
+        """
+        if self.listening:
+            return True
+        try:
+            conn = await connect()
+        except Exception as exc:
+            logger.warning("Release registry could not open listener: %s", exc)
+            return False
+        if conn is None:
+            return False
+        await conn.add_listener(RELEASE_NOTIFY_CHANNEL, self._on_notify)
+        conn.add_termination_listener(self._on_terminate)
+        self._listen_conn = conn
+        # Anything cached before LISTEN started may already be stale.
+        self.clear()
+        return True
+
+    async def stop(self) -> None:
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is not None and not conn.is_closed():
+            await conn.close()
+
+
+# Module-level singleton
+release_registry = ModelReleaseRegistry()
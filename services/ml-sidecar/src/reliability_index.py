@@ -0,0 +1,198 @@
+"""Per-tenant sorted index of customer payment reliability.
+
+customerReliabilityPercentile is the PERCENT_RANK of a customer's
+paymentReliability among the tenant's parties. Instead of ranking every
+party per prediction, the index loads each tenant's reliabilities once into
+a sorted array and answers lookups with bisect: the percent rank of v among
+n values is (number of values below v) / (n - 1).
+
+A trigger on world_objects (migration 099) notifies
+'world_party_reliability_changed' with a party's new value, and the index
+moves that one entry in place. While no listener is connected, tenants are
+reloaded after a TTL instead.
+
+Ranked percentiles are opt-in (ML_RELIABILITY_PERCENTILE_RANKED). The
+original SQL applied PERCENT_RANK() in the same SELECT as its party filter,
+so the window saw one row and every known party got 0.0 (unknown parties
+0.5). Stored epochs and every released model were trained on that value,
+so serving real ranks would skew every learned prediction. Until the epochs'
+features are rebuilt and the models retrained, percentile() returns the
+original values; the index still tracks the ranks so that switch is a flag.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+from .db import get_party_reliabilities
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+RELIABILITY_NOTIFY_CHANNEL = "world_party_reliability_changed"
+UNLISTENED_TTL_SECONDS = float(os.environ.get("ML_RELIABILITY_INDEX_TTL_SECONDS", "300"))
+RANKED_PERCENTILES = os.environ.get("ML_RELIABILITY_PERCENTILE_RANKED", "0").lower() in ("1", "true", "yes")
+DEFAULT_PERCENTILE = 0.5
+# What the original per-party PERCENT_RANK query returned for a known party.
+UNRANKED_PERCENTILE = 0.0
+
+
+class TenantReliability:
+    """Sorted reliabilities of one tenant's parties."""
+
+    __slots__ = ("by_party", "values", "loaded_at", "ranked")
+
+    def __init__(self, by_party: dict[str, float], *, ranked: bool = RANKED_PERCENTILES):
+        self.ranked = ranked
+        self.by_party = dict(by_party)
+        self.values = sorted(self.by_party.values())
+        self.loaded_at = time.monotonic()
+
+    def percentile(self, party_id: str) -> float:
+        value = self.by_party.get(party_id)
+        if value is None:
+            return DEFAULT_PERCENTILE
+        if not self.ranked:
+            return UNRANKED_PERCENTILE
+        if len(self.values) <= 1:
+            return 0.0
+        return bisect.bisect_left(self.values, value) / (len(self.values) - 1)
+
+    def update(self, party_id: str, value: float | None) -> None:
+        """Set a party's reliability; None removes the party."""
+        old = self.by_party.pop(party_id, None)
+        if old is not None:
+            del self.values[bisect.bisect_left(self.values, old)]
+        if value is not None:
+            self.by_party[party_id] = value
+            bisect.insort(self.values, value)
+
+
+class ReliabilityIndex:
+    """Customer reliability percentiles per tenant, served from memory."""
+
+    def __init__(self, ttl_seconds: float = UNLISTENED_TTL_SECONDS, *, ranked: bool = RANKED_PERCENTILES):
+        self.ttl_seconds = ttl_seconds
+        self.ranked = ranked
+        self._tenants: dict[str, TenantReliability] = {}
+        # Changes notified while a tenant loads, replayed onto its snapshot.
+        self._pending: dict[str, list[tuple[str, float | None]]] = {}
+        self._clears = 0
+        self._loads = SingleFlight()
+        self._listen_conn = None
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+
+    @property
+    def listening(self) -> bool:
+        return self._listen_conn is not None and not self._listen_conn.is_closed()
+
+    async def tenant(self, pool, tenant_id: str) -> TenantReliability:
+        """The tenant's index, loading it if missing or (while unlistened) expired."""
+        entry = self._tenants.get(tenant_id)
+        if entry is not None and (self.listening or time.monotonic() - entry.loaded_at < self.ttl_seconds):
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return await self._loads.do(tenant_id, lambda: self._load(pool, tenant_id))
+
+    async def _load(self, pool, tenant_id: str) -> TenantReliability:
+        clears = self._clears
+        self._pending[tenant_id] = []
+        try:
+            entry = TenantReliability(await get_party_reliabilities(pool, tenant_id), ranked=self.ranked)
+            # Notifications carry absolute values, so replaying ones the
+            # snapshot already reflects is harmless.
+            for party_id, value in self._pending[tenant_id]:
+                entry.update(party_id, value)
+        finally:
+            self._pending.pop(tenant_id, None)
+        if self._clears == clears:
+            self._tenants[tenant_id] = entry
+        return entry
+
+    async def percentile(self, pool, tenant_id: str, party_id: str) -> float:
+        return (await self.tenant(pool, tenant_id)).percentile(party_id)
+
+    async def percentiles(self, pool, tenant_id: str, party_ids: list[str]) -> dict[str, float]:
+        entry = await self.tenant(pool, tenant_id)
+        return {party_id: entry.percentile(party_id) for party_id in party_ids}
+
+    def invalidate(self, tenant_id: str | None = None) -> None:
+        if tenant_id:
+            self._tenants.pop(tenant_id, None)
+        else:
+            # Loads in flight may have missed the reason for clearing.
+            self._clears += 1
+            self._tenants.clear()
+
+    def handle_notification(self, payload: str) -> None:
+        """Apply one party's change; drop everything if the payload is unparseable."""
+        try:
+            message = json.loads(payload)
+            tenant_id = str(message["tenant_id"])
+            party_id = str(message["party_id"])
+            value = message.get("reliability")
+            value = float(value) if value is not None else None
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Unparseable reliability notification, clearing index: %r", payload)
+            self.invalidate()
+            return
+        if tenant_id in self._pending:
+            self._pending[tenant_id].append((party_id, value))
+        entry = self._tenants.get(tenant_id)
+        if entry is not None:  # unloaded tenants pick the change up when they load
+            entry.update(party_id, value)
+            self.updates += 1
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        self.handle_notification(payload)
+
+    def _on_terminate(self, connection) -> None:
+        # Notifications may have been missed; fall back to TTL freshness.
+        logger.warning("Reliability index listener connection lost")
+        self._listen_conn = None
+        self.invalidate()
+
+    async def start(self, connect: Callable[[], Awaitable[Any]]) -> bool:
+        """LISTEN for reliability changes on a connection from `connect`."""
+        if self.listening:
+            return True
+        try:
+            conn = await connect()
+        except Exception as exc:
+            logger.warning("Reliability index could not open listener: %s", exc)
+            return False
+        if conn is None:
+            return False
+        await conn.add_listener(RELIABILITY_NOTIFY_CHANNEL, self._on_notify)
+        conn.add_termination_listener(self._on_terminate)
+        self._listen_conn = conn
+        # Anything loaded before LISTEN started may already be stale.
+        self.invalidate()
+        return True
+
+    async def stop(self) -> None:
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is not None and not conn.is_closed():
+            await conn.close()
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "tenants": len(self._tenants),
+            "listening": self.listening,
+            "ranked": self.ranked,
+            "hits": self.hits,
+            "misses": self.misses,
+            "updates": self.updates,
+        }
+
+
+# Module-level singleton
+reliability_index = ReliabilityIndex()
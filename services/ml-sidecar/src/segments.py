@@ -18,8 +18,12 @@ from __future__ import annotations
 import logging
 from typing import Any
 
+from .async_cache import AsyncCache
+
 logger = logging.getLogger(__name__)
 
+_segment_cache = AsyncCache.from_env("tenant_segment", ttl_seconds=600, stale_seconds=3600, max_entries=5000)
+
 
 def assign_segment(tenant_stats: dict[str, float]) -> str:
     """Assign a tenant to a segment based on their invoice characteristics."""
@@ -67,10 +71,15 @@ async def upsert_tenant_segment(
         segment_id,
         __import__("json").dumps(segment_features),
     )
+    _segment_cache.put(tenant_id, segment_id)
 
 
 async def get_tenant_segment(pool, tenant_id: str) -> str | None:
-    """Get a tenant's current segment assignment."""
+    """Get a tenant's current segment assignment (cached)."""
+    return await _segment_cache.get(tenant_id, lambda: _load_tenant_segment(pool, tenant_id))
+
+
+async def _load_tenant_segment(pool, tenant_id: str) -> str | None:
     row = await pool.fetchrow(
         "SELECT segment_id FROM tenant_segments WHERE tenant_id = $1",
         tenant_id,
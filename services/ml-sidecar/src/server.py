@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import os
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Awaitable, Callable
 from uuid import uuid4
 
 from fastapi import FastAPI
@@ -12,31 +14,31 @@ import numpy as np
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
-from .calibration import fit_best_calibrator, calibrate
+from .calibration import apply_calibrator, fit_best_calibrator
 from .uplift import fit_uplift_model, predict_uplift, TrainedUpliftModel
-from .conformal import compute_intervals_from_residuals
+from .conformal import compute_intervals_batch_from_residuals
 from .db import (
     close_pool,
     get_epoch_training_rows,
-    get_event_counts_for_object,
     get_intervention_comparison_rows,
     get_intervention_training_rows,
     get_latest_model_release,
-    get_party_id_for_invoice,
     get_pool,
     get_prediction_outcome_pairs,
     get_prediction_training_rows,
     insert_model_release,
     list_model_releases,
+    open_listen_connection,
 )
 from .epoch_trigger import (
     create_epoch_for_invoice,
     resolve_pending_outcomes,
     sweep_invoices_for_epochs,
 )
-from .features import build_full_feature_vector
-from .tenant_stats import load_tenant_stats_with_customer
-from .trajectory import load_customer_trajectory
+from .async_cache import cache_status
+from .feature_assembly import assemble_feature_vector, assemble_feature_vectors
+from .feature_store import feature_store
+from .features import compute_feature_hash
 from .drift import drift_monitor, check_all_models
 from .models import (
     CalibrateRequest,
@@ -53,21 +55,38 @@ from .models import (
     ModelReleaseResponse,
     ModelSelectionInfo,
     OodInfo,
+    PredictBatchRequest,
+    PredictBatchResponse,
     PredictRequest,
     PredictResponse,
     TrainRequest,
     TrainResponse,
 )
+from .micro_batcher import MicroBatcher
+from .model_artifacts import artifact_store
+from .monitor_state import monitor_state
 from .ood import distribution_monitor
-from .catboost_model import TrainedCatBoostModel, fit_catboost_payment_model, predict_catboost
+from .release_registry import release_registry
+from .reliability_index import reliability_index
+from .single_flight import SingleFlight
+from .warmup import cache_warmup
+from .catboost_model import (
+    TrainedCatBoostModel,
+    build_shap_explainer,
+    fit_catboost_payment_model,
+    predict_catboost_batch,
+)
 from .segments import assign_segment, get_tenant_segment, upsert_tenant_segment
-from .survival import TrainedSurvivalModel, fit_survival_model, predict_survival
+from .survival import TrainedSurvivalModel, fit_survival_model, predict_survival, predict_survival_batch
+from .training_executor import training_executor
+from .training_jobs import training_jobs
 from .training import (
     TrainedInterventionModel,
     TrainedProbabilityModel,
     build_invoice_feature_map,
     fit_intervention_effect_model,
     fit_probability_model,
+    predict_batch_with_trained_model,
     predict_with_intervention_model,
     predict_with_trained_model,
     summarize_comparative_treatment,
@@ -113,6 +132,12 @@ _survival_models: LRUCache = LRUCache()
 _intervention_models: LRUCache = LRUCache()
 _uplift_models: LRUCache = LRUCache()
 
+# Coalesces concurrent fits / artifact loads / calibrator builds per cache key.
+_model_flights = SingleFlight()
+
+MAX_PREDICT_BATCH_SIZE = int(os.environ.get("ML_PREDICT_BATCH_MAX", "1000"))
+MAX_PREDICT_V2_BATCH_SIZE = int(os.environ.get("ML_PREDICT_V2_BATCH_MAX", "1000"))
+
 MIN_TENANT_TRAINING_ROWS = 20
 MIN_GLOBAL_TRAINING_ROWS = 50
 MIN_INTERVENTION_TRAINING_ROWS = 8
@@ -127,6 +152,48 @@ def _intervention_cache_key(tenant_id: str, action_class: str, object_type: str,
     return f"{tenant_id}:{action_class}:{object_type}:{field}"
 
 
+async def _cached_or_stored(pool, cache: LRUCache, kind: str, cache_key: str):
+    """Model from the in-process cache, else its newest stored artifact."""
+    model = cache.get(cache_key)
+    if model is not None:
+        return model
+
+    async def load():
+        stored = await artifact_store.load(pool, kind, cache_key=cache_key)
+        if stored is not None:
+            cache[cache_key] = stored
+        return stored
+
+    return await _model_flights.do(("artifact", kind, cache_key), load)
+
+
+async def _get_release(
+    pool,
+    prediction_type: str,
+    scope: str,
+    tenant_id: str | None = None,
+    status: str | None = None,
+) -> dict | None:
+    """Latest (or latest-approved) release, served from the release registry."""
+    return await release_registry.get(
+        pool,
+        prediction_type,
+        scope,
+        tenant_id,
+        status=status,
+        loader=get_latest_model_release,
+    )
+
+
+async def _record_release(pool, release: dict[str, Any]) -> None:
+    """Persist a release and drop its registry entry so readers see it immediately.
+
+    Other workers are invalidated by the NOTIFY trigger on world_model_releases.
+    """
+    await insert_model_release(pool, release)
+    release_registry.invalidate(release["prediction_type"], release["scope"], release.get("tenant_id"))
+
+
 def _feature_matrix_from_rows(rows: list[dict[str, Any]]) -> dict[str, list[float]]:
     columns: dict[str, list[float]] = {}
     for row in rows:
@@ -283,7 +350,7 @@ async def _train_cached_model(
     force: bool = False,
 ) -> TrainedProbabilityModel | None:
     cache_key = _cache_key(scope, prediction_type, tenant_id)
-    latest_release = await get_latest_model_release(pool, prediction_type, scope, tenant_id)
+    latest_release = await _get_release(pool, prediction_type, scope, tenant_id)
     if (
         not force
         and cache_key in _trained_models
@@ -292,12 +359,58 @@ async def _train_cached_model(
     ):
         return _trained_models[cache_key]
 
+    return await _model_flights.do(
+        ("probability", cache_key, force),
+        lambda: _load_or_fit_probability_model(
+            pool,
+            cache_key=cache_key,
+            latest_release=latest_release,
+            prediction_type=prediction_type,
+            tenant_id=tenant_id,
+            scope=scope,
+            force=force,
+        ),
+    )
+
+
+async def _load_stored_probability_model(pool, cache_key: str, release: dict) -> TrainedProbabilityModel | None:
+    """Cache the stored artifact of a release; None if it has none."""
+    stored = await artifact_store.load(pool, "probability", release_id=str(release["release_id"]))
+    if stored is None:
+        return None
+    stored.release_status = str(release["status"])
+    stored.metadata = {
+        **stored.metadata,
+        "baseline_comparison": release.get("baseline_comparison") or {},
+        "replay_report": release.get("replay_report") or {},
+    }
+    _trained_models[cache_key] = stored
+    return stored
+
+
+async def _load_or_fit_probability_model(
+    pool,
+    *,
+    cache_key: str,
+    latest_release: dict | None,
+    prediction_type: str,
+    tenant_id: str | None,
+    scope: str,
+    force: bool,
+) -> TrainedProbabilityModel | None:
+    """Cache miss path of _train_cached_model; runs once per key at a time."""
+    if not force and latest_release is not None:
+        stored = await _load_stored_probability_model(pool, cache_key, latest_release)
+        if stored is not None:
+            return stored
+
     rows = await get_prediction_training_rows(pool, prediction_type, tenant_id)
     min_rows = MIN_TENANT_TRAINING_ROWS if scope == "tenant" else MIN_GLOBAL_TRAINING_ROWS
     if len(rows) < min_rows:
         return None
 
-    model = fit_probability_model(
+    model = await training_executor.run(
+        fit_probability_model,
         rows,
         prediction_type=prediction_type,
         tenant_id=tenant_id,
@@ -335,12 +448,16 @@ async def _train_cached_model(
             "baseline_comparison": latest_release.get("baseline_comparison") or {},
             "replay_report": latest_release.get("replay_report") or {},
         }
+        # Release predates artifact storage: store the refit so the next miss loads it.
+        await artifact_store.save(
+            pool, "probability", model, release_id=model.release_id, cache_key=cache_key, tenant_id=tenant_id,
+        )
         _trained_models[cache_key] = model
         return model
 
     baseline_comparison, replay_report, training_window, release_status = _evaluate_candidate_release(model, rows)
     release_id = f"release_{uuid4().hex}"
-    await insert_model_release(
+    await _record_release(
         pool,
         {
             "release_id": release_id,
@@ -370,6 +487,9 @@ async def _train_cached_model(
         "baseline_comparison": baseline_comparison,
         "replay_report": replay_report,
     }
+    await artifact_store.save(
+        pool, "probability", model, release_id=release_id, cache_key=cache_key, tenant_id=tenant_id,
+    )
     if release_status == "approved" or cache_key not in _trained_models:
         _trained_models[cache_key] = model
     return model
@@ -385,7 +505,7 @@ async def _select_model(pool, tenant_id: str, prediction_type: str) -> tuple[Tra
         tenant_id=tenant_id,
         scope="tenant",
     )
-    tenant_release = await get_latest_model_release(pool, prediction_type, "tenant", tenant_id)
+    tenant_release = await _get_release(pool, prediction_type, "tenant", tenant_id)
     if tenant_model is not None and tenant_release is not None and tenant_release.get("status") == "approved":
         tenant_model.release_id = str(tenant_release["release_id"])
         tenant_model.release_status = str(tenant_release["status"])
@@ -399,7 +519,7 @@ async def _select_model(pool, tenant_id: str, prediction_type: str) -> tuple[Tra
         tenant_id=None,
         scope="global",
     )
-    global_release = await get_latest_model_release(pool, prediction_type, "global", None)
+    global_release = await _get_release(pool, prediction_type, "global", None)
     if global_model is not None and global_release is not None and global_release.get("status") == "approved":
         global_model.release_id = str(global_release["release_id"])
         global_model.release_status = str(global_release["status"])
@@ -420,14 +540,39 @@ async def _train_intervention_model(
     force: bool = False,
 ) -> TrainedInterventionModel | None:
     cache_key = _intervention_cache_key(tenant_id, action_class, object_type, field)
-    if not force and cache_key in _intervention_models:
-        return _intervention_models[cache_key]
+    if not force:
+        cached = await _cached_or_stored(pool, _intervention_models, "intervention", cache_key)
+        if cached is not None:
+            return cached
+
+    return await _model_flights.do(
+        ("intervention", cache_key, force),
+        lambda: _fit_intervention_model(
+            pool,
+            cache_key=cache_key,
+            tenant_id=tenant_id,
+            action_class=action_class,
+            object_type=object_type,
+            field=field,
+        ),
+    )
 
+
+async def _fit_intervention_model(
+    pool,
+    *,
+    cache_key: str,
+    tenant_id: str,
+    action_class: str,
+    object_type: str,
+    field: str,
+) -> TrainedInterventionModel | None:
     rows = await get_intervention_training_rows(pool, tenant_id, action_class, object_type, field)
     if len(rows) < MIN_INTERVENTION_TRAINING_ROWS:
         return None
 
-    model = fit_intervention_effect_model(
+    model = await training_executor.run(
+        fit_intervention_effect_model,
         rows,
         tenant_id=tenant_id,
         action_class=action_class,
@@ -437,14 +582,65 @@ async def _train_intervention_model(
     if model is None:
         return None
 
+    await artifact_store.save(
+        pool, "intervention", model,
+        release_id=f"artifact_{uuid4().hex}", cache_key=cache_key, tenant_id=tenant_id,
+    )
     _intervention_models[cache_key] = model
     return model
 
 
+async def _warm_approved_model(pool, tenant_id: str, prediction_type: str) -> TrainedProbabilityModel | None:
+    """Load the stored artifact _select_model would serve; never fits or records a release."""
+    for scope, scope_tenant in (("tenant", tenant_id), ("global", None)):
+        cache_key = _cache_key(scope, prediction_type, scope_tenant)
+        release = await _get_release(pool, prediction_type, scope, scope_tenant)
+        if release is None or release.get("status") != "approved":
+            continue
+        cached = _trained_models.get(cache_key)
+        if cached is not None and cached.release_id == release["release_id"]:
+            return cached
+        stored = await _model_flights.do(
+            ("artifact", "probability", release["release_id"]),
+            lambda: _load_stored_probability_model(pool, cache_key, release),
+        )
+        if stored is not None:
+            return stored
+    return None
+
+
+async def _warm_tenant(pool, tenant_id: str) -> None:
+    """Preload a tenant's approved release artifacts and monitor state.
+
+    Only stored artifacts are loaded: a tenant without an approved artifact
+    is skipped, leaving any fit to the first prediction that needs it.
+    """
+    for prediction_type in sorted(ELIGIBLE_LEARNED_PREDICTIONS):
+        learned_model = await _warm_approved_model(pool, tenant_id, prediction_type)
+        if learned_model is None:
+            continue
+        ood_scope = tenant_id if learned_model.scope == "tenant" else "global"
+        await monitor_state.restore_ood(pool, ood_scope, prediction_type)
+        await _cached_or_stored(pool, _catboost_models, "catboost", _cache_key("tenant", prediction_type, tenant_id))
+    await _cached_or_stored(pool, _survival_models, "survival", f"tenant:{tenant_id}:survival")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await get_pool()
+    pool = await get_pool()
+    if pool is not None:
+        await release_registry.start(open_listen_connection)
+        await reliability_index.start(open_listen_connection)
+        monitor_state.start(pool)
+        cache_warmup.start(pool, _warm_tenant)
+        training_jobs.start(pool, _run_training_job)
     yield
+    await training_jobs.stop()
+    await cache_warmup.stop()
+    await monitor_state.stop(pool)
+    training_executor.shutdown()
+    await release_registry.stop()
+    await reliability_index.stop()
     await close_pool()
 
 
@@ -464,17 +660,64 @@ async def health():
 
     return {
         "status": "ok",
+        "ready": cache_warmup.ready,
         "db_connected": pool is not None,
         "drift_monitors_active": monitor_count,
         "drift_monitors_stale": stale_monitors,
         "calibrators_cached": len(_calibrators),
+        "release_registry_listening": release_registry.listening,
+        "monitor_states_restored": monitor_state.restored,
+        "monitor_states_checkpointed": monitor_state.checkpointed,
+        "model_artifacts_loaded": artifact_store.loaded,
+        "model_artifacts_saved": artifact_store.saved,
+        "warmup": cache_warmup.status(),
+        "training_executor": training_executor.status(),
+        "training_jobs": training_jobs.status(),
+        "single_flight": _model_flights.status(),
+        "predict_microbatch": predict_batcher.status(),
+        "feature_store": feature_store.status(),
+        "reliability_index": reliability_index.status(),
+        "caches": cache_status(),
     }
 
 
-@app.post("/predict", response_model=PredictResponse)
-async def predict(req: PredictRequest):
-    pool = await get_pool()
-    predicted_value = float(req.features.get(req.prediction_type, 0.5))
+async def _outcome_calibration(
+    pool,
+    tenant_id: str,
+    prediction_type: str,
+    cal_key: str,
+) -> tuple[list[tuple[float, float]], dict | None]:
+    """Outcome pairs and the calibrator fitted on them (cached under cal_key).
+
+    Concurrent callers share one pairs query and at most one fit.
+    """
+
+    async def load():
+        pairs = await get_prediction_outcome_pairs(pool, tenant_id, prediction_type)
+        if len(pairs) < 10:
+            return pairs, None
+        calibrator = _calibrators.get(cal_key)
+        if calibrator is None:
+            calibrator = fit_best_calibrator([p for p, _ in pairs], [o for _, o in pairs])
+            _calibrators[cal_key] = calibrator
+        return pairs, calibrator
+
+    return await _model_flights.do(("calibrator", cal_key), load)
+
+
+async def _predict_rows(
+    pool,
+    tenant_id: str,
+    prediction_type: str,
+    feature_rows: list[dict],
+    coverage: float = 0.90,
+) -> list[PredictResponse]:
+    """Score feature maps that share a tenant, prediction type and coverage.
+
+    Model selection, calibration and drift lookups run once for the group;
+    the learned model scores every row as a single matrix.
+    """
+    predicted_values = [float(features.get(prediction_type, 0.5)) for features in feature_rows]
     selection = ModelSelectionInfo(
         strategy="fallback_rule",
         chosen_model_id="rule_inference",
@@ -485,18 +728,19 @@ async def predict(req: PredictRequest):
     )
     chosen_model_id = "rule_inference"
     learned_model: TrainedProbabilityModel | None = None
+    learned_predictions: list[dict[str, Any]] = []
 
     if pool:
-        learned_model, fallback_reason = await _select_model(pool, req.tenant_id, req.prediction_type)
+        learned_model, fallback_reason = await _select_model(pool, tenant_id, prediction_type)
         if learned_model is not None:
-            learned_prediction = predict_with_trained_model(learned_model, req.features)
-            predicted_value = float(learned_prediction["value"])
+            learned_predictions = predict_batch_with_trained_model(learned_model, feature_rows, coverage)
+            predicted_values = [float(prediction["value"]) for prediction in learned_predictions]
             chosen_model_id = learned_model.model_id
-            latest_release = await get_latest_model_release(
+            latest_release = await _get_release(
                 pool,
-                req.prediction_type,
+                prediction_type,
                 learned_model.scope,
-                req.tenant_id if learned_model.scope == "tenant" else None,
+                tenant_id if learned_model.scope == "tenant" else None,
             )
             selection = ModelSelectionInfo(
                 strategy="trained_probability_model",
@@ -517,9 +761,10 @@ async def predict(req: PredictRequest):
             selection.fallback_reason = fallback_reason
 
     # --- Calibration ---
-    cal_key = f"{req.tenant_id}:{req.prediction_type}:{chosen_model_id}"
+    cal_key = f"{tenant_id}:{prediction_type}:{chosen_model_id}"
     calibrator = _calibrators.get(cal_key)
     cal_info = CalibrationInfo(score=0.5, method="none", ece=1.0, n_outcomes=0)
+    pairs: list[tuple[float, float]] = []
 
     if learned_model is not None:
         if learned_model.calibrator is not None:
@@ -538,16 +783,9 @@ async def predict(req: PredictRequest):
                 n_outcomes=learned_model.sample_count,
             )
     elif pool:
-        pairs = await get_prediction_outcome_pairs(pool, req.tenant_id, req.prediction_type)
-        if len(pairs) >= 10:
-            predictions_list = [p for p, _ in pairs]
-            outcomes_list = [o for _, o in pairs]
-
-            if calibrator is None:
-                calibrator = fit_best_calibrator(predictions_list, outcomes_list)
-                _calibrators[cal_key] = calibrator
-
-            predicted_value = calibrate(predicted_value, calibrator)
+        pairs, calibrator = await _outcome_calibration(pool, tenant_id, prediction_type, cal_key)
+        if calibrator is not None:
+            predicted_values = apply_calibrator(np.asarray(predicted_values, dtype=np.float64), calibrator).tolist()
             cal_info = CalibrationInfo(
                 score=max(0, 1 - calibrator["ece_after"]),
                 method=calibrator["method"],
@@ -560,147 +798,173 @@ async def predict(req: PredictRequest):
             )
 
     # --- Conformal intervals ---
-    interval = ConfidenceInterval(
-        lower=max(0, predicted_value - 0.2),
-        upper=min(1, predicted_value + 0.2),
-        coverage=0.90,
-    )
     if learned_model is not None:
-        prediction = predict_with_trained_model(learned_model, req.features)
-        interval = ConfidenceInterval(
-            lower=prediction["interval"]["lower"],
-            upper=prediction["interval"]["upper"],
-            coverage=prediction["interval"]["coverage"],
-        )
-    elif pool:
-        pairs = await get_prediction_outcome_pairs(pool, req.tenant_id, req.prediction_type)
-        if len(pairs) >= 5:
-            residuals = [p - o for p, o in pairs]
-            interval_dict = compute_intervals_from_residuals(residuals, predicted_value, coverage=0.90)
-            interval = ConfidenceInterval(
-                lower=interval_dict["lower"],
-                upper=interval_dict["upper"],
-                coverage=interval_dict["coverage"],
+        intervals = [
+            ConfidenceInterval(
+                lower=prediction["interval"]["lower"],
+                upper=prediction["interval"]["upper"],
+                coverage=prediction["interval"]["coverage"],
             )
+            for prediction in learned_predictions
+        ]
+    elif pool and len(pairs) >= 5:
+        residuals = [p - o for p, o in pairs]
+        intervals = [
+            ConfidenceInterval(**interval_dict)
+            for interval_dict in compute_intervals_batch_from_residuals(residuals, predicted_values, coverage=coverage)
+        ]
+    else:
+        intervals = [
+            ConfidenceInterval(
+                lower=max(0, value - 0.2),
+                upper=min(1, value + 0.2),
+                coverage=0.90,
+            )
+            for value in predicted_values
+        ]
 
     # --- Drift ---
-    drift_tenant = req.tenant_id if learned_model is None or learned_model.scope == "tenant" else "global"
-    drift_status = drift_monitor.get_status(chosen_model_id, req.prediction_type, drift_tenant)
+    drift_tenant = tenant_id if learned_model is None or learned_model.scope == "tenant" else "global"
+    await monitor_state.restore_drift(pool, chosen_model_id, prediction_type, drift_tenant)
+    drift_status = drift_monitor.get_status(chosen_model_id, prediction_type, drift_tenant)
     drift_info = DriftInfo(
         detected=drift_status["drift_detected"],
         adwin_value=drift_status["adwin_value"],
     )
 
-    # --- OOD ---
-    ood_scope = req.tenant_id if learned_model is None or learned_model.scope == "tenant" else "global"
-    ood_result = distribution_monitor.check(ood_scope, req.prediction_type, req.features)
-    ood_info = OodInfo(
-        in_distribution=ood_result["in_distribution"],
-        kl_divergence=ood_result["kl_divergence"],
-    )
+    # --- OOD + confidence, per row ---
+    ood_scope = tenant_id if learned_model is None or learned_model.scope == "tenant" else "global"
+    await monitor_state.restore_ood(pool, ood_scope, prediction_type)
+    ood_results = distribution_monitor.check_batch(ood_scope, prediction_type, feature_rows)
+    responses: list[PredictResponse] = []
+    for predicted_value, interval, ood_result in zip(predicted_values, intervals, ood_results):
+        ood_info = OodInfo(
+            in_distribution=ood_result["in_distribution"],
+            kl_divergence=ood_result["kl_divergence"],
+        )
 
-    # --- Confidence ---
-    confidence = cal_info.score
-    if drift_info.detected:
-        confidence *= 0.5
-    if not ood_info.in_distribution:
-        confidence *= 0.5
-
-    return PredictResponse(
-        value=predicted_value,
-        confidence=round(confidence, 4),
-        interval=interval,
-        model_id=chosen_model_id,
-        calibration=cal_info,
-        drift=drift_info,
-        ood=ood_info,
-        selection=selection,
-    )
+        confidence = cal_info.score
+        if drift_info.detected:
+            confidence *= 0.5
+        if not ood_info.in_distribution:
+            confidence *= 0.5
+
+        responses.append(
+            PredictResponse(
+                value=predicted_value,
+                confidence=round(confidence, 4),
+                interval=interval,
+                model_id=chosen_model_id,
+                calibration=cal_info,
+                drift=drift_info,
+                ood=ood_info,
+                selection=selection,
+            )
+        )
+    return responses
 
 
-@app.post("/predict/v2")
-async def predict_v2(request: Request):
-    """Enhanced prediction with auto-built full feature vector.
+async def _score_predict_batch(key: tuple[str, str, float], feature_rows: list[dict]) -> list[PredictResponse]:
+    tenant_id, prediction_type, coverage = key
+    pool = await get_pool()
+    return await _predict_rows(pool, tenant_id, prediction_type, feature_rows, coverage)
 
-    Instead of receiving pre-built features, this endpoint takes tenant_id +
-    object_id and builds the 34-feature vector from the current world model
-    state, including tenant stats, trajectory, and event counts.
-    """
-    body = await request.json()
-    tenant_id = body.get("tenant_id")
-    object_id = body.get("object_id")
-    prediction_type = body.get("prediction_type", "paymentProbability7d")
 
-    if not tenant_id or not object_id:
-        return JSONResponse({"error": "tenant_id and object_id required"}, status_code=400)
+# Opt-in (ML_PREDICT_MICROBATCH=1): coalesces concurrent /predict calls per group.
+predict_batcher = MicroBatcher(_score_predict_batch)
+
+
+@app.post("/predict", response_model=PredictResponse)
+async def predict(req: PredictRequest):
+    coverage = req.coverage if req.coverage is not None else 0.90
+    key = (req.tenant_id, req.prediction_type, coverage)
+    if predict_batcher.enabled:
+        return await predict_batcher.submit(key, req.features)
+    responses = await _score_predict_batch(key, [req.features])
+    return responses[0]
+
+
+@app.post("/predict/batch", response_model=PredictBatchResponse)
+async def predict_batch(req: PredictBatchRequest):
+    """Score many feature maps in one call.
+
+    Rows are grouped by (tenant_id, prediction_type, coverage), which
+    resolves to one selected model per group; each group is scored as a
+    single matrix. Results come back in request order.
+    """
+    if len(req.items) > MAX_PREDICT_BATCH_SIZE:
+        return JSONResponse(
+            {"error": "too_many_items", "max_items": MAX_PREDICT_BATCH_SIZE},
+            status_code=400,
+        )
 
     pool = await get_pool()
-    if not pool:
-        return JSONResponse({"error": "no_db"}, status_code=503)
+    groups: dict[tuple[str, str, float], list[int]] = {}
+    for index, item in enumerate(req.items):
+        coverage = item.coverage if item.coverage is not None else 0.90
+        groups.setdefault((item.tenant_id, item.prediction_type, coverage), []).append(index)
+
+    results: list[PredictResponse | None] = [None] * len(req.items)
+    for (tenant_id, prediction_type, coverage), indices in groups.items():
+        responses = await _predict_rows(
+            pool,
+            tenant_id,
+            prediction_type,
+            [req.items[index].features for index in indices],
+            coverage,
+        )
+        for index, response in zip(indices, responses):
+            results[index] = response
 
-    # Load current object state
-    from .db import get_object_state_at
-    obj = await get_object_state_at(pool, tenant_id, object_id, datetime.now(timezone.utc).isoformat())
-    if obj is None:
-        return JSONResponse({"error": "object_not_found"}, status_code=404)
+    return PredictBatchResponse(results=results)
 
-    state = obj["state"]
-    estimated = obj["estimated"]
-
-    # Resolve party for trajectory
-    party_id = await get_party_id_for_invoice(pool, tenant_id, object_id)
-
-    # Build full feature vector with all 4 families
-    tenant_stats = await load_tenant_stats_with_customer(pool, tenant_id, party_id)
-    event_counts = await get_event_counts_for_object(pool, tenant_id, object_id)
-    trajectory = None
-    if party_id:
-        trajectory = await load_customer_trajectory(pool, tenant_id, party_id)
-
-    features = build_full_feature_vector(
-        state,
-        estimated,
-        tenant_stats=tenant_stats,
-        event_counts=event_counts,
-        trajectory=trajectory,
-    )
 
-    # Try CatBoost first (has SHAP), then logistic regression, then rule fallback
-    from .features import compute_feature_hash as _compute_fh
-    feature_hash = _compute_fh(features)
+async def _score_v2_rows(
+    pool,
+    tenant_id: str,
+    prediction_type: str,
+    feature_rows: list[dict[str, float]],
+) -> list[dict[str, Any]]:
+    """Score full feature vectors for one tenant as a single matrix.
 
-    predicted_value = float(features.get(prediction_type, 0.5))
+    Model selection runs once for the group; returns one predict_v2-shaped
+    dict per row (without the per-row data availability flags).
+    """
+    predicted_values = [float(features.get(prediction_type, 0.5)) for features in feature_rows]
     chosen_model_id = "rule_inference"
-    shap_reasons: list[dict] = []
-    interval = {"lower": max(0, predicted_value - 0.2), "upper": min(1, predicted_value + 0.2), "coverage": 0.90}
+    shap_reasons: list[list[dict]] = [[] for _ in feature_rows]
+    intervals = [
+        {"lower": max(0, value - 0.2), "upper": min(1, value + 0.2), "coverage": 0.90}
+        for value in predicted_values
+    ]
     model_family = "rule_inference"
 
     # Hierarchical model selection: tenant → segment → global → logistic → rules
     # 1. Try tenant-specific CatBoost
     cb_key = _cache_key("tenant", prediction_type, tenant_id)
-    catboost_model = _catboost_models.get(cb_key)
+    catboost_model = await _cached_or_stored(pool, _catboost_models, "catboost", cb_key)
 
     # 2. Try segment CatBoost if no tenant model
     if catboost_model is None and pool and tenant_id:
         segment_id = await get_tenant_segment(pool, tenant_id)
         if segment_id:
             seg_key = _cache_key("segment", prediction_type, segment_id)
-            catboost_model = _catboost_models.get(seg_key)
+            catboost_model = await _cached_or_stored(pool, _catboost_models, "catboost", seg_key)
             if catboost_model:
                 model_family = "catboost_segment"
 
     # 3. Try global CatBoost
     if catboost_model is None:
         global_key = _cache_key("global", prediction_type, None)
-        catboost_model = _catboost_models.get(global_key)
+        catboost_model = await _cached_or_stored(pool, _catboost_models, "catboost", global_key)
         if catboost_model:
             model_family = "catboost_global"
 
     if catboost_model is not None:
-        cb_result = predict_catboost(catboost_model, features)
-        predicted_value = cb_result["value"]
-        interval = cb_result["interval"]
-        shap_reasons = cb_result.get("shap_reasons", [])
+        cb_results = predict_catboost_batch(catboost_model, feature_rows)
+        predicted_values = [result["value"] for result in cb_results]
+        intervals = [result["interval"] for result in cb_results]
+        shap_reasons = [result.get("shap_reasons", []) for result in cb_results]
         chosen_model_id = catboost_model.model_id
         if model_family == "rule_inference":
             model_family = "catboost"
@@ -708,56 +972,171 @@ async def predict_v2(request: Request):
         # 4. Try logistic regression
         learned_model, _ = await _select_model(pool, tenant_id, prediction_type)
         if learned_model is not None:
-            learned_prediction = predict_with_trained_model(learned_model, features)
-            predicted_value = float(learned_prediction["value"])
-            interval = learned_prediction["interval"]
+            learned_predictions = predict_batch_with_trained_model(learned_model, feature_rows)
+            predicted_values = [float(prediction["value"]) for prediction in learned_predictions]
+            intervals = [prediction["interval"] for prediction in learned_predictions]
             chosen_model_id = learned_model.model_id
             model_family = "logistic_regression"
 
     # Survival prediction (time-to-pay)
     surv_key = f"tenant:{tenant_id}:survival"
-    surv_model = _survival_models.get(surv_key) or _survival_models.get("global:global:survival")
-    survival_info = None
-    if surv_model is not None:
-        sp = predict_survival(surv_model, features)
-        survival_info = {
-            "median_days_to_pay": sp.median_days_to_pay,
-            "survival_7d": sp.survival_7d,
-            "survival_30d": sp.survival_30d,
-            "survival_90d": sp.survival_90d,
-            "hazard_ratio": sp.hazard_ratio,
-        }
+    surv_model = (
+        await _cached_or_stored(pool, _survival_models, "survival", surv_key)
+        or await _cached_or_stored(pool, _survival_models, "survival", "global:global:survival")
+    )
 
-    # Drift + OOD
+    # Drift (shared by the group)
     drift_scope = tenant_id if model_family == "rule_inference" else "global"
+    await monitor_state.restore_drift(pool, chosen_model_id, prediction_type, drift_scope)
+    await monitor_state.restore_ood(pool, drift_scope, prediction_type)
     drift_status = drift_monitor.get_status(chosen_model_id, prediction_type, drift_scope)
-    ood_result = distribution_monitor.check(drift_scope, prediction_type, features)
 
-    confidence = 0.6 if model_family == "rule_inference" else 0.75
+    base_confidence = 0.6 if model_family == "rule_inference" else 0.75
     if model_family == "catboost" and catboost_model and catboost_model.calibrator:
-        confidence = max(0, 1 - catboost_model.calibrator["ece_after"])
+        base_confidence = max(0, 1 - catboost_model.calibrator["ece_after"])
     if drift_status["drift_detected"]:
-        confidence *= 0.5
-    if not ood_result["in_distribution"]:
-        confidence *= 0.5
+        base_confidence *= 0.5
+
+    survival_predictions = (
+        predict_survival_batch(surv_model, feature_rows) if surv_model is not None else [None] * len(feature_rows)
+    )
+
+    ood_results = distribution_monitor.check_batch(drift_scope, prediction_type, feature_rows)
+
+    results: list[dict[str, Any]] = []
+    for features, predicted_value, interval, reasons, sp, ood_result in zip(
+        feature_rows, predicted_values, intervals, shap_reasons, survival_predictions, ood_results,
+    ):
+        survival_info = None
+        if sp is not None:
+            survival_info = {
+                "median_days_to_pay": sp.median_days_to_pay,
+                "survival_7d": sp.survival_7d,
+                "survival_30d": sp.survival_30d,
+                "survival_90d": sp.survival_90d,
+                "hazard_ratio": sp.hazard_ratio,
+            }
+
+        confidence = base_confidence
+        if not ood_result["in_distribution"]:
+            confidence *= 0.5
+
+        results.append({
+            "value": round(predicted_value, 6),
+            "confidence": round(confidence, 4),
+            "interval": interval,
+            "model_id": chosen_model_id,
+            "model_family": model_family,
+            "feature_count": len(features),
+            "feature_hash": compute_feature_hash(features),
+            "shap_reasons": reasons,
+            "survival": survival_info,
+            "drift_detected": drift_status["drift_detected"],
+            "in_distribution": ood_result["in_distribution"],
+        })
+    return results
+
 
+@app.post("/predict/v2")
+async def predict_v2(request: Request):
+    """Enhanced prediction with auto-built full feature vector.
+
+    Instead of receiving pre-built features, this endpoint takes tenant_id +
+    object_id and builds the 34-feature vector from the current world model
+    state, including tenant stats, trajectory, and event counts, with one
+    database round trip (see feature_assembly). A fresh row in the feature
+    store is served instead of rebuilding the vector.
+    """
+    body = await request.json()
+    tenant_id = body.get("tenant_id")
+    object_id = body.get("object_id")
+    prediction_type = body.get("prediction_type", "paymentProbability7d")
+
+    if not tenant_id or not object_id:
+        return JSONResponse({"error": "tenant_id and object_id required"}, status_code=400)
+
+    pool = await get_pool()
+    if not pool:
+        return JSONResponse({"error": "no_db"}, status_code=503)
+
+    stored = await feature_store.get(pool, tenant_id, object_id)
+    if stored is not None:
+        result = (await _score_v2_rows(pool, tenant_id, prediction_type, [stored["features"]]))[0]
+        return JSONResponse({
+            **result,
+            "tenant_stats_available": stored["tenant_stats_available"],
+            "trajectory_available": stored["trajectory_available"],
+        })
+
+    assembled = await assemble_feature_vector(pool, tenant_id, object_id)
+    if assembled is None:
+        return JSONResponse({"error": "object_not_found"}, status_code=404)
+    features = assembled["features"]
+    tenant_stats = assembled["tenant_stats"]
+    trajectory = assembled["trajectory"]
+
+    # Try CatBoost first (has SHAP), then logistic regression, then rule fallback
+    result = (await _score_v2_rows(pool, tenant_id, prediction_type, [features]))[0]
     return JSONResponse({
-        "value": round(predicted_value, 6),
-        "confidence": round(confidence, 4),
-        "interval": interval,
-        "model_id": chosen_model_id,
-        "model_family": model_family,
-        "feature_count": len(features),
-        "feature_hash": feature_hash,
-        "shap_reasons": shap_reasons,
-        "survival": survival_info,
-        "drift_detected": drift_status["drift_detected"],
-        "in_distribution": ood_result["in_distribution"],
+        **result,
         "tenant_stats_available": tenant_stats is not None and tenant_stats.get("invoice_count", 0) > 0,
         "trajectory_available": trajectory is not None and trajectory.get("invoices_paid_count", 0) > 0,
     })
 
 
+@app.post("/predict/v2/batch")
+async def predict_v2_batch(request: Request):
+    """Bulk /predict/v2 for a list of object_ids belonging to one tenant.
+
+    Each feature family is gathered with one set-based query for all objects
+    (see feature_assembly), and all rows are scored together.
+    """
+    body = await request.json()
+    tenant_id = body.get("tenant_id")
+    object_ids = body.get("object_ids") or []
+    prediction_type = body.get("prediction_type", "paymentProbability7d")
+
+    if not tenant_id or not isinstance(object_ids, list) or not object_ids:
+        return JSONResponse({"error": "tenant_id and object_ids required"}, status_code=400)
+    if len(object_ids) > MAX_PREDICT_V2_BATCH_SIZE:
+        return JSONResponse(
+            {"error": "too_many_object_ids", "max_object_ids": MAX_PREDICT_V2_BATCH_SIZE},
+            status_code=400,
+        )
+
+    pool = await get_pool()
+    if not pool:
+        return JSONResponse({"error": "no_db"}, status_code=503)
+
+    object_ids = [str(object_id) for object_id in object_ids]
+    assembled = await assemble_feature_vectors(pool, tenant_id, object_ids)
+    found_ids = [object_id for object_id in dict.fromkeys(object_ids) if object_id in assembled]
+    scored = await _score_v2_rows(
+        pool,
+        tenant_id,
+        prediction_type,
+        [assembled[object_id]["features"] for object_id in found_ids],
+    )
+
+    results = []
+    for object_id, result in zip(found_ids, scored):
+        tenant_stats = assembled[object_id]["tenant_stats"]
+        trajectory = assembled[object_id]["trajectory"]
+        results.append({
+            "object_id": object_id,
+            **result,
+            "tenant_stats_available": tenant_stats is not None and tenant_stats.get("invoice_count", 0) > 0,
+            "trajectory_available": trajectory is not None and trajectory.get("invoices_paid_count", 0) > 0,
+        })
+
+    return JSONResponse({
+        "tenant_id": tenant_id,
+        "prediction_type": prediction_type,
+        "results": results,
+        "missing_object_ids": [object_id for object_id in dict.fromkeys(object_ids) if object_id not in assembled],
+    })
+
+
 @app.post("/interventions/estimate", response_model=InterventionEstimateResponse)
 async def estimate_intervention(req: InterventionEstimateRequest):
     pool = await get_pool()
@@ -915,7 +1294,10 @@ async def calibrate_endpoint(req: CalibrateRequest):
 async def drift(tenant_id: str):
     pool = await get_pool()
     if pool:
+        await monitor_state.restore_drift_tenant(pool, tenant_id)
         statuses = await check_all_models(pool, tenant_id)
+        # Persist the advanced watermark together with the detectors that consumed it.
+        await monitor_state.checkpoint(pool)
         return DriftResponse(
             models=[
                 DriftStatus(
@@ -960,7 +1342,7 @@ async def train(req: TrainRequest):
             details={"minimum_samples": MIN_TENANT_TRAINING_ROWS if scope == "tenant" else MIN_GLOBAL_TRAINING_ROWS},
         )
 
-    latest_release = await get_latest_model_release(pool, req.prediction_type, scope, req.tenant_id)
+    latest_release = await _get_release(pool, req.prediction_type, scope, req.tenant_id)
 
     return TrainResponse(
         status="trained" if latest_release is not None else "trained_untracked",
@@ -1085,7 +1467,8 @@ async def train_uplift(request: Request):
     if not tenant_id or len(outcomes) < 30:
         return JSONResponse({"status": "insufficient_data", "model_id": None}, status_code=200)
 
-    model = fit_uplift_model(
+    model = await training_executor.run(
+        fit_uplift_model,
         outcomes,
         tenant_id=tenant_id,
         action_class=action_class,
@@ -1095,6 +1478,11 @@ async def train_uplift(request: Request):
         return JSONResponse({"status": "insufficient_data", "model_id": None}, status_code=200)
 
     cache_key = f"{tenant_id}:{action_class}"
+    pool = await get_pool()
+    await artifact_store.save(
+        pool, "uplift", model,
+        release_id=f"artifact_{uuid4().hex}", cache_key=cache_key, tenant_id=tenant_id,
+    )
     _uplift_models[cache_key] = model
 
     return JSONResponse({
@@ -1117,7 +1505,8 @@ async def predict_uplift_endpoint(request: Request):
     features = body.get("features", {})
 
     cache_key = f"{tenant_id}:{action_class}"
-    model = _uplift_models.get(cache_key)
+    pool = await get_pool()
+    model = await _cached_or_stored(pool, _uplift_models, "uplift", cache_key)
 
     if model is None:
         return JSONResponse({"error": "no_model", "lift": None}, status_code=200)
@@ -1188,10 +1577,11 @@ async def survival_predict_endpoint(request: Request):
         return JSONResponse({"error": "tenant_id required"}, status_code=400)
 
     # Try tenant model, fall back to global
+    pool = await get_pool()
     surv_key = f"tenant:{tenant_id}:survival"
-    model = _survival_models.get(surv_key)
+    model = await _cached_or_stored(pool, _survival_models, "survival", surv_key)
     if model is None:
-        model = _survival_models.get("global:global:survival")
+        model = await _cached_or_stored(pool, _survival_models, "survival", "global:global:survival")
 
     if model is None:
         return JSONResponse({
@@ -1240,6 +1630,34 @@ async def epoch_sweep(request: Request):
     return JSONResponse({"created": created, "tenant_id": tenant_id})
 
 
+@app.post("/features/refresh")
+async def features_refresh(request: Request):
+    """Refresh stored invoice features for a tenant (all open invoices or object_ids)."""
+    body = await request.json()
+    tenant_id = body.get("tenant_id")
+    object_ids = body.get("object_ids")
+    if not tenant_id:
+        return JSONResponse({"error": "tenant_id required"}, status_code=400)
+    if object_ids is not None and not isinstance(object_ids, list):
+        return JSONResponse({"error": "object_ids must be a list"}, status_code=400)
+
+    pool = await get_pool()
+    if not pool:
+        return JSONResponse({"refreshed": 0, "error": "no_db"}, status_code=200)
+
+    rows = await feature_store.refresh(
+        pool,
+        tenant_id,
+        object_ids=[str(object_id) for object_id in object_ids] if object_ids is not None else None,
+        limit=body.get("limit", 200),
+    )
+    return JSONResponse({
+        "tenant_id": tenant_id,
+        "invoices": len(rows),
+        "refreshed": sum(1 for row in rows if row["rebuilt"]),
+    })
+
+
 @app.post("/epochs/resolve")
 async def epoch_resolve(request: Request):
     """Resolve outcomes for epochs whose observation window has closed."""
@@ -1281,38 +1699,51 @@ async def epoch_create_single(request: Request):
     })
 
 
-@app.post("/train/v2")
-async def train_v2(request: Request):
-    """Train a model using epoch-based training data (point-in-time correct)."""
-    body = await request.json()
-    tenant_id = body.get("tenant_id")
-    prediction_type = body.get("prediction_type", "paymentProbability7d")
-    force = body.get("force", False)
+async def _noop_stage(stage: str) -> None:
+    return None
 
-    pool = await get_pool()
-    if not pool:
-        return JSONResponse({"status": "no_db"}, status_code=200)
 
+async def _train_from_epochs(
+    pool,
+    tenant_id: str | None,
+    prediction_type: str,
+    report_stage: Callable[[str], Awaitable[None]] = _noop_stage,
+) -> dict[str, Any]:
+    """Epoch-based training shared by /train/v2 and training jobs.
+
+    Returns the /train/v2 response body; report_stage is awaited as the
+    run moves through loading_epochs, fitting and recording_release.
+    """
     scope = "tenant" if tenant_id else "global"
+    await report_stage("loading_epochs")
     epoch_rows = await get_epoch_training_rows(pool, tenant_id, prediction_type)
 
     if len(epoch_rows) < MIN_TENANT_TRAINING_ROWS:
-        return JSONResponse({
+        return {
             "status": "insufficient_epoch_data",
             "epoch_rows": len(epoch_rows),
             "minimum_required": MIN_TENANT_TRAINING_ROWS,
             "fallback": "use /train for legacy training",
-        })
+        }
 
-    # Try CatBoost first (needs >= 50 samples), fall back to logistic regression
-    catboost_model = fit_catboost_payment_model(
-        epoch_rows,
-        prediction_type=prediction_type,
-        tenant_id=tenant_id,
-        scope=scope,
+    await report_stage("fitting")
+
+    # Try CatBoost first (needs >= 50 samples), fall back to logistic regression.
+    # The survival model (time-to-pay) trains alongside it in another worker.
+    catboost_model, survival = await asyncio.gather(
+        training_executor.run(
+            fit_catboost_payment_model,
+            epoch_rows,
+            prediction_type=prediction_type,
+            tenant_id=tenant_id,
+            scope=scope,
+            with_shap=False,
+        ),
+        training_executor.run(fit_survival_model, epoch_rows, tenant_id=tenant_id, scope=scope),
     )
 
     if catboost_model is not None:
+        catboost_model.shap_explainer = build_shap_explainer(catboost_model.model)
         cache_key = _cache_key(scope, prediction_type, tenant_id)
         _catboost_models[cache_key] = catboost_model
         model_id = catboost_model.model_id
@@ -1323,14 +1754,15 @@ async def train_v2(request: Request):
         metadata = catboost_model.metadata
     else:
         # Fall back to logistic regression
-        logreg = fit_probability_model(
+        logreg = await training_executor.run(
+            fit_probability_model,
             epoch_rows,
             prediction_type=prediction_type,
             tenant_id=tenant_id,
             scope=scope,
         )
         if logreg is None:
-            return JSONResponse({"status": "training_failed"})
+            return {"status": "training_failed"}
 
         cache_key = _cache_key(scope, prediction_type, tenant_id)
         logreg.release_id = None
@@ -1343,8 +1775,6 @@ async def train_v2(request: Request):
         sample_count = logreg.sample_count
         metadata = logreg.metadata
 
-    # Also train survival model (time-to-pay)
-    survival = fit_survival_model(epoch_rows, tenant_id=tenant_id, scope=scope)
     survival_info = None
     if survival is not None:
         surv_cache_key = f"{scope}:{tenant_id or 'global'}:survival"
@@ -1359,20 +1789,13 @@ async def train_v2(request: Request):
         }
 
     # Create release record
+    await report_stage("recording_release")
     release_id = f"release_{uuid4().hex}"
-    baseline_comparison, replay_report, training_window, release_status = _evaluate_candidate_release(
-        # Create a minimal adapter for evaluation
-        type("_Model", (), {
-            "model_id": model_id, "feature_names": list((epoch_rows[0].get("feature_snapshot") or {}).keys()),
-            "estimator": None, "calibrator": None, "residuals": [],
-        })() if catboost_model is None else type("_Model", (), {
-            "model_id": model_id, "feature_names": catboost_model.feature_names,
-            "estimator": None, "calibrator": catboost_model.calibrator, "residuals": [],
-        })(),
-        epoch_rows,
-    ) if catboost_model is None else ({}, {}, {}, "candidate")
-
-    await insert_model_release(pool, {
+    baseline_comparison, replay_report, training_window, release_status = (
+        _evaluate_candidate_release(logreg, epoch_rows) if catboost_model is None else ({}, {}, {}, "candidate")
+    )
+
+    await _record_release(pool, {
         "release_id": release_id,
         "model_id": model_id,
         "prediction_type": prediction_type,
@@ -1392,8 +1815,20 @@ async def train_v2(request: Request):
         "replay_report": replay_report if isinstance(replay_report, dict) else {},
         "metadata": metadata,
     })
+    if catboost_model is not None:
+        await artifact_store.save(
+            pool, "catboost", catboost_model, release_id=release_id, cache_key=cache_key, tenant_id=tenant_id,
+        )
+    else:
+        await artifact_store.save(
+            pool, "probability", logreg, release_id=release_id, cache_key=cache_key, tenant_id=tenant_id,
+        )
+    if survival is not None:
+        await artifact_store.save(
+            pool, "survival", survival, release_id=release_id, cache_key=surv_cache_key, tenant_id=tenant_id,
+        )
 
-    return JSONResponse({
+    return {
         "status": "trained",
         "source": "decision_epochs",
         "model_family": model_family,
@@ -1404,4 +1839,86 @@ async def train_v2(request: Request):
         "brier_score": brier,
         "roc_auc": auc,
         "survival": survival_info,
-    })
+    }
+
+
+async def _train_from_epochs_once(pool, tenant_id: str | None, prediction_type: str) -> dict[str, Any]:
+    """_train_from_epochs, shared by concurrent /train/v2 requests for the same scope."""
+    return await _model_flights.do(
+        ("epochs", tenant_id, prediction_type),
+        lambda: _train_from_epochs(pool, tenant_id, prediction_type),
+    )
+
+
+@app.post("/train/v2")
+async def train_v2(request: Request):
+    """Train a model using epoch-based training data (point-in-time correct)."""
+    body = await request.json()
+    tenant_id = body.get("tenant_id")
+    prediction_type = body.get("prediction_type", "paymentProbability7d")
+
+    pool = await get_pool()
+    if not pool:
+        return JSONResponse({"status": "no_db"}, status_code=200)
+
+    return JSONResponse(await _train_from_epochs_once(pool, tenant_id, prediction_type))
+
+
+# ---------------------------------------------------------------------------
+# Training jobs — queued epoch training with status polling
+# ---------------------------------------------------------------------------
+
+
+async def _run_training_job(pool, job: dict, report_stage) -> dict[str, Any]:
+    # Not coalesced: the job table already serializes runs, and each job needs
+    # its own stage reports and to stop when its claim is lost.
+    return await _train_from_epochs(pool, job.get("tenant_id"), job["prediction_type"], report_stage)
+
+
+def _training_job_payload(job: dict) -> dict[str, Any]:
+    result = job.get("result") or {}
+    return {
+        "job_id": job["job_id"],
+        "tenant_id": job.get("tenant_id"),
+        "prediction_type": job["prediction_type"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "attempts": job.get("attempts", 0),
+        "release_id": result.get("release_id"),
+        "release_status": result.get("release_status"),
+        "result": job.get("result"),
+        "error": job.get("error"),
+        **{
+            key: job[key].isoformat() if isinstance(job.get(key), datetime) else job.get(key)
+            for key in ("created_at", "started_at", "finished_at")
+        },
+    }
+
+
+@app.post("/train/jobs")
+async def submit_training_job(request: Request):
+    """Queue epoch-based training (as /train/v2) and return the job id immediately."""
+    body = await request.json()
+    pool = await get_pool()
+    if not pool:
+        return JSONResponse({"error": "no_db"}, status_code=503)
+
+    job = await training_jobs.submit(
+        pool,
+        body.get("tenant_id"),
+        body.get("prediction_type", "paymentProbability7d"),
+    )
+    return JSONResponse(_training_job_payload(job), status_code=202)
+
+
+@app.get("/train/jobs/{job_id}")
+async def get_training_job_status(job_id: str):
+    """Status, current stage and (once finished) the release of a training job."""
+    pool = await get_pool()
+    if not pool:
+        return JSONResponse({"error": "no_db"}, status_code=503)
+
+    job = await training_jobs.get(pool, job_id)
+    if job is None:
+        return JSONResponse({"error": "job_not_found"}, status_code=404)
+    return JSONResponse(_training_job_payload(job))
@@ -0,0 +1,52 @@
+"""Single-flight coordination for expensive per-key work.
+
+After a cache miss, every concurrent request for the same tenant would
+otherwise fetch the same rows and fit the same model (and record a release
+per fit). SingleFlight runs the work once per key: the first caller starts
+it, later callers await the same result, and the key is free again as soon
+as the work finishes, so the next miss starts a fresh run.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return fn()'s result, sharing one run among concurrent callers.
+
+        The work runs as its own task, so a caller that is cancelled (client
+        disconnect) does not cancel it for the others. Exceptions propagate
+        to every caller of that run.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.started += 1
+
+            def _release(done: asyncio.Task, key: Hashable = key) -> None:
+                if self._calls.get(key) is done:
+                    del self._calls[key]
+
+            task.add_done_callback(_release)
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def status(self) -> dict[str, Any]:
+        return {"in_flight": len(self._calls), "started": self.started, "coalesced": self.coalesced}
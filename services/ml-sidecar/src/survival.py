@@ -10,6 +10,10 @@ This module uses lifelines CoxPH for survival analysis:
 - Proper handling of censored (still-open) observations
 
 Evaluation: C-index for ranking quality, time-dependent Brier score.
+
+Serving does not touch lifelines or pandas: fit_survival_model exports a
+CoxKernel (folded coefficients plus the Breslow baseline cumulative hazard as
+numpy arrays) and predictions are S(t) = exp(-H0(t) * exp(x·β)).
 """
 
 from __future__ import annotations
@@ -24,6 +28,64 @@ import numpy as np
 logger = logging.getLogger(__name__)
 
 MIN_SURVIVAL_SAMPLES = 30
+SURVIVAL_HORIZON_DAYS = (7.0, 30.0, 90.0)
+
+
+@dataclass
+class CoxKernel:
+    """A fitted CoxPH model reduced to numpy arrays.
+
+    The training-time standardization and lifelines' internal centering are
+    folded into coef/offset, so log_partial_hazard(x) = x @ coef - offset on
+    raw features, identical to cph.predict_log_partial_hazard on standardized
+    ones. H0 is the baseline cumulative hazard evaluated on `timeline`.
+    """
+    coef: np.ndarray  # (n_features,)
+    offset: float
+    timeline: np.ndarray  # increasing event/censoring times
+    baseline_cumulative_hazard: np.ndarray  # H0 at each timeline point
+
+    def log_partial_hazard(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.coef - self.offset
+
+    def cumulative_hazard_at(self, times) -> np.ndarray:
+        """H0 at arbitrary times, linearly interpolated like lifelines."""
+        return np.interp(np.asarray(times, dtype=np.float64), self.timeline, self.baseline_cumulative_hazard)
+
+    def score(self, X: np.ndarray, times=SURVIVAL_HORIZON_DAYS) -> dict[str, np.ndarray]:
+        """Survival at `times`, median time and partial hazard for each row.
+
+        Returns {"survival": (n, len(times)), "median": (n,), "partial_hazard": (n,)};
+        median is inf where the survival curve never reaches 0.5.
+        """
+        partial_hazard = np.exp(self.log_partial_hazard(X))
+        survival = np.exp(-np.outer(partial_hazard, self.cumulative_hazard_at(times)))
+
+        # S(t) <= 0.5  <=>  H0(t) >= ln 2 / partial_hazard; H0 is non-decreasing.
+        crossing = np.searchsorted(self.baseline_cumulative_hazard, np.log(2.0) / partial_hazard, side="left")
+        median = np.full(len(partial_hazard), np.inf)
+        reached = crossing < len(self.timeline)
+        median[reached] = self.timeline[crossing[reached]]
+        return {"survival": survival, "median": median, "partial_hazard": partial_hazard}
+
+
+def compile_cox_kernel(cph, feature_names: list[str], means: np.ndarray, stds: np.ndarray) -> CoxKernel:
+    """Fold z = (x - mean) / std and lifelines' centering into one affine map.
+
+    lifelines scores (z - norm_mean)·β, which expands to
+        x·(β / std) - (mean / std + norm_mean)·β
+    """
+    beta = np.asarray(cph.params_[feature_names].values, dtype=np.float64)
+    norm_mean = np.asarray(cph._norm_mean[feature_names].values, dtype=np.float64)
+    coef = beta / stds
+    offset = float((means / stds + norm_mean) @ beta)
+    baseline = cph.baseline_cumulative_hazard_
+    return CoxKernel(
+        coef=np.ascontiguousarray(coef),
+        offset=offset,
+        timeline=np.ascontiguousarray(baseline.index.values, dtype=np.float64),
+        baseline_cumulative_hazard=np.ascontiguousarray(baseline.values.reshape(-1), dtype=np.float64),
+    )
 
 
 @dataclass
@@ -40,6 +102,7 @@ class TrainedSurvivalModel:
     concordance: float | None
     median_survival_days: float | None
     metadata: dict[str, Any]
+    kernel: CoxKernel | None = None
 
 
 @dataclass
@@ -158,6 +221,14 @@ def fit_survival_model(
     except (AttributeError, ValueError):
         median_survival = None
 
+    try:
+        kernel = compile_cox_kernel(
+            cph, feature_cols, means[feature_cols].to_numpy(np.float64), stds[feature_cols].to_numpy(np.float64),
+        )
+    except Exception as e:
+        logger.warning("Could not compile CoxPH kernel, serving through lifelines: %s", e)
+        kernel = None
+
     model_id = f"ml_survival_cox_{scope}_v1"
 
     return TrainedSurvivalModel(
@@ -176,6 +247,7 @@ def fit_survival_model(
         censored_count=censored_count,
         concordance=concordance,
         median_survival_days=median_survival,
+        kernel=kernel,
         metadata={
             "model_family": "cox_ph",
             "feature_source": "decision_epochs_v1",
@@ -184,11 +256,49 @@ def fit_survival_model(
     )
 
 
+def predict_survival_batch(
+    model: TrainedSurvivalModel,
+    feature_rows: list[dict[str, float]],
+) -> list[SurvivalPrediction]:
+    """Predict survival for many invoices with a handful of vector ops."""
+    if not feature_rows:
+        return []
+    if model.kernel is None:
+        return [_predict_survival_lifelines(model, features) for features in feature_rows]
+
+    X = np.asarray(
+        [[float(features.get(name, 0.0)) for name in model.feature_names] for features in feature_rows],
+        dtype=np.float64,
+    )
+    scored = model.kernel.score(X, SURVIVAL_HORIZON_DAYS)
+    survival = np.round(scored["survival"], 4)
+    hazard_ratios = np.round(scored["partial_hazard"], 4)
+    return [
+        SurvivalPrediction(
+            median_days_to_pay=float(median) if np.isfinite(median) else None,
+            survival_7d=float(row[0]),
+            survival_30d=float(row[1]),
+            survival_90d=float(row[2]),
+            hazard_ratio=float(hr),
+            concordance=model.concordance,
+        )
+        for row, median, hr in zip(survival, scored["median"], hazard_ratios)
+    ]
+
+
 def predict_survival(
     model: TrainedSurvivalModel,
     features: dict[str, float],
 ) -> SurvivalPrediction:
     """Predict survival function for a single invoice."""
+    return predict_survival_batch(model, [features])[0]
+
+
+def _predict_survival_lifelines(
+    model: TrainedSurvivalModel,
+    features: dict[str, float],
+) -> SurvivalPrediction:
+    """Score through lifelines; only used for models without a CoxKernel."""
     import pandas as pd
 
     cph = model.model["cph"]
@@ -218,14 +328,15 @@ def predict_survival(
 
     # Median time to pay for this specific invoice
     try:
-        median = cph.predict_median(df)
-        median_days = float(median.iloc[0]) if not np.isinf(median.iloc[0]) else None
+        # lifelines squeezes a one-row result to a scalar
+        median = float(np.asarray(cph.predict_median(df)).reshape(-1)[0])
+        median_days = median if not np.isinf(median) else None
     except Exception:
         median_days = None
 
     # Hazard ratio relative to baseline
     try:
-        hr = float(np.exp(cph.predict_partial_hazard(df).iloc[0]))
+        hr = float(cph.predict_partial_hazard(df).iloc[0])
     except Exception:
         hr = 1.0
 
@@ -5,22 +5,26 @@ days-to-pay, percentiles) so that individual invoice features can be
 expressed relative to the tenant's norms. This makes a $500 SaaS invoice
 and a $50K construction invoice comparable.
 
-Cache TTL is 1 hour — stats shift slowly, no need to recompute per request.
+Amount and days-to-pay distributions come from per-tenant quantile sketches
+that the database keeps current (migration 098), so a reload reads a few
+hundred bucket rows instead of scanning the tenant's invoices.
+
+Stats are cached for an hour (stats shift slowly) and served stale for up to
+another hour while a background reload runs; see async_cache.
 """
 
 from __future__ import annotations
 
 import logging
-import time
-from typing import Any
 
-from .db import get_customer_reliability_percentile, get_tenant_invoice_stats
+from .async_cache import AsyncCache
+from .db import get_tenant_invoice_sketches
+from .quantile_sketch import QuantileSketch
+from .reliability_index import reliability_index
 
 logger = logging.getLogger(__name__)
 
-# In-memory cache: tenant_id -> (stats_dict, timestamp)
-_cache: dict[str, tuple[dict[str, float], float]] = {}
-CACHE_TTL_SECONDS = 3600  # 1 hour
+_stats_cache = AsyncCache.from_env("tenant_stats", ttl_seconds=3600, stale_seconds=3600, max_entries=5000)
 
 
 async def load_tenant_stats(
@@ -30,18 +34,15 @@ async def load_tenant_stats(
     force: bool = False,
 ) -> dict[str, float]:
     """Load tenant-level statistics, using cache when fresh."""
-    now = time.time()
-
-    if not force and tenant_id in _cache:
-        stats, cached_at = _cache[tenant_id]
-        if now - cached_at < CACHE_TTL_SECONDS:
-            return stats
-
     if pool is None:
         return _default_stats()
+    if force:
+        _stats_cache.invalidate(tenant_id)
+    return await _stats_cache.get(tenant_id, lambda: _compute_tenant_stats(pool, tenant_id))
 
-    stats = await get_tenant_invoice_stats(pool, tenant_id)
-    _cache[tenant_id] = (stats, now)
+
+async def _compute_tenant_stats(pool, tenant_id: str) -> dict[str, float]:
+    stats = stats_from_sketches(await get_tenant_invoice_sketches(pool, tenant_id))
     logger.info(
         "Loaded tenant stats for %s: %d invoices, median=$%.0f, avg_dtp=%.1fd",
         tenant_id,
@@ -63,18 +64,56 @@ async def load_tenant_stats_with_customer(
     stats = await load_tenant_stats(pool, tenant_id, force=force)
 
     if party_id and pool:
-        percentile = await get_customer_reliability_percentile(pool, tenant_id, party_id)
+        percentile = await reliability_index.percentile(pool, tenant_id, party_id)
         stats = {**stats, "customer_reliability_percentile": percentile}
 
     return stats
 
 
+async def load_tenant_stats_with_customers(
+    pool,
+    tenant_id: str,
+    party_ids: list[str],
+    *,
+    force: bool = False,
+) -> dict[str, dict[str, float]]:
+    """Bulk form of load_tenant_stats_with_customer.
+
+    Loads the tenant stats once and every party's percentile from the
+    reliability index. Returns {party_id: stats}; callers use load_tenant_stats for rows
+    without a party.
+    """
+    stats = await load_tenant_stats(pool, tenant_id, force=force)
+    if not party_ids or not pool:
+        return {party_id: stats for party_id in party_ids}
+
+    percentiles = await reliability_index.percentiles(pool, tenant_id, party_ids)
+    return {
+        party_id: {**stats, "customer_reliability_percentile": percentiles.get(party_id, 0.5)}
+        for party_id in party_ids
+    }
+
+
+def stats_from_sketches(sketch_rows: dict[str, list]) -> dict[str, float]:
+    """Tenant stats from the amount_cents and days_to_pay sketch rows."""
+    amounts = QuantileSketch.from_rows(sketch_rows.get("amount_cents", []))
+    days_to_pay = QuantileSketch.from_rows(sketch_rows.get("days_to_pay", []))
+    p25, p50, p75, p95 = amounts.quantiles([0.25, 0.50, 0.75, 0.95])
+    return {
+        "invoice_count": amounts.count,
+        "amount_p25": p25,
+        "amount_p50": p50,
+        "amount_p75": p75,
+        "amount_p95": p95,
+        "avg_amount_cents": amounts.mean(),
+        "median_amount_cents": p50,
+        "avg_days_to_pay": days_to_pay.mean(30.0),
+    }
+
+
 def invalidate_cache(tenant_id: str | None = None) -> None:
     """Clear cached stats. Called after significant data changes."""
-    if tenant_id:
-        _cache.pop(tenant_id, None)
-    else:
-        _cache.clear()
+    _stats_cache.invalidate(tenant_id or None)
 
 
 def _default_stats() -> dict[str, float]:
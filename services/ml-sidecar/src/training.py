@@ -5,13 +5,14 @@ from datetime import datetime, timezone
 from typing import Any
 
 import numpy as np
+from scipy.special import expit
 from sklearn.linear_model import LinearRegression, LogisticRegression
 from sklearn.metrics import brier_score_loss, mean_absolute_error, r2_score, roc_auc_score
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 
-from .calibration import calibrate, fit_best_calibrator
-from .conformal import compute_intervals_from_residuals
+from .calibration import apply_calibrator, calibrate, fit_best_calibrator
+from .conformal import ConformalTable, build_conformal_table, compute_intervals_batch_from_residuals
 from .features import build_invoice_feature_map, build_full_feature_vector, compute_feature_hash
 
 
@@ -36,6 +37,45 @@ def _parse_datetime(value: Any) -> datetime | None:
         return None
 
 
+@dataclass
+class LinearKernel:
+    """A fitted StandardScaler + linear model folded into one affine map.
+
+    decision(X) = X @ coef + intercept reproduces the pipeline's
+    decision_function (or predict, for regressors) without sklearn input
+    validation or per-step dispatch. Works on a single row or a matrix.
+    """
+    coef: np.ndarray  # contiguous float64, shape (n_features,)
+    intercept: float
+
+    def decision(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Positive-class probability for a logistic kernel."""
+        return expit(self.decision(X))
+
+
+def compile_linear_kernel(estimator: Pipeline) -> LinearKernel:
+    """Fold the scaler's mean and scale into the final linear step's weights.
+
+    For z = (x - mean) / scale and f(z) = w·z + b:
+        f(x) = (w / scale)·x + (b - Σ w·mean / scale)
+    """
+    linear = estimator.steps[-1][1]
+    weights = np.asarray(linear.coef_, dtype=np.float64).reshape(-1)
+    intercept = float(np.asarray(linear.intercept_, dtype=np.float64).reshape(-1)[0])
+
+    scaler = estimator.named_steps.get("scaler")
+    if scaler is not None:
+        mean = np.asarray(scaler.mean_, dtype=np.float64) if scaler.mean_ is not None else np.zeros_like(weights)
+        scale = np.asarray(scaler.scale_, dtype=np.float64) if scaler.scale_ is not None else np.ones_like(weights)
+        weights = weights / scale
+        intercept = intercept - float(weights @ mean)
+
+    return LinearKernel(coef=np.ascontiguousarray(weights, dtype=np.float64), intercept=intercept)
+
+
 @dataclass
 class TrainedProbabilityModel:
     model_id: str
@@ -54,6 +94,20 @@ class TrainedProbabilityModel:
     roc_auc: float | None
     residuals: list[float]
     metadata: dict[str, Any]
+    kernel: LinearKernel | None = None
+    conformal: ConformalTable | None = None
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Positive-class probabilities; uses the compiled kernel when present."""
+        if self.kernel is not None:
+            return self.kernel.predict_proba(X)
+        return self.estimator.predict_proba(X)[:, 1]
+
+    def intervals(self, values: np.ndarray, coverage: float = 0.90) -> list[dict[str, float]]:
+        """Conformal intervals; a table lookup when the quantiles were precomputed."""
+        if self.conformal is not None:
+            return self.conformal.intervals(values, coverage)
+        return compute_intervals_batch_from_residuals(self.residuals, values, coverage=coverage)
 
 
 @dataclass
@@ -71,6 +125,7 @@ class TrainedInterventionModel:
     r2_score: float | None
     delta_mean: float
     metadata: dict[str, Any]
+    kernel: LinearKernel | None = None
 
 
 @dataclass
@@ -139,10 +194,7 @@ def fit_probability_model(
 
     raw_probabilities = estimator.predict_proba(X)[:, 1]
     calibrator = fit_best_calibrator(raw_probabilities.tolist(), y.astype(float).tolist()) if len(rows) >= 20 else None
-    probabilities = np.asarray(
-        [calibrate(float(prob), calibrator) if calibrator is not None else float(prob) for prob in raw_probabilities],
-        dtype=np.float64,
-    )
+    probabilities = apply_calibrator(raw_probabilities, calibrator) if calibrator is not None else raw_probabilities
     residuals = (probabilities - y).tolist()
 
     try:
@@ -173,6 +225,8 @@ def fit_probability_model(
         brier_score=float(brier_score_loss(y, probabilities)),
         roc_auc=auc,
         residuals=residuals,
+        kernel=compile_linear_kernel(estimator),
+        conformal=build_conformal_table(residuals, probabilities),
         metadata={
             "feature_source": "decision_epochs_v1" if is_epoch_based else "current_world_object_snapshot_v1",
             "model_family": "logistic_regression",
@@ -184,14 +238,15 @@ def fit_probability_model(
 def predict_with_trained_model(
     model: TrainedProbabilityModel,
     request_features: dict[str, Any],
+    coverage: float = 0.90,
 ) -> dict[str, Any]:
     vector = np.asarray(
         [[_to_float(request_features.get(feature_name)) for feature_name in model.feature_names]],
         dtype=np.float64,
     )
-    raw_probability = float(model.estimator.predict_proba(vector)[0][1])
+    raw_probability = float(model.predict_proba(vector)[0])
     calibrated_probability = calibrate(raw_probability, model.calibrator) if model.calibrator is not None else raw_probability
-    interval = compute_intervals_from_residuals(model.residuals, calibrated_probability, coverage=0.90)
+    interval = model.intervals(np.asarray([calibrated_probability]), coverage)[0]
     return {
         "value": float(np.clip(calibrated_probability, 0.0, 1.0)),
         "raw_value": float(np.clip(raw_probability, 0.0, 1.0)),
@@ -199,6 +254,35 @@ def predict_with_trained_model(
     }
 
 
+def predict_batch_with_trained_model(
+    model: TrainedProbabilityModel,
+    feature_rows: list[dict[str, Any]],
+    coverage: float = 0.90,
+) -> list[dict[str, Any]]:
+    """Score many feature maps with one predict_proba call.
+
+    Returns one dict per row with the same shape as predict_with_trained_model.
+    """
+    if not feature_rows:
+        return []
+    matrix = np.asarray(
+        [[_to_float(row.get(feature_name)) for feature_name in model.feature_names] for row in feature_rows],
+        dtype=np.float64,
+    )
+    raw_probabilities = model.predict_proba(matrix)
+    if model.calibrator is not None:
+        calibrated_probabilities = apply_calibrator(raw_probabilities, model.calibrator)
+    else:
+        calibrated_probabilities = raw_probabilities
+    intervals = model.intervals(calibrated_probabilities, coverage)
+    values = np.clip(calibrated_probabilities, 0.0, 1.0)
+    raw_values = np.clip(raw_probabilities, 0.0, 1.0)
+    return [
+        {"value": float(value), "raw_value": float(raw_value), "interval": interval}
+        for value, raw_value, interval in zip(values, raw_values, intervals)
+    ]
+
+
 def fit_intervention_effect_model(
     rows: list[dict[str, Any]],
     *,
@@ -260,6 +344,7 @@ def fit_intervention_effect_model(
         mean_absolute_error=mae,
         r2_score=model_r2,
         delta_mean=float(y.mean()) if len(y) > 0 else 0.0,
+        kernel=compile_linear_kernel(estimator),
         metadata={
             "model_family": "linear_regression",
             "feature_source": "world_action_effect_observations_v1",
@@ -289,7 +374,10 @@ def predict_with_intervention_model(
         [[_to_float(feature_map.get(feature_name)) for feature_name in model.feature_names]],
         dtype=np.float64,
     )
-    predicted_delta = float(model.estimator.predict(vector)[0])
+    if model.kernel is not None:
+        predicted_delta = float(model.kernel.decision(vector)[0])
+    else:
+        predicted_delta = float(model.estimator.predict(vector)[0])
     next_value = _to_float(current_value) + predicted_delta
     quality_score = float(np.clip((1.0 - min(model.mean_absolute_error, 1.0)) * 0.8 + (min(model.sample_count, 50) / 50.0) * 0.2, 0.0, 1.0))
     evidence_strength = float(np.clip((quality_score * 0.7) + (min(model.sample_count, 40) / 40.0) * 0.3, 0.0, 1.0))
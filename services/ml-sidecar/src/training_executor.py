@@ -0,0 +1,123 @@
+"""Process-pool executor for model fitting.
+
+fit_* functions are CPU-bound and would stall the event loop (and every
+request on the worker) for the length of a fit. Handlers submit them here
+instead and await the result. Jobs run in spawned worker processes whose
+BLAS/OpenMP pools and CatBoost are capped at ML_TRAINING_THREADS_PER_JOB
+threads, so concurrent fits do not oversubscribe the CPU.
+
+With ML_TRAINING_WORKERS=0 jobs run on a thread of this process instead
+(still off the event loop, but sharing the GIL with request handling).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+TRAINING_WORKERS = int(os.environ.get("ML_TRAINING_WORKERS", "2"))
+TRAINING_THREADS_PER_JOB = int(os.environ.get("ML_TRAINING_THREADS_PER_JOB", "1"))
+TRAINING_MAX_JOBS_PER_WORKER = int(os.environ.get("ML_TRAINING_MAX_JOBS_PER_WORKER", "100"))
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "ML_TRAINING_THREADS_PER_JOB")
+
+
+def _init_worker(threads_per_job: int) -> None:
+    """Cap native thread pools in a fresh worker before any fit runs."""
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = str(threads_per_job)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(threads_per_job)
+    except ImportError:
+        pass
+    # Imported after the caps so CatBoost picks up its thread count.
+    from . import catboost_model
+
+    catboost_model.CATBOOST_THREAD_COUNT = threads_per_job
+
+
+class TrainingExecutor:
+    """Runs fit functions off the event loop; one per sidecar process."""
+
+    def __init__(
+        self,
+        workers: int = TRAINING_WORKERS,
+        threads_per_job: int = TRAINING_THREADS_PER_JOB,
+        max_jobs_per_worker: int = TRAINING_MAX_JOBS_PER_WORKER,
+    ):
+        self.workers = workers
+        self.threads_per_job = max(1, threads_per_job)
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._pool: ProcessPoolExecutor | None = None
+        self.submitted = 0
+        self.failed = 0
+        self.in_flight = 0
+
+    def _executor(self) -> Executor | None:
+        if self.workers <= 0:
+            return None  # the loop's default thread pool
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.threads_per_job,),
+                max_tasks_per_child=self.max_jobs_per_worker or None,
+            )
+        return self._pool
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run fn(*args, **kwargs) in a worker and return its result.
+
+        fn, its arguments and its result must be picklable. Exceptions raised
+        by fn propagate. A crashed worker breaks the pool; it is replaced and
+        the error re-raised.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._executor()
+        self.submitted += 1
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+        except BrokenProcessPool:
+            logger.error("Training worker died running %s; restarting the pool", getattr(fn, "__name__", fn))
+            self._discard_pool(executor)
+            self.failed += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    def _discard_pool(self, executor: Executor | None) -> None:
+        if executor is not None and executor is self._pool:
+            self._pool = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "threads_per_job": self.threads_per_job,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "failed": self.failed,
+        }
+
+    def shutdown(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Module-level singleton
+training_executor = TrainingExecutor()
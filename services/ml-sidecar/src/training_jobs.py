@@ -0,0 +1,175 @@
+"""Asynchronous training jobs backed by world_model_training_jobs.
+
+POST /train/jobs only inserts a queued row (migration 095) and returns its
+id; every sidecar worker runs a few job slots that claim queued rows with
+FOR UPDATE SKIP LOCKED and run them through the server's epoch training.
+While a job runs its slot heartbeats the row, so a job orphaned by a
+restart is claimed again once its lease expires. Because the queue is the
+table, a scheduler can submit thousands of jobs without holding
+connections, and jobs survive deploys.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+from typing import Any, Awaitable, Callable
+from uuid import uuid4
+
+from .db import (
+    claim_training_job,
+    finish_training_job,
+    get_training_job,
+    insert_training_job,
+    update_training_job_stage,
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_CONCURRENCY = int(os.environ.get("ML_TRAINING_JOB_CONCURRENCY", "2"))
+JOB_POLL_SECONDS = float(os.environ.get("ML_TRAINING_JOB_POLL_SECONDS", "5"))
+JOB_LEASE_SECONDS = float(os.environ.get("ML_TRAINING_JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("ML_TRAINING_JOB_MAX_ATTEMPTS", "3"))
+
+ReportStage = Callable[[str], Awaitable[None]]
+# (pool, job, report_stage) -> result stored on the job
+JobHandler = Callable[[Any, dict, ReportStage], Awaitable[dict]]
+
+
+class TrainingJobRunner:
+    """Claims and runs queued training jobs in a fixed number of slots."""
+
+    def __init__(
+        self,
+        concurrency: int = JOB_CONCURRENCY,
+        poll_seconds: float = JOB_POLL_SECONDS,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._wake = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+        self.abandoned = 0
+        self.heartbeat_errors = 0
+
+    async def submit(self, pool, tenant_id: str | None, prediction_type: str) -> dict:
+        """Queue a job and wake a local slot to pick it up."""
+        job = await insert_training_job(pool, f"trainjob_{uuid4().hex}", tenant_id, prediction_type)
+        self._wake.set()
+        return job
+
+    async def get(self, pool, job_id: str) -> dict | None:
+        return await get_training_job(pool, job_id)
+
+    async def run_one(self, pool, handler: JobHandler) -> bool:
+        """Claim and run one job. Returns False when nothing was claimable.
+
+        Stage updates and heartbeats only apply while this worker still holds
+        the claim; once one touches no row (the lease expired and the job was
+        reclaimed or failed) the handler is abandoned without writing a result.
+        """
+        job = await claim_training_job(pool, self.worker_id, self.lease_seconds, self.max_attempts)
+        if job is None:
+            return False
+
+        job_id = job["job_id"]
+        stage = {"current": "queued"}
+        lost = asyncio.Event()
+
+        async def record_stage(name: str) -> None:
+            if not await update_training_job_stage(pool, job_id, self.worker_id, name):
+                lost.set()
+                work.cancel()
+
+        async def report_stage(name: str) -> None:
+            stage["current"] = name
+            await record_stage(name)
+            if lost.is_set():
+                raise asyncio.CancelledError
+
+        async def heartbeat() -> None:
+            while True:
+                await asyncio.sleep(self.lease_seconds / 3)
+                try:
+                    await record_stage(stage["current"])
+                except Exception as exc:
+                    # Keep beating: a lease that lapses meanwhile is caught by
+                    # the next update that touches no row.
+                    self.heartbeat_errors += 1
+                    logger.warning("Training job %s heartbeat failed: %s", job_id, exc)
+
+        work = asyncio.create_task(handler(pool, job, report_stage))
+        beat = asyncio.create_task(heartbeat())
+        try:
+            result = await work
+        except asyncio.CancelledError:
+            if not lost.is_set():
+                # Shutdown: leave the job running; its lease expires and another worker retries it.
+                work.cancel()
+                raise
+            self.abandoned += 1
+            logger.warning("Training job %s lost its claim; abandoning it", job_id)
+            return True
+        except Exception as exc:
+            logger.exception("Training job %s failed", job_id)
+            if await self._finish(pool, job_id, "failed", error=f"{type(exc).__name__}: {exc}"):
+                self.failed += 1
+        else:
+            if await self._finish(pool, job_id, "succeeded", result=result):
+                self.completed += 1
+        finally:
+            beat.cancel()
+        return True
+
+    async def _finish(self, pool, job_id: str, status: str, **outcome: Any) -> bool:
+        if await finish_training_job(pool, job_id, self.worker_id, status, **outcome):
+            return True
+        self.abandoned += 1
+        logger.warning("Training job %s lost its claim; dropping its %s result", job_id, status)
+        return False
+
+    async def _slot(self, pool, handler: JobHandler) -> None:
+        while True:
+            try:
+                if await self.run_one(pool, handler):
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Training job slot error: %s", exc)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "slots": len(self._tasks),
+            "completed": self.completed,
+            "failed": self.failed,
+            "abandoned": self.abandoned,
+            "heartbeat_errors": self.heartbeat_errors,
+        }
+
+    def start(self, pool, handler: JobHandler) -> None:
+        if not self._tasks and pool is not None:
+            self._tasks = [asyncio.create_task(self._slot(pool, handler)) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Module-level singleton
+training_jobs = TrainingJobRunner()
@@ -14,10 +14,13 @@ import logging
 from datetime import datetime, timezone
 from typing import Any
 
-from .db import get_customer_payment_history
+from .async_cache import AsyncCache
+from .db import get_customer_payment_histories, get_customer_payment_history
 
 logger = logging.getLogger(__name__)
 
+_trajectory_cache = AsyncCache.from_env("customer_trajectory", ttl_seconds=900, stale_seconds=3600, max_entries=20000)
+
 
 def _parse_dt(value: Any) -> datetime | None:
     if not value:
@@ -124,6 +127,16 @@ def compute_trajectory_from_history(
     }
 
 
+def trajectory_from_history(
+    invoices: list[dict[str, Any]],
+    reference_time: datetime | None = None,
+) -> dict[str, float]:
+    """compute_trajectory_from_history, or the defaults for a customer without invoices."""
+    if not invoices:
+        return _default_trajectory()
+    return compute_trajectory_from_history(invoices, reference_time)
+
+
 async def load_customer_trajectory(
     pool,
     tenant_id: str,
@@ -132,17 +145,53 @@ async def load_customer_trajectory(
     before: str | None = None,
     reference_time: datetime | None = None,
 ) -> dict[str, float]:
-    """Load and compute trajectory features for a customer."""
+    """Load and compute trajectory features for a customer.
+
+    The current trajectory (no before/reference_time) is cached per customer;
+    point-in-time loads always query.
+    """
     if pool is None:
         return _default_trajectory()
+    if before is None and reference_time is None:
+        return await _trajectory_cache.get(
+            (tenant_id, party_id),
+            lambda: _compute_customer_trajectory(pool, tenant_id, party_id, None, None),
+        )
+    return await _compute_customer_trajectory(pool, tenant_id, party_id, before, reference_time)
 
+
+async def _compute_customer_trajectory(
+    pool,
+    tenant_id: str,
+    party_id: str,
+    before: str | None,
+    reference_time: datetime | None,
+) -> dict[str, float]:
     invoices = await get_customer_payment_history(
         pool, tenant_id, party_id, before=before,
     )
-    if not invoices:
-        return _default_trajectory()
+    return trajectory_from_history(invoices, reference_time)
 
-    return compute_trajectory_from_history(invoices, reference_time)
+
+async def load_customer_trajectories(
+    pool,
+    tenant_id: str,
+    party_ids: list[str],
+    *,
+    before: datetime | None = None,
+    reference_time: datetime | None = None,
+) -> dict[str, dict[str, float]]:
+    """Bulk form of load_customer_trajectory: one history query for all parties."""
+    if pool is None or not party_ids:
+        return {party_id: _default_trajectory() for party_id in party_ids}
+
+    histories = await get_customer_payment_histories(
+        pool, tenant_id, party_ids, before=before,
+    )
+    return {
+        party_id: trajectory_from_history(histories.get(party_id, []), reference_time)
+        for party_id in party_ids
+    }
 
 
 def _default_trajectory() -> dict[str, float]:
@@ -16,8 +16,8 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 
-from .training import build_invoice_feature_map, _to_float, _parse_datetime
-from .conformal import compute_intervals_from_residuals  # noqa: F401 — used for reference
+from .training import LinearKernel, build_invoice_feature_map, compile_linear_kernel, _to_float, _parse_datetime
+from .conformal import ConformalTable, build_conformal_table
 
 
 @dataclass
@@ -37,6 +37,9 @@ class TrainedUpliftModel:
     observed_lift: float
     residuals: list[float]
     metadata: dict[str, Any]
+    treatment_kernel: LinearKernel | None = None
+    control_kernel: LinearKernel | None = None
+    conformal: ConformalTable | None = None
 
 
 def _build_features_from_graded_outcome(row: dict[str, Any]) -> dict[str, float]:
@@ -174,6 +177,9 @@ def fit_uplift_model(
         control_positive_rate=control_positive_rate,
         observed_lift=observed_lift,
         residuals=residuals,
+        treatment_kernel=compile_linear_kernel(treatment_estimator),
+        control_kernel=compile_linear_kernel(control_estimator),
+        conformal=build_conformal_table(residuals, predicted_lifts_treat),
         metadata={
             "model_family": "t_learner",
             "treatment_action_class": action_class,
@@ -185,30 +191,24 @@ def fit_uplift_model(
 def predict_uplift(
     model: TrainedUpliftModel,
     features: dict[str, Any],
+    coverage: float = 0.90,
 ) -> dict[str, Any]:
     vector = np.asarray(
         [[_to_float(features.get(name)) for name in model.feature_names]],
         dtype=np.float64,
     )
-    treatment_prob = float(model.treatment_estimator.predict_proba(vector)[0][1])
-    control_prob = float(model.control_estimator.predict_proba(vector)[0][1])
+    if model.treatment_kernel is not None and model.control_kernel is not None:
+        treatment_prob = float(model.treatment_kernel.predict_proba(vector)[0])
+        control_prob = float(model.control_kernel.predict_proba(vector)[0])
+    else:
+        treatment_prob = float(model.treatment_estimator.predict_proba(vector)[0][1])
+        control_prob = float(model.control_estimator.predict_proba(vector)[0][1])
     lift = treatment_prob - control_prob
 
-    # Compute conformal interval directly for lift (which can be negative,
-    # unlike probabilities, so we clip to [-1, 1] instead of [0, 1]).
-    resids = np.asarray(model.residuals, dtype=np.float64)
-    if len(resids) == 0:
-        q = 0.5
-    else:
-        abs_resids = np.abs(resids)
-        n = len(abs_resids)
-        quantile_level = min(np.ceil((n + 1) * 0.90) / n, 1.0)
-        q = float(np.quantile(abs_resids, quantile_level))
-    interval = {
-        "lower": float(np.clip(lift - q, -1.0, 1.0)),
-        "upper": float(np.clip(lift + q, -1.0, 1.0)),
-        "coverage": 0.90,
-    }
+    # Lift can be negative, unlike probabilities, so intervals are clipped
+    # to [-1, 1] instead of [0, 1].
+    conformal = model.conformal or build_conformal_table(model.residuals)
+    interval = conformal.intervals([lift], coverage, lower_bound=-1.0, upper_bound=1.0)[0]
 
     return {
         "lift": float(np.clip(lift, -1.0, 1.0)),
@@ -0,0 +1,124 @@
+"""Background warm-up of model caches after startup.
+
+A fresh worker has empty model, calibrator and OOD caches, so the first
+prediction per tenant pays for artifact loads (or a full fit) and monitor
+restores. The warm-up ranks tenants by recent prediction volume and warms
+the busiest ones through a caller-supplied `warm_tenant` coroutine, a few at
+a time, while the worker already serves traffic. /health reports progress so
+deploy tooling can wait for readiness.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable
+
+from .db import get_most_active_tenants
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.environ.get("ML_WARMUP_ENABLED", "1").lower() not in ("0", "false", "no")
+WARMUP_MAX_TENANTS = int(os.environ.get("ML_WARMUP_MAX_TENANTS", "50"))
+WARMUP_CONCURRENCY = int(os.environ.get("ML_WARMUP_CONCURRENCY", "4"))
+WARMUP_LOOKBACK_DAYS = float(os.environ.get("ML_WARMUP_LOOKBACK_DAYS", "7"))
+
+WarmTenant = Callable[[Any, str], Awaitable[None]]
+
+
+class CacheWarmup:
+    """Runs one warm-up pass and tracks its progress."""
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = WARMUP_ENABLED,
+        max_tenants: int = WARMUP_MAX_TENANTS,
+        concurrency: int = WARMUP_CONCURRENCY,
+        lookback_days: float = WARMUP_LOOKBACK_DAYS,
+    ):
+        self.enabled = enabled
+        self.max_tenants = max_tenants
+        self.concurrency = max(1, concurrency)
+        self.lookback_days = lookback_days
+        self._task: asyncio.Task | None = None
+        self.reset()
+
+    def reset(self) -> None:
+        # idle -> running -> complete | failed; disabled when turned off
+        self.state = "idle" if self.enabled else "disabled"
+        self.tenants_total = 0
+        self.tenants_warmed = 0
+        self.tenants_failed = 0
+        self.duration_seconds: float | None = None
+
+    @property
+    def ready(self) -> bool:
+        """False only while a warm-up pass is running."""
+        return self.state != "running"
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "tenants_total": self.tenants_total,
+            "tenants_warmed": self.tenants_warmed,
+            "tenants_failed": self.tenants_failed,
+            "duration_seconds": self.duration_seconds,
+        }
+
+    async def _warm_one(self, pool, tenant_id: str, warm_tenant: WarmTenant, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            try:
+                await warm_tenant(pool, tenant_id)
+            except Exception as exc:
+                self.tenants_failed += 1
+                logger.warning("Warm-up failed for tenant %s: %s", tenant_id, exc)
+                return
+            self.tenants_warmed += 1
+
+    async def run(self, pool, warm_tenant: WarmTenant) -> None:
+        """Warm the most active tenants; never raises."""
+        if not self.enabled or pool is None:
+            return
+        self.state = "running"
+        started = time.monotonic()
+        try:
+            since = datetime.now(timezone.utc) - timedelta(days=self.lookback_days)
+            tenant_ids = await get_most_active_tenants(pool, since, self.max_tenants)
+            self.tenants_total = len(tenant_ids)
+            semaphore = asyncio.Semaphore(self.concurrency)
+            await asyncio.gather(*(
+                self._warm_one(pool, tenant_id, warm_tenant, semaphore) for tenant_id in tenant_ids
+            ))
+        except Exception as exc:
+            self.state = "failed"
+            logger.warning("Warm-up aborted: %s", exc)
+        else:
+            self.state = "complete"
+            logger.info(
+                "Warm-up finished: %d/%d tenants in %.1fs",
+                self.tenants_warmed, self.tenants_total, time.monotonic() - started,
+            )
+        finally:
+            self.duration_seconds = round(time.monotonic() - started, 3)
+
+    def start(self, pool, warm_tenant: WarmTenant) -> None:
+        if self._task is None and self.enabled and pool is not None:
+            self._task = asyncio.create_task(self.run(pool, warm_tenant))
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+# Module-level singleton
+cache_warmup = CacheWarmup()
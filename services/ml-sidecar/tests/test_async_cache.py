@@ -0,0 +1,109 @@
+"""Tests for the stale-while-revalidate async cache."""
+
+import asyncio
+
+import pytest
+
+from src.async_cache import AsyncCache, cache_status
+
+
+class CountingLoader:
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+        self.fail = False
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("db down")
+        return f"value_{self.calls}"
+
+
+def _age(cache: AsyncCache, key, seconds: float) -> None:
+    value, loaded_at = cache._entries[key]
+    cache._entries[key] = (value, loaded_at - seconds)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = AsyncCache("test_misses", ttl_seconds=60, stale_seconds=60, max_entries=10)
+    load = CountingLoader(delay=0.01)
+
+    values = await asyncio.gather(*(cache.get("k", load) for _ in range(5)))
+
+    assert values == ["value_1"] * 5
+    assert load.calls == 1
+    assert await cache.get("k", load) == "value_1"
+    assert cache.status()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_while_refreshing_in_background():
+    cache = AsyncCache("test_stale", ttl_seconds=60, stale_seconds=600, max_entries=10)
+    load = CountingLoader(delay=0.01)
+    await cache.get("k", load)
+    _age(cache, "k", 120)
+
+    stale = await asyncio.gather(cache.get("k", load), cache.get("k", load))
+    assert stale == ["value_1", "value_1"]
+    await asyncio.sleep(0.05)
+
+    assert load.calls == 2
+    assert await cache.get("k", load) == "value_2"
+    assert cache.status()["stale_hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_the_stale_value():
+    cache = AsyncCache("test_refresh_error", ttl_seconds=60, stale_seconds=600, max_entries=10)
+    load = CountingLoader()
+    await cache.get("k", load)
+    _age(cache, "k", 120)
+    load.fail = True
+
+    assert await cache.get("k", load) == "value_1"
+    await asyncio.sleep(0.01)
+
+    assert cache.status()["refresh_errors"] == 1
+    assert await cache.get("k", load) == "value_1"
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_reload_and_size_is_bounded():
+    cache = AsyncCache("test_bounded", ttl_seconds=60, stale_seconds=60, max_entries=2)
+    load = CountingLoader()
+    await cache.get("a", load)
+    _age(cache, "a", 500)
+
+    assert await cache.get("a", load) == "value_2"
+    await cache.get("b", load)
+    await cache.get("c", load)
+
+    assert len(cache) == 2
+    assert cache.status()["evictions"] == 1
+    assert "test_bounded" in cache_status()
+
+
+@pytest.mark.asyncio
+async def test_none_results_can_be_left_uncached():
+    cache = AsyncCache("test_none", ttl_seconds=60, stale_seconds=60, max_entries=10)
+    results = iter([None, "party_1", None])
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return next(results)
+
+    assert await cache.get("k", load, cache_none=False) is None
+    assert await cache.get("k", load, cache_none=False) == "party_1"
+    assert await cache.get("k", load, cache_none=False) == "party_1"
+    assert len(calls) == 2
+
+    _age(cache, "k", 90)
+    assert await cache.get("k", load, cache_none=False) == "party_1"
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert len(calls) == 3
+    assert len(cache) == 0
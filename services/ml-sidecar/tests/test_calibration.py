@@ -3,6 +3,7 @@
 import numpy as np
 import pytest
 from src.calibration import (
+    apply_calibrator,
     apply_isotonic,
     apply_temperature,
     calibrate,
@@ -10,6 +11,7 @@ from src.calibration import (
     fit_best_calibrator,
     fit_isotonic,
     fit_temperature_scaling,
+    reservoir_sample,
 )
 
 
@@ -46,6 +48,19 @@ class TestComputeECE:
     def test_empty(self):
         assert compute_ece([], []) == 0.0
 
+    def test_matches_per_bin_definition(self):
+        """Bin edges (including exact edges and 1.0) match the mask-per-bin definition."""
+        rng = np.random.default_rng(7)
+        preds = np.concatenate([rng.uniform(0, 1, 300), np.arange(11) / 10])
+        outs = rng.binomial(1, 0.4, size=len(preds)).astype(float)
+        expected = 0.0
+        for i in range(10):
+            lo, hi = i / 10, (i + 1) / 10
+            mask = (preds >= lo) & ((preds <= hi) if i == 9 else (preds < hi))
+            if mask.any():
+                expected += abs(outs[mask].mean() - preds[mask].mean()) * mask.sum() / len(preds)
+        assert compute_ece(preds.tolist(), outs.tolist()) == pytest.approx(expected, abs=1e-12)
+
 
 # ---------------------------------------------------------------------------
 # Temperature scaling tests
@@ -58,6 +73,23 @@ class TestTemperatureScaling:
         T = fit_temperature_scaling(predictions, outcomes)
         assert T > 1.0
 
+    def test_matches_bounded_scalar_search(self):
+        """Gradient-based fit lands on the same optimum as a derivative-free search."""
+        from scipy.optimize import minimize_scalar
+        from scipy.special import expit
+
+        predictions, outcomes = _make_overconfident()
+        p = np.clip(np.asarray(predictions), 0.001, 0.999)
+        logits = np.log(p / (1 - p))
+        y = np.asarray(outcomes)
+
+        def nll(T):
+            z = logits / T
+            return float(np.sum(np.logaddexp(0.0, z) - y * z))
+
+        reference = minimize_scalar(nll, bounds=(0.1, 10.0), method="bounded", options={"xatol": 1e-8}).x
+        assert fit_temperature_scaling(predictions, outcomes) == pytest.approx(reference, rel=1e-3)
+
     def test_apply_temperature_softens(self):
         """Applying T > 1 should move prediction toward 0.5."""
         p = 0.8
@@ -109,6 +141,24 @@ class TestFitBestCalibrator:
         assert result["n_samples"] == len(predictions)
         assert result["method"] in ("temperature", "isotonic")
 
+    def test_sample_cap_bounds_fit(self):
+        predictions, outcomes = _make_overconfident(n=3000)
+        result = fit_best_calibrator(predictions, outcomes, max_samples=1000)
+        assert result["n_samples"] == 3000
+        assert result["n_fit"] == 1000
+        assert result["ece_after"] < result["ece_before"] * 0.5
+
+    def test_reservoir_sample_is_deterministic_and_ordered(self):
+        preds = np.linspace(0, 1, 50)
+        outs = (preds > 0.5).astype(float)
+        sampled_preds, sampled_outs = reservoir_sample(preds, outs, 10)
+        again, _ = reservoir_sample(preds, outs, 10)
+        assert len(sampled_preds) == 10
+        np.testing.assert_array_equal(sampled_preds, again)
+        assert np.all(np.diff(sampled_preds) > 0)
+        np.testing.assert_array_equal(sampled_outs, (sampled_preds > 0.5).astype(float))
+        assert len(reservoir_sample(preds, outs, 100)[0]) == 50
+
     def test_calibrate_function(self):
         """calibrate() should return value in [0, 1]."""
         predictions, outcomes = _make_overconfident()
@@ -118,6 +168,33 @@ class TestFitBestCalibrator:
             assert 0.0 <= cal <= 1.0
 
 
+# ---------------------------------------------------------------------------
+# Vectorized application
+# ---------------------------------------------------------------------------
+
+class TestApplyCalibrator:
+    def test_temperature_array_matches_scalar(self):
+        calibrator = {"method": "temperature", "model": 1.7, "temperature": 1.7}
+        preds = np.array([0.0, 0.0005, 0.2, 0.5, 0.8, 0.9995, 1.0])
+        expected = [apply_temperature(float(p), 1.7) for p in preds]
+        np.testing.assert_allclose(apply_calibrator(preds, calibrator), expected, atol=1e-12)
+
+    def test_isotonic_array_matches_sklearn(self):
+        predictions, outcomes = _make_overconfident()
+        model = fit_isotonic(predictions, outcomes)
+        calibrator = {"method": "isotonic", "model": model, "temperature": None}
+        preds = np.linspace(0.0, 1.0, 201)
+        np.testing.assert_allclose(apply_calibrator(preds, calibrator), model.predict(preds), atol=1e-12)
+        assert "x_thresholds" in calibrator
+
+    def test_fit_best_calibrator_arrays_match_calibrate(self):
+        predictions, outcomes = _make_overconfident()
+        calibrator = fit_best_calibrator(predictions, outcomes)
+        preds = np.asarray(predictions)
+        expected = [calibrate(float(p), calibrator) for p in preds]
+        np.testing.assert_allclose(apply_calibrator(preds, calibrator), expected, atol=1e-12)
+
+
 # ---------------------------------------------------------------------------
 # Edge cases
 # ---------------------------------------------------------------------------
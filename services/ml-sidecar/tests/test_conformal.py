@@ -7,12 +7,22 @@ Covers:
 - Probability clamping to [0, 1]
 - Coverage at 0.80 and 0.95 levels
 - compute_intervals_from_residuals
+- compute_intervals_batch_from_residuals
+- compute_intervals_batch and the fitted-conformalizer cache
+- build_conformal_table (precomputed and Mondrian quantiles)
 """
 
 import numpy as np
 import pytest
 
-from conformal import compute_intervals, compute_intervals_from_residuals
+from conformal import (
+    build_conformal_table,
+    compute_intervals,
+    compute_intervals_batch,
+    conformalizer_cache,
+    compute_intervals_batch_from_residuals,
+    compute_intervals_from_residuals,
+)
 
 
 def _synthetic_data(n: int, noise_std: float = 0.1, seed: int = 42):
@@ -106,6 +116,49 @@ class TestComputeIntervals:
             compute_intervals([0.5, 0.6], [0.5], 0.5)
 
 
+class TestConformalizerCache:
+    def test_reuses_fit_until_watermark_changes(self, monkeypatch):
+        import conformal
+
+        fits = []
+        real_fit = conformal.fit_conformalizer
+
+        def counting_fit(preds, outs, coverage=0.90):
+            fits.append(len(preds))
+            return real_fit(preds, outs, coverage)
+
+        monkeypatch.setattr(conformal, "fit_conformalizer", counting_fit)
+        conformalizer_cache.clear()
+        preds, outs = _synthetic_data(100, seed=5)
+
+        for p in (0.2, 0.5, 0.8):
+            compute_intervals(preds, outs, p, cache_key=("t1", "paymentProbability7d"), watermark="w1")
+        assert fits == [100]
+
+        compute_intervals(preds + [0.4], outs + [0.5], 0.5, cache_key=("t1", "paymentProbability7d"), watermark="w2")
+        assert fits == [100, 101]
+
+        # Without an explicit watermark the content fingerprint is used.
+        compute_intervals(preds, outs, 0.5)
+        compute_intervals(list(preds), list(outs), 0.6)
+        assert fits == [100, 101, 100]
+
+    def test_batch_matches_single(self):
+        conformalizer_cache.clear()
+        preds, outs = _synthetic_data(200, seed=8)
+        new_preds = [0.05, 0.3, 0.5, 0.95]
+        batch = compute_intervals_batch(preds, outs, new_preds, coverage=0.9)
+        for p, interval in zip(new_preds, batch):
+            single = compute_intervals(preds, outs, p, coverage=0.9)
+            assert interval["lower"] == pytest.approx(single["lower"], abs=1e-12)
+            assert interval["upper"] == pytest.approx(single["upper"], abs=1e-12)
+            assert interval["coverage"] == 0.9
+
+    def test_batch_small_sample_fallback(self):
+        batch = compute_intervals_batch([], [], [0.2, 0.7])
+        assert [(i["lower"], i["upper"]) for i in batch] == [(0.0, 1.0), (0.0, 1.0)]
+
+
 # ---- compute_intervals_from_residuals ----
 
 
@@ -159,3 +212,75 @@ class TestComputeIntervalsFromResiduals:
         w80 = r80["upper"] - r80["lower"]
         w95 = r95["upper"] - r95["lower"]
         assert w95 >= w80
+
+
+# ---- compute_intervals_batch_from_residuals ----
+
+
+class TestComputeIntervalsBatchFromResiduals:
+    def test_matches_scalar(self):
+        """Batch intervals should equal the per-prediction scalar results."""
+        rng = np.random.default_rng(42)
+        residuals = rng.normal(0, 0.1, size=200).tolist()
+        preds = [0.02, 0.3, 0.5, 0.97]
+
+        batch = compute_intervals_batch_from_residuals(residuals, preds, coverage=0.90)
+        assert len(batch) == len(preds)
+        for p, result in zip(preds, batch):
+            assert result == pytest.approx(
+                compute_intervals_from_residuals(residuals, p, coverage=0.90)
+            )
+
+    def test_empty_residuals(self):
+        batch = compute_intervals_batch_from_residuals([], [0.5, 0.9], coverage=0.90)
+        assert batch[0]["lower"] == 0.0
+        assert batch[0]["upper"] == 1.0
+        assert batch[1]["upper"] == 1.0
+
+
+# ---- build_conformal_table ----
+
+
+class TestConformalTable:
+    def test_table_matches_residual_intervals(self):
+        """Precomputed and off-table coverage levels match the on-the-fly method."""
+        preds, outs = _synthetic_data(500, noise_std=0.1, seed=3)
+        residuals = (np.asarray(preds) - np.asarray(outs)).tolist()
+        table = build_conformal_table(residuals, coverage_levels=(0.8, 0.9, 0.95))
+        new_preds = np.linspace(0.0, 1.0, 11)
+        for coverage in (0.8, 0.9, 0.95, 0.85):
+            expected = compute_intervals_batch_from_residuals(residuals, new_preds, coverage=coverage)
+            actual = table.intervals(new_preds, coverage)
+            for got, want in zip(actual, expected):
+                assert got["lower"] == pytest.approx(want["lower"], abs=1e-12)
+                assert got["upper"] == pytest.approx(want["upper"], abs=1e-12)
+                assert got["coverage"] == coverage
+
+    def test_empty_residuals_use_wide_default(self):
+        table = build_conformal_table([])
+        interval = table.intervals([0.5], 0.9)[0]
+        assert interval["lower"] == pytest.approx(0.0)
+        assert interval["upper"] == pytest.approx(1.0)
+
+    def test_mondrian_widths_adapt_to_bin(self):
+        """Heteroscedastic residuals give narrower intervals where errors are small."""
+        rng = np.random.default_rng(11)
+        preds = rng.uniform(0.0, 1.0, size=2000)
+        residuals = rng.normal(0.0, 0.02 + 0.2 * preds)
+        table = build_conformal_table(residuals, preds, coverage_levels=(0.9,), mondrian_bins=4, min_bin_size=50)
+        q_low, q_high = table.quantiles_for([0.1, 0.9], 0.9)
+        assert q_low < table.quantile(0.9) < q_high
+
+        # Each bin is calibrated on its own residuals: coverage holds per bin.
+        test_preds = rng.uniform(0.0, 1.0, size=4000)
+        test_resids = rng.normal(0.0, 0.02 + 0.2 * test_preds)
+        covered = np.abs(test_resids) <= table.quantiles_for(test_preds, 0.9)
+        for lo in (0.0, 0.5):
+            in_range = (test_preds >= lo) & (test_preds < lo + 0.5)
+            assert covered[in_range].mean() >= 0.86
+
+    def test_mondrian_small_bins_fall_back_to_global(self):
+        preds = np.linspace(0.0, 1.0, 40)
+        residuals = np.linspace(-0.2, 0.2, 40)
+        table = build_conformal_table(residuals, preds, coverage_levels=(0.9,), mondrian_bins=4, min_bin_size=50)
+        np.testing.assert_allclose(table.quantiles_for(preds, 0.9), table.quantile(0.9))
@@ -1,6 +1,14 @@
 import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
 import pytest
-from src.drift import DriftMonitor
+from contextlib import asynccontextmanager
+
+from src import drift
+from src.drift import DriftMonitor, PageHinkleyRingDetector
+from src.monitor_state import MonitorStateStore
+from src.ood import DistributionMonitor
 
 
 @pytest.fixture
@@ -113,3 +121,223 @@ def test_rebuild_from_pairs_matches_sequential(monitor):
 
     assert seq_status["drift_detected"] == rebuild_status["drift_detected"]
     assert abs(seq_status["adwin_value"] - rebuild_status["adwin_value"]) < 1e-10
+
+
+class FakeOutcomePool:
+    """Serves world_prediction_outcomes keyset pages and stores drift checkpoints."""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.watermarks = {}
+        self.states = {}
+        self.fetched_rows = 0
+        self.fail_writes = False
+
+    def add(self, outcomes):
+        self.outcomes.extend(outcomes)
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def fetch(self, sql, *args):
+        if "world_model_monitor_state" in sql:
+            kind, state_key, tenant_id = args
+            return [
+                {"state_key": key, "state": state}
+                for key, (row_tenant, state) in self.states.items()
+                if (state_key is None or key == state_key) and (tenant_id is None or row_tenant == tenant_id)
+            ]
+        tenant_id, after_at, after_id, limit = args
+        rows = sorted(
+            (o for o in self.outcomes if o["tenant_id"] == tenant_id),
+            key=lambda o: (o["outcome_at"], o["prediction_id"]),
+        )
+        if after_at is not None:
+            rows = [o for o in rows if (o["outcome_at"], o["prediction_id"]) > (after_at, after_id)]
+        rows = rows[:limit]
+        self.fetched_rows += len(rows)
+        return rows
+
+    async def fetchrow(self, sql, tenant_id):
+        stored = self.watermarks.get(tenant_id)
+        if stored is None:
+            return None
+        return {"last_outcome_at": stored[0], "last_prediction_id": stored[1]}
+
+    async def execute(self, sql, *args):
+        if self.fail_writes:
+            raise ConnectionError("database unavailable")
+        if "world_drift_watermarks" in sql:
+            for tenant_id, outcome_at, prediction_id, consumed in zip(*args):
+                self.watermarks[tenant_id] = (outcome_at, prediction_id, consumed)
+        else:
+            _, keys, tenants, states = args
+            for key, tenant_id, state in zip(keys, tenants, states):
+                self.states[key] = (tenant_id, state)
+
+
+def _store(monitor):
+    return MonitorStateStore(monitor, DistributionMonitor())
+
+
+def _outcomes(start: int, count: int, tenant_id: str = "t_1"):
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "tenant_id": tenant_id,
+            "prediction_id": f"pred_{idx:05d}",
+            "outcome_at": base + timedelta(hours=idx),
+            "model_id": "model_a",
+            "prediction_type": "paymentProbability7d",
+            "predicted_value": 0.5,
+            "outcome_value": 0.5 + random.gauss(0, 0.1),
+        }
+        for idx in range(start, start + count)
+    ]
+
+
+async def test_check_all_models_feeds_each_outcome_once(monkeypatch):
+    random.seed(7)
+    monitor = DriftMonitor()
+    monkeypatch.setattr(drift, "drift_monitor", monitor)
+    monkeypatch.setattr(drift, "DRIFT_INGEST_BATCH_SIZE", 40)
+    pool = FakeOutcomePool(_outcomes(0, 100))
+
+    fed = []
+    real_update_many = monitor.update_many
+
+    def counting_update_many(model_id, prediction_type, tenant_id, residuals):
+        fed.extend(residuals)
+        return real_update_many(model_id, prediction_type, tenant_id, residuals)
+
+    monitor.update_many = counting_update_many
+
+    statuses = await drift.check_all_models(pool, "t_1")
+    assert len(fed) == 100
+    assert [s["model_id"] for s in statuses] == ["model_a"]
+    assert monitor.get_watermark("t_1")[1] == "pred_00099"
+    await _store(monitor).checkpoint(pool)
+    assert pool.watermarks["t_1"][1:] == ("pred_00099", 100)
+
+    # No new outcomes: nothing fetched or fed again.
+    await drift.check_all_models(pool, "t_1")
+    assert len(fed) == 100
+
+    pool.add(_outcomes(100, 5))
+    await drift.check_all_models(pool, "t_1")
+    assert len(fed) == 105
+    await _store(monitor).checkpoint(pool)
+    assert pool.watermarks["t_1"] == (pool.outcomes[-1]["outcome_at"], "pred_00104", 5)
+
+
+async def test_check_all_models_resumes_from_persisted_watermark(monkeypatch):
+    random.seed(8)
+    pool = FakeOutcomePool(_outcomes(0, 30))
+    monitor = DriftMonitor()
+    monkeypatch.setattr(drift, "drift_monitor", monitor)
+    await drift.check_all_models(pool, "t_1")
+    await _store(monitor).checkpoint(pool)
+
+    # Simulate a restart: fresh monitor, same database.
+    restarted = DriftMonitor()
+    monkeypatch.setattr(drift, "drift_monitor", restarted)
+    await _store(restarted).restore_drift_tenant(pool, "t_1")
+    pool.add(_outcomes(30, 3))
+    pool.fetched_rows = 0
+    await drift.check_all_models(pool, "t_1")
+    assert pool.fetched_rows == 3
+    assert restarted.get_status("model_a", "paymentProbability7d", "t_1") != \
+        DriftMonitor().get_status("model_a", "paymentProbability7d", "t_1")
+
+
+async def test_watermark_is_only_persisted_with_detector_state(monkeypatch):
+    random.seed(9)
+    pool = FakeOutcomePool(_outcomes(0, 20))
+    monitor = DriftMonitor()
+    monkeypatch.setattr(drift, "drift_monitor", monitor)
+    await drift.check_all_models(pool, "t_1")
+    assert pool.watermarks == {}
+
+    pool.fail_writes = True
+    assert await _store(monitor).checkpoint(pool) == 0
+    assert pool.watermarks == {} and pool.states == {}
+
+    # A restart before any checkpoint succeeds re-feeds everything.
+    monkeypatch.setattr(drift, "drift_monitor", DriftMonitor())
+    pool.fetched_rows = 0
+    await drift.check_all_models(pool, "t_1")
+    assert pool.fetched_rows == 20
+
+    # The failed checkpoint kept the original monitor's watermark pending.
+    pool.fail_writes = False
+    assert await _store(monitor).checkpoint(pool) == 1
+    assert pool.watermarks["t_1"][1:] == ("pred_00019", 20)
+    assert set(pool.states) == {"t_1:model_a:paymentProbability7d"}
+
+
+# ---------------------------------------------------------------------------
+# Page-Hinkley ring-buffer backend
+# ---------------------------------------------------------------------------
+
+def _stationary_then_shifted(seed: int = 42):
+    random.seed(seed)
+    stationary = [random.gauss(0, 0.1) for _ in range(100)]
+    shifted = [0.5 + random.gauss(0, 0.1) for _ in range(100)]
+    return stationary, shifted
+
+
+def test_page_hinkley_backend_status_shape_and_detection():
+    monitor = DriftMonitor(backend="page_hinkley")
+    stationary, shifted = _stationary_then_shifted()
+    assert not any(monitor.update("model_a", "paymentProbability7d", "t_1", r, 0.0) for r in stationary)
+    status = monitor.get_status("model_a", "paymentProbability7d", "t_1")
+    assert status["drift_detected"] is False
+    assert isinstance(status["adwin_value"], float)
+    assert abs(status["adwin_value"]) < 0.05
+
+    assert any(monitor.update("model_a", "paymentProbability7d", "t_1", r, 0.0) for r in shifted)
+    # After the change the estimate tracks the new residual level, as ADWIN's does.
+    assert monitor.get_status("model_a", "paymentProbability7d", "t_1")["adwin_value"] > 0.4
+
+
+def test_page_hinkley_update_many_matches_sequential():
+    stationary, shifted = _stationary_then_shifted(seed=3)
+    residuals = stationary + shifted + stationary
+
+    sequential = PageHinkleyRingDetector(capacity=64)
+    flags = []
+    for r in residuals:
+        sequential.update(r)
+        flags.append(sequential.drift_detected)
+
+    batched = PageHinkleyRingDetector(capacity=64)
+    assert batched.update_many(residuals) is True
+    assert batched.n_detections == sequential.n_detections == sum(flags)
+    assert batched.drift_detected == flags[-1]
+    assert batched.estimation == pytest.approx(sequential.estimation, abs=1e-12)
+
+
+def test_page_hinkley_memory_is_bounded():
+    detector = PageHinkleyRingDetector(capacity=32)
+    detector.update_many(np.zeros(10_000))
+    assert detector._buffer.nbytes == 32 * 8
+    assert detector.estimation == 0.0
+
+
+def test_rebuild_from_pairs_uses_configured_backend():
+    stationary, shifted = _stationary_then_shifted()
+    pairs = [(r, 0.0) for r in stationary + shifted]
+    monitor = DriftMonitor(backend="page_hinkley")
+    monitor.rebuild_from_pairs("model_a", "paymentProbability7d", "t_1", pairs)
+    assert isinstance(monitor._monitors["t_1:model_a:paymentProbability7d"], PageHinkleyRingDetector)
+    assert monitor.get_status("model_a", "paymentProbability7d", "t_1")["adwin_value"] > 0.4
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        DriftMonitor(backend="nope")
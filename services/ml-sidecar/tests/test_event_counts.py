@@ -0,0 +1,85 @@
+"""Tests for event-count features read from the world_object_event_counts rollup."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.db import get_event_counts_for_object, get_event_counts_for_objects
+
+
+class FakeRollupPool:
+    """Answers the rollup, day-bucket and as-of-day queries with canned rows."""
+
+    def __init__(self, totals=(), buckets=(), day_events=()):
+        self.totals = list(totals)
+        self.buckets = list(buckets)
+        self.day_events = list(day_events)
+        self.queries: list[str] = []
+
+    async def fetch(self, query, *args):
+        if "FROM world_object_event_counts\n" in query:
+            self.queries.append("totals")
+            return [row for row in self.totals if row["object_id"] in args[1]]
+        if "FROM world_object_event_count_days" in query:
+            self.queries.append("buckets")
+            return [row for row in self.buckets if row["object_id"] in args[1]]
+        if "FROM world_events" in query:
+            self.queries.append("day_events")
+            return [row for row in self.day_events if row["object_id"] in args[1]]
+        raise AssertionError(f"unexpected query: {query}")
+
+
+def _totals(object_id, last_event_at, last_action_at=None, **counts):
+    row = {key: 0 for key in ("reminder_count", "partial_payment_count", "escalation_count", "dispute_count")}
+    row.update(counts, object_id=object_id, last_event_at=last_event_at, last_action_at=last_action_at)
+    return row
+
+
+@pytest.mark.asyncio
+async def test_current_counts_are_one_rollup_lookup():
+    now = datetime.now(timezone.utc)
+    pool = FakeRollupPool(totals=[
+        _totals("inv_1", now - timedelta(days=1), now - timedelta(days=3), reminder_count=2, dispute_count=1),
+    ])
+
+    counts = await get_event_counts_for_objects(pool, "t_1", ["inv_1", "inv_2"])
+
+    assert counts["inv_1"] == {"reminder_count": 2, "dispute_count": 1, "days_since_last_contact": 3}
+    assert counts["inv_2"] == {"days_since_last_contact": -1}
+    assert pool.queries == ["totals"]
+
+
+@pytest.mark.asyncio
+async def test_as_of_counts_combine_day_buckets_and_the_as_of_day():
+    as_of = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+    pool = FakeRollupPool(
+        totals=[
+            _totals("inv_1", as_of + timedelta(days=5), reminder_count=9),
+            _totals("inv_2", as_of - timedelta(days=2), escalation_count=1),
+        ],
+        buckets=[{
+            "object_id": "inv_1", "reminder_count": 2, "partial_payment_count": 0, "escalation_count": 0,
+            "dispute_count": 0, "last_action_at": datetime(2026, 3, 6, tzinfo=timezone.utc),
+        }],
+        day_events=[
+            {"object_id": "inv_1", "type": "action.communicate.email", "cnt": 1,
+             "last_action_at": datetime(2026, 3, 10, 9, 0, tzinfo=timezone.utc)},
+            {"object_id": "inv_1", "type": "financial.payment.received", "cnt": 1, "last_action_at": None},
+        ],
+    )
+
+    counts = await get_event_counts_for_objects(pool, "t_1", ["inv_1", "inv_2"], as_of)
+
+    assert counts["inv_1"] == {"reminder_count": 3, "partial_payment_count": 1, "days_since_last_contact": 0}
+    assert counts["inv_2"] == {"escalation_count": 1, "days_since_last_contact": -1}
+    assert pool.queries == ["totals", "buckets", "day_events"]
+
+
+@pytest.mark.asyncio
+async def test_single_object_accepts_iso_as_of():
+    pool = FakeRollupPool(totals=[_totals("inv_1", datetime(2026, 1, 1, tzinfo=timezone.utc), dispute_count=1)])
+
+    counts = await get_event_counts_for_object(pool, "t_1", "inv_1", "2026-02-01T00:00:00Z")
+
+    assert counts == {"dispute_count": 1, "days_since_last_contact": -1}
+    assert pool.queries == ["totals"]
@@ -0,0 +1,252 @@
+"""Tests for single-invoice feature assembly (one round trip per /predict/v2)."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+import src.feature_assembly as feature_assembly
+import src.server as server
+from src.db import get_invoice_feature_inputs
+from src.feature_store import InvoiceFeatureStore
+from src.features import build_full_feature_vector
+from src.reliability_index import TenantReliability
+from src.server import app
+from src.trajectory import compute_trajectory_from_history
+
+NOW = datetime(2026, 3, 20, 12, 0, tzinfo=timezone.utc)
+
+HISTORY = [
+    {"invoice_id": "inv_9", "status": "paid", "amount_cents": 40000,
+     "issued_at": "2026-02-01T00:00:00+00:00", "due_at": "2026-03-01T00:00:00+00:00",
+     "paid_at": "2026-02-20T00:00:00+00:00", "updated_at": "2026-02-20T00:00:00+00:00"},
+    {"invoice_id": "inv_8", "status": "paid", "amount_cents": 30000,
+     "issued_at": "2026-01-01T00:00:00+00:00", "due_at": "2026-02-01T00:00:00+00:00",
+     "paid_at": "2026-01-25T00:00:00+00:00", "updated_at": "2026-01-25T00:00:00+00:00"},
+]
+
+
+def _inputs_row(**overrides):
+    row = {
+        "state": json.dumps({"amountCents": 50000, "status": "overdue", "dueAt": "2026-03-01T00:00:00+00:00"}),
+        "estimated": json.dumps({"paymentReliability": 0.6}),
+        "version": 3,
+        "valid_from": None,
+        "party_id": "party_1",
+        "reminder_count": 2,
+        "partial_payment_count": 0,
+        "escalation_count": 0,
+        "dispute_count": 1,
+        "last_action_at": NOW - timedelta(days=4),
+        "last_event_at": NOW - timedelta(days=1),
+        "payment_history": json.dumps(HISTORY),
+    }
+    row.update(overrides)
+    return row
+
+
+class FakeInputsPool:
+    """Answers the feature-inputs CTE and the as-of event count queries."""
+
+    def __init__(self, row, day_events=()):
+        self.row = row
+        self.day_events = list(day_events)
+        self.queries: list[str] = []
+
+    async def fetchrow(self, query, *args):
+        assert "WITH obj AS" in query
+        self.queries.append("inputs")
+        return self.row
+
+    async def fetch(self, query, *args):
+        if "FROM world_object_event_count_days" in query:
+            self.queries.append("buckets")
+            return []
+        if "FROM world_events" in query:
+            self.queries.append("day_events")
+            return self.day_events
+        raise AssertionError(f"unexpected query: {query}")
+
+
+@pytest.mark.asyncio
+async def test_inputs_are_one_query():
+    pool = FakeInputsPool(_inputs_row())
+
+    inputs = await get_invoice_feature_inputs(pool, "t_1", "inv_1", NOW)
+
+    assert pool.queries == ["inputs"]
+    assert inputs["state"]["status"] == "overdue"
+    assert inputs["version"] == 3
+    assert inputs["party_id"] == "party_1"
+    assert inputs["event_counts"] == {"reminder_count": 2, "dispute_count": 1, "days_since_last_contact": 4}
+    assert [inv["invoice_id"] for inv in inputs["payment_history"]] == ["inv_9", "inv_8"]
+
+
+@pytest.mark.asyncio
+async def test_inputs_without_rollup_row_or_payer():
+    pool = FakeInputsPool(_inputs_row(
+        party_id=None,
+        reminder_count=None, partial_payment_count=None, escalation_count=None, dispute_count=None,
+        last_action_at=None, last_event_at=None,
+        payment_history=json.dumps([]),
+    ))
+
+    inputs = await get_invoice_feature_inputs(pool, "t_1", "inv_1", NOW)
+
+    assert inputs["party_id"] is None
+    assert inputs["event_counts"] == {"days_since_last_contact": -1}
+    assert inputs["payment_history"] == []
+
+
+@pytest.mark.asyncio
+async def test_inputs_count_events_as_of_when_later_events_exist():
+    pool = FakeInputsPool(
+        _inputs_row(reminder_count=7, last_event_at=NOW + timedelta(days=2)),
+        day_events=[{"object_id": "inv_1", "type": "action.remind", "cnt": 1, "last_action_at": NOW - timedelta(hours=1)}],
+    )
+
+    inputs = await get_invoice_feature_inputs(pool, "t_1", "inv_1", NOW)
+
+    assert pool.queries == ["inputs", "buckets", "day_events"]
+    assert inputs["event_counts"] == {"reminder_count": 1, "days_since_last_contact": 0}
+
+
+@pytest.mark.asyncio
+async def test_missing_object_returns_none():
+    assert await get_invoice_feature_inputs(FakeInputsPool(None), "t_1", "inv_x", NOW) is None
+
+
+@pytest.mark.asyncio
+async def test_assemble_loads_tenant_lookups_concurrently(monkeypatch):
+    stats_started = asyncio.Event()
+    index_started = asyncio.Event()
+    pool = FakeInputsPool(_inputs_row())
+
+    async def fake_inputs(pool_, tenant_id, object_id, as_of):
+        # Completes only if the tenant lookups were started alongside it.
+        await asyncio.wait_for(asyncio.gather(stats_started.wait(), index_started.wait()), 1)
+        return await get_invoice_feature_inputs(pool_, tenant_id, object_id, as_of)
+
+    async def fake_load_tenant_stats(pool_, tenant_id, force=False):
+        stats_started.set()
+        return {"invoice_count": 10, "median_amount_cents": 60_000}
+
+    async def fake_tenant(pool_, tenant_id):
+        index_started.set()
+        return TenantReliability({"party_0": 0.2, "party_1": 0.9, "party_2": 0.5})
+
+    monkeypatch.setattr(feature_assembly, "get_invoice_feature_inputs", fake_inputs)
+    monkeypatch.setattr(feature_assembly, "load_tenant_stats", fake_load_tenant_stats)
+    monkeypatch.setattr(feature_assembly.reliability_index, "tenant", fake_tenant)
+
+    assembled = await feature_assembly.assemble_feature_vector(pool, "t_1", "inv_1", reference_time=NOW)
+
+    assert pool.queries == ["inputs"]
+    assert assembled["party_id"] == "party_1"
+    assert assembled["tenant_stats"] == {
+        "invoice_count": 10, "median_amount_cents": 60_000, "customer_reliability_percentile": 0.0,
+    }
+    assert assembled["trajectory"] == compute_trajectory_from_history(HISTORY, NOW)
+    assert assembled["features"] == build_full_feature_vector(
+        {"amountCents": 50000, "status": "overdue", "dueAt": "2026-03-01T00:00:00+00:00"},
+        {"paymentReliability": 0.6},
+        reference_time=NOW,
+        tenant_stats=assembled["tenant_stats"],
+        event_counts={"reminder_count": 2, "dispute_count": 1, "days_since_last_contact": 4},
+        trajectory=assembled["trajectory"],
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_assembly_builds_every_family_as_of_reference_time(monkeypatch):
+    as_of = NOW - timedelta(days=30)
+    state = {"amountCents": 50000, "status": "open", "dueAt": "2026-03-01T00:00:00+00:00"}
+    seen = {}
+
+    async def fake_get_object_states_at(pool_, tenant_id, object_ids, at):
+        seen["states"] = at
+        return {"inv_1": {"state": state, "estimated": {}, "version": 1, "valid_from": None}}
+
+    async def fake_get_party_ids_for_invoices(pool_, tenant_id, invoice_ids):
+        return {"inv_1": "party_1"}
+
+    async def fake_get_event_counts_for_objects(pool_, tenant_id, object_ids, as_of=None):
+        seen["events"] = as_of
+        return {"inv_1": {"reminder_count": 1}}
+
+    async def fake_load_tenant_stats(pool_, tenant_id, force=False):
+        return {"invoice_count": 10}
+
+    async def fake_load_tenant_stats_with_customers(pool_, tenant_id, party_ids, force=False):
+        return {"party_1": {"invoice_count": 10}}
+
+    async def fake_load_customer_trajectories(pool_, tenant_id, party_ids, before=None, reference_time=None):
+        seen["trajectories"] = reference_time
+        return {"party_1": compute_trajectory_from_history(HISTORY, reference_time)}
+
+    for name, fake in [
+        ("get_object_states_at", fake_get_object_states_at),
+        ("get_party_ids_for_invoices", fake_get_party_ids_for_invoices),
+        ("get_event_counts_for_objects", fake_get_event_counts_for_objects),
+        ("load_tenant_stats", fake_load_tenant_stats),
+        ("load_tenant_stats_with_customers", fake_load_tenant_stats_with_customers),
+        ("load_customer_trajectories", fake_load_customer_trajectories),
+    ]:
+        monkeypatch.setattr(feature_assembly, name, fake)
+
+    assembled = await feature_assembly.assemble_feature_vectors(object(), "t_1", ["inv_1"], reference_time=as_of)
+
+    assert seen == {"states": as_of, "events": as_of, "trajectories": as_of}
+    assert assembled["inv_1"]["features"] == build_full_feature_vector(
+        state,
+        {},
+        reference_time=as_of,
+        tenant_stats={"invoice_count": 10},
+        event_counts={"reminder_count": 1},
+        trajectory=compute_trajectory_from_history(HISTORY, as_of),
+    )
+
+
+@pytest.mark.asyncio
+async def test_missing_payer_link_is_not_cached(monkeypatch):
+    links = iter([None, "party_1"])
+    lookups = []
+
+    async def fake_get_party_id_for_invoice(pool_, tenant_id, invoice_id):
+        lookups.append(invoice_id)
+        return next(links)
+
+    monkeypatch.setattr(feature_assembly, "get_party_id_for_invoice", fake_get_party_id_for_invoice)
+    feature_assembly._party_link_cache.invalidate()
+
+    assert await feature_assembly.load_party_id(object(), "t_1", "inv_new") is None
+    assert await feature_assembly.load_party_id(object(), "t_1", "inv_new") == "party_1"
+    assert await feature_assembly.load_party_id(object(), "t_1", "inv_new") == "party_1"
+    assert lookups == ["inv_new", "inv_new"]
+    feature_assembly._party_link_cache.invalidate()
+
+
+@pytest.mark.asyncio
+async def test_predict_v2_returns_404_for_missing_object(monkeypatch):
+    async def fake_get_pool():
+        return FakeInputsPool(None)
+
+    async def fake_load_tenant_stats(pool_, tenant_id, force=False):
+        return {"invoice_count": 0}
+
+    async def fake_tenant(pool_, tenant_id):
+        return TenantReliability({})
+
+    monkeypatch.setattr(server, "get_pool", fake_get_pool)
+    monkeypatch.setattr(server, "feature_store", InvoiceFeatureStore(enabled=False))
+    monkeypatch.setattr(feature_assembly, "load_tenant_stats", fake_load_tenant_stats)
+    monkeypatch.setattr(feature_assembly.reliability_index, "tenant", fake_tenant)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/predict/v2", json={"tenant_id": "t_test", "object_id": "inv_x"})
+
+    assert response.status_code == 404
+    assert response.json() == {"error": "object_not_found"}
@@ -0,0 +1,216 @@
+"""Tests for the materialized invoice feature store."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+import src.epoch_trigger as epoch_trigger
+import src.feature_store as feature_store_module
+import src.server as server
+from src.feature_store import InvoiceFeatureStore
+from src.features import build_full_feature_vector
+from src.server import app
+
+
+def _overdue_state(amount_cents: int = 50000) -> dict:
+    due_at = datetime.now(timezone.utc) - timedelta(days=9)
+    return {
+        "status": "overdue",
+        "amountCents": amount_cents,
+        "amountRemainingCents": amount_cents,
+        "issuedAt": (due_at - timedelta(days=30)).isoformat(),
+        "dueAt": due_at.isoformat(),
+    }
+
+
+class FakeFeatureTable:
+    """world_objects invoices plus world_model_invoice_features, behind the db helpers."""
+
+    def __init__(self):
+        self.invoices: dict[str, dict] = {}
+        self.rows: dict[str, dict] = {}
+        self.assembled: list[list[str]] = []
+
+    def add_invoice(self, object_id: str, state: dict, version: int = 1) -> None:
+        self.invoices[object_id] = {"version": version, "state": state, "events_updated_at": None}
+
+    def install(self, monkeypatch):
+        for name in ("get_invoice_feature_sources", "upsert_invoice_features", "get_invoice_features",
+                     "mark_invoice_features_snapshot", "prune_invoice_features", "assemble_feature_vectors",
+                     "load_tenant_stats"):
+            monkeypatch.setattr(feature_store_module, name, getattr(self, name))
+
+    async def get_invoice_feature_sources(self, pool, tenant_id, *, object_ids=None, limit=200):
+        sources = []
+        for object_id, invoice in self.invoices.items():
+            if object_ids is not None and object_id not in object_ids:
+                continue
+            stored = self.rows.get(object_id, {})
+            sources.append({
+                "object_id": object_id,
+                "version": invoice["version"],
+                "state": invoice["state"],
+                "party_id": None,
+                "events_updated_at": invoice["events_updated_at"],
+                "history_updated_at": None,
+                "source_fingerprint": stored.get("source_fingerprint"),
+                "features": stored.get("features"),
+                "feature_hash": stored.get("feature_hash"),
+                "snapshot_fingerprint": stored.get("snapshot_fingerprint"),
+                "snapshot_trigger": stored.get("snapshot_trigger"),
+                "refreshed_at": stored.get("refreshed_at"),
+            })
+        return sources[:limit]
+
+    async def upsert_invoice_features(self, pool, tenant_id, rows):
+        for row in rows:
+            stored = self.rows.setdefault(row["object_id"], {})
+            stored.update(row, refreshed_at=datetime.now(timezone.utc))
+
+    async def get_invoice_features(self, pool, tenant_id, object_id, max_age_seconds):
+        stored = self.rows.get(object_id)
+        invoice = self.invoices.get(object_id)
+        if stored is None or invoice is None or invoice["version"] != stored["object_version"]:
+            return None
+        return {
+            **stored,
+            "version": invoice["version"],
+            "party_id": None,
+            "events_updated_at": invoice["events_updated_at"],
+            "history_updated_at": None,
+        }
+
+    async def mark_invoice_features_snapshot(self, pool, tenant_id, object_id, fingerprint, trigger):
+        self.rows[object_id].update(snapshot_fingerprint=fingerprint, snapshot_trigger=trigger)
+
+    async def prune_invoice_features(self, pool, tenant_id):
+        return 0
+
+    async def assemble_feature_vectors(self, pool, tenant_id, object_ids, *, reference_time=None):
+        self.assembled.append(list(object_ids))
+        return {
+            object_id: {
+                "features": build_full_feature_vector(self.invoices[object_id]["state"], {}, reference_time=reference_time),
+                "tenant_stats": None,
+                "trajectory": None,
+                "party_id": None,
+            }
+            for object_id in object_ids
+        }
+
+    async def load_tenant_stats(self, pool, tenant_id, *, force=False):
+        return {"invoice_count": 10, "median_amount_cents": 40000}
+
+
+@pytest.mark.asyncio
+async def test_refresh_rebuilds_only_changed_invoices(monkeypatch):
+    table = FakeFeatureTable()
+    table.install(monkeypatch)
+    table.add_invoice("inv_1", _overdue_state(50000))
+    table.add_invoice("inv_2", _overdue_state(80000))
+    store = InvoiceFeatureStore(enabled=True, max_age_seconds=900)
+
+    first = await store.refresh(object(), "t_1")
+    assert [row["rebuilt"] for row in first] == [True, True]
+
+    second = await store.refresh(object(), "t_1")
+    assert [row["rebuilt"] for row in second] == [False, False]
+
+    table.invoices["inv_2"]["events_updated_at"] = datetime.now(timezone.utc)
+    third = await store.refresh(object(), "t_1")
+
+    assert [row["rebuilt"] for row in third] == [False, True]
+    assert table.assembled == [["inv_1", "inv_2"], ["inv_2"]]
+    assert store.status()["refreshed"] == 3
+    assert store.status()["unchanged"] == 3
+
+
+@pytest.mark.asyncio
+async def test_rows_past_max_age_are_rebuilt(monkeypatch):
+    table = FakeFeatureTable()
+    table.install(monkeypatch)
+    table.add_invoice("inv_1", _overdue_state())
+    store = InvoiceFeatureStore(enabled=True, max_age_seconds=60)
+
+    await store.refresh(object(), "t_1")
+    table.rows["inv_1"]["refreshed_at"] -= timedelta(seconds=120)
+
+    assert [row["rebuilt"] for row in await store.refresh(object(), "t_1")] == [True]
+
+
+@pytest.mark.asyncio
+async def test_rows_are_not_served_once_their_sources_change(monkeypatch):
+    table = FakeFeatureTable()
+    table.install(monkeypatch)
+    table.add_invoice("inv_1", _overdue_state())
+    store = InvoiceFeatureStore(enabled=True)
+    await store.refresh(object(), "t_1")
+
+    assert await store.get(object(), "t_1", "inv_1") is not None
+
+    # An event arrives after the refresh: the stored counts are stale.
+    table.invoices["inv_1"]["events_updated_at"] = datetime.now(timezone.utc)
+    assert await store.get(object(), "t_1", "inv_1") is None
+
+    await store.refresh(object(), "t_1")
+    assert await store.get(object(), "t_1", "inv_1") is not None
+    assert store.status()["hits"] == 2
+    assert store.status()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sweep_skips_invoices_unchanged_since_their_epoch(monkeypatch):
+    table = FakeFeatureTable()
+    table.install(monkeypatch)
+    table.add_invoice("inv_1", _overdue_state(50000))
+    table.add_invoice("inv_2", _overdue_state(80000))
+    monkeypatch.setattr(epoch_trigger, "feature_store", InvoiceFeatureStore(enabled=True))
+    snapshots: list[str] = []
+
+    async def fake_create_epoch_for_invoice(pool, tenant_id, object_id, **kwargs):
+        snapshots.append(object_id)
+        return {"id": f"ep_{object_id}", "epoch_trigger": "7d_overdue"}
+
+    monkeypatch.setattr(epoch_trigger, "create_epoch_for_invoice", fake_create_epoch_for_invoice)
+
+    assert await epoch_trigger.sweep_invoices_for_epochs(object(), "t_1") == 2
+    assert await epoch_trigger.sweep_invoices_for_epochs(object(), "t_1") == 0
+
+    table.invoices["inv_1"]["version"] = 2
+    assert await epoch_trigger.sweep_invoices_for_epochs(object(), "t_1") == 1
+    assert snapshots == ["inv_1", "inv_2", "inv_1"]
+
+
+@pytest.mark.asyncio
+async def test_predict_v2_serves_stored_features(monkeypatch):
+    table = FakeFeatureTable()
+    table.install(monkeypatch)
+    table.add_invoice("inv_1", _overdue_state())
+    store = InvoiceFeatureStore(enabled=True)
+    await store.refresh(object(), "t_test")
+    monkeypatch.setattr(server, "feature_store", store)
+    scored: list[dict] = []
+
+    async def fake_get_pool():
+        return object()
+
+    async def fake_score_v2_rows(pool, tenant_id, prediction_type, feature_rows):
+        scored.extend(feature_rows)
+        return [{"value": 0.5, "feature_hash": "h"} for _ in feature_rows]
+
+    async def no_raw_state(*args, **kwargs):
+        raise AssertionError("stored features should be served")
+
+    monkeypatch.setattr(server, "get_pool", fake_get_pool)
+    monkeypatch.setattr(server, "_score_v2_rows", fake_score_v2_rows)
+    monkeypatch.setattr(server, "assemble_feature_vector", no_raw_state)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/predict/v2", json={"tenant_id": "t_test", "object_id": "inv_1"})
+
+    assert response.status_code == 200
+    assert response.json()["value"] == 0.5
+    assert scored == [table.rows["inv_1"]["features"]]
+    assert store.status()["hits"] == 1
@@ -0,0 +1,69 @@
+"""Tests for the /predict micro-batcher."""
+
+import asyncio
+
+import pytest
+
+from src.micro_batcher import MicroBatcher
+
+
+class RecordingScorer:
+    def __init__(self, fail: bool = False):
+        self.calls: list[tuple] = []
+        self.fail = fail
+
+    async def __call__(self, key, rows):
+        self.calls.append((key, list(rows)))
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return [f"{key}:{row}" for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_rows_within_window_share_one_score_call_per_key():
+    scorer = RecordingScorer()
+    batcher = MicroBatcher(scorer, enabled=True, window_ms=5, max_rows=100)
+
+    results = await asyncio.gather(
+        batcher.submit("a", 1), batcher.submit("b", 2), batcher.submit("a", 3), batcher.submit("a", 4),
+    )
+
+    assert results == ["a:1", "b:2", "a:3", "a:4"]
+    assert sorted(scorer.calls) == [("a", [1, 3, 4]), ("b", [2])]
+    assert batcher.status()["batches"] == 2
+    assert batcher.status()["largest_batch"] == 3
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_before_the_window():
+    scorer = RecordingScorer()
+    batcher = MicroBatcher(scorer, enabled=True, window_ms=10_000, max_rows=3)
+
+    results = await asyncio.wait_for(asyncio.gather(*(batcher.submit("a", i) for i in range(3))), timeout=1)
+
+    assert results == ["a:0", "a:1", "a:2"]
+    assert scorer.calls == [("a", [0, 1, 2])]
+
+
+@pytest.mark.asyncio
+async def test_score_errors_reach_every_waiting_row():
+    batcher = MicroBatcher(RecordingScorer(fail=True), enabled=True, window_ms=1)
+
+    results = await asyncio.gather(batcher.submit("a", 1), batcher.submit("a", 2), return_exceptions=True)
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+
+
+@pytest.mark.asyncio
+async def test_short_score_results_fail_every_row_instead_of_hanging():
+    async def score(key, rows):
+        return [f"{key}:{row}" for row in rows[:-1]]
+
+    batcher = MicroBatcher(score, enabled=True, window_ms=1)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(batcher.submit("a", 1), batcher.submit("a", 2), return_exceptions=True), timeout=1,
+    )
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert str(results[0]) == "score returned 1 results for 2 rows"
@@ -0,0 +1,216 @@
+"""Tests for model artifact serialization and the artifact store."""
+
+import threading
+
+import numpy as np
+import pytest
+
+import src.model_artifacts as model_artifacts
+from src.catboost_model import fit_catboost_payment_model, predict_catboost_batch
+from src.model_artifacts import (
+    ModelArtifactStore,
+    dump_catboost_model,
+    dump_intervention_model,
+    dump_probability_model,
+    dump_survival_model,
+    dump_uplift_model,
+    load_catboost_model,
+    load_intervention_model,
+    load_probability_model,
+    load_survival_model,
+    load_uplift_model,
+)
+from src.survival import fit_survival_model, predict_survival_batch
+from src.training import (
+    fit_intervention_effect_model,
+    fit_probability_model,
+    predict_batch_with_trained_model,
+    predict_with_intervention_model,
+)
+from src.uplift import fit_uplift_model, predict_uplift
+from tests.test_server import make_training_rows
+from tests.test_survival import _make_epochs
+from tests.test_uplift import make_graded_outcomes
+
+
+class FakeArtifactPool:
+    """Stores world_model_artifacts rows in a dict keyed by (release_id, kind)."""
+
+    def __init__(self):
+        self.rows: dict[tuple[str, str], dict] = {}
+        self.fetches = 0
+
+    async def execute(self, sql, release_id, kind, cache_key, tenant_id, model_id, fmt, payload, checksum, size):
+        self.rows.setdefault((release_id, kind), {
+            "release_id": release_id,
+            "model_kind": kind,
+            "cache_key": cache_key,
+            "model_id": model_id,
+            "format": fmt,
+            "payload": payload,
+            "checksum": checksum,
+        })
+
+    async def fetchrow(self, sql, kind, release_id, cache_key):
+        self.fetches += 1
+        matches = [
+            row for row in self.rows.values()
+            if row["model_kind"] == kind
+            and (release_id is None or row["release_id"] == release_id)
+            and (cache_key is None or row["cache_key"] == cache_key)
+        ]
+        return matches[-1] if matches else None
+
+
+def _feature_rows(feature_names, n=20, seed=5):
+    rng = np.random.default_rng(seed)
+    return [
+        {name: float(rng.uniform(0, 2.0) * (100_000 if "Cents" in name else 1.0)) for name in feature_names}
+        for _ in range(n)
+    ]
+
+
+def test_probability_model_round_trip():
+    model = fit_probability_model(
+        make_training_rows(60), prediction_type="paymentProbability7d", tenant_id="t_1", scope="tenant",
+    )
+    restored = load_probability_model(dump_probability_model(model))
+
+    assert restored.estimator is None
+    assert restored.feature_names == model.feature_names
+    assert restored.calibrator["method"] == model.calibrator["method"]
+    rows = _feature_rows(model.feature_names)
+    for coverage in (0.9, 0.85):
+        for original, loaded in zip(
+            predict_batch_with_trained_model(model, rows, coverage),
+            predict_batch_with_trained_model(restored, rows, coverage),
+        ):
+            assert loaded["value"] == pytest.approx(original["value"], abs=1e-12)
+            assert loaded["interval"] == pytest.approx(original["interval"])
+
+
+def test_catboost_model_round_trip():
+    epochs = _make_epochs(80)
+    for idx, epoch in enumerate(epochs):
+        epoch["outcome_label"]["paid_7d"] = idx % 3 != 0
+    model = fit_catboost_payment_model(epochs, prediction_type="paymentProbability7d", tenant_id="t_1", scope="tenant")
+    assert model is not None
+    restored = load_catboost_model(dump_catboost_model(model))
+
+    rows = _feature_rows(model.feature_names)
+    for original, loaded in zip(predict_catboost_batch(model, rows), predict_catboost_batch(restored, rows)):
+        assert loaded["value"] == pytest.approx(original["value"], abs=1e-12)
+        assert loaded["shap_reasons"] == original["shap_reasons"]
+
+
+def test_survival_model_round_trip():
+    model = fit_survival_model(_make_epochs(), tenant_id="t_1")
+    restored = load_survival_model(dump_survival_model(model))
+
+    assert restored.model is None
+    rows = _feature_rows(model.feature_names)
+    for original, loaded in zip(predict_survival_batch(model, rows), predict_survival_batch(restored, rows)):
+        assert loaded == original
+
+
+def test_uplift_and_intervention_round_trip():
+    uplift = fit_uplift_model(make_graded_outcomes(), tenant_id="t_1", action_class="communicate.email")
+    restored_uplift = load_uplift_model(dump_uplift_model(uplift))
+    features = _feature_rows(uplift.feature_names, n=1)[0]
+    original, loaded = predict_uplift(uplift, features), predict_uplift(restored_uplift, features)
+    assert loaded["lift"] == pytest.approx(original["lift"], abs=1e-12)
+    assert loaded["interval"] == pytest.approx(original["interval"])
+
+    rows = [
+        {
+            "current_value": 0.35 + idx * 0.01,
+            "predicted_value": 0.48 + idx * 0.01,
+            "delta_expected": 0.13,
+            "delta_observed": 0.18 + idx * 0.005,
+            "confidence": 0.72,
+            "objective_score": 0.8,
+            "state": {"amountCents": 100_000 + idx * 1_000, "status": "overdue"},
+            "estimated": {"paymentReliability": 0.6},
+        }
+        for idx in range(12)
+    ]
+    intervention = fit_intervention_effect_model(
+        rows, tenant_id="t_1", action_class="communicate.email", object_type="invoice", field="paymentProbability7d",
+    )
+    restored_intervention = load_intervention_model(dump_intervention_model(intervention))
+    kwargs = dict(current_value=0.4, predicted_value=0.55, confidence=0.7)
+    assert predict_with_intervention_model(
+        restored_intervention, {"amountCents": 120_000}, {}, **kwargs,
+    ) == predict_with_intervention_model(intervention, {"amountCents": 120_000}, {}, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_store_loads_by_release_and_by_cache_key():
+    model = fit_probability_model(
+        make_training_rows(40), prediction_type="paymentProbability7d", tenant_id="t_1", scope="tenant",
+    )
+    pool = FakeArtifactPool()
+    store = ModelArtifactStore()
+    assert await store.save(pool, "probability", model, release_id="release_a", cache_key="tenant:t_1:p", tenant_id="t_1")
+
+    by_release = await store.load(pool, "probability", release_id="release_a")
+    by_key = await store.load(pool, "probability", cache_key="tenant:t_1:p")
+    assert by_release.release_id == by_key.release_id == "release_a"
+    assert by_release.model_id == model.model_id
+    assert store.loaded == 2
+
+
+@pytest.mark.asyncio
+async def test_store_rejects_payload_moved_to_another_release():
+    model = fit_probability_model(
+        make_training_rows(40), prediction_type="paymentProbability7d", tenant_id="t_1", scope="tenant",
+    )
+    pool = FakeArtifactPool()
+    store = ModelArtifactStore()
+    await store.save(pool, "probability", model, release_id="release_a", cache_key="k", tenant_id="t_1")
+    row = dict(pool.rows[("release_a", "probability")], release_id="release_b")
+    pool.rows[("release_b", "probability")] = row
+
+    assert await store.load(pool, "probability", release_id="release_b") is None
+    assert store.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_store_remembers_misses_until_a_save():
+    pool = FakeArtifactPool()
+    store = ModelArtifactStore(miss_ttl_seconds=60)
+
+    assert await store.load(pool, "survival", cache_key="tenant:t_1:survival") is None
+    assert await store.load(pool, "survival", cache_key="tenant:t_1:survival") is None
+    assert pool.fetches == 1
+
+    model = fit_survival_model(_make_epochs(), tenant_id="t_1")
+    await store.save(pool, "survival", model, release_id="release_a", cache_key="tenant:t_1:survival", tenant_id="t_1")
+    assert await store.load(pool, "survival", cache_key="tenant:t_1:survival") is not None
+    assert pool.fetches == 2
+
+
+@pytest.mark.asyncio
+async def test_store_serializes_off_the_event_loop(monkeypatch):
+    model = fit_probability_model(
+        make_training_rows(40), prediction_type="paymentProbability7d", tenant_id="t_1", scope="tenant",
+    )
+    dump, load = model_artifacts.SERIALIZERS["probability"]
+    threads: list[int] = []
+
+    def tracking_dump(value):
+        threads.append(threading.get_ident())
+        return dump(value)
+
+    def tracking_load(payload):
+        threads.append(threading.get_ident())
+        return load(payload)
+
+    monkeypatch.setitem(model_artifacts.SERIALIZERS, "probability", (tracking_dump, tracking_load))
+    pool = FakeArtifactPool()
+    store = ModelArtifactStore()
+    await store.save(pool, "probability", model, release_id="release_a", cache_key="k", tenant_id="t_1")
+    assert await store.load(pool, "probability", release_id="release_a") is not None
+
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
@@ -0,0 +1,189 @@
+"""Tests for drift/OOD monitor checkpointing and lazy restore."""
+
+import json
+import pickle
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pytest
+
+import src.drift as drift_module
+from src.drift import DriftMonitor
+from src.monitor_state import MonitorStateStore
+from src.ood import DistributionMonitor
+
+
+class FakeStatePool:
+    """Stores world_model_monitor_state rows in a dict."""
+
+    def __init__(self):
+        self.rows: dict[tuple[str, str], tuple[str, bytes]] = {}
+        self.fetches = 0
+        self.fail_writes = False
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def fetch(self, sql, kind, state_key, tenant_id):
+        self.fetches += 1
+        return [
+            {"state_key": key, "state": state}
+            for (row_kind, key), (row_tenant, state) in self.rows.items()
+            if row_kind == kind
+            and (state_key is None or key == state_key)
+            and (tenant_id is None or row_tenant == tenant_id)
+        ]
+
+    async def execute(self, sql, kind, keys, tenants, states):
+        if self.fail_writes:
+            raise ConnectionError("database unavailable")
+        for key, tenant_id, state in zip(keys, tenants, states):
+            self.rows[(kind, key)] = (tenant_id, state)
+
+
+def _populated_store(backend: str = "adwin") -> MonitorStateStore:
+    rng = np.random.default_rng(1)
+    drift = DriftMonitor(backend=backend)
+    for residual in np.concatenate([rng.normal(0, 0.1, 100), rng.normal(0.5, 0.1, 60)]):
+        drift.update("model_a", "paymentProbability7d", "t_1", float(residual), 0.0)
+    drift.update("model_b", "churnRisk", "t_1", 0.2, 0.1)
+    drift.update("model_a", "paymentProbability7d", "t_2", 0.2, 0.1)
+
+    ood = DistributionMonitor()
+    ood.fit("t_1", "paymentProbability7d", {
+        "amount": rng.normal(0, 1, 500).tolist(),
+        "days": rng.exponential(5, 500).tolist(),
+    })
+    return MonitorStateStore(drift, ood)
+
+
+@pytest.mark.parametrize("backend", ["adwin", "page_hinkley"])
+async def test_checkpoint_then_lazy_restore_round_trips(backend):
+    pool = FakeStatePool()
+    original = _populated_store(backend)
+    assert await original.checkpoint(pool) == 4
+    assert await original.checkpoint(pool) == 0  # nothing changed since
+
+    restarted = MonitorStateStore(DriftMonitor(backend=backend), DistributionMonitor())
+    await restarted.restore_drift(pool, "model_a", "paymentProbability7d", "t_1")
+    await restarted.restore_ood(pool, "t_1", "paymentProbability7d")
+    assert set(restarted.drift._monitors) == {"t_1:model_a:paymentProbability7d"}
+
+    assert restarted.drift.get_status("model_a", "paymentProbability7d", "t_1") == \
+        original.drift.get_status("model_a", "paymentProbability7d", "t_1")
+
+    rows = [{"amount": 0.3, "days": 2.0}, {"amount": 12.0, "days": 1.0}]
+    assert restarted.ood.check_batch("t_1", "paymentProbability7d", rows) == \
+        original.ood.check_batch("t_1", "paymentProbability7d", rows)
+
+    # Restored detectors keep learning from where they left off.
+    shifted = np.random.default_rng(5).normal(-0.5, 0.1, 200)
+    assert restarted.drift.update_many("model_a", "paymentProbability7d", "t_1", shifted)
+    original.drift.update_many("model_a", "paymentProbability7d", "t_1", shifted)
+    assert restarted.drift.get_status("model_a", "paymentProbability7d", "t_1")["adwin_value"] == \
+        pytest.approx(original.drift.get_status("model_a", "paymentProbability7d", "t_1")["adwin_value"], abs=0.05)
+
+
+async def test_restore_is_attempted_once_and_never_overwrites_live_state():
+    pool = FakeStatePool()
+    await _populated_store().checkpoint(pool)
+
+    store = MonitorStateStore(DriftMonitor(), DistributionMonitor())
+    store.drift.update("model_b", "churnRisk", "t_1", 0.9, 0.0)
+    live = store.drift._monitors["t_1:model_b:churnRisk"]
+
+    await store.restore_drift_tenant(pool, "t_1")
+    await store.restore_drift_tenant(pool, "t_1")
+    await store.restore_drift(pool, "model_a", "paymentProbability7d", "t_1")
+    assert pool.fetches == 1
+    assert store.drift._monitors["t_1:model_b:churnRisk"] is live
+    assert "t_1:model_a:paymentProbability7d" in store.drift._monitors
+    assert "t_2:model_a:paymentProbability7d" not in store.drift._monitors
+
+    await store.restore_ood(pool, "t_9", "paymentProbability7d")
+    await store.restore_ood(pool, "t_9", "paymentProbability7d")
+    assert pool.fetches == 2
+
+
+async def test_failed_checkpoint_keeps_keys_dirty():
+    pool = FakeStatePool()
+    store = _populated_store()
+    pool.fail_writes = True
+    assert await store.checkpoint(pool) == 0
+    pool.fail_writes = False
+    assert await store.checkpoint(pool) == 4
+    assert pool.rows[("drift", "t_2:model_a:paymentProbability7d")][0] == "t_2"
+    assert pool.rows[("ood", "t_1:paymentProbability7d")][0] == "t_1"
+
+
+def test_page_hinkley_state_is_versioned_json_and_restores_exactly():
+    original = _populated_store("page_hinkley").drift
+    key = "t_1:model_a:paymentProbability7d"
+    payload = original.export_state(key)
+    state = json.loads(payload)
+    assert state["format"] == 2 and state["backend"] == "page_hinkley"
+
+    restored = DriftMonitor(backend="page_hinkley")
+    assert restored.import_state(key, payload)
+
+    rng = np.random.default_rng(3)
+    for residual in np.concatenate([rng.normal(0.5, 0.1, 50), rng.normal(-0.4, 0.1, 150)]):
+        assert restored.update("model_a", "paymentProbability7d", "t_1", float(residual), 0.0) == \
+            original.update("model_a", "paymentProbability7d", "t_1", float(residual), 0.0)
+    assert restored.get_status("model_a", "paymentProbability7d", "t_1")["adwin_value"] == \
+        pytest.approx(original.get_status("model_a", "paymentProbability7d", "t_1")["adwin_value"])
+
+
+def test_adwin_state_is_its_window_replayed_into_a_fresh_detector():
+    original = _populated_store("adwin").drift
+    key = "t_1:model_a:paymentProbability7d"
+    state = json.loads(original.export_state(key))
+    detector = original._monitors[key]
+
+    # Only parameters and residuals: nothing of river's internal layout.
+    assert set(state["detector"]) == {"params", "window"}
+    assert len(state["detector"]["window"]) == detector.width
+
+    restored = DriftMonitor(backend="adwin")
+    assert restored.import_state(key, json.dumps(state).encode("utf-8"))
+    assert restored._monitors[key].width == detector.width
+    assert restored._monitors[key].estimation == pytest.approx(detector.estimation)
+
+    detected = [
+        restored.update("model_a", "paymentProbability7d", "t_1", float(residual), 0.0)
+        for residual in np.random.default_rng(3).normal(-0.4, 0.1, 200)
+    ]
+    assert any(detected)
+
+
+def test_adwin_replay_is_bounded(monkeypatch):
+    monkeypatch.setattr(drift_module, "DRIFT_ADWIN_REPLAY_MAX", 50)
+    monitor = DriftMonitor(backend="adwin")
+    monitor.update_many("model_a", "paymentProbability7d", "t_1", np.zeros(500))
+
+    state = json.loads(monitor.export_state("t_1:model_a:paymentProbability7d"))
+    assert len(state["detector"]["window"]) == 50
+
+
+def test_unreadable_drift_state_is_dropped_with_a_warning(caplog):
+    drift = _populated_store().drift
+    key = "t_1:model_a:paymentProbability7d"
+    state = json.loads(drift.export_state(key))
+
+    no_window = json.loads(json.dumps(state))
+    del no_window["detector"]["window"]
+    other_format = dict(state, format=1)
+    other_backend = dict(state, backend="page_hinkley")
+    payloads = [json.dumps(payload).encode("utf-8") for payload in (no_window, other_format, other_backend)]
+    payloads.append(pickle.dumps({"backend": "adwin"}))
+
+    for payload in payloads:
+        monitor = DriftMonitor()
+        assert not monitor.import_state(key, payload)
+        assert key not in monitor._monitors
+    assert sum("Dropping unreadable drift state" in record.message for record in caplog.records) == 4
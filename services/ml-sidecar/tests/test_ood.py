@@ -148,6 +148,52 @@ class TestNoFitGraceful:
         assert result["per_feature"] == {}
 
 
+class TestBatch:
+    """check_batch scores many vectors at once with the same results as check."""
+
+    def test_batch_matches_reference_loop(self, monitor):
+        rng = np.random.default_rng(42)
+        feature_matrix = {
+            "amount": rng.standard_normal(1000).tolist(),
+            "days_overdue": rng.exponential(10.0, 1000).tolist(),
+        }
+        monitor.fit("t1", "paymentProbability7d", feature_matrix)
+
+        rows = [
+            {"amount": 0.1, "days_overdue": 4.0},
+            {"amount": 9.0},
+            {"days_overdue": -1.0, "unknown": 3.0},
+            {"unknown": 1.0},
+            {"amount": feature_matrix["amount"][0], "days_overdue": max(feature_matrix["days_overdue"])},
+            {"amount": float("nan")},
+        ]
+        results = monitor.check_batch("t1", "paymentProbability7d", rows)
+        assert len(results) == len(rows)
+
+        for features, result in zip(rows, results):
+            assert result == monitor.check("t1", "paymentProbability7d", features)
+            # Per-feature scores follow the original per-feature definition.
+            for name, score in result["per_feature"].items():
+                counts, edges = np.histogram(np.asarray(feature_matrix[name]), bins=50)
+                q = counts / counts.sum() + 1e-10
+                q = q / q.sum()
+                h_ref = -np.sum(q * np.log(q))
+                value = features[name]
+                if value < edges[0] or value > edges[-1]:
+                    surprise = -np.log(q.min())
+                else:
+                    bin_idx = int(np.clip(np.searchsorted(edges[1:], value, side="right"), 0, 49))
+                    surprise = -np.log(q[bin_idx])
+                assert score == pytest.approx(max(0.0, surprise - h_ref), abs=1e-12)
+
+        assert results[3] == {"in_distribution": True, "kl_divergence": 0.0, "per_feature": {}}
+        assert results[1]["in_distribution"] is False
+
+    def test_batch_without_fit(self, monitor):
+        results = monitor.check_batch("nobody", "churnRisk", [{"x": 1.0}, {}])
+        assert all(r["in_distribution"] and r["per_feature"] == {} for r in results)
+
+
 class TestSingleton:
     """Module-level singleton exists."""
 
@@ -0,0 +1,72 @@
+"""Tests for the log-bucket quantile sketch and sketch-backed tenant stats."""
+
+import numpy as np
+import pytest
+
+from src.quantile_sketch import RELATIVE_ACCURACY, QuantileSketch, bucket_index
+from src.tenant_stats import stats_from_sketches
+
+
+def _sketch(values) -> QuantileSketch:
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(float(value))
+    return sketch
+
+
+def _rows(sketch: QuantileSketch) -> list[dict]:
+    return [
+        {"bucket": bucket, "count": count, "total": sketch.totals[bucket]}
+        for bucket, count in sketch.counts.items()
+    ]
+
+
+def test_quantiles_stay_within_relative_accuracy():
+    amounts = np.random.default_rng(7).lognormal(mean=9.0, sigma=1.4, size=5000)
+    sketch = _sketch(amounts)
+
+    for q in (0.25, 0.5, 0.75, 0.95):
+        exact = float(np.percentile(amounts, q * 100))
+        assert sketch.quantile(q) == pytest.approx(exact, rel=2 * RELATIVE_ACCURACY)
+    assert sketch.mean() == pytest.approx(float(amounts.mean()))
+    assert len(sketch.counts) < 700
+
+
+def test_removals_and_merges_match_a_rebuilt_sketch():
+    values = np.random.default_rng(3).uniform(100, 100000, size=400)
+    left, right = _sketch(values[:200]), _sketch(values[200:])
+    left.merge(right)
+    for value in values[:50]:
+        left.add(float(value), -1)
+
+    rebuilt = _sketch(values[50:])
+    assert left.counts == rebuilt.counts
+    assert left.quantiles([0.25, 0.5, 0.95]) == rebuilt.quantiles([0.25, 0.5, 0.95])
+    assert left.total == pytest.approx(rebuilt.total)
+
+
+def test_non_positive_values_share_the_zero_bucket():
+    sketch = _sketch([0.0, -2.0, 10.0])
+
+    assert bucket_index(0.0) == bucket_index(-2.0)
+    assert sketch.quantile(0.0) == 0.0
+    assert sketch.mean() == pytest.approx(8.0 / 3)
+
+
+def test_tenant_stats_from_sketch_rows():
+    amounts = [1000, 2000, 5000, 8000, 20000, 50000, 120000]
+    stats = stats_from_sketches({
+        "amount_cents": _rows(_sketch(amounts)),
+        "days_to_pay": _rows(_sketch([10.0, 20.0, 45.0])),
+    })
+
+    assert stats["invoice_count"] == len(amounts)
+    assert stats["median_amount_cents"] == pytest.approx(8000, rel=RELATIVE_ACCURACY)
+    assert stats["amount_p95"] == pytest.approx(float(np.percentile(amounts, 95)), rel=2 * RELATIVE_ACCURACY)
+    assert stats["avg_amount_cents"] == pytest.approx(np.mean(amounts))
+    assert stats["avg_days_to_pay"] == pytest.approx(25.0)
+
+    empty = stats_from_sketches({})
+    assert empty["invoice_count"] == 0
+    assert empty["amount_p50"] == 0.0
+    assert empty["avg_days_to_pay"] == 30.0
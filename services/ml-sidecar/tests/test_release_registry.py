@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src.release_registry import ModelReleaseRegistry
+
+
+class FakeReleaseTable:
+    def __init__(self):
+        self.releases: list[dict] = []
+        self.queries = 0
+
+    async def load(self, pool, prediction_type, scope, tenant_id=None, status=None):
+        self.queries += 1
+        matches = [
+            release for release in self.releases
+            if release["prediction_type"] == prediction_type
+            and release["scope"] == scope
+            and release.get("tenant_id") == tenant_id
+            and (status is None or release["status"] == status)
+        ]
+        if not matches:
+            return None
+        return max(matches, key=lambda release: release["trained_at"])
+
+
+def _release(release_id: str, status: str, trained_at: str, tenant_id: str | None = "t_1") -> dict:
+    return {
+        "release_id": release_id,
+        "prediction_type": "paymentProbability7d",
+        "scope": "tenant" if tenant_id else "global",
+        "tenant_id": tenant_id,
+        "status": status,
+        "trained_at": trained_at,
+    }
+
+
+@pytest.mark.asyncio
+async def test_hits_do_not_query():
+    table = FakeReleaseTable()
+    table.releases.append(_release("r1", "approved", "2026-01-01"))
+    registry = ModelReleaseRegistry(ttl_seconds=3600)
+
+    for _ in range(5):
+        latest = await registry.get(None, "paymentProbability7d", "tenant", "t_1", loader=table.load)
+        approved = await registry.get(None, "paymentProbability7d", "tenant", "t_1", status="approved", loader=table.load)
+
+    assert latest["release_id"] == "r1"
+    assert approved["release_id"] == "r1"
+    assert table.queries == 1
+    assert registry.hits == 9
+    assert registry.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_latest_and_approved_tracked_separately():
+    table = FakeReleaseTable()
+    table.releases.append(_release("r1", "approved", "2026-01-01"))
+    table.releases.append(_release("r2", "candidate", "2026-02-01"))
+    registry = ModelReleaseRegistry(ttl_seconds=3600)
+
+    latest = await registry.get(None, "paymentProbability7d", "tenant", "t_1", loader=table.load)
+    approved = await registry.get(None, "paymentProbability7d", "tenant", "t_1", status="approved", loader=table.load)
+
+    assert latest["release_id"] == "r2"
+    assert approved["release_id"] == "r1"
+
+
+@pytest.mark.asyncio
+async def test_missing_release_is_cached():
+    table = FakeReleaseTable()
+    registry = ModelReleaseRegistry(ttl_seconds=3600)
+
+    assert await registry.get(None, "paymentProbability7d", "global", None, loader=table.load) is None
+    assert await registry.get(None, "paymentProbability7d", "global", None, loader=table.load) is None
+    assert table.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_notification_invalidates_matching_key():
+    table = FakeReleaseTable()
+    table.releases.append(_release("r1", "approved", "2026-01-01"))
+    registry = ModelReleaseRegistry(ttl_seconds=3600)
+    await registry.get(None, "paymentProbability7d", "tenant", "t_1", loader=table.load)
+
+    table.releases.append(_release("r2", "approved", "2026-02-01"))
+    registry.handle_notification(json.dumps({
+        "release_id": "r2",
+        "prediction_type": "paymentProbability7d",
+        "scope": "tenant",
+        "tenant_id": "t_1",
+        "status": "approved",
+    }))
+
+    latest = await registry.get(None, "paymentProbability7d", "tenant", "t_1", loader=table.load)
+    assert latest["release_id"] == "r2"
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_load_is_not_lost():
+    table = FakeReleaseTable()
+    table.releases.append(_release("r1", "approved", "2026-01-01"))
+    registry = ModelReleaseRegistry(ttl_seconds=3600)
+
+    async def slow_load(pool, prediction_type, scope, tenant_id=None, status=None):
+        result = await table.load(pool, prediction_type, scope, tenant_id, status)
+        if table.queries == 1:
+            # r2 is inserted and notified after this read.
+            table.releases.append(_release("r2", "approved", "2026-02-01"))
+            registry.invalidate("paymentProbability7d", "tenant", "t_1")
+        return result
+
+    first = await registry.get(None, "paymentProbability7d", "tenant", "t_1", loader=slow_load)
+    assert first["release_id"] == "r1"
+
+    latest = await registry.get(None, "paymentProbability7d", "tenant", "t_1", loader=slow_load)
+    assert latest["release_id"] == "r2"
+
+
+@pytest.mark.asyncio
+async def test_unparseable_notification_clears_registry():
+    table = FakeReleaseTable()
+    table.releases.append(_release("r1", "approved", "2026-01-01"))
+    registry = ModelReleaseRegistry(ttl_seconds=3600)
+    await registry.get(None, "paymentProbability7d", "tenant", "t_1", loader=table.load)
+
+    registry.handle_notification("not json")
+    await registry.get(None, "paymentProbability7d", "tenant", "t_1", loader=table.load)
+    assert table.queries == 2
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_without_listener():
+    table = FakeReleaseTable()
+    registry = ModelReleaseRegistry(ttl_seconds=0.0)
+
+    await registry.get(None, "paymentProbability7d", "tenant", "t_1", loader=table.load)
+    await registry.get(None, "paymentProbability7d", "tenant", "t_1", loader=table.load)
+    assert table.queries == 2
+
+
+@pytest.mark.asyncio
+async def test_start_without_connection_keeps_ttl_mode():
+    registry = ModelReleaseRegistry()
+
+    async def no_connection():
+        return None
+
+    assert await registry.start(no_connection) is False
+    assert registry.listening is False
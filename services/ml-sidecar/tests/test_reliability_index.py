@@ -0,0 +1,104 @@
+"""Tests for the in-memory customer reliability index."""
+
+import json
+
+import pytest
+
+import src.reliability_index as reliability_index_module
+from src.reliability_index import ReliabilityIndex, TenantReliability
+
+
+def _percent_rank(values: dict[str, float], party_id: str) -> float:
+    """PERCENT_RANK() as Postgres computes it."""
+    below = sum(1 for value in values.values() if value < values[party_id])
+    return below / (len(values) - 1) if len(values) > 1 else 0.0
+
+
+def test_percentiles_match_percent_rank_with_ties():
+    reliabilities = {"p1": 0.2, "p2": 0.9, "p3": 0.5, "p4": 0.5, "p5": 0.7}
+    entry = TenantReliability(reliabilities, ranked=True)
+
+    for party_id in reliabilities:
+        assert entry.percentile(party_id) == pytest.approx(_percent_rank(reliabilities, party_id))
+    assert entry.percentile("p_unknown") == 0.5
+    assert TenantReliability({"p1": 0.4}, ranked=True).percentile("p1") == 0.0
+
+
+def test_unranked_percentiles_match_the_original_query():
+    # The original query ranked within its own WHERE id = $2 filter.
+    entry = TenantReliability({"p1": 0.2, "p2": 0.9, "p3": 0.5}, ranked=False)
+
+    assert [entry.percentile(party_id) for party_id in ("p1", "p2", "p3")] == [0.0, 0.0, 0.0]
+    assert entry.percentile("p_unknown") == 0.5
+
+
+@pytest.mark.asyncio
+async def test_bulk_lookup_loads_the_tenant_once(monkeypatch):
+    loads: list[str] = []
+
+    async def fake_get_party_reliabilities(pool, tenant_id):
+        loads.append(tenant_id)
+        return {"p1": 0.1, "p2": 0.6, "p3": 0.9}
+
+    monkeypatch.setattr(reliability_index_module, "get_party_reliabilities", fake_get_party_reliabilities)
+    index = ReliabilityIndex(ttl_seconds=300, ranked=True)
+
+    assert await index.percentiles(object(), "t_1", ["p1", "p3", "p9"]) == {"p1": 0.0, "p3": 1.0, "p9": 0.5}
+    assert await index.percentile(object(), "t_1", "p2") == 0.5
+    assert loads == ["t_1"]
+    assert index.status()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_notifications_update_the_loaded_tenant_in_place(monkeypatch):
+    async def fake_get_party_reliabilities(pool, tenant_id):
+        return {"p1": 0.1, "p2": 0.6, "p3": 0.9}
+
+    monkeypatch.setattr(reliability_index_module, "get_party_reliabilities", fake_get_party_reliabilities)
+    index = ReliabilityIndex(ranked=True)
+    await index.percentile(object(), "t_1", "p1")
+
+    index.handle_notification(json.dumps({"tenant_id": "t_1", "party_id": "p1", "reliability": 0.95}))
+    index.handle_notification(json.dumps({"tenant_id": "t_1", "party_id": "p2", "reliability": None}))
+    index.handle_notification(json.dumps({"tenant_id": "t_1", "party_id": "p4", "reliability": 0.3}))
+
+    percentiles = await index.percentiles(object(), "t_1", ["p1", "p2", "p3", "p4"])
+    assert percentiles == {"p1": 1.0, "p2": 0.5, "p3": 0.5, "p4": 0.0}
+    assert index.status()["updates"] == 3
+
+    index.handle_notification("not json")
+    assert index.status()["tenants"] == 0
+
+
+@pytest.mark.asyncio
+async def test_notifications_during_a_load_are_replayed(monkeypatch):
+    index = ReliabilityIndex(ranked=True)
+
+    async def fake_get_party_reliabilities(pool, tenant_id):
+        snapshot = {"p1": 0.1, "p2": 0.6, "p3": 0.9}
+        # p1 changes after the snapshot was read but before the load returns.
+        index.handle_notification(json.dumps({"tenant_id": "t_1", "party_id": "p1", "reliability": 0.95}))
+        return snapshot
+
+    monkeypatch.setattr(reliability_index_module, "get_party_reliabilities", fake_get_party_reliabilities)
+
+    assert await index.percentile(object(), "t_1", "p1") == 1.0
+    assert await index.percentile(object(), "t_1", "p3") == 0.5
+
+
+@pytest.mark.asyncio
+async def test_load_overlapping_a_clear_is_not_kept(monkeypatch):
+    index = ReliabilityIndex(ranked=True)
+    loads: list[str] = []
+
+    async def fake_get_party_reliabilities(pool, tenant_id):
+        loads.append(tenant_id)
+        if len(loads) == 1:
+            index.handle_notification("not json")
+        return {"p1": 0.1, "p2": 0.6}
+
+    monkeypatch.setattr(reliability_index_module, "get_party_reliabilities", fake_get_party_reliabilities)
+
+    await index.percentile(object(), "t_1", "p1")
+    await index.percentile(object(), "t_1", "p1")
+    assert loads == ["t_1", "t_1"]
@@ -6,6 +6,7 @@ import pytest
 from httpx import ASGITransport, AsyncClient
 
 import src.server as server
+from src.async_cache import clear_caches
 from src.server import app
 
 
@@ -78,20 +79,48 @@ def install_release_store(monkeypatch):
     return releases
 
 
+def install_artifact_store(monkeypatch):
+    import src.model_artifacts as model_artifacts
+
+    artifacts: dict[tuple[str, str], dict] = {}
+
+    async def fake_insert_model_artifact(pool, artifact):
+        artifacts.setdefault((artifact["release_id"], artifact["model_kind"]), dict(artifact))
+
+    async def fake_get_model_artifact(pool, model_kind, *, release_id=None, cache_key=None):
+        for (stored_release, stored_kind), artifact in artifacts.items():
+            if stored_kind == model_kind and release_id in (None, stored_release) and cache_key in (None, artifact["cache_key"]):
+                return artifact
+        return None
+
+    monkeypatch.setattr(model_artifacts, "insert_model_artifact", fake_insert_model_artifact)
+    monkeypatch.setattr(model_artifacts, "get_model_artifact", fake_get_model_artifact)
+    return artifacts
+
+
 @pytest.fixture(autouse=True)
 def clear_sidecar_state(monkeypatch):
     server._calibrators.clear()
     server._trained_models.clear()
     server._intervention_models.clear()
     server._uplift_models.clear()
+    server._catboost_models.clear()
+    server._survival_models.clear()
     server.drift_monitor._monitors.clear()
     server.drift_monitor._last_checked.clear()
     server.distribution_monitor._distributions.clear()
+    server.release_registry.clear()
+    server.monitor_state.reset()
+    server.artifact_store.clear()
+    clear_caches()
     yield
     server._calibrators.clear()
     server._trained_models.clear()
     server._intervention_models.clear()
     server._uplift_models.clear()
+    server._catboost_models.clear()
+    server._survival_models.clear()
+    server.release_registry.clear()
 
 
 @pytest.mark.asyncio
@@ -191,6 +220,337 @@ async def test_predict_uses_trained_tenant_model_when_training_data_exists(monke
         assert 0 <= data["value"] <= 1
 
 
+@pytest.mark.asyncio
+async def test_evicted_model_is_reloaded_from_artifact_instead_of_retrained(monkeypatch):
+    rows = make_training_rows(24)
+    install_release_store(monkeypatch)
+    artifacts = install_artifact_store(monkeypatch)
+    training_fetches = 0
+
+    async def fake_get_pool():
+        return object()
+
+    async def fake_get_prediction_training_rows(pool, prediction_type, tenant_id=None, limit=2000):
+        nonlocal training_fetches
+        training_fetches += 1
+        return rows if tenant_id == "t_test" else []
+
+    async def fake_get_prediction_outcome_pairs(pool, tenant_id, prediction_type):
+        return []
+
+    monkeypatch.setattr(server, "get_pool", fake_get_pool)
+    monkeypatch.setattr(server, "get_prediction_training_rows", fake_get_prediction_training_rows)
+    monkeypatch.setattr(server, "get_prediction_outcome_pairs", fake_get_prediction_outcome_pairs)
+
+    body = {
+        "tenant_id": "t_test",
+        "object_id": "inv_live",
+        "prediction_type": "paymentProbability7d",
+        "features": {"paymentProbability7d": 0.45, "amountCents": 180000, "daysOverdue": 15, "paymentReliability": 0.77},
+    }
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = (await client.post("/predict", json=body)).json()
+        assert first["selection"]["strategy"] == "trained_probability_model"
+        assert [kind for _, kind in artifacts] == ["probability"]
+        fetches_after_training = training_fetches
+
+        server._trained_models.clear()
+        second = (await client.post("/predict", json=body)).json()
+
+    assert training_fetches == fetches_after_training
+    assert second["model_id"] == first["model_id"]
+    assert second["value"] == pytest.approx(first["value"], abs=1e-9)
+    assert second["interval"] == pytest.approx(first["interval"])
+
+
+@pytest.mark.asyncio
+async def test_warm_tenant_preloads_approved_artifact_before_first_predict(monkeypatch):
+    rows = make_training_rows(24)
+    releases = install_release_store(monkeypatch)
+    install_artifact_store(monkeypatch)
+    training_fetches = 0
+
+    async def fake_get_pool():
+        return object()
+
+    async def fake_get_prediction_training_rows(pool, prediction_type, tenant_id=None, limit=2000):
+        nonlocal training_fetches
+        training_fetches += 1
+        return rows if tenant_id == "t_test" else []
+
+    async def fake_get_prediction_outcome_pairs(pool, tenant_id, prediction_type):
+        return []
+
+    monkeypatch.setattr(server, "get_pool", fake_get_pool)
+    monkeypatch.setattr(server, "get_prediction_training_rows", fake_get_prediction_training_rows)
+    monkeypatch.setattr(server, "get_prediction_outcome_pairs", fake_get_prediction_outcome_pairs)
+
+    body = {
+        "tenant_id": "t_test",
+        "object_id": "inv_live",
+        "prediction_type": "paymentProbability7d",
+        "features": {"paymentProbability7d": 0.45, "amountCents": 180000, "daysOverdue": 15},
+    }
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = (await client.post("/predict", json=body)).json()
+        release_count = len(releases)
+        fetches_after_training = training_fetches
+
+        # A fresh worker: nothing in memory, the release and artifact are stored.
+        server._trained_models.clear()
+        server.release_registry.clear()
+        await server._warm_tenant(object(), "t_test")
+        assert server._trained_models["tenant:t_test:paymentProbability7d"].release_id == first["selection"]["release_id"]
+
+        second = (await client.post("/predict", json=body)).json()
+        health = (await client.get("/health")).json()
+
+    assert second["selection"]["strategy"] == "trained_probability_model"
+    assert training_fetches == fetches_after_training
+    assert len(releases) == release_count
+    assert health["ready"] is True
+    assert health["warmup"]["state"] in ("idle", "complete", "disabled")
+
+
+@pytest.mark.asyncio
+async def test_warm_tenant_never_fits_or_records_releases(monkeypatch):
+    releases = install_release_store(monkeypatch)
+    install_artifact_store(monkeypatch)
+
+    async def fake_get_prediction_training_rows(pool, prediction_type, tenant_id=None, limit=2000):
+        raise AssertionError("warm-up must not read training rows")
+
+    monkeypatch.setattr(server, "get_prediction_training_rows", fake_get_prediction_training_rows)
+
+    await server._warm_tenant(object(), "t_cold")
+
+    assert releases == []
+    assert len(server._trained_models) == 0
+
+
+@pytest.mark.asyncio
+async def test_train_v2_falls_back_to_logistic_regression_below_catboost_minimum(monkeypatch):
+    from tests.test_survival import _make_epochs
+
+    install_release_store(monkeypatch)
+    epochs = _make_epochs(40)
+    for idx, epoch in enumerate(epochs):
+        epoch["outcome_label"]["paid_7d"] = idx % 3 != 0
+
+    async def fake_get_pool():
+        return object()
+
+    async def fake_get_epoch_training_rows(pool, tenant_id, prediction_type):
+        return epochs
+
+    monkeypatch.setattr(server, "get_pool", fake_get_pool)
+    monkeypatch.setattr(server, "get_epoch_training_rows", fake_get_epoch_training_rows)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post("/train/v2", json={"tenant_id": "t_test"})
+
+    data = resp.json()
+    assert data["status"] == "trained"
+    assert data["model_family"] == "logistic_regression"
+    assert data["survival"]["sample_count"] == 40
+    assert "tenant:t_test:paymentProbability7d" in server._trained_models
+
+
+@pytest.mark.asyncio
+async def test_concurrent_predicts_after_cache_miss_fit_once(monkeypatch):
+    import asyncio
+
+    rows = make_training_rows(24)
+    releases = install_release_store(monkeypatch)
+    training_fetches = 0
+
+    async def fake_get_pool():
+        return object()
+
+    async def fake_get_prediction_training_rows(pool, prediction_type, tenant_id=None, limit=2000):
+        nonlocal training_fetches
+        training_fetches += 1
+        await asyncio.sleep(0.01)
+        return rows if tenant_id == "t_test" else []
+
+    async def fake_get_prediction_outcome_pairs(pool, tenant_id, prediction_type):
+        return []
+
+    monkeypatch.setattr(server, "get_pool", fake_get_pool)
+    monkeypatch.setattr(server, "get_prediction_training_rows", fake_get_prediction_training_rows)
+    monkeypatch.setattr(server, "get_prediction_outcome_pairs", fake_get_prediction_outcome_pairs)
+
+    body = {
+        "tenant_id": "t_test",
+        "object_id": "inv_live",
+        "prediction_type": "paymentProbability7d",
+        "features": {"paymentProbability7d": 0.45, "amountCents": 180000, "daysOverdue": 15},
+    }
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(*(client.post("/predict", json=body) for _ in range(6)))
+
+    assert {resp.json()["model_id"] for resp in responses} == {responses[0].json()["model_id"]}
+    # one fetch for the tenant scope (and at most one for the global fallback lookup)
+    assert training_fetches <= 2
+    assert len([release for release in releases if release.get("tenant_id") == "t_test"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_microbatched_predicts_match_unbatched(monkeypatch):
+    import asyncio
+
+    rows = make_training_rows(24)
+    install_release_store(monkeypatch)
+
+    async def fake_get_pool():
+        return object()
+
+    async def fake_get_prediction_training_rows(pool, prediction_type, tenant_id=None, limit=2000):
+        return rows if tenant_id == "t_test" else []
+
+    async def fake_get_prediction_outcome_pairs(pool, tenant_id, prediction_type):
+        return []
+
+    monkeypatch.setattr(server, "get_pool", fake_get_pool)
+    monkeypatch.setattr(server, "get_prediction_training_rows", fake_get_prediction_training_rows)
+    monkeypatch.setattr(server, "get_prediction_outcome_pairs", fake_get_prediction_outcome_pairs)
+
+    bodies = [
+        {
+            "tenant_id": "t_test",
+            "object_id": f"inv_{idx}",
+            "prediction_type": "paymentProbability7d",
+            "features": {"paymentProbability7d": 0.45, "amountCents": 100000 + idx * 20000, "daysOverdue": idx},
+        }
+        for idx in range(8)
+    ]
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        unbatched = [(await client.post("/predict", json=body)).json() for body in bodies]
+
+        monkeypatch.setattr(server.predict_batcher, "enabled", True)
+        monkeypatch.setattr(server.predict_batcher, "window_seconds", 0.05)
+        batches_before = server.predict_batcher.batches
+        batched = [resp.json() for resp in await asyncio.gather(*(client.post("/predict", json=body) for body in bodies))]
+
+    assert server.predict_batcher.batches - batches_before == 1
+    for single, grouped in zip(unbatched, batched):
+        assert grouped["value"] == pytest.approx(single["value"], abs=1e-12)
+        assert grouped["interval"] == pytest.approx(single["interval"])
+        assert grouped["model_id"] == single["model_id"]
+
+
+@pytest.mark.asyncio
+async def test_predict_batch_matches_single_predictions(monkeypatch):
+    rows = make_training_rows(24)
+    install_release_store(monkeypatch)
+
+    async def fake_get_pool():
+        return object()
+
+    async def fake_get_prediction_training_rows(pool, prediction_type, tenant_id=None, limit=2000):
+        return rows if tenant_id == "t_test" else []
+
+    async def fake_get_prediction_outcome_pairs(pool, tenant_id, prediction_type):
+        return []
+
+    monkeypatch.setattr(server, "get_pool", fake_get_pool)
+    monkeypatch.setattr(server, "get_prediction_training_rows", fake_get_prediction_training_rows)
+    monkeypatch.setattr(server, "get_prediction_outcome_pairs", fake_get_prediction_outcome_pairs)
+
+    items = [
+        {
+            "tenant_id": "t_test" if idx % 2 == 0 else "t_other",
+            "object_id": f"inv_live_{idx}",
+            "prediction_type": "paymentProbability7d",
+            "features": {
+                "paymentProbability7d": 0.3 + idx * 0.05,
+                "amountCents": 120000 + idx * 20000,
+                "amountRemainingCents": 120000 + idx * 20000,
+                "daysOverdue": 5 + idx * 3,
+                "isOverdue": 1,
+                "paymentReliability": 0.5 + idx * 0.04,
+            },
+        }
+        for idx in range(6)
+    ]
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        batch_resp = await client.post("/predict/batch", json={"items": items})
+        assert batch_resp.status_code == 200
+        results = batch_resp.json()["results"]
+        assert len(results) == len(items)
+
+        for item, result in zip(items, results):
+            single_resp = await client.post("/predict", json=item)
+            single = single_resp.json()
+            assert result["model_id"] == single["model_id"]
+            assert result["value"] == pytest.approx(single["value"])
+            assert result["interval"] == pytest.approx(single["interval"])
+            assert result["confidence"] == pytest.approx(single["confidence"])
+
+    assert results[0]["selection"]["strategy"] == "trained_probability_model"
+    assert results[1]["selection"]["strategy"] == "fallback_rule"
+
+
+async def test_predict_batch_rejects_oversized_batches(monkeypatch):
+    monkeypatch.setattr(server, "MAX_PREDICT_BATCH_SIZE", 2)
+    item = {
+        "tenant_id": "t_test", "object_id": "inv_1",
+        "prediction_type": "paymentProbability7d", "features": {"daysOverdue": 5},
+    }
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/predict/batch", json={"items": [item] * 3})
+
+    assert response.status_code == 400
+    assert response.json() == {"error": "too_many_items", "max_items": 2}
+
+
+async def test_predict_honors_requested_coverage(monkeypatch):
+    rows = make_training_rows(24)
+    install_release_store(monkeypatch)
+
+    async def fake_get_pool():
+        return object()
+
+    async def fake_get_prediction_training_rows(pool, prediction_type, tenant_id=None, limit=2000):
+        return rows if tenant_id == "t_test" else []
+
+    async def fake_get_prediction_outcome_pairs(pool, tenant_id, prediction_type):
+        return []
+
+    monkeypatch.setattr(server, "get_pool", fake_get_pool)
+    monkeypatch.setattr(server, "get_prediction_training_rows", fake_get_prediction_training_rows)
+    monkeypatch.setattr(server, "get_prediction_outcome_pairs", fake_get_prediction_outcome_pairs)
+
+    payload = {
+        "tenant_id": "t_test",
+        "object_id": "inv_live",
+        "prediction_type": "paymentProbability7d",
+        "features": {"amountCents": 300000, "daysOverdue": 20, "isOverdue": 1, "paymentReliability": 0.5},
+    }
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        widths = {}
+        for coverage in (0.8, 0.95):
+            resp = await client.post("/predict", json={**payload, "coverage": coverage})
+            assert resp.status_code == 200
+            interval = resp.json()["interval"]
+            assert interval["coverage"] == coverage
+            widths[coverage] = interval["upper"] - interval["lower"]
+        assert widths[0.95] >= widths[0.8]
+
+        invalid = await client.post("/predict", json={**payload, "coverage": 1.5})
+        assert invalid.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_train_endpoint_returns_trained_model(monkeypatch):
     rows = make_training_rows(24)
@@ -470,3 +830,93 @@ async def test_uplift_predict_endpoint(monkeypatch):
     assert "treatment_prob" in body
     assert "control_prob" in body
     assert "interval" in body
+
+
+@pytest.mark.asyncio
+async def test_predict_v2_batch_assembles_features_per_family(monkeypatch):
+    import src.feature_assembly as feature_assembly
+
+    install_release_store(monkeypatch)
+    calls: dict[str, int] = {}
+
+    def track(name):
+        calls[name] = calls.get(name, 0) + 1
+
+    async def fake_get_pool():
+        return object()
+
+    async def fake_get_object_states_at(pool, tenant_id, object_ids, as_of):
+        track("states")
+        return {
+            object_id: {
+                "state": {"amountCents": 50_000 * (idx + 1), "status": "overdue", "dueAt": "2026-03-01T00:00:00+00:00"},
+                "estimated": {"paymentReliability": 0.6},
+                "version": 1,
+                "valid_from": None,
+            }
+            for idx, object_id in enumerate(object_ids)
+            if object_id != "inv_missing"
+        }
+
+    async def fake_get_party_ids_for_invoices(pool, tenant_id, invoice_ids):
+        track("parties")
+        return {invoice_id: "party_1" for invoice_id in invoice_ids}
+
+    async def fake_get_event_counts_for_objects(pool, tenant_id, object_ids, as_of=None):
+        track("events")
+        return {object_id: {"reminder_count": 2, "days_since_last_contact": 3} for object_id in object_ids}
+
+    async def fake_load_tenant_stats(pool, tenant_id, force=False):
+        track("tenant_stats")
+        return {"invoice_count": 10, "median_amount_cents": 60_000}
+
+    async def fake_load_tenant_stats_with_customers(pool, tenant_id, party_ids, force=False):
+        track("percentiles")
+        return {party_id: {"invoice_count": 10, "median_amount_cents": 60_000, "customer_reliability_percentile": 0.8} for party_id in party_ids}
+
+    async def fake_load_customer_trajectories(pool, tenant_id, party_ids, before=None, reference_time=None):
+        track("trajectories")
+        return {party_id: {"invoices_paid_count": 4.0, "avg_days_to_pay": 21.0} for party_id in party_ids}
+
+    async def fake_get_tenant_segment(pool, tenant_id):
+        return None
+
+    async def fake_get_prediction_training_rows(pool, prediction_type, tenant_id=None, limit=2000):
+        return []
+
+    monkeypatch.setattr(server, "get_pool", fake_get_pool)
+    monkeypatch.setattr(server, "get_tenant_segment", fake_get_tenant_segment)
+    monkeypatch.setattr(server, "get_prediction_training_rows", fake_get_prediction_training_rows)
+    monkeypatch.setattr(feature_assembly, "get_object_states_at", fake_get_object_states_at)
+    monkeypatch.setattr(feature_assembly, "get_party_ids_for_invoices", fake_get_party_ids_for_invoices)
+    monkeypatch.setattr(feature_assembly, "get_event_counts_for_objects", fake_get_event_counts_for_objects)
+    monkeypatch.setattr(feature_assembly, "load_tenant_stats", fake_load_tenant_stats)
+    monkeypatch.setattr(feature_assembly, "load_tenant_stats_with_customers", fake_load_tenant_stats_with_customers)
+    monkeypatch.setattr(feature_assembly, "load_customer_trajectories", fake_load_customer_trajectories)
+
+    object_ids = [f"inv_{idx}" for idx in range(5)] + ["inv_missing"]
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/predict/v2/batch",
+            json={"tenant_id": "t_test", "object_ids": object_ids},
+        )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [result["object_id"] for result in data["results"]] == object_ids[:5]
+    assert data["missing_object_ids"] == ["inv_missing"]
+    assert all(count == 1 for count in calls.values()), calls
+    for result in data["results"]:
+        assert result["model_family"] == "rule_inference"
+        assert result["feature_count"] == 34
+        assert result["tenant_stats_available"] is True
+        assert result["trajectory_available"] is True
+    assert len({result["feature_hash"] for result in data["results"]}) == 5
+
+
+@pytest.mark.asyncio
+async def test_predict_v2_batch_requires_object_ids(monkeypatch):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post("/predict/v2/batch", json={"tenant_id": "t_test", "object_ids": []})
+    assert resp.status_code == 400
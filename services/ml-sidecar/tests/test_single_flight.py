@@ -0,0 +1,68 @@
+"""Tests for single-flight coordination."""
+
+import asyncio
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_run():
+    flights = SingleFlight()
+    runs = 0
+
+    async def work():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+        return {"model": runs}
+
+    results = await asyncio.gather(*(flights.do("tenant:t_1", work) for _ in range(5)))
+
+    assert runs == 1
+    assert all(result is results[0] for result in results)
+    assert flights.status() == {"in_flight": 0, "started": 1, "coalesced": 4}
+
+    # the key is free again once the run finished
+    await flights.do("tenant:t_1", work)
+    assert runs == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_and_keys_are_independent():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("fit failed")
+
+    async def ok():
+        return "ok"
+
+    results = await asyncio.gather(
+        flights.do("a", fail), flights.do("a", fail), flights.do("b", ok), return_exceptions=True,
+    )
+    assert [type(result) for result in results[:2]] == [ValueError, ValueError]
+    assert results[2] == "ok"
+    assert not flights.in_flight("a")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_shared_run():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return 42
+
+    first = asyncio.create_task(flights.do("k", work))
+    second = asyncio.create_task(flights.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == 42
+    with pytest.raises(asyncio.CancelledError):
+        await first
@@ -0,0 +1,93 @@
+"""Tests for the survival module's numpy scoring kernel."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.survival import fit_survival_model, predict_survival, predict_survival_batch
+
+
+def _make_epochs(n: int = 120, seed: int = 3) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    epochs = []
+    for idx in range(n):
+        reliability = float(rng.uniform(0.0, 1.0))
+        days_overdue = float(rng.integers(0, 60))
+        snapshot = {
+            "amountCents": float(rng.integers(10_000, 500_000)),
+            "daysOverdue": days_overdue,
+            "amountPaidRatio": float(rng.uniform(0.0, 0.5)),
+            "paymentReliability": reliability,
+            "disputeRisk": float(rng.uniform(0.0, 0.3)),
+            "reminderCount": float(rng.integers(0, 5)),
+            "daysToPaySlope": float(rng.normal(0.0, 1.0)),
+            "customerReliabilityPercentile": reliability,
+            "amountVsTenantMedian": float(rng.uniform(0.5, 2.0)),
+        }
+        if idx % 4 == 0:
+            label = {"censored": True}
+        else:
+            label = {"time_to_pay_days": float(max(1.0, rng.exponential(10 + 40 * (1 - reliability) + days_overdue / 2)))}
+        epochs.append({
+            "feature_snapshot": snapshot,
+            "outcome_label": label,
+            "epoch_at": "2026-01-01T00:00:00Z",
+            "outcome_window_end": "2026-03-01T00:00:00Z",
+        })
+    return epochs
+
+
+def _standardized_frame(model, rows):
+    means = model.model["feature_means"]
+    stds = model.model["feature_stds"]
+    return pd.DataFrame([
+        {name: (float(row.get(name, 0.0)) - means[name]) / stds[name] for name in model.feature_names}
+        for row in rows
+    ])
+
+
+def test_kernel_matches_lifelines():
+    model = fit_survival_model(_make_epochs(), tenant_id="t1")
+    assert model is not None and model.kernel is not None
+
+    rows = [epoch["feature_snapshot"] for epoch in _make_epochs(20, seed=9)]
+    rows.append({"paymentReliability": 1.0})  # missing features default to 0
+    cph = model.model["cph"]
+    df = _standardized_frame(model, rows)
+    sf = cph.predict_survival_function(df, times=[7, 30, 90])
+    medians = cph.predict_median(df)
+    partial_hazards = cph.predict_partial_hazard(df)
+
+    predictions = predict_survival_batch(model, rows)
+    assert len(predictions) == len(rows)
+    for i, prediction in enumerate(predictions):
+        assert prediction.survival_7d == pytest.approx(round(float(sf.iloc[0, i]), 4), abs=1e-4)
+        assert prediction.survival_30d == pytest.approx(round(float(sf.iloc[1, i]), 4), abs=1e-4)
+        assert prediction.survival_90d == pytest.approx(round(float(sf.iloc[2, i]), 4), abs=1e-4)
+        assert prediction.hazard_ratio == pytest.approx(round(float(partial_hazards.iloc[i]), 4), abs=1e-4)
+        expected_median = float(medians.iloc[i])
+        if np.isinf(expected_median):
+            assert prediction.median_days_to_pay is None
+        else:
+            assert prediction.median_days_to_pay == pytest.approx(expected_median)
+
+
+def test_single_prediction_matches_batch_and_lifelines_fallback():
+    model = fit_survival_model(_make_epochs(), tenant_id="t1")
+    row = _make_epochs(1, seed=21)[0]["feature_snapshot"]
+    single = predict_survival(model, row)
+    assert single == predict_survival_batch(model, [row])[0]
+
+    model.kernel = None
+    fallback = predict_survival(model, row)
+    assert fallback.survival_30d == pytest.approx(single.survival_30d, abs=1e-4)
+    assert fallback.hazard_ratio == pytest.approx(single.hazard_ratio, abs=1e-4)
+    assert fallback.median_days_to_pay == single.median_days_to_pay
+
+
+def test_survival_is_monotone_in_time():
+    model = fit_survival_model(_make_epochs(), tenant_id="t1")
+    rows = [epoch["feature_snapshot"] for epoch in _make_epochs(30, seed=4)]
+    for prediction in predict_survival_batch(model, rows):
+        assert 1.0 >= prediction.survival_7d >= prediction.survival_30d >= prediction.survival_90d >= 0.0
+    assert predict_survival_batch(model, []) == []
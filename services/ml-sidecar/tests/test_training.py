@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.training import (
+    compile_linear_kernel,
+    fit_intervention_effect_model,
+    fit_probability_model,
+    predict_batch_with_trained_model,
+    predict_with_intervention_model,
+    predict_with_trained_model,
+)
+from tests.test_server import make_training_rows
+
+
+def _random_feature_rows(model, n: int, seed: int = 3) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    return [
+        {name: float(rng.uniform(0, 2.0) * (100_000 if "Cents" in name else 1.0)) for name in model.feature_names}
+        for _ in range(n)
+    ]
+
+
+class TestLinearKernel:
+    def test_probability_kernel_matches_pipeline(self):
+        model = fit_probability_model(
+            make_training_rows(40),
+            prediction_type="paymentProbability7d",
+            tenant_id="t_test",
+            scope="tenant",
+        )
+        assert model is not None
+        assert model.kernel is not None
+        assert model.kernel.coef.dtype == np.float64
+        assert model.kernel.coef.flags["C_CONTIGUOUS"]
+
+        rows = _random_feature_rows(model, 50)
+        X = np.asarray([[row[name] for name in model.feature_names] for row in rows])
+        np.testing.assert_allclose(
+            model.kernel.predict_proba(X),
+            model.estimator.predict_proba(X)[:, 1],
+            rtol=1e-9, atol=1e-12,
+        )
+        # single row
+        np.testing.assert_allclose(
+            model.kernel.predict_proba(X[:1]),
+            model.estimator.predict_proba(X[:1])[:, 1],
+            rtol=1e-9, atol=1e-12,
+        )
+
+    def test_predict_falls_back_to_estimator_without_kernel(self):
+        model = fit_probability_model(
+            make_training_rows(40),
+            prediction_type="paymentProbability7d",
+            tenant_id="t_test",
+            scope="tenant",
+        )
+        row = _random_feature_rows(model, 1)[0]
+        with_kernel = predict_with_trained_model(model, row)
+        model.kernel = None
+        without_kernel = predict_with_trained_model(model, row)
+        assert with_kernel["raw_value"] == pytest.approx(without_kernel["raw_value"], abs=1e-12)
+        assert with_kernel["value"] == pytest.approx(without_kernel["value"], abs=1e-9)
+
+    def test_batch_matches_single_row(self):
+        model = fit_probability_model(
+            make_training_rows(40),
+            prediction_type="paymentProbability7d",
+            tenant_id="t_test",
+            scope="tenant",
+        )
+        rows = _random_feature_rows(model, 20)
+        batch = predict_batch_with_trained_model(model, rows)
+        for row, result in zip(rows, batch):
+            single = predict_with_trained_model(model, row)
+            assert result["value"] == pytest.approx(single["value"], abs=1e-12)
+            assert result["interval"] == pytest.approx(single["interval"])
+
+    def test_regression_kernel_matches_pipeline(self):
+        from sklearn.linear_model import LinearRegression
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+
+        rng = np.random.default_rng(11)
+        X = rng.normal(size=(60, 5)) * np.array([1.0, 10.0, 100.0, 0.1, 0.0])
+        y = X @ np.array([0.5, -0.2, 0.01, 3.0, 1.0]) + rng.normal(scale=0.1, size=60)
+        estimator = Pipeline([("scaler", StandardScaler()), ("regression", LinearRegression())]).fit(X, y)
+
+        kernel = compile_linear_kernel(estimator)
+        np.testing.assert_allclose(kernel.decision(X), estimator.predict(X), rtol=1e-9, atol=1e-9)
+
+    def test_intervention_model_uses_kernel(self):
+        rows = []
+        for idx in range(12):
+            rows.append({
+                "current_value": 0.35 + idx * 0.01,
+                "predicted_value": 0.48 + idx * 0.01,
+                "delta_expected": 0.13,
+                "delta_observed": 0.18 + idx * 0.005,
+                "confidence": 0.72,
+                "objective_score": 0.8,
+                "state": {"amountCents": 100_000 + idx * 1_000, "status": "overdue"},
+                "estimated": {"paymentReliability": 0.6},
+            })
+        model = fit_intervention_effect_model(
+            rows, tenant_id="t_test", action_class="communicate.email", object_type="invoice", field="paymentProbability7d",
+        )
+        assert model is not None and model.kernel is not None
+
+        kwargs = dict(current_value=0.4, predicted_value=0.55, confidence=0.7)
+        with_kernel = predict_with_intervention_model(model, {"amountCents": 120_000}, {}, **kwargs)
+        model.kernel = None
+        without_kernel = predict_with_intervention_model(model, {"amountCents": 120_000}, {}, **kwargs)
+        assert with_kernel["delta"] == pytest.approx(without_kernel["delta"], abs=1e-9)
@@ -0,0 +1,57 @@
+"""Tests for the process-pool training executor."""
+
+import os
+
+import numpy as np
+import pytest
+
+from src.training import fit_probability_model, predict_batch_with_trained_model
+from src.training_executor import TrainingExecutor
+from tests.test_server import make_training_rows
+
+
+def _thread_caps() -> dict:
+    from src import catboost_model
+
+    return {"omp": os.environ.get("OMP_NUM_THREADS"), "catboost": catboost_model.CATBOOST_THREAD_COUNT}
+
+
+def _fail(message: str) -> None:
+    raise ValueError(message)
+
+
+@pytest.fixture
+def process_executor():
+    executor = TrainingExecutor(workers=1, threads_per_job=2)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_fit_in_worker_matches_inline_fit(process_executor):
+    rows = make_training_rows(40)
+    kwargs = dict(prediction_type="paymentProbability7d", tenant_id="t_1", scope="tenant")
+
+    remote = await process_executor.run(fit_probability_model, rows, **kwargs)
+    local = fit_probability_model(rows, **kwargs)
+
+    feature_rows = [{name: float(i) for name in local.feature_names} for i in range(5)]
+    np.testing.assert_allclose(
+        [p["value"] for p in predict_batch_with_trained_model(remote, feature_rows)],
+        [p["value"] for p in predict_batch_with_trained_model(local, feature_rows)],
+    )
+    assert process_executor.status()["submitted"] == 1
+    assert process_executor.status()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_workers_run_with_thread_caps(process_executor):
+    assert await process_executor.run(_thread_caps) == {"omp": "2", "catboost": 2}
+
+
+@pytest.mark.asyncio
+async def test_job_exceptions_propagate():
+    executor = TrainingExecutor(workers=0)
+    with pytest.raises(ValueError, match="bad rows"):
+        await executor.run(_fail, "bad rows")
+    assert executor.status()["failed"] == 1
@@ -0,0 +1,279 @@
+"""Tests for queued training jobs and the /train/jobs endpoints."""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+import src.server as server
+import src.training_jobs as training_jobs_module
+from src.server import app
+from src.training_jobs import TrainingJobRunner
+from tests.test_server import install_release_store
+from tests.test_survival import _make_epochs
+
+
+class FakeJobTable:
+    """In-memory world_model_training_jobs with the db helpers' signatures."""
+
+    def __init__(self):
+        self.jobs: dict[str, dict] = {}
+        self.stages: list[tuple[str, str]] = []
+
+    def install(self, monkeypatch):
+        for name in ("insert_training_job", "get_training_job", "claim_training_job",
+                     "update_training_job_stage", "finish_training_job"):
+            monkeypatch.setattr(training_jobs_module, name, getattr(self, name))
+
+    async def insert_training_job(self, pool, job_id, tenant_id, prediction_type):
+        self.jobs[job_id] = {
+            "job_id": job_id, "tenant_id": tenant_id, "prediction_type": prediction_type,
+            "status": "queued", "stage": "queued", "attempts": 0, "result": None, "error": None,
+            "created_at": datetime.now(timezone.utc), "started_at": None, "finished_at": None,
+        }
+        return dict(self.jobs[job_id])
+
+    async def get_training_job(self, pool, job_id):
+        job = self.jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def claim_training_job(self, pool, worker_id, lease_seconds, max_attempts):
+        for job in self.jobs.values():
+            if job["status"] == "queued":
+                job.update(
+                    status="running", attempts=job["attempts"] + 1, claimed_by=worker_id,
+                    started_at=datetime.now(timezone.utc),
+                )
+                return dict(job)
+        return None
+
+    def _held(self, job_id, worker_id):
+        job = self.jobs[job_id]
+        return job.get("claimed_by") == worker_id and job["status"] == "running"
+
+    async def update_training_job_stage(self, pool, job_id, worker_id, stage):
+        if not self._held(job_id, worker_id):
+            return False
+        self.jobs[job_id]["stage"] = stage
+        self.stages.append((job_id, stage))
+        return True
+
+    async def finish_training_job(self, pool, job_id, worker_id, status, *, result=None, error=None):
+        if not self._held(job_id, worker_id):
+            return False
+        self.jobs[job_id].update(
+            status=status, stage="done", result=result, error=error, finished_at=datetime.now(timezone.utc),
+        )
+        return True
+
+
+@pytest.mark.asyncio
+async def test_runner_records_stages_and_result(monkeypatch):
+    table = FakeJobTable()
+    table.install(monkeypatch)
+    runner = TrainingJobRunner()
+
+    async def handler(pool, job, report_stage):
+        await report_stage("fitting")
+        return {"status": "trained", "release_id": "release_1"}
+
+    job = await runner.submit(object(), "t_1", "paymentProbability7d")
+    assert await runner.run_one(object(), handler) is True
+    assert await runner.run_one(object(), handler) is False
+
+    stored = table.jobs[job["job_id"]]
+    assert stored["status"] == "succeeded"
+    assert stored["result"]["release_id"] == "release_1"
+    assert table.stages == [(job["job_id"], "fitting")]
+    assert runner.status()["completed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_runner_marks_failed_jobs(monkeypatch):
+    table = FakeJobTable()
+    table.install(monkeypatch)
+    runner = TrainingJobRunner()
+
+    async def handler(pool, job, report_stage):
+        raise RuntimeError("epoch query timed out")
+
+    job = await runner.submit(object(), None, "paymentProbability7d")
+    await runner.run_one(object(), handler)
+
+    stored = table.jobs[job["job_id"]]
+    assert stored["status"] == "failed"
+    assert stored["error"] == "RuntimeError: epoch query timed out"
+
+
+@pytest.mark.asyncio
+async def test_runner_abandons_a_job_reclaimed_by_another_worker(monkeypatch):
+    table = FakeJobTable()
+    table.install(monkeypatch)
+    runner = TrainingJobRunner()
+    reached = []
+
+    async def handler(pool, job, report_stage):
+        # The lease expired and another worker reclaimed the job mid-run.
+        table.jobs[job["job_id"]]["claimed_by"] = "other-host:1"
+        await report_stage("fitting")
+        reached.append("recording_release")
+        return {"status": "trained"}
+
+    job = await runner.submit(object(), "t_1", "paymentProbability7d")
+    assert await runner.run_one(object(), handler) is True
+
+    stored = table.jobs[job["job_id"]]
+    assert reached == []
+    assert stored["status"] == "running"
+    assert stored["result"] is None
+    assert table.stages == []
+    assert runner.status() == {"slots": 0, "completed": 0, "failed": 0, "abandoned": 1, "heartbeat_errors": 0}
+
+
+@pytest.mark.asyncio
+async def test_runner_does_not_overwrite_a_job_it_no_longer_holds(monkeypatch):
+    table = FakeJobTable()
+    table.install(monkeypatch)
+    runner = TrainingJobRunner()
+
+    async def handler(pool, job, report_stage):
+        table.jobs[job["job_id"]].update(status="failed", error="worker lost; attempts exhausted")
+        return {"status": "trained"}
+
+    job = await runner.submit(object(), "t_1", "paymentProbability7d")
+    await runner.run_one(object(), handler)
+
+    stored = table.jobs[job["job_id"]]
+    assert stored["status"] == "failed"
+    assert stored["error"] == "worker lost; attempts exhausted"
+    assert runner.status()["completed"] == 0
+    assert runner.status()["abandoned"] == 1
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_cancels_a_job_whose_claim_was_lost(monkeypatch):
+    table = FakeJobTable()
+    table.install(monkeypatch)
+    runner = TrainingJobRunner(lease_seconds=0.03)
+
+    async def handler(pool, job, report_stage):
+        table.jobs[job["job_id"]]["claimed_by"] = "other-host:1"
+        await asyncio.sleep(5)
+        return {"status": "trained"}
+
+    job = await runner.submit(object(), "t_1", "paymentProbability7d")
+    await asyncio.wait_for(runner.run_one(object(), handler), 1)
+
+    assert table.jobs[job["job_id"]]["result"] is None
+    assert runner.status()["abandoned"] == 1
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_survives_a_failed_stage_update(monkeypatch):
+    table = FakeJobTable()
+    table.install(monkeypatch)
+    runner = TrainingJobRunner(lease_seconds=0.03)
+    failures = 2
+    update_stage = table.update_training_job_stage
+
+    async def flaky_update_training_job_stage(pool, job_id, worker_id, stage):
+        nonlocal failures
+        if failures:
+            failures -= 1
+            raise ConnectionError("connection reset")
+        return await update_stage(pool, job_id, worker_id, stage)
+
+    monkeypatch.setattr(training_jobs_module, "update_training_job_stage", flaky_update_training_job_stage)
+
+    async def handler(pool, job, report_stage):
+        # Long enough for two failed beats and one that lands.
+        while not table.stages:
+            await asyncio.sleep(0.005)
+        table.jobs[job["job_id"]]["claimed_by"] = "other-host:1"
+        await asyncio.sleep(5)
+        return {"status": "trained"}
+
+    job = await runner.submit(object(), "t_1", "paymentProbability7d")
+    await asyncio.wait_for(runner.run_one(object(), handler), 1)
+
+    assert table.stages == [(job["job_id"], "queued")]
+    assert table.jobs[job["job_id"]]["result"] is None
+    assert runner.status()["heartbeat_errors"] == 2
+    assert runner.status()["abandoned"] == 1
+
+
+@pytest.mark.asyncio
+async def test_submit_then_poll_training_job(monkeypatch):
+    table = FakeJobTable()
+    table.install(monkeypatch)
+    install_release_store(monkeypatch)
+    epochs = _make_epochs(40)
+    for idx, epoch in enumerate(epochs):
+        epoch["outcome_label"]["paid_7d"] = idx % 3 != 0
+
+    async def fake_get_pool():
+        return object()
+
+    async def fake_get_epoch_training_rows(pool, tenant_id, prediction_type):
+        return epochs
+
+    monkeypatch.setattr(server, "get_pool", fake_get_pool)
+    monkeypatch.setattr(server, "get_epoch_training_rows", fake_get_epoch_training_rows)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        submitted = await client.post("/train/jobs", json={"tenant_id": "t_test"})
+        assert submitted.status_code == 202
+        job_id = submitted.json()["job_id"]
+        assert (await client.get(f"/train/jobs/{job_id}")).json()["status"] == "queued"
+
+        assert await server.training_jobs.run_one(object(), server._run_training_job)
+
+        finished = (await client.get(f"/train/jobs/{job_id}")).json()
+        missing = await client.get("/train/jobs/trainjob_missing")
+
+    assert finished["status"] == "succeeded"
+    assert finished["release_id"].startswith("release_")
+    assert finished["result"]["model_family"] == "logistic_regression"
+    assert [stage for _, stage in table.stages] == ["loading_epochs", "fitting", "recording_release"]
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_job_reports_its_stages_while_train_v2_runs_for_the_same_scope(monkeypatch):
+    table = FakeJobTable()
+    table.install(monkeypatch)
+    install_release_store(monkeypatch)
+    epochs = _make_epochs(40)
+    for idx, epoch in enumerate(epochs):
+        epoch["outcome_label"]["paid_7d"] = idx % 3 != 0
+    release_train_v2 = asyncio.Event()
+    loads = []
+
+    async def fake_get_pool():
+        return object()
+
+    async def fake_get_epoch_training_rows(pool, tenant_id, prediction_type):
+        loads.append(tenant_id)
+        if len(loads) == 1:
+            await release_train_v2.wait()
+        return epochs
+
+    monkeypatch.setattr(server, "get_pool", fake_get_pool)
+    monkeypatch.setattr(server, "get_epoch_training_rows", fake_get_epoch_training_rows)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        train_v2 = asyncio.create_task(client.post("/train/v2", json={"tenant_id": "t_test"}))
+        while not loads:
+            await asyncio.sleep(0)
+        job_id = (await client.post("/train/jobs", json={"tenant_id": "t_test"})).json()["job_id"]
+
+        # Coalescing onto the blocked /train/v2 run would never return.
+        assert await asyncio.wait_for(server.training_jobs.run_one(object(), server._run_training_job), 10)
+        release_train_v2.set()
+        assert (await train_v2).status_code == 200
+
+    assert table.jobs[job_id]["status"] == "succeeded"
+    assert [stage for _, stage in table.stages] == ["loading_epochs", "fitting", "recording_release"]
@@ -109,3 +109,26 @@ def test_predict_uplift_returns_lift_and_interval():
     assert "interval" in result
     assert isinstance(result["lift"], float)
     assert result["interval"]["lower"] <= result["lift"] <= result["interval"]["upper"]
+
+
+def test_predict_uplift_kernels_match_sklearn_estimators():
+    import numpy as np
+
+    outcomes = make_graded_outcomes(n_treatment=60, n_control=30)
+    model = fit_uplift_model(outcomes, tenant_id="t_test", action_class="communicate.email")
+    assert model is not None
+    assert model.treatment_kernel is not None
+    assert model.control_kernel is not None
+
+    rng = np.random.default_rng(7)
+    X = rng.uniform(0, 200_000, size=(25, len(model.feature_names)))
+    np.testing.assert_allclose(
+        model.treatment_kernel.predict_proba(X),
+        model.treatment_estimator.predict_proba(X)[:, 1],
+        rtol=1e-9, atol=1e-12,
+    )
+    np.testing.assert_allclose(
+        model.control_kernel.predict_proba(X),
+        model.control_estimator.predict_proba(X)[:, 1],
+        rtol=1e-9, atol=1e-12,
+    )
@@ -0,0 +1,71 @@
+"""Tests for the startup cache warm-up."""
+
+import asyncio
+
+import pytest
+
+from src.warmup import CacheWarmup
+
+
+class FakeTenantPool:
+    def __init__(self, tenant_ids):
+        self.tenant_ids = tenant_ids
+        self.limits = []
+
+    async def fetch(self, sql, since, limit):
+        self.limits.append(limit)
+        return [{"tenant_id": tenant_id} for tenant_id in self.tenant_ids[:limit]]
+
+
+@pytest.mark.asyncio
+async def test_warms_busiest_tenants_with_bounded_concurrency():
+    pool = FakeTenantPool([f"t_{i}" for i in range(10)])
+    warmup = CacheWarmup(enabled=True, max_tenants=6, concurrency=2)
+    warmed, running, peak = [], 0, 0
+
+    async def warm_tenant(pool, tenant_id):
+        nonlocal running, peak
+        assert not warmup.ready
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        warmed.append(tenant_id)
+
+    await warmup.run(pool, warm_tenant)
+
+    assert pool.limits == [6]
+    assert sorted(warmed) == [f"t_{i}" for i in range(6)]
+    assert peak == 2
+    assert warmup.ready
+    assert warmup.status()["state"] == "complete"
+    assert warmup.status()["tenants_warmed"] == 6
+
+
+@pytest.mark.asyncio
+async def test_tenant_failures_are_counted_not_raised():
+    warmup = CacheWarmup(enabled=True, max_tenants=5, concurrency=3)
+
+    async def warm_tenant(pool, tenant_id):
+        if tenant_id == "t_bad":
+            raise RuntimeError("no model")
+
+    await warmup.run(FakeTenantPool(["t_1", "t_bad", "t_2"]), warm_tenant)
+
+    status = warmup.status()
+    assert status["state"] == "complete"
+    assert (status["tenants_total"], status["tenants_warmed"], status["tenants_failed"]) == (3, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_disabled_warmup_is_ready_and_does_nothing():
+    warmup = CacheWarmup(enabled=False)
+    pool = FakeTenantPool(["t_1"])
+
+    async def warm_tenant(pool, tenant_id):
+        raise AssertionError("should not run")
+
+    await warmup.run(pool, warm_tenant)
+    assert pool.limits == []
+    assert warmup.ready
+    assert warmup.status()["state"] == "disabled"
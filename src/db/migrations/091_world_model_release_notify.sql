@@ -0,0 +1,35 @@
+-- 091: NOTIFY on model release writes
+-- The ML sidecar keeps an in-process registry of the latest and latest-approved
+-- release per (prediction_type, scope, tenant_id). It LISTENs on
+-- 'world_model_release_changed' and drops the matching registry entry whenever
+-- a release is inserted or its status/metadata is updated, so the prediction
+-- hot path never has to query world_model_releases.
+
+CREATE OR REPLACE FUNCTION notify_world_model_release_changed()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM pg_notify('world_model_release_changed', json_build_object(
+    'release_id', NEW.release_id,
+    'prediction_type', NEW.prediction_type,
+    'scope', NEW.scope,
+    'tenant_id', NEW.tenant_id,
+    'status', NEW.status
+  )::text);
+  RETURN NEW;
+END;
+$$;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_trigger WHERE tgname = 'world_model_release_changed'
+  ) THEN
+    CREATE TRIGGER world_model_release_changed
+      AFTER INSERT OR UPDATE ON world_model_releases
+      FOR EACH ROW
+      EXECUTE FUNCTION notify_world_model_release_changed();
+  END IF;
+END;
+$$;
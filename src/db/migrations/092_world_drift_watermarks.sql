@@ -0,0 +1,18 @@
+-- 092: Incremental drift ingestion
+-- GET /drift/{tenant_id} on the ML sidecar used to replay a tenant's whole
+-- prediction/outcome history into its drift detectors on every call. It now
+-- keeps a per-tenant watermark — the (outcome_at, prediction_id) of the last
+-- outcome it consumed — and only fetches outcomes past it. The watermark is
+-- stored here so it survives sidecar restarts.
+
+CREATE TABLE IF NOT EXISTS world_drift_watermarks (
+  tenant_id TEXT PRIMARY KEY,
+  last_outcome_at TIMESTAMPTZ NOT NULL,
+  last_prediction_id TEXT NOT NULL,
+  outcomes_consumed BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Keyset scan for "outcomes after the watermark", in consumption order.
+CREATE INDEX IF NOT EXISTS idx_world_prediction_outcomes_tenant_keyset
+  ON world_prediction_outcomes (tenant_id, outcome_at, prediction_id);
@@ -0,0 +1,18 @@
+-- 093: Durable ML sidecar monitor state
+-- The sidecar's drift detectors (per tenant/model/prediction type) and OOD
+-- reference histograms (per scope/prediction type) used to live only in
+-- process memory, so every deploy reset them to "no drift" and "in
+-- distribution". The sidecar now checkpoints changed monitors here and
+-- restores each key lazily on first use after a restart.
+
+CREATE TABLE IF NOT EXISTS world_model_monitor_state (
+  kind TEXT NOT NULL CHECK (kind IN ('drift', 'ood')),
+  state_key TEXT NOT NULL,
+  tenant_id TEXT NOT NULL,              -- tenant or 'global' scope owning the key
+  state BYTEA NOT NULL,                 -- drift: versioned JSON (UTF-8); ood: compressed npz
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (kind, state_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_world_model_monitor_state_tenant
+  ON world_model_monitor_state (kind, tenant_id);
@@ -0,0 +1,22 @@
+-- 094: Durable ML sidecar model artifacts
+-- Fitted models (logistic, CatBoost, survival, uplift, intervention) used to
+-- live only in the sidecar's in-process caches, so an eviction or a deploy
+-- meant retraining. The sidecar now stores each model here when it is
+-- trained and reloads it on a cache miss.
+
+CREATE TABLE IF NOT EXISTS world_model_artifacts (
+  release_id TEXT NOT NULL,             -- world_model_releases.release_id; 'artifact_<uuid>' for kinds without releases
+  model_kind TEXT NOT NULL CHECK (model_kind IN ('probability', 'catboost', 'survival', 'uplift', 'intervention')),
+  cache_key TEXT NOT NULL,              -- sidecar cache key the model is served under
+  tenant_id TEXT,
+  model_id TEXT NOT NULL,
+  format TEXT NOT NULL,                 -- 'npz.v1': compressed npz, CatBoost embedded as cbm
+  payload BYTEA NOT NULL,
+  checksum TEXT NOT NULL,               -- sha256 over release_id and payload
+  byte_size INTEGER NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (release_id, model_kind)
+);
+
+CREATE INDEX IF NOT EXISTS idx_world_model_artifacts_cache_key
+  ON world_model_artifacts (model_kind, cache_key, created_at DESC);
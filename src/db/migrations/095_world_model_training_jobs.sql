@@ -0,0 +1,26 @@
+-- 095: Asynchronous ML sidecar training jobs
+-- POST /train/jobs records a queued job here and returns its id immediately;
+-- sidecar workers claim queued jobs (FOR UPDATE SKIP LOCKED), report the
+-- current stage while they run and store the outcome. A running job whose
+-- heartbeat goes stale (worker restarted) is claimed again, up to a fixed
+-- number of attempts.
+
+CREATE TABLE IF NOT EXISTS world_model_training_jobs (
+  job_id TEXT PRIMARY KEY,
+  tenant_id TEXT,                       -- NULL for the global scope
+  prediction_type TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+  stage TEXT NOT NULL DEFAULT 'queued', -- queued | loading_epochs | fitting | recording_release | done
+  attempts INTEGER NOT NULL DEFAULT 0,
+  claimed_by TEXT,
+  result JSONB,                         -- /train/v2 response body, including release_id
+  error TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  started_at TIMESTAMPTZ,
+  heartbeat_at TIMESTAMPTZ,
+  finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_world_model_training_jobs_pending
+  ON world_model_training_jobs (created_at)
+  WHERE status IN ('queued', 'running');
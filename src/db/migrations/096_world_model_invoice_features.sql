@@ -0,0 +1,28 @@
+-- 096: Materialized invoice feature store for the ML sidecar
+-- One row per open invoice holding its latest 34-feature vector and
+-- feature hash. The sidecar refreshes a row only when its source
+-- fingerprint changes (invoice version, invoice events, the customer's
+-- invoice history, tenant stats) or the row ages out, so /predict/v2 reads
+-- one row instead of rebuilding features, and the epoch sweep only
+-- re-snapshots invoices whose sources or trigger changed since their last
+-- epoch (the feature hash itself moves with the clock through daysOverdue).
+
+CREATE TABLE IF NOT EXISTS world_model_invoice_features (
+  tenant_id TEXT NOT NULL,
+  object_id TEXT NOT NULL,              -- world_objects.id of the invoice
+  object_version INTEGER NOT NULL,      -- world_objects.version the row was built from
+  party_id TEXT,
+  source_fingerprint TEXT NOT NULL,     -- sha256 over the change watermarks of every feature family
+  state JSONB NOT NULL,                 -- invoice state the row was built from (epoch triggers)
+  features JSONB NOT NULL,
+  feature_hash TEXT NOT NULL,
+  tenant_stats_available BOOLEAN NOT NULL DEFAULT false,
+  trajectory_available BOOLEAN NOT NULL DEFAULT false,
+  snapshot_fingerprint TEXT,            -- source_fingerprint when the last epoch was taken
+  snapshot_trigger TEXT,                -- epoch_trigger of that epoch
+  refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (tenant_id, object_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_world_model_invoice_features_refreshed
+  ON world_model_invoice_features (tenant_id, refreshed_at);
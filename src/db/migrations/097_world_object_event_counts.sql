@@ -0,0 +1,159 @@
+-- 097: Per-object event-count rollup for the ML sidecar
+-- Event-count features (reminders, partial payments, escalations, disputes,
+-- last contact) used to be computed by scanning world_events on
+-- payload->>'objectId' / payload->>'targetObjectId', which no index serves.
+-- A trigger now folds every inserted event into running totals per
+-- (tenant, object) and into per-day buckets. Current counts are one row;
+-- point-in-time counts sum the buckets before the as-of day and scan only
+-- that day's events. world_events is append-only, so INSERT is the only
+-- write the rollup has to follow.
+--
+-- The classification mirrors _accumulate_event_count in
+-- services/ml-sidecar/src/db.py; keep the two in sync.
+--
+-- Locking: CREATE TRIGGER takes a SHARE ROW EXCLUSIVE lock on world_events
+-- that is held until this migration commits, and the backfill below runs
+-- inside the same transaction (migrate.js applies each file atomically).
+-- Inserts into world_events (ingest, webhooks, actions) therefore block
+-- for the whole backfill; reads are unaffected. The backfill is one
+-- sequential scan of world_events plus a hash aggregate over its object
+-- references, so the lock time grows linearly with the table. Time it
+-- before deploying by running the backfill SELECT (the refs/classified
+-- CTEs grouped by tenant_id, object_id) under EXPLAIN ANALYZE on a restored
+-- copy, and apply the migration in a low-traffic window when that exceeds
+-- the ingest clients' retry budget.
+
+CREATE TABLE IF NOT EXISTS world_object_event_counts (
+  tenant_id TEXT NOT NULL,
+  object_id TEXT NOT NULL,              -- payload objectId / targetObjectId
+  event_count INTEGER NOT NULL DEFAULT 0,
+  reminder_count INTEGER NOT NULL DEFAULT 0,
+  partial_payment_count INTEGER NOT NULL DEFAULT 0,
+  escalation_count INTEGER NOT NULL DEFAULT 0,
+  dispute_count INTEGER NOT NULL DEFAULT 0,
+  last_action_at TIMESTAMPTZ,           -- latest 'action.%' event (last contact)
+  last_event_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (tenant_id, object_id)
+);
+
+CREATE TABLE IF NOT EXISTS world_object_event_count_days (
+  tenant_id TEXT NOT NULL,
+  object_id TEXT NOT NULL,
+  day DATE NOT NULL,                    -- UTC day of world_events.timestamp
+  event_count INTEGER NOT NULL DEFAULT 0,
+  reminder_count INTEGER NOT NULL DEFAULT 0,
+  partial_payment_count INTEGER NOT NULL DEFAULT 0,
+  escalation_count INTEGER NOT NULL DEFAULT 0,
+  dispute_count INTEGER NOT NULL DEFAULT 0,
+  last_action_at TIMESTAMPTZ,
+  PRIMARY KEY (tenant_id, object_id, day)
+);
+
+CREATE OR REPLACE FUNCTION rollup_world_event_counts()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  ref_id TEXT;
+  is_reminder INTEGER := CASE WHEN NEW.type LIKE '%remind%' OR NEW.type LIKE '%communicate.email%' THEN 1 ELSE 0 END;
+  is_partial INTEGER := CASE WHEN NEW.type LIKE '%partial%' OR NEW.type LIKE '%payment.received%' THEN 1 ELSE 0 END;
+  is_escalation INTEGER := CASE WHEN NEW.type LIKE '%escalat%' OR NEW.type LIKE '%task.create%' THEN 1 ELSE 0 END;
+  is_dispute INTEGER := CASE WHEN NEW.type LIKE '%dispute%' THEN 1 ELSE 0 END;
+  action_at TIMESTAMPTZ := CASE WHEN NEW.type LIKE 'action.%' THEN NEW.timestamp END;
+BEGIN
+  FOR ref_id IN
+    SELECT DISTINCT r
+    FROM unnest(ARRAY[NEW.payload->>'objectId', NEW.payload->>'targetObjectId']) AS r
+    WHERE r IS NOT NULL
+  LOOP
+    INSERT INTO world_object_event_counts AS c (
+      tenant_id, object_id, event_count, reminder_count, partial_payment_count,
+      escalation_count, dispute_count, last_action_at, last_event_at, updated_at
+    ) VALUES (
+      NEW.tenant_id, ref_id, 1, is_reminder, is_partial,
+      is_escalation, is_dispute, action_at, NEW.timestamp, now()
+    )
+    ON CONFLICT (tenant_id, object_id) DO UPDATE SET
+      event_count = c.event_count + 1,
+      reminder_count = c.reminder_count + EXCLUDED.reminder_count,
+      partial_payment_count = c.partial_payment_count + EXCLUDED.partial_payment_count,
+      escalation_count = c.escalation_count + EXCLUDED.escalation_count,
+      dispute_count = c.dispute_count + EXCLUDED.dispute_count,
+      last_action_at = GREATEST(c.last_action_at, EXCLUDED.last_action_at),
+      last_event_at = GREATEST(c.last_event_at, EXCLUDED.last_event_at),
+      updated_at = now();
+
+    INSERT INTO world_object_event_count_days AS d (
+      tenant_id, object_id, day, event_count, reminder_count, partial_payment_count,
+      escalation_count, dispute_count, last_action_at
+    ) VALUES (
+      NEW.tenant_id, ref_id, (NEW.timestamp AT TIME ZONE 'UTC')::date, 1, is_reminder, is_partial,
+      is_escalation, is_dispute, action_at
+    )
+    ON CONFLICT (tenant_id, object_id, day) DO UPDATE SET
+      event_count = d.event_count + 1,
+      reminder_count = d.reminder_count + EXCLUDED.reminder_count,
+      partial_payment_count = d.partial_payment_count + EXCLUDED.partial_payment_count,
+      escalation_count = d.escalation_count + EXCLUDED.escalation_count,
+      dispute_count = d.dispute_count + EXCLUDED.dispute_count,
+      last_action_at = GREATEST(d.last_action_at, EXCLUDED.last_action_at);
+  END LOOP;
+  RETURN NEW;
+END;
+$$;
+
+-- Created before the backfill: the trigger's lock holds back concurrent
+-- inserts until this migration commits, so no event is missed or counted
+-- twice (see Locking above for how long that is).
+DROP TRIGGER IF EXISTS trg_world_event_counts ON world_events;
+CREATE TRIGGER trg_world_event_counts
+  AFTER INSERT ON world_events
+  FOR EACH ROW EXECUTE FUNCTION rollup_world_event_counts();
+
+WITH refs AS (
+  SELECT DISTINCT
+    we.id,
+    we.tenant_id,
+    ref.object_id,
+    we.type,
+    we.timestamp
+  FROM world_events we
+  CROSS JOIN LATERAL unnest(ARRAY[we.payload->>'objectId', we.payload->>'targetObjectId']) AS ref(object_id)
+  WHERE ref.object_id IS NOT NULL
+),
+classified AS (
+  SELECT
+    tenant_id,
+    object_id,
+    (timestamp AT TIME ZONE 'UTC')::date AS day,
+    timestamp,
+    CASE WHEN type LIKE '%remind%' OR type LIKE '%communicate.email%' THEN 1 ELSE 0 END AS is_reminder,
+    CASE WHEN type LIKE '%partial%' OR type LIKE '%payment.received%' THEN 1 ELSE 0 END AS is_partial,
+    CASE WHEN type LIKE '%escalat%' OR type LIKE '%task.create%' THEN 1 ELSE 0 END AS is_escalation,
+    CASE WHEN type LIKE '%dispute%' THEN 1 ELSE 0 END AS is_dispute,
+    CASE WHEN type LIKE 'action.%' THEN timestamp END AS action_at
+  FROM refs
+),
+days AS (
+  INSERT INTO world_object_event_count_days (
+    tenant_id, object_id, day, event_count, reminder_count, partial_payment_count,
+    escalation_count, dispute_count, last_action_at
+  )
+  SELECT
+    tenant_id, object_id, day, COUNT(*), SUM(is_reminder), SUM(is_partial),
+    SUM(is_escalation), SUM(is_dispute), MAX(action_at)
+  FROM classified
+  GROUP BY tenant_id, object_id, day
+  ON CONFLICT (tenant_id, object_id, day) DO NOTHING
+)
+INSERT INTO world_object_event_counts (
+  tenant_id, object_id, event_count, reminder_count, partial_payment_count,
+  escalation_count, dispute_count, last_action_at, last_event_at, updated_at
+)
+SELECT
+  tenant_id, object_id, COUNT(*), SUM(is_reminder), SUM(is_partial),
+  SUM(is_escalation), SUM(is_dispute), MAX(action_at), MAX(timestamp), now()
+FROM classified
+GROUP BY tenant_id, object_id
+ON CONFLICT (tenant_id, object_id) DO NOTHING;
@@ -0,0 +1,180 @@
+-- 098: Per-tenant quantile sketches of invoice amounts and days-to-pay
+-- Tenant stats for relative features (amount p25/p50/p75/p95, averages)
+-- used to be PERCENTILE_CONT and AVG scans over every invoice of the tenant.
+-- A trigger on world_objects now keeps log-bucket sketches (DDSketch-style,
+-- 1% relative accuracy) per tenant and metric: bucket i counts values in
+-- (gamma^(i-1), gamma^i] with gamma = 1.01 / 0.99 and carries their exact
+-- sum. Unlike t-digest or KLL the counts can be decremented, so invoice
+-- updates and deletes keep the sketch exact, and sketches merge by adding
+-- bucket counts. The sidecar reads a tenant's few hundred bucket rows and
+-- computes quantiles itself (src/quantile_sketch.py).
+--
+-- Which invoices count mirrors the queries get_tenant_invoice_stats used:
+-- amounts of live invoices, days-to-pay of paid invoices with issuedAt.
+--
+-- Locking: CREATE TRIGGER takes a SHARE ROW EXCLUSIVE lock on world_objects
+-- that is held until this migration commits, and the backfill below runs
+-- inside the same transaction (migrate.js applies each file atomically).
+-- Every insert, update and delete of world objects (invoices, parties and
+-- all other types) therefore blocks for the whole backfill; reads are
+-- unaffected. The backfill reads every invoice row twice (once per metric)
+-- and evaluates the JSON extraction functions per row, so the lock time
+-- grows linearly with the number of invoices. Time it before deploying by
+-- running the backfill SELECT under EXPLAIN ANALYZE on a restored copy,
+-- and apply the migration in a low-traffic window when that exceeds the
+-- writers' retry budget.
+
+CREATE TABLE IF NOT EXISTS world_tenant_invoice_sketches (
+  tenant_id TEXT NOT NULL,
+  metric TEXT NOT NULL CHECK (metric IN ('amount_cents', 'days_to_pay')),
+  bucket INTEGER NOT NULL,              -- ml_sketch_bucket(value); -2147483648 holds values <= 0
+  count BIGINT NOT NULL DEFAULT 0,
+  total DOUBLE PRECISION NOT NULL DEFAULT 0,  -- exact sum of the bucket's values
+  PRIMARY KEY (tenant_id, metric, bucket)
+);
+
+CREATE OR REPLACE FUNCTION ml_sketch_try_float(raw TEXT)
+RETURNS DOUBLE PRECISION
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+BEGIN
+  RETURN raw::double precision;
+EXCEPTION WHEN others THEN
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION ml_sketch_try_timestamptz(raw TEXT)
+RETURNS TIMESTAMPTZ
+LANGUAGE plpgsql
+STABLE
+AS $$
+BEGIN
+  RETURN raw::timestamptz;
+EXCEPTION WHEN others THEN
+  RETURN NULL;
+END;
+$$;
+
+-- Must match bucket_index in services/ml-sidecar/src/quantile_sketch.py.
+CREATE OR REPLACE FUNCTION ml_sketch_bucket(value DOUBLE PRECISION)
+RETURNS INTEGER
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT CASE
+    WHEN value <= 1e-9 THEN -2147483648
+    ELSE CEIL(LN(value) / LN(1.01 / 0.99))::integer
+  END
+$$;
+
+CREATE OR REPLACE FUNCTION ml_sketch_invoice_amount(obj world_objects)
+RETURNS DOUBLE PRECISION
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT CASE
+    WHEN obj.type = 'invoice' AND NOT obj.tombstone AND obj.valid_to IS NULL
+      THEN ml_sketch_try_float(obj.state->>'amountCents')
+  END
+$$;
+
+CREATE OR REPLACE FUNCTION ml_sketch_invoice_days_to_pay(obj world_objects)
+RETURNS DOUBLE PRECISION
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT CASE
+    WHEN obj.type = 'invoice' AND NOT obj.tombstone AND obj.state->>'status' = 'paid'
+      THEN EXTRACT(EPOCH FROM (
+        COALESCE(ml_sketch_try_timestamptz(obj.state->>'paidAt'), obj.updated_at)
+        - ml_sketch_try_timestamptz(obj.state->>'issuedAt')
+      )) / 86400.0
+  END
+$$;
+
+CREATE OR REPLACE FUNCTION ml_sketch_add(
+  p_tenant_id TEXT,
+  p_metric TEXT,
+  p_value DOUBLE PRECISION,
+  p_sign INTEGER
+)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF p_value IS NULL THEN
+    RETURN;
+  END IF;
+  INSERT INTO world_tenant_invoice_sketches AS s (tenant_id, metric, bucket, count, total)
+  VALUES (p_tenant_id, p_metric, ml_sketch_bucket(p_value), p_sign, p_sign * p_value)
+  ON CONFLICT (tenant_id, metric, bucket) DO UPDATE SET
+    count = s.count + EXCLUDED.count,
+    total = s.total + EXCLUDED.total;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sketch_world_invoice_stats()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  old_amount DOUBLE PRECISION;
+  new_amount DOUBLE PRECISION;
+  old_dtp DOUBLE PRECISION;
+  new_dtp DOUBLE PRECISION;
+  same_tenant BOOLEAN := TG_OP = 'UPDATE' AND OLD.tenant_id = NEW.tenant_id;
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    old_amount := ml_sketch_invoice_amount(OLD);
+    old_dtp := ml_sketch_invoice_days_to_pay(OLD);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    new_amount := ml_sketch_invoice_amount(NEW);
+    new_dtp := ml_sketch_invoice_days_to_pay(NEW);
+  END IF;
+
+  -- Most invoice updates (status, estimates) leave both values alone.
+  IF NOT (same_tenant AND old_amount IS NOT DISTINCT FROM new_amount) THEN
+    IF TG_OP <> 'INSERT' THEN
+      PERFORM ml_sketch_add(OLD.tenant_id, 'amount_cents', old_amount, -1);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+      PERFORM ml_sketch_add(NEW.tenant_id, 'amount_cents', new_amount, 1);
+    END IF;
+  END IF;
+  IF NOT (same_tenant AND old_dtp IS NOT DISTINCT FROM new_dtp) THEN
+    IF TG_OP <> 'INSERT' THEN
+      PERFORM ml_sketch_add(OLD.tenant_id, 'days_to_pay', old_dtp, -1);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+      PERFORM ml_sketch_add(NEW.tenant_id, 'days_to_pay', new_dtp, 1);
+    END IF;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+-- Created before the backfill so concurrent writers wait for this migration
+-- to commit and are then counted by the trigger (see Locking above for how
+-- long that is).
+DROP TRIGGER IF EXISTS trg_world_invoice_sketches ON world_objects;
+CREATE TRIGGER trg_world_invoice_sketches
+  AFTER INSERT OR UPDATE OR DELETE ON world_objects
+  FOR EACH ROW EXECUTE FUNCTION sketch_world_invoice_stats();
+
+INSERT INTO world_tenant_invoice_sketches (tenant_id, metric, bucket, count, total)
+SELECT tenant_id, metric, ml_sketch_bucket(value), COUNT(*), SUM(value)
+FROM (
+  SELECT o.tenant_id, 'amount_cents' AS metric, ml_sketch_invoice_amount(o) AS value
+  FROM world_objects o
+  WHERE o.type = 'invoice'
+  UNION ALL
+  SELECT o.tenant_id, 'days_to_pay' AS metric, ml_sketch_invoice_days_to_pay(o) AS value
+  FROM world_objects o
+  WHERE o.type = 'invoice'
+) v
+WHERE value IS NOT NULL
+GROUP BY tenant_id, metric, ml_sketch_bucket(value)
+ON CONFLICT (tenant_id, metric, bucket) DO NOTHING;
@@ -0,0 +1,57 @@
+-- 099: NOTIFY on customer reliability changes
+-- The ML sidecar ranks a customer's paymentReliability among the tenant's
+-- parties (the customerReliabilityPercentile feature). It used to run
+-- PERCENT_RANK() over every party of the tenant per prediction; it now keeps
+-- a sorted in-memory index per tenant and LISTENs on
+-- 'world_party_reliability_changed' to apply each change in place.
+-- The payload carries the party's new reliability, or null once it no longer
+-- counts (tombstoned, superseded or deleted).
+
+CREATE OR REPLACE FUNCTION ml_party_reliability(obj world_objects)
+RETURNS DOUBLE PRECISION
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT CASE
+    WHEN obj.type = 'party' AND NOT obj.tombstone AND obj.valid_to IS NULL
+      THEN COALESCE(ml_sketch_try_float(obj.estimated->>'paymentReliability'), 0.5)
+  END
+$$;
+
+CREATE OR REPLACE FUNCTION notify_world_party_reliability_changed()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  old_value DOUBLE PRECISION;
+  new_value DOUBLE PRECISION;
+  party world_objects;
+BEGIN
+  IF TG_OP <> 'INSERT' THEN
+    old_value := ml_party_reliability(OLD);
+  END IF;
+  IF TG_OP <> 'DELETE' THEN
+    new_value := ml_party_reliability(NEW);
+  END IF;
+  IF old_value IS NOT DISTINCT FROM new_value THEN
+    RETURN NULL;
+  END IF;
+
+  IF TG_OP = 'DELETE' THEN
+    party := OLD;
+  ELSE
+    party := NEW;
+  END IF;
+  PERFORM pg_notify('world_party_reliability_changed', json_build_object(
+    'tenant_id', party.tenant_id,
+    'party_id', party.id,
+    'reliability', new_value
+  )::text);
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_world_party_reliability_changed ON world_objects;
+CREATE TRIGGER trg_world_party_reliability_changed
+  AFTER INSERT OR UPDATE OR DELETE ON world_objects
+  FOR EACH ROW EXECUTE FUNCTION notify_world_party_reliability_changed();